@@ -0,0 +1,86 @@
+from __future__ import division, absolute_import, print_function
+"""Fake data for the benchmarks.
+
+The benchmarks make their images with this module, rather than with PyGuide.FakeData,
+so that the data does not depend on the version of PyGuide being timed:
+every version times the same images, and the benchmarks run against any version of PyGuide
+(including versions that predate functions added to FakeData).
+
+The star image is the double gaussian of PyGuide.FakeData.fakeStar and the noise
+is that of PyGuide.FakeData.addNoise (both as of PyGuide 2.3.0).
+
+History:
+2026-10-18          First version.
+                    Added addNoise.
+"""
+__all__ = ["fakeStar", "fakeStarField", "addNoise"]
+
+import numpy
+
+_MaxValUInt16 = 2**16 - 1
+
+# x,y position of the center of pixel i,j is (j + PosMinusIndex, i + PosMinusIndex); see PyGuide.Constants
+_PosMinusIndex = 0.5
+
+def fakeStar(arrShape, xyCtr, sigma, ampl):
+    """Return a 2-d uint16 array containing a noise-free double gaussian truncated at 2**16-1
+
+    Inputs:
+    - arrShape  desired array shape (2 integers)
+    - xyCtr     desired x,y center
+    - sigma     desired sigma (float)
+    - ampl      desired amplitude (float)
+    """
+    sigma = float(sigma)
+    ampl = float(ampl)
+    ijCtr = [float(xyCtr[ii] - _PosMinusIndex) for ii in (1, 0)]
+
+    def peakFunc(i, j):
+        radSq = (i - ijCtr[0])**2 + (j - ijCtr[1])**2
+        expArg = - radSq / (2.0 * sigma**2)
+        gauss = ampl * (numpy.exp(expArg)  + 0.1*numpy.exp(0.25*expArg))
+        gauss = numpy.where(gauss <= _MaxValUInt16, gauss, _MaxValUInt16)
+        return gauss.astype(numpy.uint16)
+    return numpy.fromfunction(peakFunc, arrShape)
+
+def fakeStarField(imShape, xyCtrs, sigma, ampl):
+    """Return a noise-free float64 image of stars
+
+    Inputs:
+    - imShape   image shape (i,j)
+    - xyCtrs    x,y center of each star
+    - sigma     sigma of each star (float)
+    - ampl      amplitude of each star (float)
+
+    Each star is computed (with fakeStar) only over the region of the image it affects,
+    a box of half-width 20 sigma.
+    """
+    cleanData = numpy.zeros(imShape, dtype=numpy.float64)
+    halfWidth = int(20 * sigma) + 1
+    for xyCtr in xyCtrs:
+        ijCtr = [int(round(xyCtr[ii] - _PosMinusIndex)) for ii in (1, 0)]
+        ijBeg = [max(ijCtr[ii] - halfWidth, 0) for ii in (0, 1)]
+        ijEnd = [min(ijCtr[ii] + halfWidth, imShape[ii]) for ii in (0, 1)]
+        stampShape = (ijEnd[0] - ijBeg[0], ijEnd[1] - ijBeg[1])
+        stampXYCtr = (xyCtr[0] - ijBeg[1], xyCtr[1] - ijBeg[0])
+        cleanData[ijBeg[0]:ijEnd[0], ijBeg[1]:ijEnd[1]] += fakeStar(stampShape, stampXYCtr, sigma, ampl)
+    return cleanData
+
+def addNoise(data, sky, ccdInfo, seed):
+    """Return data with sky, poisson noise, bias and gaussian read noise added, as a float32 array
+
+    Inputs:
+    - data      noiseless image, in ADU
+    - sky       sky level, in ADU
+    - ccdInfo   a PyGuide.CCDInfo object (only bias, readNoise and ccdGain are used)
+    - seed      random number seed
+
+    Values are truncated to the range of uint16 and rounded down to integers (as by a real camera).
+    """
+    randState = numpy.random.RandomState(seed)
+    outData = numpy.add(data, sky).astype(int)
+    outData = randState.poisson(lam = outData * ccdInfo.ccdGain) / ccdInfo.ccdGain
+    outData += randState.normal(loc = ccdInfo.bias, scale = ccdInfo.readNoise/float(ccdInfo.ccdGain), size = data.shape)
+    outData = numpy.where(outData >= 0, outData, 0)
+    outData = numpy.where(outData <= _MaxValUInt16, outData, _MaxValUInt16)
+    return outData.astype(numpy.uint16).astype(numpy.float32)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Measure the time to import PyGuide and to first use its main routines.
+
+Each case is run in a new Python process (so nothing is already imported), repeat times;
+the process times the case's code and reports which slow-to-import packages
+(scipy, numpy.ma) it loaded. The time to import numpy is measured as a baseline,
+since PyGuide cannot be imported any faster than that.
+
+Example:
+    ./benchImport.py -o import.json
+
+History:
+2026-10-18          First version.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy
+
+from runBenchmarks import getMetadata
+
+# name: code to time
+Cases = (
+    ("numpy", "import numpy"),
+    ("import", "import PyGuide"),
+    ("centroid", "import PyGuide; PyGuide.centroid"),
+    ("findStars", "import PyGuide; PyGuide.findStars"),
+    ("all", "import PyGuide; [getattr(PyGuide, name) for name in dir(PyGuide)]"),
+)
+CaseNames = [case[0] for case in Cases]
+
+# packages that are slow to import; report whether each case imports them
+WatchModules = ("scipy", "numpy.ma")
+
+_ChildCode = """
+import json, sys, time
+_timer = getattr(time, "perf_counter", time.time)
+begTime = _timer()
+exec(%r)
+dTime = _timer() - begTime
+print(json.dumps(dict(time=dTime, imported=[name for name in %r if name in sys.modules])))
+"""
+
+def timeCase(code, repeat=10):
+    """Time code in repeat new processes and return a result dict
+
+    Returns a dict containing:
+    - times     time for each repetition (sec)
+    - imported  modules in WatchModules that the code imported
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(path for path in [os.getcwd()] + sys.path if path)
+    timeList = []
+    imported = None
+    for ind in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", _ChildCode % (code, WatchModules)], env=env)
+        childResult = json.loads(output.decode("ascii").strip().splitlines()[-1])
+        timeList.append(childResult["time"])
+        imported = childResult["imported"]
+    return dict(times=timeList, imported=imported)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the time to import PyGuide.")
+    parser.add_argument("-o", "--output", help="output JSON file; if omitted, only print a summary")
+    parser.add_argument("-r", "--repeat", type=int, default=10, help="number of processes per case")
+    parser.add_argument("-c", "--case", nargs="+", choices=CaseNames, default=CaseNames, help="cases to run")
+    args = parser.parse_args(argv)
+
+    resultList = []
+    for name, code in Cases:
+        if name not in args.case:
+            continue
+        result = timeCase(code, repeat=args.repeat)
+        result.update(name=name, code=code)
+        resultList.append(result)
+        print("%-10s median=%7.1f ms  min=%7.1f ms  imports %s" % (name,
+            numpy.median(result["times"]) * 1000, min(result["times"]) * 1000,
+            ", ".join(result["imported"]) or "none of " + ", ".join(WatchModules)))
+
+    if args.output:
+        with open(args.output, "w") as outFile:
+            json.dump(dict(meta=getMetadata(), results=resultList), outFile, indent=1, sort_keys=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
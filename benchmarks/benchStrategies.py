@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Compare the cost of the centroid search strategies (the strategy argument of PyGuide.centroid).
+
+For each strategy, radius, mask fraction and initial offset, centroid a star at the center
+of a fake image (made as in runBenchmarks.py, but with a brighter, wider star,
+so that the search usually finds it) from initial guesses that many pixels away
+(in NumAngles directions) and report the mean number of asymmetry evaluations (nEval),
+walk iterations (nIter) and time per centroid, the number of evaluations relative to
+the default "grid" strategy, and the fraction of centroids that found the star
+(to within 0.5 pixels).
+
+Example:
+    ./benchStrategies.py -o strategies.json
+
+History:
+2026-10-18          First version.
+                    Make the image with benchData.fakeStarField and benchData.addNoise, as runBenchmarks.py does.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy
+import PyGuide
+from PyGuide import Centroid
+
+import benchData
+from runBenchmarks import CCDInfo, Seed, Sky, getMetadata
+
+_timer = getattr(time, "perf_counter", time.time)
+
+ImSize = 256
+FWHM = 6.0      # star FWHM, in pixels
+Ampl = 20000    # peak star amplitude, in ADU
+RadList = (10, 20, 40)
+OffsetList = (0, 2, 4, 8, 12)
+NumAngles = 12
+MaskFracList = (0.0, 0.1)
+
+def makeField(maskFrac):
+    """Return (data, mask, xyStar) for a fake image with one star at the center"""
+    randState = numpy.random.RandomState(Seed)
+    imShape = (ImSize, ImSize)
+    xyStar = numpy.array((ImSize / 2.0, ImSize / 2.0))
+    cleanData = benchData.fakeStarField(imShape, [xyStar], FWHM / PyGuide.FWHMPerSigma, Ampl)
+    data = benchData.addNoise(cleanData, sky=Sky, ccdInfo=CCDInfo, seed=Seed)
+    mask = randState.uniform(size=imShape) < maskFrac if maskFrac > 0 else None
+    return data, mask, xyStar
+
+def runStrategies(strategyList=Centroid.Strategies, radList=RadList, offsetList=OffsetList,
+    maskFracList=MaskFracList, log=None):
+    """Centroid with each strategy and return a list of result dicts (one per case)
+
+    Inputs:
+    - strategyList  search strategies to test
+    - radList       centroid radii (pixels)
+    - offsetList    distances of the initial guess from the star (pixels)
+    - maskFracList  fractions of pixels masked
+    - log           a file to which to write progress (e.g. sys.stderr); None for silence
+    """
+    resultList = []
+    for maskFrac in maskFracList:
+        data, mask, xyStar = makeField(maskFrac)
+        for rad in radList:
+            for offset in offsetList:
+                angles = numpy.arange(NumAngles) * (2 * math.pi / NumAngles)
+                xyGuessList = [xyStar + offset * numpy.array((math.cos(ang), math.sin(ang))) for ang in angles]
+                gridNEval = None
+                for strategy in strategyList:
+                    stats = Centroid.CentroidStats(nCentroids=0)
+                    nFound = 0
+                    begTime = _timer()
+                    for xyGuess in xyGuessList:
+                        ctrData = Centroid.basicCentroid(data, mask, None, xyGuess, rad, CCDInfo,
+                            doStats=True, strategy=strategy)
+                        stats += ctrData.stats
+                        if ctrData.isOK and numpy.hypot(*(numpy.subtract(ctrData.xyCtr, xyStar))) < 0.5:
+                            nFound += 1
+                    dTime = _timer() - begTime
+                    meanNEval = stats.nEval / len(xyGuessList)
+                    if strategy == "grid":
+                        gridNEval = meanNEval
+                    result = dict(
+                        params = dict(strategy=strategy, rad=rad, offset=offset, maskFrac=maskFrac),
+                        nEval = meanNEval,
+                        nIter = stats.nIter / len(xyGuessList),
+                        nPixRead = stats.nPixRead / len(xyGuessList),
+                        fracFound = nFound / len(xyGuessList),
+                        time = dTime / len(xyGuessList),
+                        nEvalRatio = meanNEval / gridNEval if gridNEval else None,
+                    )
+                    resultList.append(result)
+                    if log is not None:
+                        log.write("%s\n" % (formatResult(result),))
+                        log.flush()
+    return resultList
+
+def formatResult(result):
+    """Format one result as a line of text"""
+    params = result["params"]
+    ratioStr = "%6.2f" % (result["nEvalRatio"],) if result["nEvalRatio"] is not None else "     -"
+    return "%-6s rad=%-3s offset=%-3s maskFrac=%-4s nEval=%6.1f (%s x grid) nIter=%5.1f found=%4.2f time=%7.3f ms" % \
+        (params["strategy"], params["rad"], params["offset"], params["maskFrac"],
+        result["nEval"], ratioStr, result["nIter"], result["fracFound"], result["time"] * 1000)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the cost of PyGuide centroid search strategies.")
+    parser.add_argument("-o", "--output", help="output JSON file; if omitted, only print a summary")
+    parser.add_argument("-s", "--strategy", nargs="+", choices=Centroid.Strategies, default=list(Centroid.Strategies),
+        help="strategies to test; default: all (include grid to get nEval ratios)")
+    args = parser.parse_args(argv)
+
+    resultList = runStrategies(strategyList=args.strategy, log=sys.stdout)
+
+    print()
+    for strategy in args.strategy:
+        stratResults = [result for result in resultList if result["params"]["strategy"] == strategy]
+        print("%-6s mean nEval=%6.1f  mean found=%4.2f  mean time=%7.3f ms" % (strategy,
+            numpy.mean([result["nEval"] for result in stratResults]),
+            numpy.mean([result["fracFound"] for result in stratResults]),
+            numpy.mean([result["time"] for result in stratResults]) * 1000))
+
+    if args.output:
+        with open(args.output, "w") as outFile:
+            json.dump(dict(meta=getMetadata(), results=resultList), outFile, indent=1, sort_keys=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
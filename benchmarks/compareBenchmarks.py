@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Compare two sets of PyGuide benchmark results (JSON files written by runBenchmarks.py).
+
+For each case (benchmark and parameters) in both files, print the old and new time per call
+and the ratio new/old. Cases whose ratio exceeds 1 + threshold are flagged as regressions
+(and those below 1 - threshold as improvements). Cases in only one file are listed at the end.
+
+Exit status is 1 if there are any regressions, else 0, so this can be used in scripts.
+
+Benchmark timings are noisy: compare runs made on the same (otherwise idle) machine
+and use "best" (the default statistic) unless you have a reason not to.
+
+Example:
+    ./compareBenchmarks.py before.json after.json --threshold 0.1
+
+History:
+2026-10-18          First version.
+"""
+import argparse
+import json
+import sys
+
+def loadResults(filePath):
+    """Load a benchmark results file; return (meta dict, dict of case key: result dict)"""
+    with open(filePath, "r") as inFile:
+        resultDict = json.load(inFile)
+    caseDict = dict((caseKey(result), result) for result in resultDict["results"])
+    return resultDict.get("meta", {}), caseDict
+
+def caseKey(result):
+    """Return a hashable key identifying the case (benchmark and parameters) of a result"""
+    return (result["benchmark"],) + tuple(sorted(result["params"].items()))
+
+def formatCase(key):
+    """Format a case key as a short string"""
+    return "%-17s %s" % (key[0], " ".join("%s=%s" % item for item in key[1:]))
+
+def compareResults(oldCases, newCases, stat="best", threshold=0.1):
+    """Compare benchmark results
+
+    Inputs:
+    - oldCases  dict of case key: result, as returned by loadResults
+    - newCases  dict of case key: result, as returned by loadResults
+    - stat      statistic to compare: "best" or "median"
+    - threshold fractional change in time that counts as a regression or improvement
+
+    Returns a list of (key, oldTime, newTime, ratio, flag) for cases in both,
+    in the order of the new results, where flag is "SLOWER", "faster" or "".
+    """
+    compList = []
+    for key, newResult in newCases.items():
+        oldResult = oldCases.get(key)
+        if oldResult is None:
+            continue
+        oldTime = oldResult[stat]
+        newTime = newResult[stat]
+        ratio = newTime / oldTime if oldTime > 0 else float("inf")
+        if ratio > 1 + threshold:
+            flag = "SLOWER"
+        elif ratio < 1 - threshold:
+            flag = "faster"
+        else:
+            flag = ""
+        compList.append((key, oldTime, newTime, ratio, flag))
+    return compList
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two PyGuide benchmark result files.")
+    parser.add_argument("oldPath", help="results of the baseline (old) version")
+    parser.add_argument("newPath", help="results of the version being tested (new)")
+    parser.add_argument("--stat", choices=("best", "median"), default="best",
+        help="statistic to compare; default: %(default)s")
+    parser.add_argument("--threshold", type=float, default=0.1,
+        help="fractional change that counts as a regression or improvement; default: %(default)s")
+    parser.add_argument("--changed", action="store_true", help="only show cases that changed by more than threshold")
+    args = parser.parse_args(argv)
+
+    oldMeta, oldCases = loadResults(args.oldPath)
+    newMeta, newCases = loadResults(args.newPath)
+    for name, meta in (("old", oldMeta), ("new", newMeta)):
+        print("%s: PyGuide %s; Python %s; numpy %s; %s; %s" % (name, meta.get("pyGuideVersion"),
+            meta.get("pythonVersion"), meta.get("numpyVersion"), meta.get("platform"), meta.get("date")))
+    print()
+
+    compList = compareResults(oldCases, newCases, stat=args.stat, threshold=args.threshold)
+    compList.sort(key=lambda item: item[0])
+    print("%-70s %11s %11s %7s" % ("case", "old (ms)", "new (ms)", "new/old"))
+    nSlower = nFaster = 0
+    for key, oldTime, newTime, ratio, flag in compList:
+        if flag == "SLOWER":
+            nSlower += 1
+        elif flag == "faster":
+            nFaster += 1
+        elif args.changed:
+            continue
+        print("%-70s %11.4f %11.4f %7.3f %s" % (formatCase(key), oldTime * 1000, newTime * 1000, ratio, flag))
+
+    for name, caseDict, otherDict in (("old", oldCases, newCases), ("new", newCases, oldCases)):
+        missingKeys = sorted(key for key in caseDict if key not in otherDict)
+        if missingKeys:
+            print("\nCases only in %s results:" % (name,))
+            for key in missingKeys:
+                print("  %s" % (formatCase(key),))
+
+    print("\n%s cases compared: %s slower, %s faster (threshold %s; statistic %s)" % \
+        (len(compList), nSlower, nFaster, args.threshold, args.stat))
+    return 1 if nSlower else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
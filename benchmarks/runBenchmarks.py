@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Run the PyGuide benchmark suite and write the results as JSON.
+
+Benchmarks (each is timed over a matrix of the parameters listed):
+- radProf           radProf.radProf at the center of the image: rad, maskFrac, nThreads
+- radAsymmWeighted  radProf.radAsymmWeighted at the center of the image: rad, maskFrac, nThreads
+- centroid          PyGuide.centroid of one star, starting 2 pixels off: rad, maskFrac, nThreads
+- findStars         PyGuide.findStars: imSize, nStars, maskFrac, nThreads
+- skyStats          ImUtil.skyStats of the whole image: imSize, maskFrac, nThreads
+- starShape         PyGuide.starShape of one star: rad, maskFrac, nThreads
+Parameters not listed for a benchmark are held at their default value (see DefaultParams).
+
+Parameters:
+- imSize    width and height of the image (pixels)
+- rad       radius of centroid, radial profile or star shape (pixels)
+- nStars    number of stars in the image
+- maskFrac  fraction of pixels masked (chosen at random)
+- nThreads  number of threads simultaneously calling the routine;
+            time per call is wall time divided by the total number of calls,
+            so it only drops with more threads if the routine releases the GIL
+
+Images are made with benchData (not PyGuide.FakeData) from a fixed random seed,
+so every run (and every version of PyGuide) times the same data.
+
+Each case is timed "repeat" times; each repetition runs enough calls
+to take at least --mintime seconds. Results include the time per call
+for each repetition and the best (minimum) and median of these.
+
+To compare two runs (e.g. before and after a change) use compareBenchmarks.py.
+
+Examples:
+    ./runBenchmarks.py -o results.json
+    ./runBenchmarks.py --quick -b centroid findStars -o results.json
+
+History:
+2026-10-18          First version; replaces tests/timeCentroid.py as the way to time PyGuide.
+                    Make images with benchData.fakeStarField and benchData.addNoise, so the data does not depend
+                    on the version of PyGuide (and older versions can still be benchmarked).
+"""
+import argparse
+import datetime
+import json
+import platform
+import sys
+import threading
+import time
+
+import numpy
+import PyGuide
+from PyGuide import ImUtil
+from PyGuide import radProf
+
+import benchData
+
+_timer = getattr(time, "perf_counter", time.time)
+
+# version of the output format; increment if it changes incompatibly
+FormatVersion = 1
+
+# fake data settings
+Sky = 1000      # sky level, in ADU
+CCDInfo = PyGuide.CCDInfo(
+    bias = 2176,    # image bias, in ADU
+    readNoise = 19, # read noise, in e-
+    ccdGain = 2.1,  # inverse ccd gain, in e-/ADU
+)
+FWHM = 2.5      # star FWHM, in pixels
+Ampl = 5000     # peak star amplitude, in ADU
+Seed = 1        # random number seed for fake data
+
+DefaultParams = dict(
+    imSize = 512,
+    rad = 10,
+    nStars = 10,
+    maskFrac = 0.0,
+    nThreads = 1,
+)
+
+FullMatrix = dict(
+    imSize = (256, 512, 1024, 2048),
+    rad = (5, 10, 20, 40, 80),
+    nStars = (1, 10, 50),
+    maskFrac = (0.0, 0.1),
+    nThreads = (1, 2, 4),
+)
+
+QuickMatrix = dict(
+    imSize = (256, 1024),
+    rad = (10, 40),
+    nStars = (10,),
+    maskFrac = (0.0, 0.1),
+    nThreads = (1, 2),
+)
+
+class FakeField(object):
+    """A deterministic fake image with stars
+
+    Attributes:
+    - data      image data (numpy.float32)
+    - mask      mask (bool), or None if maskFrac = 0
+    - xyCtrs    star centers; the first star is at the center of the image
+    """
+    def __init__(self, imSize, nStars, maskFrac):
+        randState = numpy.random.RandomState(Seed)
+        imShape = (imSize, imSize)
+        sigma = FWHM / PyGuide.FWHMPerSigma
+        margin = min(20, imSize // 4)
+        xyCtrs = [(imSize / 2.0, imSize / 2.0)]
+        xyCtrs += [tuple(xy) for xy in randState.uniform(margin, imSize - margin, size=(nStars - 1, 2))]
+
+        cleanData = benchData.fakeStarField(imShape, xyCtrs, sigma, Ampl)
+        self.data = benchData.addNoise(cleanData, sky=Sky, ccdInfo=CCDInfo, seed=Seed)
+        if maskFrac > 0:
+            self.mask = randState.uniform(size=imShape) < maskFrac
+        else:
+            self.mask = None
+        self.xyCtrs = xyCtrs
+
+_FieldCache = {}
+
+def getField(imSize, nStars, maskFrac):
+    """Return a FakeField, creating it if it is not cached"""
+    key = (imSize, nStars, maskFrac)
+    field = _FieldCache.get(key)
+    if field is None:
+        field = _FieldCache[key] = FakeField(imSize, nStars, maskFrac)
+    return field
+
+# Benchmark setup functions: each takes a dict of parameters
+# and returns a function (of no arguments) to time
+
+def setupRadProf(params):
+    field = getField(params["imSize"], 1, params["maskFrac"])
+    rad = params["rad"]
+    ijCtr = ImUtil.ijIndFromXYPos(field.xyCtrs[0])
+    mean = numpy.zeros([rad + 2], numpy.float64)
+    var = numpy.zeros([rad + 2], numpy.float64)
+    nPts = numpy.zeros([rad + 2], numpy.int32)
+    def func():
+        radProf.radProf(field.data, field.mask, ijCtr, rad, mean, var, nPts)
+    return func
+
+def setupRadAsymmWeighted(params):
+    field = getField(params["imSize"], 1, params["maskFrac"])
+    rad = params["rad"]
+    ijCtr = ImUtil.ijIndFromXYPos(field.xyCtrs[0])
+    def func():
+        radProf.radAsymmWeighted(field.data, field.mask, ijCtr, rad,
+            CCDInfo.readNoise, CCDInfo.ccdGain, CCDInfo.bias)
+    return func
+
+def setupCentroid(params):
+    field = getField(params["imSize"], 1, params["maskFrac"])
+    rad = params["rad"]
+    xyGuess = numpy.add(field.xyCtrs[0], (2, -2))
+    def func():
+        ctrData = PyGuide.centroid(field.data, field.mask, None, xyGuess, rad, CCDInfo)
+        if not ctrData.isOK:
+            raise RuntimeError("centroid failed: %s" % (ctrData.msgStr,))
+    return func
+
+def setupFindStars(params):
+    field = getField(params["imSize"], params["nStars"], params["maskFrac"])
+    def func():
+        PyGuide.findStars(field.data, field.mask, None, CCDInfo)
+    return func
+
+def setupSkyStats(params):
+    field = getField(params["imSize"], params["nStars"], params["maskFrac"])
+    if field.mask is None:
+        dataArr = field.data
+    else:
+        dataArr = numpy.ma.array(field.data, mask=field.mask)
+    def func():
+        ImUtil.skyStats(dataArr)
+    return func
+
+def setupStarShape(params):
+    field = getField(params["imSize"], 1, params["maskFrac"])
+    rad = params["rad"]
+    xyCtr = field.xyCtrs[0]
+    def func():
+        shapeData = PyGuide.starShape(field.data, field.mask, xyCtr, rad)
+        if not shapeData.isOK:
+            raise RuntimeError("starShape failed: %s" % (shapeData.msgStr,))
+    return func
+
+# benchmark name: (setup function, names of parameters to vary)
+Benchmarks = (
+    ("radProf", setupRadProf, ("rad", "maskFrac", "nThreads")),
+    ("radAsymmWeighted", setupRadAsymmWeighted, ("rad", "maskFrac", "nThreads")),
+    ("centroid", setupCentroid, ("rad", "maskFrac", "nThreads")),
+    ("findStars", setupFindStars, ("imSize", "nStars", "maskFrac", "nThreads")),
+    ("skyStats", setupSkyStats, ("imSize", "maskFrac", "nThreads")),
+    ("starShape", setupStarShape, ("rad", "maskFrac", "nThreads")),
+)
+BenchmarkNames = [item[0] for item in Benchmarks]
+
+def iterParams(paramNames, matrix):
+    """Return an iterator over parameter dicts: every combination of matrix values for paramNames,
+    with other parameters at their default values
+    """
+    paramList = [dict(DefaultParams)]
+    for paramName in paramNames:
+        paramList = [dict(params, **{paramName: val}) for params in paramList for val in matrix[paramName]]
+    for params in paramList:
+        # the image must be big enough for the radius
+        if params["imSize"] < 4 * params["rad"]:
+            params["imSize"] = 4 * params["rad"]
+        yield params
+
+def timeCalls(func, number, nThreads):
+    """Call func number times in each of nThreads threads and return the wall time (sec)"""
+    if nThreads == 1:
+        begTime = _timer()
+        for i in range(number):
+            func()
+        return _timer() - begTime
+
+    errList = []
+    startEvent = threading.Event()
+    def runCalls():
+        startEvent.wait()
+        try:
+            for i in range(number):
+                func()
+        except Exception as e:
+            errList.append(e)
+    threadList = [threading.Thread(target=runCalls) for i in range(nThreads)]
+    for thread in threadList:
+        thread.start()
+    begTime = _timer()
+    startEvent.set()
+    for thread in threadList:
+        thread.join()
+    dTime = _timer() - begTime
+    if errList:
+        raise errList[0]
+    return dTime
+
+def timeFunc(func, nThreads, repeat, minTime):
+    """Time func; return (number, timeList), where timeList contains the time per call (sec)
+    for each repetition and number is the number of calls per thread per repetition
+    """
+    func() # warm up and check for errors
+    number = 1
+    while True:
+        dTime = timeCalls(func, number, nThreads)
+        if dTime >= minTime:
+            break
+        number = max(number * 2, int(number * minTime * 1.2 / max(dTime, 1.0e-9)))
+    timeList = [dTime / (number * nThreads)]
+    for i in range(repeat - 1):
+        timeList.append(timeCalls(func, number, nThreads) / (number * nThreads))
+    return number, timeList
+
+def getMetadata():
+    """Return information about the environment in which the benchmarks are run"""
+    try:
+        import multiprocessing
+        cpuCount = multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        cpuCount = None
+    return dict(
+        pyGuideVersion = PyGuide.__version__,
+        pythonVersion = platform.python_version(),
+        numpyVersion = numpy.__version__,
+        platform = platform.platform(),
+        machine = platform.machine(),
+        processor = platform.processor(),
+        cpuCount = cpuCount,
+        date = datetime.datetime.now().isoformat(),
+    )
+
+def runBenchmarks(benchNames=None, matrix=FullMatrix, repeat=5, minTime=0.1, log=None):
+    """Run benchmarks and return the results as a dict suitable for saving as JSON
+
+    Inputs:
+    - benchNames    names of benchmarks to run; None for all
+    - matrix        dict of parameter name: values to use for that parameter
+    - repeat        number of times to time each case
+    - minTime       minimum time for each repetition (sec)
+    - log           a file to which to write progress (e.g. sys.stderr); None for silence
+    """
+    resultList = []
+    for benchName, setupFunc, paramNames in Benchmarks:
+        if benchNames and benchName not in benchNames:
+            continue
+        for params in iterParams(paramNames, matrix):
+            func = setupFunc(params)
+            number, timeList = timeFunc(func, nThreads=params["nThreads"], repeat=repeat, minTime=minTime)
+            result = dict(
+                benchmark = benchName,
+                params = params,
+                number = number,
+                times = timeList,
+                best = min(timeList),
+                median = float(numpy.median(timeList)),
+            )
+            resultList.append(result)
+            if log is not None:
+                log.write("%s\n" % (formatResult(result),))
+                log.flush()
+    return dict(
+        formatVersion = FormatVersion,
+        meta = getMetadata(),
+        settings = dict(matrix=matrix, repeat=repeat, minTime=minTime, seed=Seed),
+        results = resultList,
+    )
+
+def formatParams(params):
+    """Format a parameter dict as a short string"""
+    return " ".join("%s=%s" % (name, params[name]) for name in sorted(params))
+
+def formatResult(result):
+    """Format one benchmark result as a line of text"""
+    return "%-17s %-55s best=%10.4f ms  median=%10.4f ms" % \
+        (result["benchmark"], formatParams(result["params"]), result["best"] * 1000, result["median"] * 1000)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run PyGuide benchmarks and write the results as JSON.")
+    parser.add_argument("-o", "--output", help="output JSON file; if omitted, write to stdout")
+    parser.add_argument("-b", "--benchmark", nargs="+", choices=BenchmarkNames,
+        help="benchmarks to run; default: all")
+    parser.add_argument("--quick", action="store_true", help="use a smaller parameter matrix")
+    parser.add_argument("--repeat", type=int, default=5, help="number of repetitions per case; default: %(default)s")
+    parser.add_argument("--mintime", type=float, default=0.1,
+        help="minimum time per repetition (sec); default: %(default)s")
+    args = parser.parse_args(argv)
+
+    matrix = QuickMatrix if args.quick else FullMatrix
+    resultDict = runBenchmarks(benchNames=args.benchmark, matrix=matrix,
+        repeat=args.repeat, minTime=args.mintime, log=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as outFile:
+            json.dump(resultDict, outFile, indent=1, sort_keys=True)
+    else:
+        json.dump(resultDict, sys.stdout, indent=1, sort_keys=True)
+        sys.stdout.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+from __future__ import division, absolute_import, print_function
+"""Calibrate raw images: bias (or bias + dark) frame, flat field and bad pixel mask.
+
+A Calibration holds the calibration data for one camera configuration
+(bias or dark frame, flat field, bad pixel mask and noise model). Its apply method
+calibrates a raw image in a single pass in C, producing the calibrated float32 data
+and the combined mask in exactly the form that centroid, findStars and starShape want,
+so those routines use them without further copying:
+
+    calib = PyGuide.Calibration(ccdInfo, biasFrame=bias, flat=flat, badPixMask=badPix)
+    calData, calMask, satMask = calib.apply(rawData, mask)
+    PyGuide.findStars(calData, calMask, satMask, calib.ccdInfo)
+
+The calibration arrays are converted, and the flat field inverted, once, when the
+Calibration is constructed; apply may also reuse output arrays from an earlier call.
+To share Calibrations among frames from several cameras, use a CalibrationCache,
+keyed by camera configuration (e.g. camera name, binning and window).
+
+History:
+2026-10-18          First version.
+"""
+__all__ = ["Calibration", "CalibrationCache"]
+
+import collections
+import threading
+
+import numpy
+
+from .Constants import CCDInfo
+from . import radProf
+from . import Timing
+
+class Calibration(object):
+    """Calibration data for one camera configuration
+
+    Inputs:
+    - ccdInfo       bias, read noise, etc. of the raw data: a PyGuide.CCDInfo object.
+                    ccdInfo.bias is subtracted from the data (in addition to biasFrame, if any),
+                    so if biasFrame includes the bias then ccdInfo.bias should be 0.
+                    ccdInfo.satLevel is used to make the saturated pixel mask;
+                    if None then no pixels are saturated.
+    - biasFrame     bias (or bias + dark) frame to subtract (ADU); None if none
+    - flat          flat field (normalized to a mean of approximately 1); None if none.
+                    Pixels whose flat field value is not finite or is <= 0 are treated as bad.
+    - badPixMask    bad pixel mask; True for bad pixels; None if none
+
+    All arrays must be 2-dimensional and have the same shape, else raises ValueError.
+
+    Attributes: the inputs (as converted), plus:
+    - shape         the image shape
+    - scale         the scale factor 1/flat (float32); None if no flat
+    - ccdInfo       a CCDInfo suitable for the calibrated data: bias = 0,
+                    the same read noise and gain, and satLevel = None
+                    (saturation is detected in the raw data by apply).
+                    The flat field changes the noise of each pixel slightly; this is ignored.
+    - rawCCDInfo    the ccdInfo argument
+    """
+    def __init__(self,
+        ccdInfo,
+        biasFrame = None,
+        flat = None,
+        badPixMask = None,
+    ):
+        shape = None
+        for name, arr in (("biasFrame", biasFrame), ("flat", flat), ("badPixMask", badPixMask)):
+            if arr is None:
+                continue
+            if numpy.ndim(arr) != 2:
+                raise ValueError("%s must be 2-dimensional" % (name,))
+            if shape is None:
+                shape = numpy.shape(arr)
+            elif numpy.shape(arr) != shape:
+                raise ValueError("%s shape=%s != shape=%s" % (name, numpy.shape(arr), shape))
+        self.shape = shape
+
+        self.rawCCDInfo = ccdInfo
+        self.ccdInfo = CCDInfo(
+            bias = 0.0,
+            readNoise = ccdInfo.readNoise,
+            ccdGain = ccdInfo.ccdGain,
+            satLevel = None,
+        )
+
+        self.biasFrame = None
+        if biasFrame is not None:
+            self.biasFrame = numpy.ascontiguousarray(biasFrame, dtype=numpy.float32)
+
+        if badPixMask is not None:
+            badPixMask = numpy.array(badPixMask, dtype=bool, order="C")
+
+        self.scale = None
+        if flat is not None:
+            flat = numpy.asarray(flat, dtype=numpy.float64)
+            isBad = ~(numpy.isfinite(flat) & (flat > 0))
+            self.scale = numpy.zeros(shape, dtype=numpy.float32)
+            numpy.divide(1.0, flat, out=self.scale, where=~isBad, casting="unsafe")
+            if isBad.any():
+                if badPixMask is None:
+                    badPixMask = isBad
+                else:
+                    badPixMask |= isBad
+        self.badPixMask = badPixMask
+
+    def apply(self, data, mask=None, out=None):
+        """Calibrate a raw image in one pass
+
+        Inputs:
+        - data      raw image data (ADU); a 2-d array whose shape matches the calibration data.
+                    numpy.uint16 and numpy.float32 data are read directly; other types are
+                    first converted to numpy.float32. A FrameIO.Frame is also accepted.
+        - mask      mask for the data; True for values to mask out (ignore); None if none.
+        - out       output arrays to reuse: (calData, calMask, satMask) as returned by
+                    an earlier call; None to allocate new arrays.
+                    Reused arrays are checked and silently replaced if unsuitable.
+
+        Returns:
+        - calData   calibrated data: (data - ccdInfo.bias - biasFrame) / flat,
+                    a C-contiguous float32 array
+        - calMask   mask | badPixMask: a C-contiguous bool array;
+                    None if both mask and badPixMask are None
+        - satMask   saturated pixels (data >= satLevel in the raw data): a C-contiguous bool array;
+                    None if rawCCDInfo.satLevel is None
+
+        Raises ValueError if the shape of data or mask does not match the calibration data.
+        """
+        shape = numpy.shape(data)
+        if len(shape) != 2:
+            raise ValueError("data must be 2-dimensional")
+        if self.shape is not None and shape != self.shape:
+            raise ValueError("data shape=%s != calibration shape=%s" % (shape, self.shape))
+        if mask is not None and numpy.shape(mask) != shape:
+            raise ValueError("mask shape=%s != data shape=%s" % (numpy.shape(mask), shape))
+        if not isinstance(data, numpy.ndarray):
+            data = numpy.asarray(data)
+
+        if out is None:
+            out = (None, None, None)
+        wantMask = mask is not None or self.badPixMask is not None
+        wantSat = self.rawCCDInfo.satLevel is not None
+        calData = _reuseArr(out[0], shape, numpy.float32)
+        calMask = _reuseArr(out[1], shape, bool) if wantMask else None
+        satMask = _reuseArr(out[2], shape, bool) if wantSat else None
+        satLevel = float(self.rawCCDInfo.satLevel) if wantSat else 0.0
+
+        with Timing.stage("calibrate"):
+            radProf.calibrate(data, mask, self.rawCCDInfo.bias, self.biasFrame, self.scale, self.badPixMask,
+                satLevel, calData, calMask, satMask)
+        return calData, calMask, satMask
+
+    def __repr__(self):
+        return "%s(shape=%s, ccdInfo=%s, biasFrame=%s, flat=%s, badPixMask=%s)" % (self.__class__.__name__,
+            self.shape, self.rawCCDInfo, self.biasFrame is not None, self.scale is not None,
+            self.badPixMask is not None)
+
+
+def _reuseArr(arr, shape, dtype):
+    """Return arr if it is a writable C-contiguous array of the specified shape and type,
+    else a new (uninitialized) array
+    """
+    if isinstance(arr, numpy.ndarray) and arr.shape == shape and arr.dtype == dtype \
+        and arr.flags.c_contiguous and arr.flags.writeable:
+        return arr
+    return numpy.empty(shape, dtype=dtype)
+
+
+class CalibrationCache(object):
+    """A cache of Calibration objects, keyed by camera configuration
+
+    Inputs:
+    - maxEntries    maximum number of Calibrations to keep;
+                    when full, the least recently used Calibration is discarded
+
+    The key may be any hashable value that identifies the camera configuration,
+    e.g. (camera name, binning, window). The cache may be shared by several threads.
+    """
+    def __init__(self, maxEntries=8):
+        self.maxEntries = int(maxEntries)
+        self._lock = threading.Lock()
+        self._calibDict = collections.OrderedDict()
+
+    def get(self, key, makeCalib=None):
+        """Return the Calibration for the specified key
+
+        Inputs:
+        - key       camera configuration
+        - makeCalib function that returns a new Calibration, called with no arguments
+                    if there is no Calibration for key; if None then None is returned instead
+
+        makeCalib is called without holding the lock, so it may be slow
+        (e.g. read calibration files) without blocking other threads.
+        """
+        with self._lock:
+            calib = self._calibDict.get(key)
+            if calib is not None:
+                self._calibDict[key] = self._calibDict.pop(key)
+                return calib
+        if makeCalib is None:
+            return None
+        calib = makeCalib()
+        self.put(key, calib)
+        return calib
+
+    def put(self, key, calib):
+        """Add or replace the Calibration for the specified key"""
+        with self._lock:
+            self._calibDict.pop(key, None)
+            self._calibDict[key] = calib
+            while len(self._calibDict) > self.maxEntries:
+                self._calibDict.popitem(last=False)
+
+    def clear(self):
+        """Discard all Calibrations"""
+        with self._lock:
+            self._calibDict.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._calibDict
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calibDict)
+
+    def __repr__(self):
+        return "%s(nEntries=%s, maxEntries=%s)" % (self.__class__.__name__, len(self), self.maxEntries)
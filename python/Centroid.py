@@ -35,6 +35,10 @@ How it works:
     a) Find the pixel with the minimum radAsymm.
     The direction to walk is determined by measuring radAsymm at 9 points.
     Each step is one pixel along x and/or y.
+    (This is the default "grid" search strategy; others need fewer evaluations;
+    see basicCentroid for details.)
+    Optionally (coarseBin > 1) this walk is preceded by a similar walk
+    on a binned copy of the data, which quickly gets close to the star.
 
     b) Find the true centroid (to better than one pixel) by applying
     a quadratic fit to the 3x3 radAsymm matrix centered on the
@@ -105,20 +109,56 @@ History:
 2006-04-17 ROwen    Ditch unused "import warnings" (thanks to pychecker).
 2008-01-12 ROwen    Added doSmooth flag to the centroid function, as suggested by Adam Ginsburg.
 2009-11-20 ROwen    Modified to use numpy.
+2026-10-18          Added centroidAndShape and the profDict argument to centroid and basicCentroid.
+                    basicCentroid caches the asymmetry at each pixel it evaluates,
+                    instead of shifting the 3x3 asymmetry arrays with scipy.ndimage.shift.
+                    CentroidData uses __slots__.
+                    Bug fix: CentroidData.__repr__ failed if xyErr was a numpy array.
+                    Bug fix: conditionArr always copied the data, despite its doc string;
+                    now it only copies if the type or memory layout is wrong.
+                    Added Timing stages.
+                    Added CentroidStats and the doStats argument to basicCentroid, centroid
+                    and centroidAndShape.
+                    Added the coarseBin and binCache arguments to basicCentroid, centroid
+                    and centroidAndShape, for a fast coarse-to-fine search when the initial guess
+                    is far from the star. Moved the walk to the pixel of minimum asymmetry
+                    to a new function _walkToMinAsymm.
+                    Added the strategy argument to basicCentroid, centroid and centroidAndShape,
+                    which selects among search strategies "grid" (the old one), "cross" and "jump".
+                    Added the timeBudget and deadline arguments to basicCentroid, centroid
+                    and centroidAndShape, and the isPartial field to CentroidData.
+                    basicCentroid, centroid and centroidAndShape use ccdInfo.satLevel to count
+                    saturated pixels if satMask is None.
+                    basicCentroid counts saturated pixels as it computes the asymmetry
+                    (in radProf.radAsymmWeighted), instead of in a separate pass.
+                    conditionMask passes PackedMask and RunMask masks through unchanged.
+                    checkSignal uses the cached background and inner regions of a MaskIndex,
+                    and uses numpy.take instead of numpy.extract.
+                    Bug fix: if there were too few background pixels, checkSignal computed
+                    background statistics from the mask values instead of the data
+                    (numpy.extract arguments were swapped), so dataCut was about 1
+                    and any region was accepted as containing a star.
+                    CentroidStats.nPixRead counts the pixels the asymmetry evaluations read
+                    (the unmasked pixels within rad), instead of the size of the box around the circle.
+                    Use ImUtil.medianFilter3, labelBlobs and minimumPosition instead of scipy.ndimage,
+                    and fill masked pixels without numpy.ma, so centroiding does not import scipy or numpy.ma.
 """
-__all__ = ['CentroidData', 'centroid',]
+__all__ = ['CentroidData', 'CentroidStats', 'centroid', 'centroidAndShape']
 
 import math
 import sys
+import time
 import traceback
 
 import numpy
-import numpy.ma
-import scipy.ndimage
 
-from .Constants import DefThresh
+from .CompactMask import isCompactMask
+from .Constants import CCDInfo, DefThresh
 from . import ImUtil
+from .MaskIndex import MaskIndex, SignalRegion
 from . import radProf
+from . import StarShape
+from . import Timing
 
 def _fmtList(alist):
     """Return "alist[0], alist[1], ..."
@@ -129,9 +169,18 @@ def _fmtList(alist):
 _MinRad = 3.0       # minimum radius
 _OuterRadAdd = 10   # amount to add to rad to get outerRad
 _MaxIter = 40       # max # of iterations
+_MaxJump = 8        # max step along i or j for the "jump" search strategy (pixels)
 _MinPixForStats = 20    # minimum # of pixels needed to measure med and std dev
+_PartialMsgStr = "Out of time; result is incomplete"
 
-class CentroidData:
+_timer = getattr(time, "perf_counter", time.time)
+
+# search strategies for basicCentroid
+Strategies = ("grid", "cross", "jump")
+_CrossIndList = ((1, 1), (0, 1), (2, 1), (1, 0), (1, 2))
+_DiagIndList = ((0, 0), (0, 2), (2, 0), (2, 2))
+
+class CentroidData(object):
     """Centroid data, including the following fields:
 
     flags; check before paying attention to the remaining data:
@@ -158,6 +207,12 @@ class CentroidData:
     - pix       the total number of unmasked pixels (ADU)
     - counts    the total number of counts (ADU)
 
+    diagnostics:
+    - stats     search statistics: a CentroidStats object if requested (doStats=True), else None
+    - isPartial if True then the time budget ran out, so the result is the best found so far:
+                the search stopped before reaching the minimum and/or the signal was not checked
+                at the centroid
+
     Warning: asymm is supposed to be normalized, but it gets large
     for bright objects with lots of masked pixels. This may be
     simply because the value is only computed at the nearest integer pixel
@@ -167,7 +222,11 @@ class CentroidData:
     - check isOK; if False do not use the data
     - check nSat(); if not None and more than a few then be cautious in using the data
         (I don't know how sensitive centroid accuracy is to # of saturated pixels)
+    - check isPartial if you specified a time budget or deadline
     """
+    __slots__ = ("isOK", "msgStr", "isPartial", "nSat", "rad", "imStats", "xyCtr", "xyErr", "asymm", "pix", "counts",
+        "stats")
+
     def __init__(self,
         isOK = True,
         msgStr = "",
@@ -179,6 +238,8 @@ class CentroidData:
         asymm = None,
         pix = None,
         counts = None,
+        stats = None,
+        isPartial = False,
     ):
         self.isOK = isOK
         self.msgStr = msgStr
@@ -197,16 +258,354 @@ class CentroidData:
         self.asymm = asymm
         self.pix = pix
         self.counts = counts
+        self.stats = stats
+        self.isPartial = isPartial
 
     def __repr__(self):
         dataList = []
-        for arg in ("isOK", "msgStr", "nSat", "xyCtr", "xyErr", "asymm", "pix", "counts", "rad", "imStats"):
+        for arg in ("isOK", "msgStr", "isPartial", "nSat", "xyCtr", "xyErr", "asymm", "pix", "counts", "rad", "imStats",
+            "stats"):
             val = getattr(self, arg)
-            if val not in (None, ""):
+            if arg == "isPartial" and not val:
+                continue
+            if val is not None and not (isinstance(val, str) and val == ""):
                 dataList.append("%s=%s" % (arg, val))
         return "%s(%s)" % (self.__class__.__name__, ", ".join(dataList))
 
 
+class CentroidStats(object):
+    """Statistics about the centroid search, for diagnosing slow centroids
+
+    - nCentroids    number of centroids these statistics describe
+                    (1 unless accumulated over many centroids, e.g. by findStars)
+    - nIter         number of iterations of the walk to the pixel of minimum asymmetry
+    - maxIter       maximum nIter of any one centroid
+    - nEval         number of radial asymmetry evaluations (calls to radProf.radAsymmWeighted)
+    - nCacheHits    number of asymmetry values reused from earlier iterations of the walk
+                    (each iteration needs 9 values for the "grid" search strategy, else 5)
+    - nPixRead      number of data pixels read by the radial asymmetry evaluations:
+                    the unmasked pixels within rad of each evaluated center
+                    (masked pixels are skipped without reading the data)
+    - nCoarseEval   number of the nEval evaluations made on a binned image (see basicCentroid coarseBin)
+    - checkSigTime  time spent checking for usable signal before and after the search (sec)
+    - walkTime      time spent walking to the pixel of minimum asymmetry (sec)
+    - fitTime       time spent fitting the centroid and counting saturated pixels (sec)
+    - totTime       total time (sec)
+
+    Use += to accumulate statistics for many centroids.
+    """
+    __slots__ = ("nCentroids", "nIter", "maxIter", "nEval", "nCacheHits", "nPixRead", "nCoarseEval",
+        "checkSigTime", "walkTime", "fitTime", "totTime")
+    _CountFields = ("nCentroids", "nIter", "nEval", "nCacheHits", "nPixRead", "nCoarseEval")
+    _TimeFields = ("checkSigTime", "walkTime", "fitTime", "totTime")
+
+    def __init__(self, nCentroids=1):
+        self.nCentroids = nCentroids
+        self.nIter = 0
+        self.maxIter = 0
+        self.nEval = 0
+        self.nCacheHits = 0
+        self.nPixRead = 0
+        self.nCoarseEval = 0
+        self.checkSigTime = 0.0
+        self.walkTime = 0.0
+        self.fitTime = 0.0
+        self.totTime = 0.0
+
+    def __iadd__(self, other):
+        for fieldName in self._CountFields + self._TimeFields:
+            setattr(self, fieldName, getattr(self, fieldName) + getattr(other, fieldName))
+        self.maxIter = max(self.maxIter, other.maxIter)
+        return self
+
+    def __repr__(self):
+        dataList = ["%s=%s" % (fieldName, getattr(self, fieldName))
+            for fieldName in ("nCentroids", "nIter", "maxIter", "nEval", "nCacheHits", "nPixRead", "nCoarseEval")]
+        dataList += ["%s=%.6f" % (fieldName, getattr(self, fieldName)) for fieldName in self._TimeFields]
+        return "%s(%s)" % (self.__class__.__name__, ", ".join(dataList))
+
+
+def _unitStep(asymmLow, asymmMid, asymmHigh):
+    """Return the step (-1, 0 or 1) toward the lowest of three asymmetries along one axis"""
+    if asymmLow < asymmMid and asymmLow <= asymmHigh:
+        return -1
+    if asymmHigh < asymmMid:
+        return 1
+    return 0
+
+def _jumpStep(asymmLow, asymmMid, asymmHigh, lastStep):
+    """Return the step along one axis predicted from three asymmetries, limited to +/-_MaxJump.
+
+    If a parabola fit to the asymmetries has a minimum more than one pixel away then return
+    the step half way to it (asymmetry is closer to V-shaped than parabolic near a star,
+    so the parabola's minimum tends to be about twice as far away as the true minimum).
+    If the parabola has no minimum (as is typical far from a star) then return
+    twice lastStep (the previous step along this axis) if that is downhill, else _unitStep.
+    """
+    a = 0.5 * (asymmHigh - 2.0*asymmMid + asymmLow)
+    if a > 0:
+        delta = -0.25 * (asymmHigh - asymmLow) / a
+        if abs(delta) > 1:
+            delta = math.copysign(max(abs(delta) * 0.5, 1), delta)
+    else:
+        delta = _unitStep(asymmLow, asymmMid, asymmHigh)
+        if delta * lastStep > 0:
+            delta *= 2 * abs(lastStep)
+    return int(round(max(min(delta, _MaxJump), -_MaxJump)))
+
+def _walkToMinAsymm(data, mask, ijStart, ijIndGuess, rad, ccdInfo, profDict, stats, verbosity, strategy="grid",
+    deadline=None, satLevel=None, satMask=None):
+    """Walk from ijStart to the pixel of minimum radial asymmetry.
+
+    Inputs:
+    - data, mask, rad, ccdInfo, profDict, verbosity, strategy: see basicCentroid
+    - ijStart   i,j index of the pixel at which to start walking
+    - ijIndGuess    i,j index of the pixel nearest the initial guess;
+                the walk fails if it gets rad or more pixels from this pixel
+    - stats     a CentroidStats object to update, or None
+    - deadline  time by which to stop walking (a value of Timing.now()), or None if no limit
+    - satLevel  saturation level (ADU); None if unknown
+    - satMask   a mask of saturated pixels; None if no mask
+    If satLevel or satMask is specified then saturated pixels are counted
+    by radProf.radAsymmWeighted, as it computes the asymmetry.
+
+    Returns (maxi, maxj, asymmArr, totCountsArr, totPtsArr, niter, isPartial, nSat) where:
+    - maxi, maxj    i,j index of the pixel of minimum asymmetry
+                    (if isPartial, the pixel the walk had reached when it ran out of time)
+    - asymmArr, totCountsArr, totPtsArr     3x3 arrays of asymm, totCounts and totPts
+                    (as returned by radProf.radAsymmWeighted) centered on maxi, maxj;
+                    for strategies other than "grid", diagonal elements that were not evaluated
+                    are nan (asymmArr, totCountsArr) and 0 (totPtsArr)
+    - niter     number of iterations
+    - isPartial True if the walk stopped because it ran out of time
+    - nSat      number of unmasked saturated pixels within rad of maxi, maxj;
+                None if satLevel and satMask are both None
+
+    Raises RuntimeError if the walk fails.
+    """
+    maxi, maxj = ijStart
+    asymmArr = numpy.zeros([3,3], float)
+    totPtsArr = numpy.zeros([3,3], int)
+    totCountsArr = numpy.zeros([3,3], float)
+    # dict of (i, j): (asymm, totCounts, totPts[, nSat]) for each pixel evaluated so far
+    asymmDict = {}
+    radIndArrLen = rad + 2 # radial index arrays need two extra points
+    satArgs = {}
+    if satLevel is not None:
+        satArgs["satLevel"] = satLevel
+    if satMask is not None:
+        satArgs["satMask"] = satMask
+
+    def getAsymm(ii, jj):
+        """Return (asymm, totCounts, totPts[, nSat]) at pixel ii, jj, evaluating it if not already known"""
+        asymmData = asymmDict.get((ii, jj))
+        if asymmData is None:
+            with Timing.stage("basicCentroid.radAsymm"):
+                if profDict is None:
+                    asymmData = radProf.radAsymmWeighted(
+                        data, mask, (ii, jj), rad, ccdInfo.bias, ccdInfo.readNoise, ccdInfo.ccdGain, **satArgs)
+                else:
+                    profData = (
+                        numpy.zeros([radIndArrLen], numpy.float64),
+                        numpy.zeros([radIndArrLen], numpy.float64),
+                        numpy.zeros([radIndArrLen], numpy.int32),
+                    )
+                    asymmData = radProf.radAsymmWeighted(
+                        data, mask, (ii, jj), rad, ccdInfo.bias, ccdInfo.readNoise, ccdInfo.ccdGain,
+                        *profData, **satArgs)
+                    profDict[(ii, jj)] = profData
+# this version omits noise-based weighting
+# (warning: the error estimate will be invalid and chiSq will not be normalized)
+#           asymmData = radProf.radAsymm(data, mask, (ii, jj), rad)
+            asymmDict[(ii, jj)] = asymmData
+
+            if verbosity > 3:
+                print("basicCentroid: ctr=(%s, %s) asymm=%10.1f, totCounts=%s, totPts=%s" % \
+                    ((ii, jj) + tuple(asymmData[0:3])))
+            if stats is not None:
+                stats.nEval += 1
+                stats.nPixRead += asymmData[2]
+        elif stats is not None:
+            stats.nCacheHits += 1
+        return asymmData
+
+    if strategy == "grid":
+        evalIndList = [(i, j) for i in range(3) for j in range(3)]
+    else:
+        evalIndList = _CrossIndList
+        asymmArr[:] = numpy.nan
+        totCountsArr[:] = numpy.nan
+
+    lastStep = (0, 0)
+    isPartial = False
+    niter = 0
+    while True:
+        niter += 1
+        if niter > _MaxIter:
+            raise RuntimeError("could not find a star in %s iterations" % (niter,))
+        Timing.addCount("basicCentroid.walkIter")
+        if stats is not None:
+            stats.nIter += 1
+            stats.maxIter = stats.nIter
+
+        for i, j in evalIndList:
+            asymmArr[i, j], totCountsArr[i, j], totPtsArr[i, j] = getAsymm(maxi + i - 1, maxj + j - 1)[0:3]
+
+        if strategy == "grid":
+            # have error matrix. Find minimum
+            ii, jj = ImUtil.minimumPosition(asymmArr)
+            ii -= 1
+            jj -= 1
+        else:
+            # have the asymmetry along +/-i and +/-j; find the step
+            ii = _unitStep(asymmArr[0, 1], asymmArr[1, 1], asymmArr[2, 1])
+            jj = _unitStep(asymmArr[1, 0], asymmArr[1, 1], asymmArr[1, 2])
+            didJump = False
+            if strategy == "jump":
+                # try jumping toward the minimum predicted by parabolic fits along i and j
+                # (or, if there is no minimum, twice as far as the last step);
+                # if that is not an improvement then fall back to a unit step
+                jumpi = _jumpStep(asymmArr[0, 1], asymmArr[1, 1], asymmArr[2, 1], lastStep[0])
+                jumpj = _jumpStep(asymmArr[1, 0], asymmArr[1, 1], asymmArr[1, 2], lastStep[1])
+                if max(abs(jumpi), abs(jumpj)) > 1 \
+                    and ((maxi + jumpi - ijIndGuess[0])**2 + (maxj + jumpj - ijIndGuess[1])**2) < rad**2:
+                    if getAsymm(maxi + jumpi, maxj + jumpj)[0] < asymmArr[1, 1]:
+                        ii, jj = jumpi, jumpj
+                        didJump = True
+                    elif verbosity > 2:
+                        print("basicCentroid: jump by %s, %s rejected" % (jumpi, jumpj))
+            if ii != 0 and jj != 0 and not didJump:
+                # both axes lead downhill; pick the lowest of the two axis steps and the diagonal between them
+                diagAsymm = getAsymm(maxi + ii, maxj + jj)[0]
+                stepList = [(diagAsymm, ii, jj), (asymmArr[1 + ii, 1], ii, 0), (asymmArr[1, 1 + jj], 0, jj)]
+                ii, jj = min(stepList, key=lambda step: step[0])[1:]
+
+        if verbosity > 2:
+            print("basicCentroid: error matrix min ii=%d, jj=%d, errmin=%5.1f" % \
+                (ii, jj, asymmDict[(maxi + ii, maxj + jj)][0]))
+            if verbosity > 3:
+                print("basicCentroid: asymm matrix =\n", asymmArr)
+
+        if ii == 0 and jj == 0:
+            # Have minimum. Get out and go home.
+            break
+        if deadline is not None and _timer() >= deadline:
+            # out of time; stop at the current pixel, for which the asymmetry arrays are known
+            if verbosity > 2:
+                print("basicCentroid: out of time; stopping at", maxi, maxj)
+            isPartial = True
+            break
+
+        # minimum error not in center; walk and try again
+        maxi += ii
+        maxj += jj
+        lastStep = (ii, jj)
+        if verbosity > 2:
+            print("shift by", -ii, -jj, "to", maxi, maxj)
+
+        if ((maxi - ijIndGuess[0])**2 + (maxj - ijIndGuess[1])**2) >= rad**2:
+            raise RuntimeError("could not find star within %r pixels" % (rad,))
+
+    if strategy != "grid":
+        # fill in the diagonal elements that happen to be known
+        for i, j in _DiagIndList:
+            asymmData = asymmDict.get((maxi + i - 1, maxj + j - 1))
+            if asymmData is not None:
+                asymmArr[i, j], totCountsArr[i, j], totPtsArr[i, j] = asymmData[0:3]
+            else:
+                asymmArr[i, j], totCountsArr[i, j], totPtsArr[i, j] = numpy.nan, numpy.nan, 0
+    nSat = asymmDict[(maxi, maxj)][3] if satArgs else None
+    return maxi, maxj, asymmArr, totCountsArr, totPtsArr, niter, isPartial, nSat
+
+
+def _coarseSearch(data, mask, ijIndGuess, rad, ccdInfo, binFac, binCache, stats, verbosity, strategy="grid",
+    deadline=None):
+    """Find the approximate position of the star by walking on a binned copy of the data.
+
+    Inputs:
+    - data, mask, rad, ccdInfo, verbosity, strategy: see basicCentroid
+    - ijIndGuess    i,j index of the pixel nearest the initial guess
+    - deadline  time by which to stop searching (a value of Timing.now()), or None if no limit
+    - binFac    binning factor
+    - binCache  a dict of binFac: (binData, binMask) for the whole image; see basicCentroid
+    - stats     a CentroidStats object to update, or None
+
+    Returns the i,j index of the full-resolution pixel at which to start the final walk.
+    If the coarse search fails or rad is too small to bin by binFac, returns ijIndGuess.
+    """
+    binRad = int(round(rad / binFac))
+    if binRad < _MinRad:
+        if verbosity > 2:
+            print("basicCentroid: rad=%s too small to search at binning %s" % (rad, binFac))
+        return ijIndGuess
+
+    if binCache is not None:
+        binData, binMask = binCache.get(binFac, (None, None))
+        if binData is None:
+            binData, binMask = binCache[binFac] = ImUtil.binImage(data, mask, binFac)
+        begInd = (0, 0)
+    else:
+        # bin only the region the search can reach: the walk stays within rad of the guess
+        # and each radial profile extends rad beyond that
+        begInd = [max(ijIndGuess[ii] - 2 * rad, 0) // binFac * binFac for ii in range(2)]
+        endInd = [min(ijIndGuess[ii] + 2 * rad + 1, data.shape[ii]) for ii in range(2)]
+        subMask = None if mask is None else mask[begInd[0]:endInd[0], begInd[1]:endInd[1]]
+        binData, binMask = ImUtil.binImage(data[begInd[0]:endInd[0], begInd[1]:endInd[1]], subMask, binFac)
+
+    # binning binFac^2 pixels by averaging increases the effective gain by binFac^2
+    # and the effective read noise (in e-) by binFac
+    binCCDInfo = CCDInfo(
+        bias = ccdInfo.bias,
+        readNoise = ccdInfo.readNoise * binFac,
+        ccdGain = ccdInfo.ccdGain * binFac**2,
+        satLevel = ccdInfo.satLevel,
+    )
+    binIndGuess = [(ijIndGuess[ii] - begInd[ii]) // binFac for ii in range(2)]
+    if stats is not None:
+        nEval = stats.nEval
+    try:
+        maxi, maxj, asymmArr = _walkToMinAsymm(
+            data = binData,
+            mask = binMask,
+            ijStart = binIndGuess,
+            ijIndGuess = binIndGuess,
+            rad = binRad,
+            ccdInfo = binCCDInfo,
+            profDict = None,
+            stats = stats,
+            verbosity = verbosity,
+            strategy = strategy,
+            deadline = deadline,
+        )[0:3]
+    except Exception as e:
+        if verbosity > 2:
+            print("basicCentroid: coarse search at binning %s failed: %s" % (binFac, e))
+        return ijIndGuess
+    finally:
+        if stats is not None:
+            stats.nCoarseEval += stats.nEval - nEval
+
+    # refine the position with a parabolic fit (as for the final centroid),
+    # ignoring a fit that is not a minimum or lies outside the central binned pixel
+    binIJ = [maxi, maxj]
+    for ii, (asymmLow, asymmHigh) in enumerate(((asymmArr[0, 1], asymmArr[2, 1]), (asymmArr[1, 0], asymmArr[1, 2]))):
+        a = 0.5 * (asymmHigh - 2.0*asymmArr[1, 1] + asymmLow)
+        if a > 0:
+            delta = -0.25 * (asymmHigh - asymmLow) / a
+            if abs(delta) <= 0.5:
+                binIJ[ii] += delta
+    # convert to full resolution; the center of binned pixel n is full-resolution index n*binFac + (binFac-1)/2
+    ijStart = [int(round(begInd[ii] + (binIJ[ii] * binFac) + ((binFac - 1) / 2.0))) for ii in range(2)]
+    if ((ijStart[0] - ijIndGuess[0])**2 + (ijStart[1] - ijIndGuess[1])**2) >= rad**2:
+        if verbosity > 2:
+            print("basicCentroid: coarse search at binning %s found %s, too far from %s" % (binFac, ijStart, ijIndGuess))
+        return ijIndGuess
+    if verbosity > 2:
+        print("basicCentroid: coarse search at binning %s found ij=%s" % (binFac, ijStart))
+    return ijStart
+
+
+@Timing.timed("basicCentroid")
 def basicCentroid(
     data,
     mask,
@@ -216,13 +615,22 @@ def basicCentroid(
     ccdInfo,
     verbosity = 0,
     doDS9 = False,
+    profDict = None,
+    doStats = False,
+    coarseBin = 1,
+    binCache = None,
+    strategy = "grid",
+    timeBudget = None,
+    deadline = None,
 ):
     """Compute a centroid.
 
     Inputs:
     - data      image data [i,j]
     - mask      a mask of invalid data (1 if invalid, 0 if valid); None if no mask.
-    - satMask   a maks of of saturated pixels (1 if saturated, 0 if not); None if no mask.
+    - satMask   a maks of of saturated pixels (1 if saturated, 0 if not); None if no mask,
+                in which case pixels whose value >= ccdInfo.satLevel are treated as saturated
+                (they are counted while computing the asymmetry, so no mask is needed)
     - xyGuess   initial x,y guess for centroid
     - rad       radius of search (pixels);
                 values less than _MinRad are treated as _MinRad
@@ -231,22 +639,66 @@ def basicCentroid(
                 3: print basic iteration info, 4: print detailed iteration info.
                 Note: there are no warnings at this time because the relevant info is returned.
     - doDS9     if True, diagnostic images are displayed in ds9
+    - profDict  a dict to which to add the radial profile computed at each pixel evaluated;
+                the key is the i,j index of the pixel and the value is (mean, var, nPts)
+                (see radProf.radProf for details); None if not wanted
+    - doStats   if True, the stats field of the returned CentroidData is a CentroidStats object
+    - coarseBin if > 1, first walk toward the star on a copy of the data binned by this factor
+                (by averaging coarseBin x coarseBin blocks of pixels), then finish at full resolution.
+                This greatly reduces the number of asymmetry evaluations when xyGuess is far from the star
+                (which requires a large rad). Ignored if rad / coarseBin < _MinRad.
+                If the binned search fails, the full resolution walk starts from xyGuess, as usual.
+    - binCache  a dict in which to cache binned copies of the whole image (keyed by binning factor),
+                or None to bin only the region near xyGuess. When centroiding several stars
+                with coarseBin > 1 on one image, pass the same (initially empty) dict to each call,
+                and a new dict for each new image (or if the data or mask changes).
+    - strategy  how to walk to the pixel of minimum asymmetry; one of Strategies:
+                - "grid": evaluate the asymmetry at all 9 pixels of the 3x3 grid about the current pixel
+                    and step to the lowest.
+                - "cross": evaluate the asymmetry at the current pixel and its 4 neighbors along i and j
+                    (all the final fit needs) and step toward the lowest; the diagonal pixel
+                    is only evaluated if both axes lead downhill.
+                - "jump": like "cross", but first try jumping (up to _MaxJump pixels along i and j)
+                    toward the minimum predicted by parabolic fits along i and j
+                    (or, far from the star, twice as far as the previous step);
+                    if the asymmetry there is not lower, take a unit step as for "cross".
+                "cross" and "jump" need fewer asymmetry evaluations than "grid" (the default).
+                All stop at a pixel whose asymmetry is lower than that of its 4 neighbors along i and j;
+                "grid" also requires it to be lower than its diagonal neighbors,
+                so the strategies occasionally stop at different pixels.
+    - timeBudget    maximum time for the search (sec); None if no limit.
+                If the time runs out, the walk stops where it is (after at least one iteration)
+                and the result is marked isPartial (see CentroidData).
+    - deadline  time by which the search must finish (a value of PyGuide.Timing.now()); None if no limit.
+                If timeBudget and deadline are both specified, the earlier applies.
 
     Masks are optional. If specified, they must be the same shape as "data"
     and should be of type Bool. None means no mask (all data is OK).
+    The mask (not satMask) may also be a PackedMask or RunMask (see PyGuide.CompactMask),
+    which is faster if large areas are masked, or a MaskIndex (see PyGuide.MaskIndex),
+    which is faster still; make it once and reuse it for each frame.
 
     Returns a CentroidData object (which see for more info),
     but with no imStats info.
     """
+    deadline = Timing.getDeadline(timeBudget, deadline)
     if verbosity > 1:
-        print("basicCentroid(xyGuess=%s, rad=%s, ccdInfo=%s)" % (xyGuess, rad, ccdInfo))
+        print("basicCentroid(xyGuess=%s, rad=%s, ccdInfo=%s, coarseBin=%s)" % (xyGuess, rad, ccdInfo, coarseBin))
+    if doStats:
+        stats = CentroidStats()
+        begTime = _timer()
+    else:
+        stats = None
     # condition and check inputs
     data = conditionData(data)
     mask = conditionMask(mask)
     satMask = conditionMask(satMask)
     if len(xyGuess) != 2:
         raise ValueError("initial guess=%r must have 2 elements" % (xyGuess,))
+    if strategy not in Strategies:
+        raise ValueError("strategy=%r must be one of %s" % (strategy, Strategies))
     rad = int(round(max(rad, _MinRad)))
+    coarseBin = int(coarseBin)
     if verbosity > 2:
         print("basicCentroid: rounded rad=%s" % (rad,))
 
@@ -262,7 +714,7 @@ def basicCentroid(
         # show masked data in frame 1 and unmasked data in frame 2
         ds9Win.xpaset("frame 1")
         if mask is not None:
-            ds9Win.showArray(data * (mask==0))
+            ds9Win.showArray(data * numpy.logical_not(mask))
         else:
             ds9Win.showArray(data)
         ds9Win.xpaset("frame 2")
@@ -274,63 +726,46 @@ def basicCentroid(
         ds9Win.xpaset("regions", "image; circle %s # group=ctrcirc" % _fmtList(args))
 
     try:
+        walkStartIJ = ijIndGuess
+        if stats is not None:
+            walkBegTime = _timer()
+        if coarseBin > 1:
+            with Timing.stage("basicCentroid.coarse"):
+                walkStartIJ = _coarseSearch(
+                    data = data,
+                    mask = mask,
+                    ijIndGuess = ijIndGuess,
+                    rad = rad,
+                    ccdInfo = ccdInfo,
+                    binFac = coarseBin,
+                    binCache = binCache,
+                    stats = stats,
+                    verbosity = verbosity,
+                    strategy = strategy,
+                    deadline = deadline,
+                )
+
         # OK, use this as first guess at maximum. Extract radial profiles in
         # a 3x3 gridlet about this, and walk to find minimum fitting error
-        maxi, maxj = ijIndGuess
-        asymmArr = numpy.zeros([3,3], float)
-        totPtsArr = numpy.zeros([3,3], int)
-        totCountsArr = numpy.zeros([3,3], float)
-
-        niter = 0
-        while True:
-            niter += 1
-            if niter > _MaxIter:
-                raise RuntimeError("could not find a star in %s iterations" % (niter,))
-
-            for i in range(3):
-                ii = maxi + i - 1
-                for j in range(3):
-                    jj = maxj + j - 1
-                    if totPtsArr[i, j] != 0:
-                        continue
-                    asymmArr[i, j], totCountsArr[i, j], totPtsArr[i, j] = radProf.radAsymmWeighted(
-                        data, mask, (ii, jj), rad, ccdInfo.bias, ccdInfo.readNoise, ccdInfo.ccdGain)
-# this version omits noise-based weighting
-# (warning: the error estimate will be invalid and chiSq will not be normalized)
-#                   asymmArr[i, j], totCountsArr[i, j], totPtsArr[i, j] = radProf.radAsymm(
-#                       data, mask, (ii, jj), rad)
-
-                    if verbosity > 3:
-                        print("basicCentroid: ind=[%s, %s] ctr=(%s, %s) asymm=%10.1f, totPts=%s, totCounts=%s" % \
-                            (i, j, ii, jj, asymmArr[i, j], totPtsArr[i, j], totCountsArr[i, j]))
-
-            # have error matrix. Find minimum
-            ii, jj = scipy.ndimage.minimum_position(asymmArr)
-            ii -= 1
-            jj -= 1
+        maxi, maxj, asymmArr, totCountsArr, totPtsArr, niter, isPartial, nSat = _walkToMinAsymm(
+            data = data,
+            mask = mask,
+            ijStart = walkStartIJ,
+            ijIndGuess = ijIndGuess,
+            rad = rad,
+            ccdInfo = ccdInfo,
+            profDict = profDict,
+            stats = stats,
+            verbosity = verbosity,
+            strategy = strategy,
+            deadline = deadline,
+            satLevel = ccdInfo.satLevel if satMask is None else None,
+            satMask = satMask,
+        )
 
-            if verbosity > 2:
-                print("basicCentroid: error matrix min ii=%d, jj=%d, errmin=%5.1f" % (ii, jj, asymmArr[ii,jj]))
-                if verbosity > 3:
-                    print("basicCentroid: asymm matrix =\n", asymmArr)
-
-            if (ii != 0 or jj != 0):
-                # minimum error not in center; walk and try again
-                maxi += ii
-                maxj += jj
-                if verbosity > 2:
-                    print("shift by", -ii, -jj, "to", maxi, maxj)
-
-                if ((maxi - ijIndGuess[0])**2 + (maxj - ijIndGuess[1])**2) >= rad**2:
-                    raise RuntimeError("could not find star within %r pixels" % (rad,))
-
-                # shift asymmArr and totPtsArr to minimum is in center again
-                asymmArr = scipy.ndimage.shift(asymmArr, (-ii, -jj))
-                totCountsArr = scipy.ndimage.shift(totCountsArr, (-ii, -jj))
-                totPtsArr = scipy.ndimage.shift(totPtsArr, (-ii, -jj))
-            else:
-                # Have minimum. Get out and go home.
-                break
+        if stats is not None:
+            fitBegTime = _timer()
+            stats.walkTime = fitBegTime - walkBegTime
 
         if verbosity > 2:
             print("basicCentroid: found ijMax=%s after %r iterations" % ((maxi, maxj), niter,))
@@ -347,8 +782,14 @@ def basicCentroid(
         aj = 0.5 * (asymmArr[1, 2] - 2.0*asymmArr[1, 1] + asymmArr[1, 0])
         bj = 0.5 * (asymmArr[1, 2] - asymmArr[1, 0])
 
-        di = -0.5*bi/ai
-        dj = -0.5*bj/aj
+        if isPartial:
+            # the walk stopped early, so maxi, maxj may not be the minimum and the fit may be poor;
+            # do not fit along an axis with no minimum and limit the correction to the 3x3 grid
+            di = max(min(-0.5*bi/ai, 1.0), -1.0) if ai > 0 else 0.0
+            dj = max(min(-0.5*bj/aj, 1.0), -1.0) if aj > 0 else 0.0
+        else:
+            di = -0.5*bi/ai
+            dj = -0.5*bj/aj
         ijCtr = (
             maxi + di,
             maxj + dj,
@@ -363,8 +804,12 @@ def basicCentroid(
         # note: I also tried using the minimum along i,j but that sometimes is negative
         # and this is already so crude that it's not likely to help
         radAsymmSigma = asymmArr[1,1]
-        iErr = math.sqrt(radAsymmSigma / ai)
-        jErr = math.sqrt(radAsymmSigma / aj)
+        if isPartial:
+            iErr = math.sqrt(radAsymmSigma / ai) if ai > 0 else numpy.nan
+            jErr = math.sqrt(radAsymmSigma / aj) if aj > 0 else numpy.nan
+        else:
+            iErr = math.sqrt(radAsymmSigma / ai)
+            jErr = math.sqrt(radAsymmSigma / aj)
         xyErr = (jErr, iErr)
 
         if ds9Win:
@@ -372,40 +817,15 @@ def basicCentroid(
             ds9Win.xpaset("regions", "image; x point %s # group=centroid" % \
                         _fmtList(xyCtr))
 
-
-        # count # saturated pixels, if satMask available
-        if satMask is None:
-            nSat = None
-        else:
-            ctrPixIJ = (maxi, maxj)
-            ctrPixXY = ImUtil.xyPosFromIJPos(ctrPixIJ)
-            subSize = (rad*2) + 1
-            subSatMaskObj = ImUtil.subFrameCtr(
-                satMask,
-                xyCtr = ctrPixXY,
-                xySize = (subSize, subSize),
-            )
-            subSatMask = subSatMaskObj.getSubFrame()
-            subCtrIJ = subSatMaskObj.subIJFromFullIJ(ctrPixIJ)
-
-            def makeDisk(i, j):
-                return ((i-subCtrIJ[0])**2 + (j-subCtrIJ[1])**2) <= rad**2
-            maybeSatPixel = numpy.fromfunction(makeDisk, subSatMask.shape)
-
-            if mask is not None:
-                subMaskObj = ImUtil.subFrameCtr(
-                    mask,
-                    xyCtr = ctrPixXY,
-                    xySize = (subSize, subSize),
-                )
-                subMask = subMaskObj.getSubFrame()
-                numpy.logical_and(maybeSatPixel, numpy.logical_not(subMask), maybeSatPixel)
-
-            numpy.logical_and(subSatMask, maybeSatPixel, maybeSatPixel)
-            nSat = scipy.ndimage.sum(maybeSatPixel)
+        if stats is not None:
+            endTime = _timer()
+            stats.fitTime = endTime - fitBegTime
+            stats.totTime = endTime - begTime
 
         ctrData = CentroidData(
             isOK = True,
+            isPartial = isPartial,
+            msgStr = _PartialMsgStr if isPartial else "",
             rad = rad,
             nSat = nSat,
             xyCtr = xyCtr,
@@ -413,6 +833,7 @@ def basicCentroid(
             counts = totCountsArr[1,1],
             pix = totPtsArr[1,1],
             asymm = asymmArr[1,1],
+            stats = stats,
         )
         if verbosity > 2:
             print("basicCentroid: %s" % (ctrData,))
@@ -423,13 +844,17 @@ def basicCentroid(
             traceback.print_exc(file=sys.stderr)
         elif verbosity > 0:
             print("basicCentroid failed: %s" % (e,))
+        if stats is not None:
+            stats.totTime = _timer() - begTime
         return CentroidData(
             isOK = False,
             msgStr = str(e),
             rad = rad,
+            stats = stats,
         )
 
 
+@Timing.timed("centroid")
 def centroid(
     data,
     mask,
@@ -442,13 +867,22 @@ def centroid(
     verbosity = 0,
     doDS9 = False,
     checkSig = (True, True),
+    profDict = None,
+    doStats = False,
+    coarseBin = 1,
+    binCache = None,
+    strategy = "grid",
+    timeBudget = None,
+    deadline = None,
 ):
     """Centroid and then confirm that there is usable signal at the location.
 
     Inputs:
     - data      image data [i,j]
     - mask      a mask of invalid data (1 if invalid, 0 if valid); None if no mask.
-    - satMask   a maks of of saturated pixels (1 if saturated, 0 if not); None if no mask.
+    - satMask   a maks of of saturated pixels (1 if saturated, 0 if not); None if no mask,
+                in which case pixels whose value >= ccdInfo.satLevel are treated as saturated
+                (they are counted while computing the asymmetry, so no mask is needed)
     - xyGuess   initial x,y guess for centroid
     - rad       radius of search (pixels);
                 values less than _MinRad are treated as _MinRad
@@ -462,14 +896,28 @@ def centroid(
     - doDS9     if True, display diagnostic images in ds9
     - checkSig  Verify usable signal for circle at (xyGuess, xy centroid)?
                 If both are false then imStats is not computed.
+    - profDict  a dict to which to add radial profiles; see basicCentroid for details
+    - doStats   if True, the stats field of the returned CentroidData is a CentroidStats object
+    - coarseBin binning factor for an initial coarse search; see basicCentroid for details
+    - binCache  a dict in which to cache binned images; see basicCentroid for details
+    - strategy  search strategy: one of Strategies; see basicCentroid for details
+    - timeBudget    maximum time (sec); None if no limit. If the time runs out then the search stops early
+                (see basicCentroid) and/or the signal check at the centroid is skipped,
+                and the result is marked isPartial (see CentroidData).
+                The initial signal check (if wanted) is always performed.
+    - deadline  time by which to finish (a value of PyGuide.Timing.now()); None if no limit.
+                If timeBudget and deadline are both specified, the earlier applies.
 
     Returns a CentroidData object (which see for more info).
     """
+    deadline = Timing.getDeadline(timeBudget, deadline)
     if verbosity > 2:
         print("data =", data)
         print("mask =", mask)
         print("centroid(xyGuess=%s, rad=%s, ccdInfo=%s, thresh=%s)" % (xyGuess, rad, ccdInfo, thresh))
 
+    if doStats:
+        begTime = _timer()
     if checkSig[0]:
         signalOK, imStats = checkSignal(
             data = data,
@@ -481,10 +929,18 @@ def centroid(
             verbosity = verbosity,
         )
         if not signalOK:
+            if doStats:
+                stats = CentroidStats()
+                stats.checkSigTime = stats.totTime = _timer() - begTime
+            else:
+                stats = None
             return CentroidData(
                 isOK = False,
                 msgStr = "No star found",
+                stats = stats,
             )
+    if doStats:
+        checkSigTime = _timer() - begTime
 
     ctrData = basicCentroid(
         data = data,
@@ -495,9 +951,25 @@ def centroid(
         ccdInfo = ccdInfo,
         verbosity = verbosity,
         doDS9 = doDS9,
+        profDict = profDict,
+        doStats = doStats,
+        coarseBin = coarseBin,
+        binCache = binCache,
+        strategy = strategy,
+        deadline = deadline,
     )
 
-    if ctrData.isOK and checkSig[1]:
+    if ctrData.isOK and checkSig[1] and deadline is not None and _timer() >= deadline:
+        # out of time; skip the signal check at the centroid
+        if verbosity > 1:
+            print("centroid: out of time; skipping signal check at the centroid")
+        ctrData.isPartial = True
+        ctrData.msgStr = _PartialMsgStr
+        if checkSig[0]:
+            ctrData.imStats = imStats
+    elif ctrData.isOK and checkSig[1]:
+        if doStats:
+            checkBegTime = _timer()
         signalOK, imStats = checkSignal(
             data = data,
             mask = mask,
@@ -511,9 +983,101 @@ def centroid(
         if not signalOK:
             ctrData.isOK = False
             ctrData.msgStr = "No star found"
+        if doStats:
+            checkSigTime += _timer() - checkBegTime
+    if doStats:
+        ctrData.stats.checkSigTime = checkSigTime
+        ctrData.stats.totTime = _timer() - begTime
     return ctrData
 
 
+@Timing.timed("centroidAndShape")
+def centroidAndShape(
+    data,
+    mask,
+    satMask,
+    xyGuess,
+    rad,
+    ccdInfo,
+    thresh = DefThresh,
+    doSmooth = True,
+    verbosity = 0,
+    doDS9 = False,
+    checkSig = (True, True),
+    doStats = False,
+    coarseBin = 1,
+    binCache = None,
+    strategy = "grid",
+    timeBudget = None,
+    deadline = None,
+):
+    """Centroid a star and fit its shape, reusing the centroider's radial profile.
+
+    Inputs: the same as centroid (except profDict);
+    timeBudget and deadline apply to the centroid and shape fit together.
+
+    Returns two items:
+    - ctrData   a CentroidData object
+    - shapeData a StarShapeData object; the fit uses radius ctrData.rad
+
+    The results are the same as calling centroid and then starShape,
+    but the radial profile needed by starShape is usually one the centroider
+    has already computed, so it need not be extracted a second time.
+    """
+    deadline = Timing.getDeadline(timeBudget, deadline)
+    data = conditionData(data)
+    mask = conditionMask(mask)
+
+    profDict = {}
+    ctrData = centroid(
+        data = data,
+        mask = mask,
+        satMask = satMask,
+        xyGuess = xyGuess,
+        rad = rad,
+        ccdInfo = ccdInfo,
+        thresh = thresh,
+        doSmooth = doSmooth,
+        verbosity = verbosity,
+        doDS9 = doDS9,
+        checkSig = checkSig,
+        profDict = profDict,
+        doStats = doStats,
+        coarseBin = coarseBin,
+        binCache = binCache,
+        strategy = strategy,
+        deadline = deadline,
+    )
+    if not ctrData.isOK:
+        return ctrData, StarShape.StarShapeData(isOK = False, msgStr = ctrData.msgStr)
+
+    ijCtrInd = tuple(ImUtil.ijIndFromXYPos(ctrData.xyCtr))
+    profData = profDict.get(ijCtrInd)
+    if profData is None:
+        # the centroid is not nearest any pixel the centroider evaluated (unusual)
+        if verbosity > 2:
+            print("centroidAndShape: computing a new radial profile at %s" % (ijCtrInd,))
+        return ctrData, StarShape.starShape(
+            data = data,
+            mask = mask,
+            xyCtr = ctrData.xyCtr,
+            rad = ctrData.rad,
+            verbosity = verbosity,
+            deadline = deadline,
+        )
+
+    mean, var, nPts = profData
+    shapeData = StarShape.starShapeFromRadProf(
+        mean, var, nPts,
+        xyCtr = ctrData.xyCtr,
+        rad = ctrData.rad,
+        verbosity = verbosity,
+        deadline = deadline,
+    )
+    return ctrData, shapeData
+
+
+@Timing.timed("checkSignal")
 def checkSignal(
     data,
     mask,
@@ -558,45 +1122,29 @@ def checkSignal(
     rad = int(round(max(rad, _MinRad)))
 
     outerRad = rad + _OuterRadAdd
-    subDataObj = ImUtil.subFrameCtr(
-        data,
-        xyCtr = xyCtr,
-        xySize = (outerRad, outerRad),
-    )
-    subData = subDataObj.getSubFrame().astype(numpy.float32) # force type and copy
-    if subData.size < _MinPixForStats:
+    data = numpy.asarray(data)
+    if isinstance(mask, MaskIndex):
+        sigRegion = mask.getSignalRegion(xyCtr, rad, outerRad)
+    else:
+        if mask is not None and not isCompactMask(mask):
+            mask = numpy.asarray(mask)
+        sigRegion = SignalRegion(data, mask, xyCtr, rad, outerRad)
+    if sigRegion.size < _MinPixForStats:
         if verbosity > 1:
             print("checkSignal: signalOK=False because subData.size = %d < %d = _MinPixForStats" %
-                (subData.size, _MinPixForStats))
+                (sigRegion.size, _MinPixForStats))
         return False, ImUtil.ImStats(
-            nPts = subData.size,
+            nPts = sigRegion.size,
         )
-    subCtrIJ = subDataObj.subIJFromFullIJ(ImUtil.ijPosFromXYPos(xyCtr))
+    subData = numpy.array(data[sigRegion.ijSlice], dtype=numpy.float32) # force type and copy
 
-    if mask is not None:
-        subMaskObj = ImUtil.subFrameCtr(
-            mask,
-            xyCtr = xyCtr,
-            xySize = (outerRad, outerRad),
-        )
-        subMask = subMaskObj.getSubFrame().astype(numpy.bool) # force type and copy
-    else:
-        subMask = numpy.zeros(subData.shape, dtype=numpy.bool)
-
-    # create circleMask; a centered circle of radius rad
-    # with 0s in the middle and 1s outside
-    def makeCircle(i, j):
-        return ((i-subCtrIJ[0])**2 + (j-subCtrIJ[1])**2) > rad**2
-    circleMask = numpy.fromfunction(makeCircle, subData.shape)
-
-    # make a copy of the data outside a circle of radius "rad";
-    # use this to compute background stats
-    bkgndPixels = numpy.extract(numpy.logical_and(circleMask, numpy.logical_not(subMask)), subData)
+    # use the data outside a circle of radius "rad" to compute background stats
+    bkgndPixels = subData.ravel().take(sigRegion.bkgndInd)
     if bkgndPixels.size < _OuterRadAdd**2:
         # too few unmasked pixels in outer region; try not masking off the star
         if verbosity > 2:
             print("checkSignal: too few good pixels in outer region; testing entire region")
-        bkgndPixels = numpy.extract(subData, numpy.logical_not(subMask))
+        bkgndPixels = subData.ravel().take(sigRegion.validInd)
         if bkgndPixels.size < _MinPixForStats:
             if verbosity > 1:
                 print("checkSignal: signalOK=False because bkgndPixels.size = %d < %d = _MinPixForStats" %
@@ -608,26 +1156,20 @@ def checkSignal(
     imStats = ImUtil.skyStats(bkgndPixels, thresh)
     del(bkgndPixels)
 
-    # median filter the inner data and look for signal > dataCut
-    dataPixels = numpy.ma.masked_array(
-        subData,
-        mask = numpy.logical_or(subMask, circleMask),
-        copy = True,
-    )
-    smoothedData = dataPixels.filled(imStats.med)
+    # median filter the inner data (with masked pixels set to the median) and look for signal > dataCut;
+    # subData is a copy, so it can be modified in place
+    smoothedData = subData
+    smoothedData[sigRegion.innerMask] = imStats.med
     if doSmooth:
-        scipy.ndimage.median_filter(smoothedData, 3, output=smoothedData)
-    del(dataPixels)
+        ImUtil.medianFilter3(smoothedData, out=smoothedData)
 
     # look for a blob of at least 2x2 adjacent pixels with smoothed value >= dataCut
     # note: it'd be much simpler but less safe to simply test:
     #    if max(smoothedData) < dataCut: # have signal
-    shapeArry = numpy.ones((3,3))
-    labels, numElts = scipy.ndimage.label(smoothedData > imStats.dataCut, shapeArry)
+    slices = ImUtil.labelBlobs(smoothedData > imStats.dataCut)[1]
     del(smoothedData)
     if verbosity > 2:
-        print("number of candidate blobs = %s" % (numElts,))
-    slices = scipy.ndimage.find_objects(labels)
+        print("number of candidate blobs = %s" % (len(slices),))
     for ijSlice in slices:
         minSize = min([slc.stop - slc.start for slc in ijSlice])
         if minSize >= 2:
@@ -651,11 +1193,12 @@ def conditionMask(mask):
     such that basicCentroid can operate most efficiently on it.
 
     Mask is optional, so a value of None returns None.
+    A PackedMask or RunMask is returned unchanged.
 
     Warning: does not copy the data unless necessary.
     """
-    if mask is None:
-        return None
+    if mask is None or isCompactMask(mask):
+        return mask
     return conditionArr(mask, numpy.bool)
 
 def conditionArr(arr, desType):
@@ -663,4 +1206,4 @@ def conditionArr(arr, desType):
 
     Warning: does not copy the data unless necessary.
     """
-    return numpy.array(arr, dtype=desType, order="C")
+    return numpy.ascontiguousarray(arr, dtype=desType)
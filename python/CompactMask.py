@@ -0,0 +1,135 @@
+from __future__ import division, absolute_import, print_function
+"""Compact forms of masks, for masks with large masked areas (e.g. a slit viewer or fiber bundle)
+
+centroid, findStars, starShape and the radProf routines accept these in place of a bool mask.
+The radial profile code then accumulates each profile one run of valid pixels at a time,
+skipping masked areas without examining each masked pixel:
+- PackedMask stores the mask bit-packed (8 pixels per byte), so masked pixels are skipped
+  8 at a time and the mask uses 1/8 the memory.
+- RunMask stores, for each row, the runs of valid pixels, so masked pixels are never examined.
+  This is the fastest form for masks that consist of a few large valid regions.
+
+Make the compact mask once and reuse it for every frame that uses the same mask.
+
+History:
+2026-10-18          First version.
+"""
+__all__ = ["PackedMask", "RunMask", "isCompactMask"]
+
+import numpy
+
+class _CompactMask(object):
+    """Base class for compact masks
+
+    Subclasses must set shape and implement _getRows.
+    """
+    ndim = 2
+    dtype = numpy.dtype(bool)
+
+    def toMask(self):
+        """Return the mask as a bool array: True for values to mask out (ignore)"""
+        return self._getRows(0, self.shape[0])
+
+    def __array__(self, dtype=None, copy=None):
+        mask = self.toMask()
+        if dtype is not None:
+            mask = mask.astype(dtype)
+        return mask
+
+    def __getitem__(self, key):
+        """Return a portion of the mask as a bool array
+
+        key must be a slice or a pair of slices (with step 1 or None).
+        """
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) == 1:
+            key = key + (slice(None),)
+        if len(key) != 2 or not all(isinstance(item, slice) for item in key):
+            raise IndexError("index must be a slice or a pair of slices")
+        begRow, endRow, rowStep = key[0].indices(self.shape[0])
+        if rowStep != 1:
+            raise IndexError("row slice step must be 1")
+        return self._getRows(begRow, max(begRow, endRow))[:, key[1]]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return "%s(shape=%s)" % (self.__class__.__name__, self.shape)
+
+
+class PackedMask(_CompactMask):
+    """A bit-packed mask
+
+    Inputs:
+    - mask      a mask [i,j]: True for values to mask out (ignore);
+                a RunMask or PackedMask is also accepted
+
+    Attributes:
+    - shape         shape of the mask
+    - packedMask    mask bits, packed along j, most significant bit first:
+                    a uint8 array [i, (shape[1] + 7) // 8], as made by numpy.packbits(mask, axis=1)
+    """
+    def __init__(self, mask):
+        if isCompactMask(mask):
+            mask = mask.toMask()
+        mask = numpy.asarray(mask, dtype=bool)
+        if mask.ndim != 2:
+            raise ValueError("mask must be 2-dimensional")
+        self.shape = mask.shape
+        self.packedMask = numpy.packbits(mask, axis=1)
+
+    def _getRows(self, begRow, endRow):
+        rows = numpy.unpackbits(self.packedMask[begRow:endRow], axis=1)[:, 0:self.shape[1]]
+        return rows.view(bool)
+
+
+class RunMask(_CompactMask):
+    """A mask stored as runs of valid pixels in each row
+
+    Inputs:
+    - mask      a mask [i,j]: True for values to mask out (ignore);
+                a RunMask or PackedMask is also accepted
+
+    Attributes:
+    - shape     shape of the mask
+    - runs      (beg j, end j + 1) of each run of valid pixels, in order of i, then j:
+                an int32 array [nRuns, 2]
+    - rowStart  index into runs of the first run of each row: an int32 array [shape[0] + 1];
+                the runs for row i are runs[rowStart[i]:rowStart[i+1]]
+    - nValid    number of valid pixels
+    """
+    def __init__(self, mask):
+        if isCompactMask(mask):
+            mask = mask.toMask()
+        mask = numpy.asarray(mask, dtype=bool)
+        if mask.ndim != 2:
+            raise ValueError("mask must be 2-dimensional")
+        self.shape = mask.shape
+        numRows, numCols = self.shape
+
+        # pad each row with a masked pixel at each end, so each run has a start and an end
+        paddedValid = numpy.zeros((numRows, numCols + 2), dtype=numpy.int8)
+        numpy.logical_not(mask, out=paddedValid[:, 1:-1], casting="unsafe")
+        edgeRows, edgeCols = numpy.nonzero(numpy.diff(paddedValid, axis=1))
+        # edges alternate: start of run, end of run
+        self.runs = numpy.ascontiguousarray(edgeCols.reshape(-1, 2), dtype=numpy.int32)
+        runRows = edgeRows[0::2]
+        self.rowStart = numpy.searchsorted(runRows, numpy.arange(numRows + 1)).astype(numpy.int32)
+        self.nValid = int(numpy.sum(self.runs[:, 1] - self.runs[:, 0]))
+
+    def _getRows(self, begRow, endRow):
+        numCols = self.shape[1]
+        begRunInd, endRunInd = self.rowStart[begRow], self.rowStart[endRow]
+        runs = self.runs[begRunInd:endRunInd]
+        runRows = numpy.repeat(numpy.arange(endRow - begRow), numpy.diff(self.rowStart[begRow:endRow + 1]))
+        edges = numpy.zeros((endRow - begRow, numCols + 1), dtype=numpy.int32)
+        numpy.add.at(edges, (runRows, runs[:, 0]), 1)
+        numpy.add.at(edges, (runRows, runs[:, 1]), -1)
+        return numpy.cumsum(edges[:, 0:numCols], axis=1) == 0
+
+
+def isCompactMask(mask):
+    """Return True if mask is a PackedMask or RunMask"""
+    return isinstance(mask, _CompactMask)
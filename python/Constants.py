@@ -8,6 +8,7 @@ History:
 2005-05-18 ROwen    Added CCDInfo and DefThresh.
 2005-10-14 ROwen    Noted that satLevel is no longer used by PyGuide.
 2008-10-01 ROwen    CCDInfo now casts its arguments (except satLevel).
+2026-10-18          CCDInfo.satLevel is used again (when there is no saturated pixel mask).
 """
 import math
 
@@ -42,8 +43,9 @@ class CCDInfo:
     - bias      ccd bias (ADU)
     - readNoise ccd read noise (e-)
     - ccdGain   ccd inverse gain (e-/ADU)
-    - satLevel  saturation level (ADU); ignored by PyFits
-                but potentially useful for generating saturated pixel masks.
+    - satLevel  saturation level (ADU); None if unknown.
+                PyGuide routines that take a saturated pixel mask (satMask)
+                treat pixels whose value >= satLevel as saturated if satMask is None.
     """
     def __init__(self,
         bias,
@@ -11,8 +11,12 @@ History:
 2005-02-07 ROwen    Changed fakeStar to accept xyCtr instead of (i,j) ctr.
 2005-05-16 ROwen    Modified addNoise to take ccdInfo instead of 3 args.
 2009-11-20 ROwen    Modified to use numpy.
+2026-10-18          Added fakeField.
+                    Added noisyFrames and iterNoisyFrames.
 """
-__all__ = ["fakeStar", "addNoise"]
+__all__ = ["fakeStar", "fakeField", "addNoise", "noisyFrames", "iterNoisyFrames"]
+
+import math
 
 import numpy
 import numpy.random
@@ -21,6 +25,10 @@ from . import ImUtil
 
 _MaxValUInt16 = 2**16 - 1
 
+# approximate number of pixels in each chunk of a noisy frame
+# (limits the size of temporary arrays; changing it changes the noise generated for a given seed)
+_NoiseChunkSize = 2**16
+
 def fakeStar(
     arrShape,
     xyCtr,
@@ -52,6 +60,87 @@ def fakeStar(
         return gauss.astype(numpy.uint16)
     return numpy.fromfunction(peakFunc, arrShape)
 
+def fakeField(
+    arrShape,
+    xyCtrs,
+    sigmas,
+    ampls,
+    satLevel = _MaxValUInt16,
+    mask = None,
+    minVal = 0.1,
+    doSatMask = False,
+):
+    """Return a 2-d array containing many noise-free double gaussian stars,
+    as a numpy.uint16 array whose values are truncated at satLevel.
+
+    Much faster than summing fakeStar for each star, because each star is computed
+    only in a window around its center (where it is at least minVal)
+    and values are truncated and converted to uint16 just once, at the end.
+
+    Inputs:
+    - arrShape  desired array shape (2 integers)
+    - xyCtrs    x,y center of each star (a sequence of x,y pairs)
+    - sigmas    sigma of each star (a sequence of floats, or one float for all stars)
+    - ampls     amplitude of each star (a sequence of floats, or one float for all stars)
+    - satLevel  saturation level (ADU); values are truncated at this level;
+                must be no larger than 2**16-1
+    - mask      a bool array of shape arrShape; pixels that are True receive no light
+                (e.g. to simulate a slit); None if no mask
+    - minVal    value (ADU) at the edge of the window in which each star is computed;
+                the result differs from the exact sum by less than minVal per star
+    - doSatMask if True, also return a saturated pixel mask
+
+    Returns:
+    - data      the star field (numpy.uint16)
+    - satMask   (only if doSatMask True) a bool array that is True for saturated pixels
+                (pixels whose value would exceed satLevel, before truncation)
+
+    The stars are the same shape as those of fakeStar, so fakeField(arrShape, [xyCtr], sigma, ampl)
+    matches fakeStar(arrShape, xyCtr, sigma, ampl) except where values are less than minVal.
+    """
+    if len(arrShape) != 2:
+        raise ValueError("arrShape=%r must have 2 elements" % (arrShape,))
+    if not 0 < satLevel <= _MaxValUInt16:
+        raise ValueError("satLevel=%r must be in range (0, %s]" % (satLevel, _MaxValUInt16))
+    if minVal <= 0:
+        raise ValueError("minVal=%r must be > 0" % (minVal,))
+    xyCtrs = numpy.asarray(xyCtrs, dtype=float).reshape(-1, 2)
+    nStars = len(xyCtrs)
+    sigmas = numpy.broadcast_to(numpy.asarray(sigmas, dtype=float), (nStars,))
+    ampls = numpy.broadcast_to(numpy.asarray(ampls, dtype=float), (nStars,))
+    if mask is not None and numpy.shape(mask) != tuple(arrShape):
+        raise ValueError("mask shape=%s != arrShape=%s" % (numpy.shape(mask), arrShape))
+
+    fieldArr = numpy.zeros(arrShape, dtype=numpy.float64)
+    for xyCtr, sigma, ampl in zip(xyCtrs, sigmas, ampls):
+        if ampl <= 0:
+            continue
+        # the wide gaussian (0.1 ampl, 2 sigma) dominates the wings;
+        # compute out to the radius at which it falls to minVal
+        if 0.1 * ampl > minVal:
+            winRad = 2.0 * sigma * math.sqrt(2.0 * math.log(0.1 * ampl / minVal))
+        else:
+            winRad = 2.0 * sigma
+        ijCtr = ImUtil.ijPosFromXYPos(xyCtr)
+        ijBeg = [max(int(math.floor(ijCtr[ii] - winRad)), 0) for ii in range(2)]
+        ijEnd = [min(int(math.ceil(ijCtr[ii] + winRad)) + 1, arrShape[ii]) for ii in range(2)]
+        if ijBeg[0] >= ijEnd[0] or ijBeg[1] >= ijEnd[1]:
+            continue
+        iRadSq = (numpy.arange(ijBeg[0], ijEnd[0]) - ijCtr[0])**2
+        jRadSq = (numpy.arange(ijBeg[1], ijEnd[1]) - ijCtr[1])**2
+        expArg = (iRadSq[:, numpy.newaxis] + jRadSq[numpy.newaxis, :]) * (-1.0 / (2.0 * sigma**2))
+        fieldArr[ijBeg[0]:ijEnd[0], ijBeg[1]:ijEnd[1]] += ampl * (numpy.exp(expArg) + 0.1 * numpy.exp(0.25 * expArg))
+
+    if mask is not None:
+        fieldArr[numpy.asarray(mask, dtype=bool)] = 0
+    if doSatMask:
+        satMask = fieldArr >= satLevel
+    numpy.minimum(fieldArr, satLevel, out=fieldArr)
+    data = fieldArr.astype(numpy.uint16)
+    if doSatMask:
+        return data, satMask
+    return data
+
 def addNoise(
     data,
     sky,
@@ -71,3 +160,141 @@ def addNoise(
     outData = numpy.where(outData >= 0, outData, 0)
     outData = numpy.where(outData <= _MaxValUInt16, outData, _MaxValUInt16)
     return outData.astype(numpy.uint16)
+
+def noisyFrames(
+    data,
+    nFrames,
+    sky,
+    ccdInfo,
+    seed = None,
+    nProc = 1,
+    out = None,
+):
+    """Return a cube of noisy frames: data with poisson noise and gaussian read noise.
+
+    The noise is statistically the same as that of addNoise, but this is much faster
+    and the frames are returned as numpy.float32 (with integer values, as for addNoise).
+
+    Inputs:
+    - data      noiseless image, in ADU
+    - nFrames   number of frames
+    - sky       sky level, in ADU
+    - ccdInfo   a PyGuide.CCDInfo object
+    - seed      random seed: an int, a numpy.random.SeedSequence, or None for a fresh random seed
+    - nProc     number of processes to use
+    - out       array in which to put the frames (numpy.float32, shape (nFrames,) + data.shape);
+                if None then a new array is created
+
+    Returns the cube of frames, an array of shape (nFrames,) + data.shape, indexed as [frame, i, j].
+
+    Each frame uses its own random number stream (spawned from seed),
+    so the frames for a given seed are the same regardless of nProc,
+    and match those returned by iterNoisyFrames for the same seed.
+    """
+    lam = _noiseLambda(data, sky, ccdInfo)
+    cubeShape = (nFrames,) + lam.shape
+    if out is None:
+        out = numpy.empty(cubeShape, dtype=numpy.float32)
+    elif out.shape != cubeShape or out.dtype != numpy.float32:
+        raise ValueError("out must be a numpy.float32 array of shape %s" % (cubeShape,))
+    seedSeqList = _getSeedSequence(seed).spawn(nFrames)
+
+    if nProc > 1 and nFrames > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(min(nProc, nFrames), initializer=_initNoiseWorker,
+            initargs=(lam, ccdInfo.ccdGain, ccdInfo.readNoise, ccdInfo.bias))
+        try:
+            for ind, frame in enumerate(pool.imap(_makeNoisyFrame, seedSeqList)):
+                out[ind] = frame
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for ind, seedSeq in enumerate(seedSeqList):
+            _fillNoisyFrame(out[ind], lam, ccdInfo.ccdGain, ccdInfo.readNoise, ccdInfo.bias,
+                numpy.random.default_rng(seedSeq))
+    return out
+
+def iterNoisyFrames(
+    data,
+    nFrames,
+    sky,
+    ccdInfo,
+    seed = None,
+    nBuffers = 1,
+):
+    """Return an iterator over noisy frames: data with poisson noise and gaussian read noise.
+
+    Like noisyFrames, but returns the frames one at a time, reusing a few preallocated buffers.
+
+    Inputs:
+    - data      noiseless image, in ADU
+    - nFrames   number of frames; None for an endless supply
+    - sky       sky level, in ADU
+    - ccdInfo   a PyGuide.CCDInfo object
+    - seed      random seed: an int, a numpy.random.SeedSequence, or None for a fresh random seed
+    - nBuffers  number of buffers; each frame (a numpy.float32 array) is overwritten
+                by the frame returned nBuffers later, so copy any frame you wish to keep longer
+
+    The frames for a given seed match those returned by noisyFrames for the same seed.
+    """
+    lam = _noiseLambda(data, sky, ccdInfo)
+    seedSeq = _getSeedSequence(seed)
+    bufferList = [numpy.empty(lam.shape, dtype=numpy.float32) for i in range(max(1, nBuffers))]
+    ind = 0
+    while nFrames is None or ind < nFrames:
+        buffer = bufferList[ind % len(bufferList)]
+        _fillNoisyFrame(buffer, lam, ccdInfo.ccdGain, ccdInfo.readNoise, ccdInfo.bias,
+            numpy.random.default_rng(seedSeq.spawn(1)[0]))
+        yield buffer
+        ind += 1
+
+def _getSeedSequence(seed):
+    """Return a numpy.random.SeedSequence given an int, None or a SeedSequence"""
+    if isinstance(seed, numpy.random.SeedSequence):
+        return seed
+    return numpy.random.SeedSequence(seed)
+
+def _noiseLambda(data, sky, ccdInfo):
+    """Return the mean number of photo-electrons per pixel (numpy.float32), as used by addNoise"""
+    lam = numpy.add(data, sky, dtype=numpy.float32)
+    numpy.floor(lam, out=lam)
+    lam *= ccdInfo.ccdGain
+    return lam
+
+def _fillNoisyFrame(outArr, lam, ccdGain, readNoise, bias, rng):
+    """Fill outArr with one noisy frame, in place, a chunk of rows at a time
+
+    Inputs:
+    - outArr    output array (numpy.float32, same shape as lam)
+    - lam       mean number of photo-electrons per pixel (see _noiseLambda)
+    - ccdGain, readNoise, bias: as for PyGuide.CCDInfo
+    - rng       a numpy.random.Generator
+    """
+    invGain = 1.0 / ccdGain
+    readNoiseADU = readNoise / float(ccdGain)
+    nRows = max(1, _NoiseChunkSize // max(1, lam.shape[-1]))
+    for begRow in range(0, lam.shape[0], nRows):
+        outChunk = outArr[begRow:begRow + nRows]
+        numpy.multiply(rng.poisson(lam[begRow:begRow + nRows]), invGain, out=outChunk, casting="unsafe")
+        readNoiseChunk = rng.standard_normal(size=outChunk.shape, dtype=numpy.float32)
+        readNoiseChunk *= readNoiseADU
+        outChunk += readNoiseChunk
+        outChunk += bias
+    # truncate as addNoise does when converting to UInt16
+    numpy.clip(outArr, 0, _MaxValUInt16, out=outArr)
+    numpy.floor(outArr, out=outArr)
+
+_WorkerNoiseArgs = None
+
+def _initNoiseWorker(lam, ccdGain, readNoise, bias):
+    """Initialize a noisyFrames worker process"""
+    global _WorkerNoiseArgs
+    _WorkerNoiseArgs = (lam, ccdGain, readNoise, bias)
+
+def _makeNoisyFrame(seedSeq):
+    """Return one noisy frame; for use by noisyFrames worker processes"""
+    lam = _WorkerNoiseArgs[0]
+    outArr = numpy.empty(lam.shape, dtype=numpy.float32)
+    _fillNoisyFrame(outArr, *(_WorkerNoiseArgs + (numpy.random.default_rng(seedSeq),)))
+    return outArr
@@ -75,22 +75,49 @@ History:
 2008-10-01 ROwen    Print image stats if verbosity >= 1.
                     Fixed bug in printing of centroid results.
 2009-11-20 ROwen    Modified to use numpy.
+2026-10-18          Sort found stars by counts alone (instead of (counts, CentroidData) tuples).
+                    Added Timing stages.
+                    Added the doStats argument.
+                    Added the tileMem argument, which finds candidate stars in bands of rows
+                    to limit the memory used.
+                    Added findStarsMosaic.
+                    Added the timeBudget and deadline arguments to findStars.
+                    findStars returns the accumulated centroid statistics as imStats.ctrStats
+                    instead of as an extra return value.
+                    findStars returns the out-of-time flag as imStats.isPartial instead of as an extra
+                    return value, so it always returns (centroidData, imStats).
+                    If satMask is None then saturated pixels are found using ccdInfo.satLevel.
+                    The mask may be a PackedMask or RunMask.
+                    The mask may be a MaskIndex, in which case only the probes are median filtered.
+                    Use ImUtil.medianFilter3 and labelBlobs instead of scipy.ndimage,
+                    and fill masked pixels without numpy.ma, so findStars does not import scipy or numpy.ma.
 """
-__all__ = ['findStars']
+__all__ = ['findStars', 'findStarsMosaic']
+
+import math
 
 import numpy
-import scipy.ndimage
-import numpy.ma
 
 from . import Centroid
+from .CompactMask import isCompactMask
+from .MaskIndex import MaskIndex
 from .Constants import DefThresh
 from . import ImUtil
+from . import Timing
 
 def _fmtList(alist):
     """Return "alist[0], alist[1], ..."
     """
     return str(alist)[1:-1]
 
+# approximate working memory per pixel (bytes) for finding candidate stars in bands of rows:
+# filled data, median-filtered data, threshold mask, labels and unmasked values for sky statistics
+_BytesPerTilePixel = 20
+_MinTileRows = 8
+
+# default halo for findStarsMosaic if rad is not specified (pixels)
+_DefMosaicHalo = 32
+
 def _reversed(alist):
     """Return a reversed copy of alist
     """
@@ -98,6 +125,7 @@ def _reversed(alist):
     retval.reverse()
     return retval
 
+@Timing.timed("findStars")
 def findStars(
     data,
     mask,
@@ -108,13 +136,19 @@ def findStars(
     rad = None,
     verbosity = 0,
     doDS9 = False,
+    doStats = False,
+    tileMem = None,
+    timeBudget = None,
+    deadline = None,
 ):
     """Find and centroid stars.
 
     Inputs:
     - data      the image data [i,j]; this is converted to a numpy array of float32, if necessary
     - mask      a mask of invalid data (1 if invalid, 0 if valid); None if no mask.
-    - satMask   a mask of of saturated pixels (1 if saturated, 0 if not); None if no mask.
+    - satMask   a mask of of saturated pixels (1 if saturated, 0 if not); None if no mask,
+                in which case pixels whose value >= ccdInfo.satLevel are treated as saturated
+                (the centroider counts them as it goes, so no mask is needed)
     - ccdInfo   bias, read noise, etc: a PyGuide.CCDInfo object.
     - thresh    determines the point above which pixels are considered data;
                 valid data >= thresh * standard deviation + median
@@ -126,14 +160,36 @@ def findStars(
                 (if doDS9 true) show smoothed image in ds9 frame 3.
     - doDS9     if True, shows current image and other info in ds9 in current frame.
                 For this to work, you must have the RO package installed.
+    - doStats   if True, return centroid search statistics as imStats.ctrStats (see below)
+                and set the stats field of each CentroidData
+    - tileMem   if not None, find candidate stars in bands of rows (with overlap between bands),
+                using approximately this much working memory (bytes), instead of several copies
+                of the full image; the results are identical, but slower.
+                The data is still converted to float32, if necessary, so supply float32 data
+                to avoid making a full copy. If doDS9 and verbosity >= 2, smoothed data is not shown.
+    - timeBudget    maximum time (sec); None if no limit. If specified, candidate stars are centroided
+                in order of decreasing brightness (so the brightest are done first) and, if the time runs out,
+                the remaining candidates are skipped and the last centroid may be partial
+                (see CentroidData.isPartial and imStats.isPartial). Finding the candidates is always completed,
+                as is the centroid of the brightest candidate (though it may be partial).
+    - deadline  time by which to finish (a value of PyGuide.Timing.now()); None if no limit.
+                If timeBudget and deadline are both specified, the earlier applies.
 
     Returns two items:
     - centroidData  a list of centroid information for each star found, in decreasing
                     order of counts. Each element is a PyGuide.CentroidData object.
-    - imStats       background statistics; a PyGuide.ImStats object.
+    - imStats       background statistics; a PyGuide.ImStats object, whose fields also include:
+                    - isPartial: True if the time ran out, so some candidates were skipped
+                      or a centroid is partial (always False if there is no time limit)
+                    - ctrStats: if doStats True, centroid search statistics accumulated over all
+                      candidate stars (including those that failed): a PyGuide.CentroidStats object;
+                      otherwise None
 
     Masks are optional. If specified, they must be the same shape as "data"
     and should be of type Bool. None means no mask (all data is OK).
+    The mask (not satMask) may also be a PackedMask or RunMask (see PyGuide.CompactMask),
+    which is faster if large areas are masked, or a MaskIndex (see PyGuide.MaskIndex),
+    which is faster still; make it once and reuse it for each frame.
 
     Found "stars" are not required to look star-like and so
     are not fit to a stellar profile. However, if the object is not
@@ -145,12 +201,15 @@ def findStars(
     and fiber bundles, where only a fragment of a star may be visible.
     It also handles donut-shaped images.
     """
+    deadline = Timing.getDeadline(timeBudget, deadline)
+
     # Condition the data and mask arrays so that centroid can operate
     # most efficiently on them (better to do it once in advance
     # rather then have centroid do it once for each star).
-    data = Centroid.conditionData(data)
-    mask = Centroid.conditionMask(mask)
-    satMask = Centroid.conditionMask(satMask)
+    with Timing.stage("findStars.condition"):
+        data = Centroid.conditionData(data)
+        mask = Centroid.conditionMask(mask)
+        satMask = Centroid.conditionMask(satMask)
 
     if doDS9:
         ds9Win = ImUtil.openDS9Win()
@@ -161,39 +220,41 @@ def findStars(
         # show masked data in frame 1 and unmasked data in frame 2
         ds9Win.xpaset("frame 1")
         if mask is not None:
-            ds9Win.showArray(data * (mask==0))
+            ds9Win.showArray(data * numpy.logical_not(mask))
         else:
             ds9Win.showArray(data)
         ds9Win.xpaset("frame 2")
         ds9Win.showArray(data)
         ds9Win.xpaset("frame 1")
 
-    # compute background statistics
-    maskedData = numpy.ma.masked_array(data, mask=mask, copy=True)
-    imStats = ImUtil.skyStats(maskedData, thresh)
-    if verbosity >= 1:
-        print("imStats=%s" % (imStats,))
-
-    # get a copy with the median used to fill in masked areas
-    # and apply a filter to get rid of speckle
-    smoothedData = maskedData.filled(imStats.med)
-    scipy.ndimage.median_filter(smoothedData, 3, output=smoothedData)
-    if ds9Win and verbosity >= 2:
-        ds9Win.xpaset("frame 3")
-        ds9Win.showArray(smoothedData)
-        ds9Win.xpaset("frame 1")
-
-    # look for points larger than median + dataCut * stdDev
-    shapeArry = numpy.ones((3,3))
-    labels, numElts = scipy.ndimage.label(smoothedData>imStats.dataCut, shapeArry)
-    smoothedData = None # release the storage
+    # candidates are found using an ordinary mask (the tiled search only needs one band of it at a time);
+    # the centroider uses the mask as given
+    if tileMem is None:
+        candMask = mask.toMask() if isCompactMask(mask) and not isinstance(mask, MaskIndex) else mask
+        imStats, slices = _findCandidates(data, candMask, thresh, verbosity, ds9Win)
+    else:
+        candMask = mask
+        imStats, slices = _findCandidatesTiled(data, mask, thresh, verbosity, tileMem)
     if verbosity >= 2:
-        print("findStars found %s possible stars above dataCut=%s" % (numElts, imStats.dataCut))
+        print("findStars found %s possible stars above dataCut=%s" % (len(slices), imStats.dataCut))
+
+    if deadline is not None:
+        # centroid the brightest candidates first, in case time runs out
+        with Timing.stage("findStars.sortCandidates"):
+            slices = _sortByBrightness(data, candMask, slices, imStats.med)
 
     # examine the candidate stars and compute centroids
-    countsCentroidList = []
-    slices = scipy.ndimage.find_objects(labels)
-    for ijSlice in slices:
+    centroidList = []
+    isPartial = False
+    if doStats:
+        ctrStats = Centroid.CentroidStats(nCentroids=0)
+    for candInd, ijSlice in enumerate(slices):
+        if deadline is not None and candInd > 0 and Timing.now() >= deadline:
+            if verbosity >= 1:
+                print("findStars warning: out of time; skipping %s of %s candidate stars" % \
+                    (len(slices) - candInd, len(slices)))
+            isPartial = True
+            break
         ijSize = [slc.stop - slc.start for slc in ijSlice]
         ijCtrInd = [(slc.stop + slc.start) / 2.0 for slc in ijSlice]
         xyCtrGuess = ImUtil.xyPosFromIJPos(ijCtrInd)
@@ -230,13 +291,19 @@ def findStars(
             ccdInfo = ccdInfo,
             verbosity = verbosity,
 #           checkSig = (False, True), # check for usable signal only after centroiding
+            doStats = doStats,
+            deadline = deadline,
         )
+        if doStats:
+            ctrStats += ctrData.stats
+        if ctrData.isPartial:
+            isPartial = True
         if not ctrData.isOK:
             if verbosity >= 1:
                 print("findStars warning: centroid at %s with rad=%s failed: %s" % (xyCtrGuess, actRad, ctrData.msgStr))
             continue
 
-        countsCentroidList.append((ctrData.counts, ctrData))
+        centroidList.append(ctrData)
 
         if ds9Win:
             # display x showing centroid
@@ -245,9 +312,7 @@ def findStars(
 
 
     # sort by decreasing counts
-    countsCentroidList.sort()
-    countsCentroidList.reverse()
-    centroidList = [cc[1] for cc in countsCentroidList]
+    centroidList.sort(key=lambda ctrData: ctrData.counts, reverse=True)
     if verbosity >= 2:
         print("findStars returning data for %s stars:" % len(centroidList))
         print("x ctr\ty ctr\tx err\ty err\t    pixels\tcounts\tradius")
@@ -257,4 +322,323 @@ def findStars(
                  cd.xyErr[0], cd.xyErr[1],
                  cd.pix, cd.counts, cd.rad)
             )
+        if doStats:
+            print("findStars centroid statistics: %s" % (ctrStats,))
+    imStats.isPartial = isPartial
+    if doStats:
+        imStats.ctrStats = ctrStats
     return centroidList, imStats
+
+
+def _sortByBrightness(data, mask, slices, sky):
+    """Return candidate star slices sorted by decreasing brightness
+
+    Inputs:
+    - data      image data
+    - mask      mask of invalid data, or None
+    - slices    list of (i slice, j slice) bounding each candidate star
+    - sky       sky level
+
+    Brightness is the sum of (data - sky) over the unmasked pixels of the bounding box.
+    """
+    brightList = []
+    for ijSlice in slices:
+        subData = data[ijSlice]
+        if mask is None:
+            brightList.append(numpy.sum(subData, dtype=numpy.float64) - (sky * subData.size))
+        else:
+            subValid = numpy.logical_not(mask[ijSlice])
+            brightList.append(numpy.sum(numpy.where(subValid, subData, 0), dtype=numpy.float64) \
+                - (sky * numpy.sum(subValid)))
+    return [slices[ind] for ind in numpy.argsort(brightList, kind="stable")[::-1]]
+
+
+def _findCandidates(data, mask, thresh, verbosity, ds9Win):
+    """Find candidate stars; return imStats, slices (the i,j bounding box of each candidate)
+
+    If mask is a MaskIndex then only the probes are median filtered; the results are identical
+    because the rest of the filled data is uniformly the median (see MaskIndex.filterSlices).
+    """
+    if isinstance(mask, MaskIndex):
+        return _findCandidatesInProbes(data, mask, thresh, verbosity, ds9Win)
+
+    # compute background statistics
+    with Timing.stage("findStars.skyStats"):
+        if mask is None:
+            imStats = ImUtil.skyStats(data, thresh)
+        else:
+            imStats = ImUtil.skyStats(data[numpy.logical_not(mask)], thresh)
+    if verbosity >= 1:
+        print("imStats=%s" % (imStats,))
+
+    # get a copy with the median used to fill in masked areas
+    # and apply a filter to get rid of speckle
+    with Timing.stage("findStars.medianFilter"):
+        smoothedData = numpy.array(data, dtype=numpy.float32, copy=True)
+        if mask is not None:
+            smoothedData[mask] = imStats.med
+        ImUtil.medianFilter3(smoothedData, out=smoothedData)
+    return imStats, _labelCandidates(smoothedData, imStats, ds9Win, verbosity)
+
+def _findCandidatesInProbes(data, maskIndex, thresh, verbosity, ds9Win):
+    """Find candidate stars using a MaskIndex; return imStats, slices (as per _findCandidates)
+    """
+    with Timing.stage("findStars.skyStats"):
+        imStats = ImUtil.skyStats(data[maskIndex.valid], thresh)
+    if verbosity >= 1:
+        print("imStats=%s" % (imStats,))
+
+    with Timing.stage("findStars.medianFilter"):
+        filledData = numpy.array(data, copy=True)
+        filledData[maskIndex.mask] = imStats.med
+        smoothedData = filledData.copy()
+        for inSlices, outSlices, subSlices in maskIndex.filterSlices:
+            smoothedData[outSlices] = ImUtil.medianFilter3(filledData[inSlices])[subSlices]
+        del(filledData)
+    return imStats, _labelCandidates(smoothedData, imStats, ds9Win, verbosity)
+
+def _labelCandidates(smoothedData, imStats, ds9Win, verbosity):
+    """Return the i,j bounding box of each blob of smoothed data above imStats.dataCut
+    """
+    if ds9Win and verbosity >= 2:
+        ds9Win.xpaset("frame 3")
+        ds9Win.showArray(smoothedData)
+        ds9Win.xpaset("frame 1")
+
+    # look for points larger than median + dataCut * stdDev
+    with Timing.stage("findStars.label"):
+        return ImUtil.labelBlobs(smoothedData>imStats.dataCut)[1]
+
+def _findCandidatesTiled(data, mask, thresh, verbosity, tileMem):
+    """Find candidate stars in bands of rows; return imStats, slices (as per _findCandidates)
+
+    The results are identical to those of _findCandidates:
+    - Sky statistics are computed from the unmasked data one band at a time (see ImUtil.skyStatsFromTiles).
+    - Each band is median filtered with one extra row on each side (a halo),
+      which makes the filtered band identical to the same rows of the filtered full image.
+    - Blobs are labelled in each band, then blobs that touch across the seam between bands are merged.
+      Candidates are returned in the same order as ImUtil.labelBlobs numbers them
+      (the order of each blob's first pixel, scanning rows in order).
+    """
+    numRows, numCols = data.shape
+    bandRows = max(_MinTileRows, int(tileMem) // max(1, numCols * _BytesPerTilePixel))
+    bandBegList = list(range(0, numRows, bandRows))
+
+    # compute background statistics
+    def getTileIter():
+        for begRow in bandBegList:
+            dataBand = data[begRow:begRow + bandRows]
+            if mask is None:
+                yield dataBand.ravel()
+            else:
+                yield dataBand[numpy.logical_not(mask[begRow:begRow + bandRows])]
+    with Timing.stage("findStars.skyStats"):
+        imStats = ImUtil.skyStatsFromTiles(getTileIter, thresh)
+    if verbosity >= 1:
+        print("imStats=%s" % (imStats,))
+
+    parentList = []    # union-find parent of each label (labels are numbered from 0 across all bands)
+    bboxList = []       # [begI, endI, begJ, endJ] of each label
+    prevLastRowLabels = None # labels of last row of previous band (numbered across all bands), or None
+
+    def findRoot(label):
+        while parentList[label] != label:
+            parentList[label] = parentList[parentList[label]]
+            label = parentList[label]
+        return label
+
+    for begRow in bandBegList:
+        endRow = min(begRow + bandRows, numRows)
+        # median filter the band with a halo of one row on each side
+        with Timing.stage("findStars.medianFilter"):
+            haloBegRow = max(begRow - 1, 0)
+            haloEndRow = min(endRow + 1, numRows)
+            smoothedBand = numpy.array(data[haloBegRow:haloEndRow], dtype=numpy.float32)
+            if mask is not None:
+                smoothedBand[mask[haloBegRow:haloEndRow]] = imStats.med
+            ImUtil.medianFilter3(smoothedBand, out=smoothedBand)
+            smoothedBand = smoothedBand[begRow - haloBegRow:endRow - haloBegRow]
+
+        with Timing.stage("findStars.label"):
+            labels, bandSlices = ImUtil.labelBlobs(smoothedBand>imStats.dataCut)
+            smoothedBand = None # release the storage
+            labelOffset = len(parentList) - 1 # band label 1 -> labelOffset + 1 = len(parentList)
+            for ijSlice in bandSlices:
+                parentList.append(len(parentList))
+                bboxList.append([ijSlice[0].start + begRow, ijSlice[0].stop + begRow, ijSlice[1].start, ijSlice[1].stop])
+
+            # merge blobs that touch across the seam with the previous band (8-connectivity)
+            firstRowLabels = numpy.where(labels[0] > 0, labels[0] + labelOffset, -1)
+            if prevLastRowLabels is not None:
+                for shift in (-1, 0, 1):
+                    # compare prevLastRowLabels[j] to firstRowLabels[j + shift]
+                    prevLabels = prevLastRowLabels[max(0, -shift):numCols - max(0, shift)]
+                    currLabels = firstRowLabels[max(0, shift):numCols - max(0, -shift)]
+                    touching = numpy.logical_and(prevLabels >= 0, currLabels >= 0)
+                    for prevLabel, currLabel in set(zip(prevLabels[touching], currLabels[touching])):
+                        prevRoot = findRoot(prevLabel)
+                        currRoot = findRoot(currLabel)
+                        if prevRoot != currRoot:
+                            # keep the lowest label as the root, so roots are in the same order as full-image labels
+                            parentList[max(prevRoot, currRoot)] = min(prevRoot, currRoot)
+            prevLastRowLabels = numpy.where(labels[-1] > 0, labels[-1] + labelOffset, -1)
+            labels = None
+
+    # combine the bounding boxes of merged blobs
+    rootBBoxDict = {}
+    for label in range(len(parentList)):
+        root = findRoot(label)
+        bbox = bboxList[label]
+        rootBBox = rootBBoxDict.get(root)
+        if rootBBox is None:
+            rootBBoxDict[root] = list(bbox)
+        else:
+            rootBBox[0] = min(rootBBox[0], bbox[0])
+            rootBBox[1] = max(rootBBox[1], bbox[1])
+            rootBBox[2] = min(rootBBox[2], bbox[2])
+            rootBBox[3] = max(rootBBox[3], bbox[3])
+    slices = [(slice(bbox[0], bbox[1]), slice(bbox[2], bbox[3]))
+        for root, bbox in sorted(rootBBoxDict.items())]
+    return imStats, slices
+
+def findStarsMosaic(
+    data,
+    mask,
+    satMask,
+    ccdInfo,
+    thresh = DefThresh,
+    radMult = 1.0,
+    rad = None,
+    tileSize = 1024,
+    halo = None,
+    dupTol = 1.0,
+    nWorkers = 0,
+    executor = None,
+    verbosity = 0,
+):
+    """Find and centroid stars in a large image (e.g. a mosaic) by processing tiles in parallel.
+
+    The image is divided into a grid of tiles. Each tile is expanded by a halo (an overlap
+    with neighboring tiles) and processed independently by findStars, so each tile has its
+    own background statistics (appropriate for mosaics whose detectors differ).
+    A star is kept only if its centroid lies in the tile proper (not the halo),
+    and a star within dupTol of a brighter star from a different tile is rejected as a duplicate.
+
+    Inputs:
+    - data, mask, satMask, ccdInfo, thresh, radMult, rad: as for findStars
+    - tileSize  size of each tile (pixels); an int or an (i, j) pair
+    - halo      width of the overlap added to each side of each tile (pixels);
+                it should be at least the largest centroid radius; if None then
+                ceil(rad) + 2 if rad is specified, else 32
+    - dupTol    stars from different tiles closer than this (pixels) are considered duplicates
+    - nWorkers  number of worker processes; 0 for one per CPU; 1 to process tiles serially
+                in this process; ignored if executor is specified
+    - executor  a concurrent.futures.Executor on which to process the tiles; None to create
+                a ProcessPoolExecutor (or none, if nWorkers is 1)
+    - verbosity 0: no output, 1: print warnings, 2: print information
+
+    Returns two items:
+    - centroidData  a list of centroid information for each star found, in decreasing
+                    order of counts. Each element is a PyGuide.CentroidData object.
+    - imStatsList   background statistics for each tile (a list of PyGuide.ImStats objects),
+                    with tiles in order of increasing i, then j
+
+    Warning: a star whose centroid radius exceeds the halo may be measured less accurately
+    than by findStars, and blobs larger than the halo may be found more than once.
+    """
+    data = Centroid.conditionData(data)
+    mask = Centroid.conditionMask(mask)
+    satMask = Centroid.conditionMask(satMask)
+    if halo is None:
+        halo = int(math.ceil(rad)) + 2 if rad is not None else _DefMosaicHalo
+    try:
+        tileShape = [int(tileSize[ii]) for ii in (0, 1)]
+    except TypeError:
+        tileShape = [int(tileSize)] * 2
+    if min(tileShape) < 1:
+        raise ValueError("tileSize=%r must be positive" % (tileSize,))
+
+    # list of (tile index, core begInd, core endInd, halo begInd, halo endInd)
+    tileList = []
+    for begI in range(0, data.shape[0], tileShape[0]):
+        for begJ in range(0, data.shape[1], tileShape[1]):
+            begInd = (begI, begJ)
+            endInd = [min(begInd[ii] + tileShape[ii], data.shape[ii]) for ii in (0, 1)]
+            haloBegInd = [max(begInd[ii] - halo, 0) for ii in (0, 1)]
+            haloEndInd = [min(endInd[ii] + halo, data.shape[ii]) for ii in (0, 1)]
+            tileList.append((len(tileList), begInd, endInd, haloBegInd, haloEndInd))
+
+    def getArgs(tileInfo):
+        tileInd, begInd, endInd, haloBegInd, haloEndInd = tileInfo
+        ijSlice = (slice(haloBegInd[0], haloEndInd[0]), slice(haloBegInd[1], haloEndInd[1]))
+        subMask = mask[ijSlice] if mask is not None else None
+        subSatMask = satMask[ijSlice] if satMask is not None else None
+        return (tileInd, data[ijSlice], subMask, subSatMask, ccdInfo, thresh, radMult, rad, verbosity)
+
+    ownExecutor = None
+    if executor is None and nWorkers != 1 and len(tileList) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ownExecutor = ProcessPoolExecutor(max_workers=nWorkers or None)
+    try:
+        if executor is None:
+            resultList = [_findStarsTile(getArgs(tileInfo)) for tileInfo in tileList]
+        else:
+            futureList = [executor.submit(_findStarsTile, getArgs(tileInfo)) for tileInfo in tileList]
+            resultList = [future.result() for future in futureList]
+    finally:
+        if ownExecutor is not None:
+            ownExecutor.shutdown()
+
+    # convert positions to full-image coordinates and keep stars centered in the tile proper
+    imStatsList = [None] * len(tileList)
+    candList = []
+    for tileInd, tileCtrDataList, imStats in resultList:
+        imStatsList[tileInd] = imStats
+        begInd, endInd, haloBegInd = tileList[tileInd][1:4]
+        for ctrData in tileCtrDataList:
+            ctrData.xyCtr = [ctrData.xyCtr[0] + haloBegInd[1], ctrData.xyCtr[1] + haloBegInd[0]]
+            ijInd = ImUtil.ijIndFromXYPos(ctrData.xyCtr)
+            if begInd[0] <= ijInd[0] < endInd[0] and begInd[1] <= ijInd[1] < endInd[1]:
+                candList.append((tileInd, ctrData))
+
+    # reject duplicates (stars from different tiles within dupTol of a brighter star),
+    # using a grid of cells of size dupTol to find nearby stars
+    candList.sort(key=lambda cand: cand[1].counts, reverse=True)
+    cellSize = max(float(dupTol), 1.0e-6)
+    cellDict = {}
+    centroidList = []
+    for tileInd, ctrData in candList:
+        cellInd = [int(math.floor(ctrData.xyCtr[ii] / cellSize)) for ii in (0, 1)]
+        isDup = False
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for otherTileInd, otherCtrData in cellDict.get((cellInd[0] + di, cellInd[1] + dj), ()):
+                    if otherTileInd != tileInd and math.hypot(ctrData.xyCtr[0] - otherCtrData.xyCtr[0],
+                        ctrData.xyCtr[1] - otherCtrData.xyCtr[1]) < dupTol:
+                        isDup = True
+        if isDup:
+            if verbosity >= 1:
+                print("findStarsMosaic warning: rejecting duplicate star at %s" % (ctrData.xyCtr,))
+            continue
+        cellDict.setdefault(tuple(cellInd), []).append((tileInd, ctrData))
+        centroidList.append(ctrData)
+
+    if verbosity >= 2:
+        print("findStarsMosaic found %s stars in %s tiles" % (len(centroidList), len(tileList)))
+    return centroidList, imStatsList
+
+def _findStarsTile(argTuple):
+    """Find stars in one tile for findStarsMosaic; return (tile index, centroid data list, imStats)
+    """
+    tileInd, data, mask, satMask, ccdInfo, thresh, radMult, rad, verbosity = argTuple
+    centroidList, imStats = findStars(
+        data = data,
+        mask = mask,
+        satMask = satMask,
+        ccdInfo = ccdInfo,
+        thresh = thresh,
+        radMult = radMult,
+        rad = rad,
+        verbosity = verbosity,
+    )
+    return tileInd, centroidList, imStats
@@ -0,0 +1,228 @@
+from __future__ import division, absolute_import, print_function
+"""Load images from FITS files with minimal copying.
+
+loadFrame memory-maps the image HDU, so only the pixels you use are read from disk,
+trims it to DATASEC as a view (no copy), and returns a Frame object.
+The Frame applies BZERO and BSCALE lazily: the scaled float32 image is computed
+in one pass the first time you ask for it, in exactly the form that centroid,
+findStars and starShape want, so those routines use it without further copying.
+
+Requires pyfits (or astropy).
+
+History:
+2026-10-18          First version. parseDataSec moved here from scripts/doPyGuide.py.
+"""
+__all__ = ["Frame", "loadFrame", "loadMask", "parseDataSec"]
+
+import sys
+
+import numpy
+
+# number of pixels to scale at a time (small enough to stay in cache)
+_ScaleChunkSize = 2**16
+
+def _getFitsModule():
+    """Return the pyfits module, or astropy.io.fits if pyfits is not available"""
+    try:
+        import pyfits
+    except ImportError:
+        from astropy.io import fits as pyfits
+    return pyfits
+
+def parseDataSec(dataSecStr):
+    """Parse DATASEC and return (beg i, end+1 i, beg j, end+1 j)
+
+    DATASEC has an origin of 1 and the end is inclusive (FITS standard) and has x and y swapped
+    The return value has an origin of 0 and the end is exclusive (numpy/C++ standard)
+
+    Return None if DATASEC is None or cannot be parsed.
+
+    Input:
+    - dataSecStr: a DATASEC in the form [begx:endx,begy:endy]; if None then None is returned
+
+    On error prints a message to stderr and returns None
+    """
+    if dataSecStr is None:
+        return None
+    try:
+        trimStr = dataSecStr[1:-1]
+        xyStrList = trimStr.split(",")
+        if len(xyStrList) != 2:
+            raise RuntimeError("Could not split %s" % (trimStr,))
+        xyStrList.reverse()
+        retValList = []
+        for strList in xyStrList:
+            begEndStrList = strList.split(":")
+            if len(begEndStrList) != 2:
+                raise RuntimeError("Could not split %s" % (begEndStrList))
+            retValList += [int(begEndStrList[0]) - 1, int(begEndStrList[1])]
+        return retValList
+    except Exception as e:
+        sys.stderr.write("Could not parse %r; error=%s" % (dataSecStr, e))
+        return None
+
+def _applyDataSec(arr, dataSec):
+    """Return a view of arr trimmed to dataSec (as returned by parseDataSec); arr if dataSec is None"""
+    if dataSec is None:
+        return arr
+    return arr[dataSec[0]:dataSec[1], dataSec[2]:dataSec[3]]
+
+def loadMask(path, dataSec=None):
+    """Load a mask from a FITS file and return it as a bool array (True where the FITS data > 0.1)
+
+    Inputs:
+    - path      path to FITS file; the mask is read from the primary HDU
+    - dataSec   region to which to trim the mask, as returned by parseDataSec;
+                normally the dataSec of the associated image; None for the full mask
+    """
+    fits = _getFitsModule()
+    hduList = fits.open(path, memmap=True)
+    try:
+        return _applyDataSec(hduList[0].data, dataSec) > 0.1
+    finally:
+        hduList.close()
+
+def loadFrame(
+    imPath,
+    maskPath = None,
+    satMaskPath = None,
+    useDataSec = True,
+):
+    """Load an image (and optionally masks) from FITS files and return a Frame.
+
+    Inputs:
+    - imPath        path to image FITS file; the image is read from the primary HDU
+    - maskPath      path to FITS file containing a mask of invalid data (> 0.1 if invalid),
+                    or None if no mask
+    - satMaskPath   path to FITS file containing a mask of saturated pixels (> 0.1 if saturated),
+                    or None if no mask
+    - useDataSec    if True and the image header contains DATASEC
+                    then the image and masks are trimmed to DATASEC (as views)
+
+    The image is memory-mapped and the file remains open until the Frame
+    (and any views of its rawData) are released.
+    """
+    fits = _getFitsModule()
+    hduList = fits.open(imPath, memmap=True, do_not_scale_image_data=True)
+    hdu = hduList[0]
+    header = hdu.header
+    rawData = hdu.data
+    if rawData is None or rawData.ndim != 2:
+        raise ValueError("%s does not contain a 2-dimensional image in its primary HDU" % (imPath,))
+
+    if useDataSec:
+        dataSec = parseDataSec(header.get("DATASEC"))
+    else:
+        dataSec = None
+
+    if maskPath:
+        mask = loadMask(maskPath, dataSec)
+    else:
+        mask = None
+    if satMaskPath:
+        satMask = loadMask(satMaskPath, dataSec)
+    else:
+        satMask = None
+
+    return Frame(
+        rawData = _applyDataSec(rawData, dataSec),
+        bzero = header.get("BZERO", 0),
+        bscale = header.get("BSCALE", 1),
+        mask = mask,
+        satMask = satMask,
+        header = header,
+        dataSec = dataSec,
+    )
+
+
+class Frame(object):
+    """An image and its masks
+
+    Inputs:
+    - rawData   unscaled 2-d image data [i,j], e.g. a memory-mapped view of a FITS image;
+                it is never modified
+    - bzero     image data = (rawData * bscale) + bzero
+    - bscale    see bzero
+    - mask      a mask of invalid data (1 if invalid, 0 if valid); None if no mask
+    - satMask   a mask of of saturated pixels (1 if saturated, 0 if not); None if no mask
+    - header    the FITS header of the image, if known, else None
+    - dataSec   the region of the original image contained in rawData,
+                as returned by parseDataSec; None if the full image
+
+    Attributes: the inputs, plus:
+    - data      the image data, scaled by bscale and bzero: a C-contiguous float32 array.
+                It is computed the first time you access it, in one pass, and then cached.
+                It is the form centroid, findStars and starShape want,
+                so passing it to them involves no further copying.
+    - shape     shape of the image (rawData.shape)
+
+    A Frame may also be used wherever an array is wanted (numpy.asarray(frame) returns frame.data),
+    so you may pass a Frame directly as the data argument of centroid, findStars, etc.
+    """
+    __slots__ = ("rawData", "bzero", "bscale", "mask", "satMask", "header", "dataSec", "_data")
+
+    def __init__(self,
+        rawData,
+        bzero = 0,
+        bscale = 1,
+        mask = None,
+        satMask = None,
+        header = None,
+        dataSec = None,
+    ):
+        if rawData.ndim != 2:
+            raise ValueError("rawData must be 2-dimensional")
+        for maskName, maskArr in (("mask", mask), ("satMask", satMask)):
+            if maskArr is not None and maskArr.shape != rawData.shape:
+                raise ValueError("%s shape=%s != image shape=%s" % (maskName, maskArr.shape, rawData.shape))
+        self.rawData = rawData
+        self.bzero = bzero
+        self.bscale = bscale
+        self.mask = mask
+        self.satMask = satMask
+        self.header = header
+        self.dataSec = dataSec
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = _scaleData(self.rawData, bzero=self.bzero, bscale=self.bscale)
+        return self._data
+
+    @property
+    def shape(self):
+        return self.rawData.shape
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.data
+        if dtype is not None and numpy.dtype(dtype) != data.dtype:
+            return data.astype(dtype)
+        if copy:
+            return data.copy()
+        return data
+
+    def __repr__(self):
+        return "%s(shape=%s, bzero=%s, bscale=%s, dataSec=%s)" % \
+            (self.__class__.__name__, self.shape, self.bzero, self.bscale, self.dataSec)
+
+
+def _scaleData(rawData, bzero, bscale):
+    """Return rawData * bscale + bzero as a new C-contiguous float32 array.
+
+    The work is done a chunk of rows at a time, so each chunk is converted,
+    scaled and offset while it is in cache and no full-size temporary array is needed.
+    Handles any input byte order (FITS data is big-endian) and memory layout (e.g. a DATASEC view).
+    """
+    outArr = numpy.empty(rawData.shape, dtype=numpy.float32)
+    if outArr.size == 0:
+        return outArr
+    rowsPerChunk = max(1, _ScaleChunkSize // rawData.shape[1])
+    for begRow in range(0, rawData.shape[0], rowsPerChunk):
+        outChunk = outArr[begRow:begRow + rowsPerChunk]
+        outChunk[...] = rawData[begRow:begRow + rowsPerChunk]
+        if bscale != 1:
+            outChunk *= bscale
+        if bzero != 0:
+            outChunk += bzero
+    return outArr
@@ -0,0 +1,404 @@
+from __future__ import division, absolute_import, print_function
+"""A ring of frames in shared memory, for handing frames from a camera process to PyGuide processes.
+
+Writing frames to FITS files, or pickling them, costs a copy (or two) and a system call or two
+per frame. A FrameRing instead holds a fixed number of frame slots (all the same shape and type)
+in one block of shared memory (multiprocessing.shared_memory). The producer (e.g. the camera
+reader) writes each frame into the next slot, with metadata and a sequence number;
+consumers read the most recent frame as a numpy array that is a view of the shared memory
+(no copy), which may be passed directly to centroid, findStars, etc.
+
+Consumers always get the latest frame (older unread frames are skipped), which is what
+a real-time guider wants. The producer never waits for consumers, so a slot may be overwritten
+while a consumer is still using it (after nSlots - 1 newer frames have been written).
+Each slot is protected by a sequence lock: a counter that is odd while the slot is being written;
+RingFrame.isValid reports whether the slot has been rewritten since the frame was read,
+so check it after processing the frame and discard the result if it is False.
+Use enough slots that this is rare.
+
+Example (producer):
+    ring = FrameRing.create(shape=(1024, 1024), dtype=numpy.float32, nSlots=4)
+    # tell consumers ring.name
+    while True:
+        with ring.writeSlot(meta=dict(expTime=expTime)) as slotData:
+            camera.readInto(slotData)
+    ring.close()
+    ring.unlink()
+
+Example (consumer):
+    ring = FrameRing.attach(name)
+    seq = 0
+    while True:
+        frame = ring.getLatest(afterSeq=seq)
+        ctrDataList, imStats = PyGuide.findStars(frame.data, mask, None, ccdInfo)
+        if frame.isValid():
+            report(frame.seq, ctrDataList)
+        seq = frame.seq
+
+There must be only one producer. The sequence lock relies on the producer's writes
+to shared memory becoming visible to other processes in the order they were made,
+which is true of x86 processors; on processors with weaker memory ordering
+a consumer could, rarely, see part of an older frame.
+
+LocalProducer writes frames from an iterable (e.g. FakeData.iterNoisyFrames) to a ring
+in a background thread, as a stand-in for a camera process, for testing.
+
+Requires Python 3.8 or later (multiprocessing.shared_memory). This module is not imported
+by "import PyGuide"; use "from PyGuide import FrameRing".
+
+History:
+2026-10-18          First version. Moved attachSharedMemory and closeSharedMemory here from Server.
+                    attachSharedMemory no longer replaces resource_tracker.register while attaching
+                    (which stopped other threads from registering shared memory they created).
+"""
+__all__ = ["FrameRing", "RingFrame", "LocalProducer", "attachSharedMemory", "closeSharedMemory"]
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+import numpy
+
+# ring header: identifies the ring and describes the slots
+_Magic = 0x474e495246475950 # "PYGFRING" as little-endian uint64
+_Version = 1
+_HeaderDType = numpy.dtype([
+    ("magic", "<u8"),
+    ("version", "<u4"),
+    ("nSlots", "<u4"),
+    ("nRows", "<u4"),
+    ("nCols", "<u4"),
+    ("metaSize", "<u4"),
+    ("pad", "<u4"),
+    ("dtype", "S16"),
+    ("lastSeq", "<u8"),
+])
+_Align = 64
+
+def _alignUp(nBytes):
+    return (nBytes + _Align - 1) // _Align * _Align
+
+
+class RingFrame(object):
+    """A frame read from a FrameRing
+
+    Attributes:
+    - seq       sequence number of the frame (the first frame written is 1)
+    - timestamp time the frame was written (time.time(), unless the producer specified another time)
+    - meta      metadata (a dict) specified by the producer
+    - data      the frame: a read-only numpy array that is a view of the shared memory (not a copy);
+                it is overwritten when the slot is reused, so do not keep it (copy it if necessary)
+    """
+    __slots__ = ("seq", "timestamp", "meta", "data", "_ring", "_slotInd", "_lockVal")
+
+    def __init__(self, ring, slotInd, lockVal, seq, timestamp, meta, data):
+        self._ring = ring
+        self._slotInd = slotInd
+        self._lockVal = lockVal
+        self.seq = seq
+        self.timestamp = timestamp
+        self.meta = meta
+        self.data = data
+
+    def isValid(self):
+        """Return True if the frame's slot has not been overwritten since the frame was read"""
+        return int(self._ring._slotLock[self._slotInd]) == self._lockVal
+
+    def __repr__(self):
+        return "%s(seq=%s, timestamp=%s, meta=%s)" % (self.__class__.__name__, self.seq, self.timestamp, self.meta)
+
+
+class FrameRing(object):
+    """A ring of frame slots in shared memory; use create or attach to make one.
+
+    Attributes:
+    - name      name of the shared memory block (give this to attach)
+    - shape     shape of each frame
+    - dtype     data type of each frame (a numpy.dtype)
+    - nSlots    number of slots
+    - metaSize  maximum size of the metadata of each frame (bytes, as JSON)
+    - isOwner   True if this object created the shared memory
+    """
+    def __init__(self, shm, isOwner):
+        """Use create or attach instead of calling this directly"""
+        self._shm = shm
+        self.isOwner = bool(isOwner)
+        self.name = shm.name
+        buf = shm.buf
+        self._header = numpy.ndarray((), dtype=_HeaderDType, buffer=buf)
+        if int(self._header["magic"]) != _Magic:
+            raise ValueError("shared memory %r is not a FrameRing" % (self.name,))
+        if int(self._header["version"]) != _Version:
+            raise ValueError("FrameRing %r has version %s; need %s" % (self.name, self._header["version"], _Version))
+        self.nSlots = int(self._header["nSlots"])
+        self.shape = (int(self._header["nRows"]), int(self._header["nCols"]))
+        self.metaSize = int(self._header["metaSize"])
+        self.dtype = numpy.dtype(self._header["dtype"].item().decode("ascii"))
+        self._lastSeq = self._header["lastSeq"][...]
+
+        # per-slot arrays: sequence lock, sequence number, timestamp, metadata length and metadata
+        offset = _alignUp(_HeaderDType.itemsize)
+        self._slotLock = numpy.ndarray((self.nSlots,), dtype="<u8", buffer=buf, offset=offset)
+        offset += 8 * self.nSlots
+        self._slotSeq = numpy.ndarray((self.nSlots,), dtype="<u8", buffer=buf, offset=offset)
+        offset += 8 * self.nSlots
+        self._slotTimestamp = numpy.ndarray((self.nSlots,), dtype="<f8", buffer=buf, offset=offset)
+        offset += 8 * self.nSlots
+        self._slotMetaLen = numpy.ndarray((self.nSlots,), dtype="<u8", buffer=buf, offset=offset)
+        offset = _alignUp(offset + 8 * self.nSlots)
+        self._slotMeta = numpy.ndarray((self.nSlots, self.metaSize), dtype=numpy.uint8, buffer=buf, offset=offset)
+        offset = _alignUp(offset + self.nSlots * self.metaSize)
+        slotBytes = _alignUp(self.shape[0] * self.shape[1] * self.dtype.itemsize)
+        self._slotData = [
+            numpy.ndarray(self.shape, dtype=self.dtype, buffer=buf, offset=offset + slotInd * slotBytes)
+            for slotInd in range(self.nSlots)
+        ]
+        self._readData = []
+        for slotData in self._slotData:
+            readData = slotData.view()
+            readData.flags.writeable = False
+            self._readData.append(readData)
+
+    @classmethod
+    def create(cls, shape, dtype=numpy.float32, nSlots=4, metaSize=1024, name=None):
+        """Create a new FrameRing (normally done by the producer)
+
+        Inputs:
+        - shape     shape of each frame (nRows, nCols)
+        - dtype     data type of each frame; numpy.float32 is best for centroid and findStars
+                    (other types are converted, which makes a copy)
+        - nSlots    number of slots; must be >= 2
+        - metaSize  maximum size of the metadata of each frame (bytes, as JSON)
+        - name      name of the shared memory block; None for a unique name
+
+        The creator should call unlink when the ring is no longer wanted.
+        """
+        from multiprocessing import shared_memory
+        shape = tuple(int(val) for val in shape)
+        dtype = numpy.dtype(dtype)
+        nSlots = int(nSlots)
+        metaSize = _alignUp(int(metaSize))
+        if len(shape) != 2 or min(shape) < 1:
+            raise ValueError("shape=%s must be 2 positive values" % (shape,))
+        if nSlots < 2:
+            raise ValueError("nSlots=%s must be >= 2" % (nSlots,))
+        dtypeStr = dtype.str.encode("ascii")
+        if dtype.hasobject or len(dtypeStr) > _HeaderDType["dtype"].itemsize:
+            raise ValueError("unsupported dtype %s" % (dtype,))
+
+        nBytes = _alignUp(_HeaderDType.itemsize) + _alignUp(4 * 8 * nSlots) + nSlots * metaSize \
+            + nSlots * _alignUp(shape[0] * shape[1] * dtype.itemsize)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=nBytes)
+        header = numpy.ndarray((), dtype=_HeaderDType, buffer=shm.buf)
+        header[...] = numpy.zeros((), dtype=_HeaderDType)
+        header["version"] = _Version
+        header["nSlots"] = nSlots
+        header["nRows"], header["nCols"] = shape
+        header["metaSize"] = metaSize
+        header["dtype"] = dtypeStr
+        header["magic"] = _Magic
+        del header
+        return cls(shm, isOwner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to an existing FrameRing (normally done by a consumer)
+
+        Inputs:
+        - name      name of the shared memory block (the name attribute of the ring)
+
+        Raises ValueError if the shared memory is not a FrameRing.
+        """
+        return cls(attachSharedMemory(name), isOwner=False)
+
+    @property
+    def lastSeq(self):
+        """Sequence number of the most recently written frame; 0 if none"""
+        return int(self._lastSeq)
+
+    @contextlib.contextmanager
+    def writeSlot(self, meta=None, timestamp=None):
+        """Context manager that returns the next slot's data array, for the producer to fill in;
+        the frame is published (made visible to getLatest) when the context exits normally.
+
+        Inputs:
+        - meta      metadata: a dict that can be encoded as JSON in at most metaSize bytes; None if none
+        - timestamp time of the frame; None for time.time() when the context exits
+
+        If the context exits with an exception then the slot is left empty and the frame is not published.
+        This allows a camera reader to read directly into the ring, with no extra copy.
+        """
+        metaBytes = json.dumps(meta if meta is not None else {}).encode("utf-8")
+        if len(metaBytes) > self.metaSize:
+            raise ValueError("meta is %s bytes as JSON; must be <= %s" % (len(metaBytes), self.metaSize))
+        seq = self.lastSeq + 1
+        slotInd = seq % self.nSlots
+        self._slotLock[slotInd] += 1 # odd: slot is being written
+        self._slotSeq[slotInd] = 0
+        isOK = False
+        try:
+            yield self._slotData[slotInd]
+            isOK = True
+        finally:
+            if isOK:
+                self._slotSeq[slotInd] = seq
+                self._slotTimestamp[slotInd] = time.time() if timestamp is None else timestamp
+                self._slotMetaLen[slotInd] = len(metaBytes)
+                self._slotMeta[slotInd, 0:len(metaBytes)] = numpy.frombuffer(metaBytes, dtype=numpy.uint8)
+            self._slotLock[slotInd] += 1 # even: slot is stable
+            if isOK:
+                self._lastSeq[...] = seq
+
+    def write(self, data, meta=None, timestamp=None):
+        """Write a frame to the next slot and publish it; return its sequence number
+
+        Inputs:
+        - data      the frame; it must have the ring's shape and is converted to the ring's type
+        - meta, timestamp: see writeSlot
+        """
+        if numpy.shape(data) != self.shape:
+            raise ValueError("data shape=%s != ring shape=%s" % (numpy.shape(data), self.shape))
+        with self.writeSlot(meta=meta, timestamp=timestamp) as slotData:
+            slotData[...] = data
+        return self.lastSeq
+
+    def getLatest(self, afterSeq=0, timeout=None, pollInterval=0.001):
+        """Return the most recently written frame, waiting for one newer than afterSeq if necessary
+
+        Inputs:
+        - afterSeq      only return a frame whose sequence number is > afterSeq
+                        (e.g. the seq of the last frame you processed; 0 for any frame)
+        - timeout       maximum time to wait (sec); None to wait forever
+        - pollInterval  time to sleep between checks for a new frame (sec)
+
+        Returns a RingFrame, or None if timed out.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            frame = self._readLatest(afterSeq)
+            if frame is not None:
+                return frame
+            if deadline is not None and time.time() >= deadline:
+                return None
+            time.sleep(pollInterval)
+
+    def _readLatest(self, afterSeq):
+        """Return the most recently written frame if its seq > afterSeq, else None"""
+        while True:
+            seq = self.lastSeq
+            if seq <= afterSeq:
+                return None
+            slotInd = seq % self.nSlots
+            lockVal = int(self._slotLock[slotInd])
+            if lockVal % 2 == 0 and int(self._slotSeq[slotInd]) == seq:
+                timestamp = float(self._slotTimestamp[slotInd])
+                metaLen = min(int(self._slotMetaLen[slotInd]), self.metaSize)
+                metaBytes = self._slotMeta[slotInd, 0:metaLen].tobytes()
+                if int(self._slotLock[slotInd]) == lockVal:
+                    return RingFrame(self, slotInd, lockVal, seq, timestamp, json.loads(metaBytes.decode("utf-8")),
+                        self._readData[slotInd])
+            # the producer overwrote the slot while we read it (we fell a whole ring behind); try again
+
+    def close(self):
+        """Stop using the shared memory (arrays from this ring must no longer be used)"""
+        self._header = self._lastSeq = self._slotLock = self._slotSeq = None
+        self._slotTimestamp = self._slotMetaLen = self._slotMeta = None
+        self._slotData = []
+        self._readData = []
+        closeSharedMemory(self._shm)
+
+    def unlink(self):
+        """Destroy the shared memory (call once, from the creator, after close)"""
+        self._shm.unlink()
+
+    def __repr__(self):
+        return "%s(name=%r, shape=%s, dtype=%s, nSlots=%s)" % (self.__class__.__name__, self.name,
+            self.shape, self.dtype, self.nSlots)
+
+
+class LocalProducer(object):
+    """Write frames to a FrameRing from a background thread: a stand-in for a camera process, for testing.
+
+    Inputs:
+    - ring      the FrameRing
+    - frames    an iterable of frames (e.g. FakeData.iterNoisyFrames(...)), or of (frame, meta dict)
+                if withMeta is True
+    - interval  time between frames (sec)
+    - withMeta  if True, frames yields (frame, meta) pairs; otherwise meta is {"frameNum": n}
+
+    Call start to start writing and stop (or use the producer as a context manager) to stop.
+    The thread stops by itself when frames is exhausted; nWritten is the number of frames written.
+    """
+    def __init__(self, ring, frames, interval=0.0, withMeta=False):
+        self.ring = ring
+        self.frames = frames
+        self.interval = float(interval)
+        self.withMeta = bool(withMeta)
+        self.nWritten = 0
+        self._stopEvent = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="LocalProducer")
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop writing frames and wait for the thread to finish"""
+        self._stopEvent.set()
+        self._thread.join(timeout)
+
+    def isAlive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        for frameNum, item in enumerate(self.frames):
+            if self._stopEvent.is_set():
+                break
+            if self.withMeta:
+                frame, meta = item
+            else:
+                frame, meta = item, dict(frameNum=frameNum)
+            self.ring.write(frame, meta=meta)
+            self.nWritten += 1
+            if self._stopEvent.wait(self.interval):
+                break
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+        return False
+
+
+def attachSharedMemory(name):
+    """Attach to an existing shared memory block without taking ownership of it
+
+    Python < 3.13 registers an attached block with the resource tracker, which would unlink it
+    when this process exits, so the block is unregistered right after attaching.
+    If this process shares a resource tracker with the block's creator (e.g. it was started
+    by multiprocessing from the creator), this also cancels the creator's registration,
+    so the tracker will not unlink the block if the creator exits without unlinking it
+    (and the tracker reports an error when the creator does unlink it).
+    """
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name != "nt":
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+def closeSharedMemory(shm):
+    """Close a shared memory block, ignoring the error if an array still refers to it"""
+    try:
+        shm.close()
+    except BufferError:
+        # an array still refers to the memory; it will be released when the array is
+        pass
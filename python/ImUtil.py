@@ -24,18 +24,31 @@ History:
                     Bug fix: test code broken.
                     Note: thanks to pychecker for catching most of these problems.
 2009-11-20 ROwen    Modified to use numpy.
+2026-10-18          ImStats uses __slots__.
+                    Added skyStatsFromTiles and binImage.
+                    SubFrame no longer copies dataArr (if it is already an array).
+                    SubFrame accepts a PackedMask or RunMask.
+                    Added medianFilter3, labelBlobs and minimumPosition (replacements for
+                    the scipy.ndimage functions PyGuide used, so importing PyGuide does not import scipy).
+                    skyStats no longer imports numpy.ma (a masked array can only exist if numpy.ma is loaded).
+                    Added the ctrStats field to ImStats (set by findStars).
+                    Added the isPartial field to ImStats (set by findStars).
 """
-__all__ = ["ImStats", "getQuartile", "skyStats", "subFrameCtr",
+__all__ = ["ImStats", "getQuartile", "skyStats", "skyStatsFromTiles", "binImage",
+    "medianFilter3", "labelBlobs", "minimumPosition", "subFrameCtr",
     "ijIndFromXYPos", "ijPosFromXYPos", "xyPosFromIJPos",
     "ds9PosFromXYPos", "xyPosFromDS9Pos",
 ]
 
 import math
+import sys
 import warnings
 
 import numpy
 
 from . import Constants
+from . import radProf
+from .CompactMask import isCompactMask
 
 _QuartileResidRatios = (
     (1.0, 0.0),
@@ -55,17 +68,23 @@ def getQuartile(sortedData, qnum):
     If the input data is not sorted, returns a meaningless number.
     If qnum not in (1, 2, 3) or len(sortedData) < 3 raises ValueError.
     """
+    ind0, ratios = _getQuartileIndRatios(len(sortedData), qnum)
+    return ((sortedData[ind0] * ratios[0]) + (sortedData[ind0+1] * ratios[1])) / (ratios[0] + ratios[1])
+
+def _getQuartileIndRatios(dataLen, qnum):
+    """Return ind0, ratios for getQuartile: the quartile is a weighted mean
+    of sortedData[ind0] and sortedData[ind0+1] with weights ratios[0] and ratios[1]
+    """
     if qnum not in (1, 2, 3):
         raise ValueError("qnum=%r must be 1, 2 or 3" % qnum)
-    dataLen = len(sortedData)
     if dataLen < 3:
-        raise ValueError("sortedData too short; len = %s < 3" % len(sortedData))
+        raise ValueError("sortedData too short; len = %s < 3" % dataLen)
     ratios = _QuartileResidRatios[((dataLen-1) * qnum) % 4]
     ind0 = (dataLen-1) * qnum // 4
-    return ((sortedData[ind0] * ratios[0]) + (sortedData[ind0+1] * ratios[1])) / (ratios[0] + ratios[1])
+    return ind0, ratios
 
 
-class ImStats:
+class ImStats(object):
     """Information about an image
     (including the settings use to obtain that info).
 
@@ -76,31 +95,43 @@ class ImStats:
     - nPts      number of points used to compute med and stdDev
     - thresh    threshold used to detect signal
     - dataCut   data cut level
+    - isPartial True if findStars ran out of time (so some candidate stars were skipped
+                or a centroid is partial); always False for other uses
+    - ctrStats  centroid search statistics accumulated by findStars over all candidate stars
+                (a PyGuide.CentroidStats object) if findStars was called with doStats True, else None
 
     If outerRad is not None then med and stdDev are for pixels
     outside a circle of radius "rad" and inside a square
     of size outerRad*2 on a side.
     Otherwise the region used to determine the stats is unknown.
     """
+    __slots__ = ("med", "stdDev", "nPts", "thresh", "dataCut", "isPartial", "ctrStats")
+
     def __init__(self,
         med = None,
         stdDev = None,
         nPts = None,
         thresh = None,
         dataCut = None,
+        isPartial = False,
+        ctrStats = None,
     ):
         self.med = med
         self.stdDev = stdDev
         self.nPts = nPts
         self.thresh = thresh
         self.dataCut = dataCut
+        self.isPartial = bool(isPartial)
+        self.ctrStats = ctrStats
 
     def __repr__(self):
         dataList = []
-        for arg in ("med", "stdDev", "nPts", "thresh", "dataCut"):
+        for arg in ("med", "stdDev", "nPts", "thresh", "dataCut", "ctrStats"):
             val = getattr(self, arg)
             if val not in (None, ""):
                 dataList.append("%s=%s" % (arg, val))
+        if self.isPartial:
+            dataList.append("isPartial=True")
         return "%s(%s)" % (self.__class__.__name__, ", ".join(dataList))
 
 
@@ -126,7 +157,8 @@ def skyStats(
     Standard deviation is computed as stdDev = 0.741 * (Q3 - Q1)
     """
     # creating sorted data
-    if isinstance(dataArr, numpy.ma.masked_array):
+    numpyMa = sys.modules.get("numpy.ma")
+    if numpyMa is not None and isinstance(dataArr, numpyMa.masked_array):
         sortedData = dataArr.compressed()
     else:
         sortedData = dataArr.flatten()
@@ -166,11 +198,233 @@ def skyStats(
     )
 
 
+def skyStatsFromTiles(
+    getTileIter,
+    thresh = Constants.DefThresh,
+    verbosity = 0,
+):
+    """Compute sky statistics, reading the data in pieces ("tiles"), without sorting it.
+
+    Returns the same ImStats as skyStats would return for all the data at once,
+    but the working memory is proportional to the size of a tile, rather than of the data.
+    This is slower than skyStats, because it reads the data several times.
+
+    Inputs:
+    - getTileIter   a function that returns an iterator over tiles, where each tile
+                    is a 1-d numpy array of (unmasked) data values; all tiles must have the same dtype;
+                    the function is called several times and must return the same data each time
+                    (though the order of tiles and of values within a tile is irrelevant)
+    - thresh: a threshold for valid data: dataCut = med + (stdDev * thresh);
+        values less than PyGuide.Constants.MinThresh are silently increased
+    - verbosity 0: no output, 1: print warnings, 2: print information
+
+    Values at particular positions in sorted order are found by histogramming the data
+    to locate the bin containing each desired position, then collecting and sorting
+    just the values in that bin (refining the histogram, if the bin holds too many values).
+    """
+    dataLen = 0
+    minVal = maxVal = None
+    for tileArr in getTileIter():
+        if len(tileArr) == 0:
+            continue
+        dataLen += len(tileArr)
+        tileMin, tileMax = tileArr.min(), tileArr.max()
+        minVal = tileMin if minVal is None else min(minVal, tileMin)
+        maxVal = tileMax if maxVal is None else max(maxVal, tileMax)
+    if verbosity >= 2:
+        print("skyStatsFromTiles computing statistics for %d elements" % (dataLen))
+
+    MaxIter = 3
+    for ii in range(1, MaxIter+1):
+        indRatioList = [_getQuartileIndRatios(dataLen, qnum) for qnum in (1, 2, 3)]
+        sortedDict = _getSortedValues(getTileIter, minVal, maxVal,
+            [ind0 + offset for ind0, ratios in indRatioList for offset in (0, 1)])
+        q1, med, q3 = [((sortedDict[ind0] * ratios[0]) + (sortedDict[ind0+1] * ratios[1])) / (ratios[0] + ratios[1])
+            for ind0, ratios in indRatioList]
+        stdDev = 0.741 * (q3 - q1)
+        cutVal = med + (2.35 * stdDev)
+        if verbosity >= 2:
+            print("skyStatsFromTiles med=%s, q1=%s, q4=%s, stdDev=%s, cutVal=%s" % (med, q1, q3, stdDev, cutVal))
+        if ii == MaxIter:
+            break
+        # number of elements < cutVal (the index at which numpy.searchsorted would insert cutVal)
+        cutInd = sum(int(numpy.count_nonzero(tileArr < cutVal)) for tileArr in getTileIter())
+        if verbosity >= 2:
+            print("skyStatsFromTiles cutInd=%d" % (cutInd,))
+        if cutInd < 3:
+            if verbosity >= 1:
+                print("skyStatsFromTiles aborting iteration at step %s; not enough data to cut further" % (ii,))
+            break
+        dataLen = cutInd
+
+    thresh = max(Constants.MinThresh, float(thresh))
+    dataCut = med + (stdDev * thresh)
+
+    return ImStats(
+        med = med,
+        stdDev = stdDev,
+        nPts = dataLen,
+        thresh = thresh,
+        dataCut = dataCut,
+    )
+
+_SortedNBins = 2**12 # number of histogram bins used by _getSortedValues
+_SortedMaxCollect = 2**18 # maximum number of values in a bin that _getSortedValues sorts
+
+def _getSortedValues(getTileIter, minVal, maxVal, indList):
+    """Return a dict of index: value of the data in sorted order at each index in indList
+
+    Inputs:
+    - getTileIter   a function that returns an iterator over tiles of data (see skyStatsFromTiles)
+    - minVal, maxVal    minimum and maximum value of the data
+    - indList       list of indices into the sorted data
+
+    Each round reads the data once and handles all pending searches.
+    A search is the range of values [begVal, endVal) (or [begVal, endVal] if endIncl),
+    the number of values less than begVal, and the indices whose values lie in the range.
+    """
+    sortedDict = {}
+    searchList = [(numpy.float64(minVal), numpy.float64(maxVal), True, 0, sorted(set(indList)))]
+    while searchList:
+        nSearch = len(searchList)
+        nInRangeList = [0] * nSearch
+        inRangeListList = [[] for i in range(nSearch)]
+        histList = [None] * nSearch
+        rangeMinList = [None] * nSearch
+        rangeMaxList = [None] * nSearch
+        for tileArr in getTileIter():
+            for si, (begVal, endVal, endIncl, nBelow, searchIndList) in enumerate(searchList):
+                if endIncl:
+                    inRangeArr = tileArr[(tileArr >= begVal) & (tileArr <= endVal)]
+                else:
+                    inRangeArr = tileArr[(tileArr >= begVal) & (tileArr < endVal)]
+                if len(inRangeArr) == 0:
+                    continue
+                nInRangeList[si] += len(inRangeArr)
+                rangeMin, rangeMax = inRangeArr.min(), inRangeArr.max()
+                rangeMinList[si] = rangeMin if rangeMinList[si] is None else min(rangeMinList[si], rangeMin)
+                rangeMaxList[si] = rangeMax if rangeMaxList[si] is None else max(rangeMaxList[si], rangeMax)
+                if nInRangeList[si] <= _SortedMaxCollect:
+                    inRangeListList[si].append(inRangeArr)
+                else:
+                    # too many values to collect; histogram them instead
+                    if histList[si] is None:
+                        histList[si] = numpy.zeros(_SortedNBins, dtype=numpy.int64)
+                        for prevArr in inRangeListList[si]:
+                            histList[si] += numpy.histogram(prevArr, bins=_SortedNBins, range=(begVal, endVal))[0]
+                        inRangeListList[si] = []
+                    histList[si] += numpy.histogram(inRangeArr, bins=_SortedNBins, range=(begVal, endVal))[0]
+
+        newSearchList = []
+        for si, (begVal, endVal, endIncl, nBelow, searchIndList) in enumerate(searchList):
+            if rangeMinList[si] is not None and rangeMinList[si] == rangeMaxList[si]:
+                # all values in range are equal
+                for ind in searchIndList:
+                    sortedDict[ind] = rangeMinList[si]
+            elif histList[si] is None:
+                sortedArr = numpy.sort(numpy.concatenate(inRangeListList[si]))
+                for ind in searchIndList:
+                    sortedDict[ind] = sortedArr[ind - nBelow]
+            else:
+                # find the bin containing each index and search that bin next round
+                edges = numpy.linspace(begVal, endVal, _SortedNBins + 1)
+                cumCounts = numpy.cumsum(histList[si])
+                binIndList = numpy.searchsorted(cumCounts, numpy.subtract(searchIndList, nBelow), side="right")
+                for binInd in sorted(set(binIndList)):
+                    binSearchIndList = [ind for ind, bi in zip(searchIndList, binIndList) if bi == binInd]
+                    binNBelow = nBelow + (cumCounts[binInd - 1] if binInd > 0 else 0)
+                    binEndIncl = endIncl and binInd == _SortedNBins - 1
+                    newSearchList.append((edges[binInd], edges[binInd + 1], binEndIncl, binNBelow, binSearchIndList))
+        searchList = newSearchList
+    return sortedDict
+
+
+def binImage(data, mask, binFac):
+    """Bin an image by averaging binFac x binFac blocks of pixels.
+
+    Inputs:
+    - data      2-d array of data [i,j]
+    - mask      a mask of invalid data (1 if invalid, 0 if valid); None if no mask
+    - binFac    binning factor (a positive integer)
+
+    Returns two items:
+    - binData   binned data as a float32 array; each binned pixel is the mean of the valid pixels in its block
+    - binMask   binned mask: True for blocks with no valid pixels; None if mask is None
+
+    Binned pixel [i,j] covers data[i*binFac:(i+1)*binFac, j*binFac:(j+1)*binFac].
+    Trailing rows and columns that do not fill a block are ignored.
+    """
+    binFac = int(binFac)
+    if binFac < 1:
+        raise ValueError("binFac=%r must be >= 1" % (binFac,))
+    data = numpy.asarray(data)
+    binShape = (data.shape[0] // binFac, data.shape[1] // binFac)
+    blockShape = (binShape[0], binFac, binShape[1], binFac)
+    blocks = data[0:binShape[0] * binFac, 0:binShape[1] * binFac].reshape(blockShape)
+    if mask is None:
+        binData = blocks.sum(axis=(1, 3), dtype=numpy.float64) / binFac**2
+        return binData.astype(numpy.float32), None
+
+    validBlocks = numpy.logical_not(numpy.asarray(mask)[0:binShape[0] * binFac, 0:binShape[1] * binFac])
+    validBlocks = validBlocks.reshape(blockShape)
+    nValid = validBlocks.sum(axis=(1, 3))
+    binData = numpy.where(validBlocks, blocks, 0).sum(axis=(1, 3), dtype=numpy.float64)
+    binData /= numpy.maximum(nValid, 1)
+    return binData.astype(numpy.float32), nValid == 0
+
+
+def medianFilter3(data, out=None):
+    """Apply a 3x3 median filter to a 2-d array
+
+    Inputs:
+    - data      data array [i,j]
+    - out       output array: a contiguous float32 array the same shape as data
+                (may be data, to filter in place); if None a new array is returned
+
+    Returns the filtered data (out, if specified) as a float32 array.
+
+    The result is the same as scipy.ndimage.median_filter(data, 3) for float32 data.
+    """
+    if out is None:
+        out = numpy.empty(numpy.shape(data), dtype=numpy.float32)
+    radProf.medianFilter3(data, out)
+    return out
+
+
+def labelBlobs(mask):
+    """Find blobs (8-connected regions of True values) in a 2-d bool array
+
+    Inputs:
+    - mask      bool array [i,j]
+
+    Returns two items:
+    - labels    blob number of each pixel [i,j] (int32); 0 for pixels not in a blob
+    - slices    bounding box of each blob: a list of (i slice, j slice); blob n is slices[n-1]
+
+    The results are the same as:
+        labels = scipy.ndimage.label(mask, numpy.ones((3,3)))[0]
+        slices = scipy.ndimage.find_objects(labels)
+    """
+    labels, bbox = radProf.labelBlobs(mask)
+    slices = [(slice(begI, endI), slice(begJ, endJ)) for begI, endI, begJ, endJ in bbox.tolist()]
+    return labels, slices
+
+
+def minimumPosition(arr):
+    """Return the index of the minimum value of an array, as a tuple
+
+    The same as scipy.ndimage.minimum_position(arr) (the first index if the minimum is not unique).
+    """
+    arr = numpy.asarray(arr)
+    return tuple(int(ind) for ind in numpy.unravel_index(numpy.argmin(arr), arr.shape))
+
+
 class SubFrame:
     """Create a subframe and provide useful utility methods.
 
     Inputs:
-    - dataArr       data array
+    - dataArr       data array; it is not copied (unless it is not already an array).
+                    May also be a PackedMask or RunMask, in which case getSubFrame returns a bool array.
     - desBegInd     desired starting i,j index (inclusive)
     - desEndInd     desired ending i,j index (exclusive)
 
@@ -184,7 +438,7 @@ class SubFrame:
         desBegInd,
         desEndInd,
     ):
-        self.dataArr = numpy.array(dataArr)
+        self.dataArr = dataArr if isCompactMask(dataArr) else numpy.asarray(dataArr)
         #print("SubFrame(data%s, desBegInd=%s, desEndInd=%s)" % (self.dataArr.shape, desBegInd, desEndInd))
 
         # round desired i,j index (just in case)
@@ -0,0 +1,217 @@
+from __future__ import division, absolute_import, print_function
+"""An index of a mask, for a mask that is used for many frames (e.g. a guide probe mask)
+
+A MaskIndex precomputes everything about a mask that centroid and findStars would
+otherwise recompute for each frame:
+- the runs of valid pixels in each row (it is a RunMask, so the radial profile code
+  skips masked areas without reading the mask)
+- the bounding box of each probe (connected region of valid pixels); findStars median-filters
+  only the probes, rather than the whole image
+- for each circle that checkSignal examines (centroid position and radius), the background
+  (annulus) pixels and the mask of the inner circle; these are cached, so a guide loop that
+  centroids at the same position each frame computes them only once
+
+Make a MaskIndex once and pass it to centroid, findStars, etc. as the mask for every frame.
+If you only have the mask array, getMaskIndex returns the MaskIndex for it,
+looked up by a hash of the mask's contents (so it is only built the first time).
+
+History:
+2026-10-18          First version.
+                    Find probes with ImUtil.labelBlobs instead of scipy.ndimage.
+"""
+__all__ = ["MaskIndex", "getMaskIndex", "maskKey"]
+
+import collections
+import hashlib
+import threading
+
+import numpy
+
+from .CompactMask import RunMask
+from . import ImUtil
+
+# maximum number of probes that findStars median-filters separately;
+# if there are more, it filters the bounding box of all of them
+_MaxFilterBoxes = 64
+
+class MaskIndex(RunMask):
+    """An index of a mask; a RunMask with additional precomputed information
+
+    Inputs:
+    - mask          a mask [i,j]: True for values to mask out (ignore);
+                    a PackedMask or RunMask is also accepted
+    - maxRegions    maximum number of checkSignal regions to cache;
+                    when full, the least recently used region is discarded
+
+    Attributes (all arrays are read-only):
+    - shape, runs, rowStart, nValid: see RunMask
+    - mask          the mask as a C-contiguous bool array
+    - valid         the inverse of mask
+    - key           hash of the mask contents (see maskKey)
+    - probeSlices   bounding box of each probe (8-connected region of valid pixels):
+                    a list of (i slice, j slice)
+    - filterSlices  regions that findStars median-filters: a list of (in slices, out slices, sub slices),
+                    where in slices is a probe box expanded by 2 pixels, out slices the box expanded by 1 pixel
+                    and sub slices the out slices relative to in slices
+    """
+    def __init__(self, mask, maxRegions=256):
+        if hasattr(mask, "toMask"):
+            mask = mask.toMask()
+        mask = numpy.array(mask, dtype=bool, order="C")
+        RunMask.__init__(self, mask)
+        mask.flags.writeable = False
+        self.mask = mask
+        self.valid = numpy.logical_not(mask)
+        self.valid.flags.writeable = False
+        self.key = maskKey(mask)
+
+        self.probeSlices = ImUtil.labelBlobs(self.valid)[1]
+        self.filterSlices = _makeFilterSlices(self.probeSlices, self.shape)
+
+        self.maxRegions = int(maxRegions)
+        self._regionLock = threading.Lock()
+        self._regionDict = collections.OrderedDict()
+
+    def toMask(self):
+        """Return the mask as a bool array (the mask attribute, which is read-only)"""
+        return self.mask
+
+    def _getRows(self, begRow, endRow):
+        return self.mask[begRow:endRow]
+
+    def getSignalRegion(self, xyCtr, rad, outerRad):
+        """Return the SignalRegion for checkSignal (cached)
+
+        Inputs:
+        - xyCtr     center of circle (pixels)
+        - rad       radius of circle (pixels)
+        - outerRad  half size of background region (pixels)
+        """
+        key = (float(xyCtr[0]), float(xyCtr[1]), rad, outerRad)
+        with self._regionLock:
+            sigRegion = self._regionDict.get(key)
+            if sigRegion is not None:
+                self._regionDict[key] = self._regionDict.pop(key)
+                return sigRegion
+        sigRegion = SignalRegion(self, self, xyCtr, rad, outerRad)
+        with self._regionLock:
+            self._regionDict[key] = sigRegion
+            while len(self._regionDict) > self.maxRegions:
+                self._regionDict.popitem(last=False)
+        return sigRegion
+
+    def __repr__(self):
+        return "%s(shape=%s, nProbes=%s)" % (self.__class__.__name__, self.shape, len(self.probeSlices))
+
+
+class SignalRegion(object):
+    """The part of checkSignal that depends only on the mask and the circle
+
+    Inputs:
+    - arr       data or mask array [i,j] (only its shape is used)
+    - mask      mask [i,j] (an array, PackedMask, RunMask or MaskIndex); None if no mask
+    - xyCtr     center of circle (pixels)
+    - rad       radius of circle (pixels)
+    - outerRad  half size of background region (pixels)
+
+    Attributes:
+    - ijSlice   the subframe: (i slice, j slice)
+    - size      number of pixels in the subframe
+    - bkgndInd  flattened subframe index of each valid pixel outside the circle
+    - validInd  flattened subframe index of each valid pixel
+    - innerMask bool subframe: True for pixels that are masked or outside the circle
+    """
+    __slots__ = ("ijSlice", "size", "bkgndInd", "validInd", "innerMask")
+
+    def __init__(self, arr, mask, xyCtr, rad, outerRad):
+        subFrame = ImUtil.subFrameCtr(
+            arr,
+            xyCtr = xyCtr,
+            xySize = (outerRad, outerRad),
+        )
+        begInd, endInd = subFrame.begInd, subFrame.endInd
+        self.ijSlice = (slice(begInd[0], endInd[0]), slice(begInd[1], endInd[1]))
+        subShape = (max(endInd[0] - begInd[0], 0), max(endInd[1] - begInd[1], 0))
+        self.size = subShape[0] * subShape[1]
+        subCtrIJ = subFrame.subIJFromFullIJ(ImUtil.ijPosFromXYPos(xyCtr))
+
+        # circleMask is a centered circle of radius rad with 0s in the middle and 1s outside
+        def makeCircle(i, j):
+            return ((i-subCtrIJ[0])**2 + (j-subCtrIJ[1])**2) > rad**2
+        circleMask = numpy.fromfunction(makeCircle, subShape)
+
+        if mask is None:
+            self.validInd = numpy.arange(self.size)
+            self.bkgndInd = numpy.flatnonzero(circleMask)
+            self.innerMask = circleMask
+        else:
+            subValid = numpy.logical_not(mask[self.ijSlice])
+            self.validInd = numpy.flatnonzero(subValid)
+            self.bkgndInd = numpy.flatnonzero(numpy.logical_and(circleMask, subValid))
+            self.innerMask = numpy.logical_or(numpy.logical_not(subValid), circleMask)
+
+
+def _makeFilterSlices(probeSlices, shape):
+    """Return the regions findStars median-filters; see MaskIndex.filterSlices
+    """
+    if len(probeSlices) > _MaxFilterBoxes:
+        probeSlices = [tuple(
+            slice(min(ijSlice[ii].start for ijSlice in probeSlices), max(ijSlice[ii].stop for ijSlice in probeSlices))
+            for ii in (0, 1)
+        )]
+    filterSlices = []
+    for ijSlice in probeSlices:
+        inSlices = tuple(slice(max(ijSlice[ii].start - 2, 0), min(ijSlice[ii].stop + 2, shape[ii])) for ii in (0, 1))
+        outSlices = tuple(slice(max(ijSlice[ii].start - 1, 0), min(ijSlice[ii].stop + 1, shape[ii])) for ii in (0, 1))
+        subSlices = tuple(slice(outSlices[ii].start - inSlices[ii].start, outSlices[ii].stop - inSlices[ii].start)
+            for ii in (0, 1))
+        filterSlices.append((inSlices, outSlices, subSlices))
+    return filterSlices
+
+
+def maskKey(mask):
+    """Return a hash of the contents of a mask (a string)
+
+    Two masks have the same key if and only if (barring hash collisions)
+    they have the same shape and the same values.
+    """
+    if hasattr(mask, "key"):
+        return mask.key
+    if hasattr(mask, "toMask"):
+        mask = mask.toMask()
+    mask = numpy.ascontiguousarray(mask, dtype=bool)
+    hashObj = hashlib.sha1(repr(mask.shape).encode("ascii"))
+    hashObj.update(mask.view(numpy.uint8).data)
+    return hashObj.hexdigest()
+
+
+_MaskIndexLock = threading.Lock()
+_MaskIndexDict = collections.OrderedDict()
+_MaxMaskIndices = 4
+
+def getMaskIndex(mask):
+    """Return the MaskIndex for a mask, making it only if it is not already cached
+
+    Inputs:
+    - mask      a mask [i,j]: True for values to mask out (ignore);
+                a PackedMask or RunMask is also accepted (a MaskIndex is returned unchanged).
+                None returns None.
+
+    MaskIndex objects are cached by the hash of the mask contents (see maskKey),
+    so the same mask (even in a new array) returns the same MaskIndex.
+    A few of the most recently used MaskIndex objects are kept.
+    """
+    if mask is None or isinstance(mask, MaskIndex):
+        return mask
+    key = maskKey(mask)
+    with _MaskIndexLock:
+        maskIndex = _MaskIndexDict.get(key)
+        if maskIndex is not None:
+            _MaskIndexDict[key] = _MaskIndexDict.pop(key)
+            return maskIndex
+    maskIndex = MaskIndex(mask)
+    with _MaskIndexLock:
+        _MaskIndexDict[key] = maskIndex
+        while len(_MaskIndexDict) > _MaxMaskIndices:
+            _MaskIndexDict.popitem(last=False)
+    return maskIndex
@@ -0,0 +1,292 @@
+from __future__ import division, absolute_import, print_function
+"""Process a stream of frames, overlapping I/O with computation.
+
+A guider typically reads an image file, conditions the data, finds or centroids stars,
+then waits for the next file, so I/O and computation never overlap.
+FramePipeline reads (prefetches) frames in a background I/O thread
+and processes them on a pool of workers, yielding results in the order of the input.
+
+Queues are bounded, so a slow consumer applies backpressure to the reader;
+for real-time use you may instead ask the pipeline to drop the oldest unprocessed frame
+when the queue is full, which keeps latency flat when processing falls behind.
+
+Example:
+    def findStarsInFrame(data):
+        return PyGuide.findStars(data, None, None, ccdInfo)
+
+    pipeline = PyGuide.FramePipeline(findStarsInFrame, nWorkers=2)
+    for frameResult in pipeline.run(fileList):
+        if not frameResult.isOK:
+            print("%s failed: %s" % (frameResult.source, frameResult.error))
+            continue
+        ctrDataList, imStats = frameResult.result
+
+History:
+2026-10-18          First version.
+                    Documented how much concurrency the default thread pool provides.
+"""
+__all__ = ["FramePipeline", "FrameResult", "loadSource"]
+
+import collections
+import sys
+import threading
+import time
+
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from .FrameIO import loadFrame
+
+def loadSource(source):
+    """Load image data from a frame source.
+
+    Inputs:
+    - source    one of:
+                - a numpy array (or anything else array-like): returned as is
+                - a callable: called with no arguments; it must return the data
+                - a string: the path of a FITS image file; it is loaded using loadFrame
+                  and the scaled float32 image data (trimmed to DATASEC) is returned.
+                  This requires pyfits (or astropy).
+    """
+    if isinstance(source, str):
+        return loadFrame(source).data
+    if callable(source):
+        return source()
+    return source
+
+
+class FrameResult(object):
+    """The result of processing one frame
+
+    Attributes:
+    - index     index of the source in the input iterator (0 for the first source)
+    - source    the frame source (as supplied to FramePipeline.run)
+    - result    the value returned by processFunc; None if an error occurred
+    - error     the exception raised by loadFunc or processFunc; None if no error
+    - loadTime  time spent loading the frame (sec)
+    - procTime  time spent processing the frame (sec); 0 if loading failed
+    """
+    __slots__ = ("index", "source", "result", "error", "loadTime", "procTime")
+
+    def __init__(self,
+        index,
+        source,
+        result = None,
+        error = None,
+        loadTime = 0.0,
+        procTime = 0.0,
+    ):
+        self.index = index
+        self.source = source
+        self.result = result
+        self.error = error
+        self.loadTime = loadTime
+        self.procTime = procTime
+
+    @property
+    def isOK(self):
+        """True if the frame was loaded and processed without error"""
+        return self.error is None
+
+    def __repr__(self):
+        return "%s(index=%s, source=%r, isOK=%s)" % (self.__class__.__name__, self.index, self.source, self.isOK)
+
+
+class FramePipeline(object):
+    """Load and process frames concurrently
+
+    Inputs:
+    - processFunc   function to process one frame; it is called with one argument:
+                    the data returned by loadFunc, and its return value is FrameResult.result.
+                    It is called from worker threads (or processes, if you supply
+                    a process pool as the executor), so it must be thread-safe.
+    - loadFunc      function to load one frame; it is called with one argument: a frame source,
+                    and runs in the I/O thread; if None then loadSource is used
+    - nWorkers      number of frames that may be processed at the same time
+    - maxQueue      maximum number of frames that may wait for processing
+                    or for you to retrieve the result (in addition to the nWorkers frames
+                    being processed); this bounds memory use and latency
+    - dropOldest    what to do when the queue is full:
+                    - False: the I/O thread waits (backpressure), so every frame is processed
+                    - True: the oldest frame whose processing has not started is discarded,
+                      so the newest frames are processed with minimal latency; see nDropped
+    - executor      a concurrent.futures.Executor with which to process frames;
+                    if None then a ThreadPoolExecutor with nWorkers threads is created
+                    (and shut down) by each call to run.
+                    Threads overlap only while PyGuide's C kernels are running
+                    (the radial profile and asymmetry routines in radProf release the GIL);
+                    the Python code of findStars and centroid still runs one thread at a time.
+                    For CPU-bound processing of large frames use a ProcessPoolExecutor
+                    (processFunc, the frame data and the results must then be picklable).
+
+    Attributes:
+    - nDropped      number of frames discarded by the most recent call to run
+                    (always 0 if dropOldest is False)
+    """
+    def __init__(self,
+        processFunc,
+        loadFunc = None,
+        nWorkers = 1,
+        maxQueue = 2,
+        dropOldest = False,
+        executor = None,
+    ):
+        if nWorkers < 1:
+            raise ValueError("nWorkers=%s; must be >= 1" % (nWorkers,))
+        if maxQueue < 1:
+            raise ValueError("maxQueue=%s; must be >= 1" % (maxQueue,))
+        self.processFunc = processFunc
+        self.loadFunc = loadFunc or loadSource
+        self.nWorkers = int(nWorkers)
+        self.maxQueue = int(maxQueue)
+        self.dropOldest = bool(dropOldest)
+        self.executor = executor
+        self.nDropped = 0
+
+    def run(self, sources):
+        """Load and process frames, yielding a FrameResult for each processed frame, in order.
+
+        Inputs:
+        - sources   an iterable of frame sources (e.g. file paths, arrays or callables);
+                    it is iterated in the I/O thread, so it may block (e.g. waiting for the next file)
+
+        Errors loading or processing a frame are reported in the FrameResult;
+        an error raised by the sources iterator itself is re-raised
+        after all frames read before the error have been yielded.
+
+        If you stop iterating early (e.g. break out of a for loop), the I/O thread is stopped,
+        frames waiting to be processed are discarded and frames being processed
+        are allowed to finish.
+        """
+        self.nDropped = 0
+        executor = self.executor
+        ownExecutor = executor is None
+        if ownExecutor:
+            executor = ThreadPoolExecutor(self.nWorkers)
+
+        state = _RunState()
+        ioThread = threading.Thread(
+            target = self._readSources,
+            args = (sources, executor, state),
+            name = "FramePipeline I/O",
+        )
+        ioThread.daemon = True
+        ioThread.start()
+        try:
+            while True:
+                with state.cond:
+                    while not state.pending and not state.isDone:
+                        state.cond.wait()
+                    if not state.pending:
+                        break
+                    entry = state.pending[0]
+                frameResult, future = entry
+                if future is not None:
+                    try:
+                        frameResult.result, frameResult.error, frameResult.procTime = future.result()
+                    except CancelledError:
+                        # dropped by the I/O thread while we were waiting
+                        continue
+                with state.cond:
+                    if state.pending and state.pending[0] is entry:
+                        state.pending.popleft()
+                    state.cond.notify_all()
+                yield frameResult
+        finally:
+            with state.cond:
+                state.isStopped = True
+                for frameResult, future in state.pending:
+                    if future is not None:
+                        future.cancel()
+                state.cond.notify_all()
+            if ownExecutor:
+                executor.shutdown(wait=True)
+
+        if state.excInfo:
+            if sys.version_info[0] >= 3:
+                raise state.excInfo[1].with_traceback(state.excInfo[2])
+            raise state.excInfo[1]
+
+    def _readSources(self, sources, executor, state):
+        """Load frames and submit them for processing.
+
+        Runs in the I/O thread.
+        """
+        maxPending = self.nWorkers + self.maxQueue
+        try:
+            for index, source in enumerate(sources):
+                if state.isStopped:
+                    return
+                frameResult = FrameResult(index=index, source=source)
+                data = None
+                begTime = time.time()
+                try:
+                    data = self.loadFunc(source)
+                except Exception as e:
+                    frameResult.error = e
+                frameResult.loadTime = time.time() - begTime
+
+                with state.cond:
+                    while len(state.pending) >= maxPending and not state.isStopped:
+                        if self.dropOldest and self._dropOldest(state.pending):
+                            continue
+                        state.cond.wait()
+                    if state.isStopped:
+                        return
+                    if frameResult.isOK:
+                        future = executor.submit(_timedCall, self.processFunc, data)
+                    else:
+                        future = None
+                    state.pending.append((frameResult, future))
+                    state.cond.notify_all()
+        except Exception:
+            state.excInfo = sys.exc_info()
+        finally:
+            with state.cond:
+                state.isDone = True
+                state.cond.notify_all()
+
+    def _dropOldest(self, pending):
+        """Discard the oldest pending frame whose processing has not started.
+
+        Return True if a frame was discarded. Call with the state lock held.
+        """
+        for entry in pending:
+            future = entry[1]
+            if future is not None and future.cancel():
+                pending.remove(entry)
+                self.nDropped += 1
+                return True
+        return False
+
+
+class _RunState(object):
+    """State shared between FramePipeline.run and its I/O thread
+
+    Attributes (all protected by cond):
+    - cond      a threading.Condition
+    - pending   a deque of (FrameResult, future) in input order;
+                future is None if the frame could not be loaded
+    - isDone    the I/O thread has finished
+    - isStopped the consumer has stopped iterating
+    - excInfo   sys.exc_info() for an error raised by the sources iterator, else None
+    """
+    __slots__ = ("cond", "pending", "isDone", "isStopped", "excInfo")
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.pending = collections.deque()
+        self.isDone = False
+        self.isStopped = False
+        self.excInfo = None
+
+
+def _timedCall(func, data):
+    """Call func(data) and return (result, exception, duration)"""
+    begTime = time.time()
+    try:
+        result = func(data)
+        error = None
+    except Exception as e:
+        result = None
+        error = e
+    return result, error, time.time() - begTime
@@ -0,0 +1,555 @@
+from __future__ import division, absolute_import, print_function
+"""A long-lived guide measurement service listening on a Unix socket.
+
+Starting Python and importing PyGuide (with numpy and scipy) for each guide cycle
+takes far longer than measuring a typical guide frame. GuideServer avoids this:
+it runs in one long-lived process, accepts requests over a local (Unix domain) socket
+and runs findStars or centroid in a pool of worker threads, keeping caches
+(of recently loaded frames, masks and attached shared memory) warm across requests.
+
+Requires Python 3 (asyncio). This module is not imported by "import PyGuide";
+use "from PyGuide import Server".
+
+Protocol:
+Each request is one line of JSON (a dict) terminated by a newline. Keys:
+- op        one of:
+            - "findStars": find stars; see PyGuide.findStars
+            - "centroid": centroid one star; see PyGuide.centroid
+            - "stats": return request latency statistics
+            - "ping": do nothing (other than reply)
+- id        (optional) any JSON value; it is returned in the reply
+- frame     the image data (required for findStars and centroid), specified as a dict:
+            - {"path": FITS file path} (DATASEC is applied), or
+            - {"shm": shared memory name, "shape": [nRows, nCols], "dtype": "float32", "offset": 0}
+              ("dtype" and "offset" are optional; the values shown are the defaults)
+- mask      (optional) a mask of invalid data, specified as for frame
+            (for shared memory the default dtype is "bool")
+- satMask   (optional) a mask of saturated pixels, specified as for mask
+- ccdInfo   a dict with keys bias, readNoise, ccdGain and (optionally) satLevel
+- doShape   (optional) if true, also fit the shape of each star; default false
+- for findStars: (optional) thresh, radMult, rad
+- for centroid: xyGuess (required), rad (required), thresh (optional)
+
+Each reply is one line of JSON (a dict) terminated by a newline,
+followed by nBytes bytes of binary payload. Keys:
+- id        the id from the request, or null if none
+- isOK      true if the request succeeded
+- error     an error message; "" if isOK is true
+- nBytes    number of bytes of payload (0 if none)
+- procTime  time spent processing the request (sec), excluding time waiting for a worker
+- for findStars: nStars and imStats (a dict)
+- for centroid: msgStr (the centroid's msgStr)
+- for stats: latency (see GuideServer.getLatencyStats) and cache (hit and miss counts for each cache)
+For findStars and centroid the payload is a StarCatalog, as returned by StarCatalog.toBytes
+(the contents of a .npy file); for centroid it contains one star.
+
+Shared memory is read in place, so the client must not modify it until the reply arrives.
+
+GuideClient is a simple blocking client, suitable for testing and for use as a template.
+
+History:
+2026-10-18          First version.
+                    Moved _attachSharedMemory and _closeSharedMemory to FrameRing.
+                    Bug fix: a shared memory block evicted from the cache was closed even if another
+                    worker thread was still measuring a frame in it; each request now holds the blocks
+                    it uses, and an evicted block is closed when the last request using it finishes.
+"""
+__all__ = ["GuideServer", "GuideClient", "frameRef"]
+
+import asyncio
+import collections
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
+from .Constants import CCDInfo
+from .FrameRing import attachSharedMemory as _attachSharedMemory, closeSharedMemory as _closeSharedMemory
+from . import Centroid
+from . import FindStars
+from . import FrameIO
+from . import StarShape
+from .StarCatalog import StarCatalog
+
+_ImStatsFields = ("med", "stdDev", "nPts", "thresh", "dataCut")
+
+def frameRef(path=None, shmName=None, shape=None, dtype="float32", offset=0):
+    """Return a frame (or mask) reference for a request.
+
+    Specify exactly one of:
+    - path      path to a FITS file
+    - shmName   name of a shared memory block (e.g. multiprocessing.shared_memory.SharedMemory.name);
+                in this case you must also specify shape and may specify dtype and offset
+    """
+    if (path is None) == (shmName is None):
+        raise ValueError("Specify exactly one of path and shmName")
+    if path is not None:
+        return dict(path=path)
+    if shape is None:
+        raise ValueError("shape is required for shared memory")
+    return dict(shm=shmName, shape=[int(val) for val in shape], dtype=numpy.dtype(dtype).name, offset=int(offset))
+
+
+class _LRUCache(object):
+    """A thread-safe least-recently-used cache
+
+    Inputs:
+    - maxSize   maximum number of items
+    - closeFunc function to call with each evicted value, or None
+
+    Values obtained with acquire are held until passed to release;
+    a held value that is evicted (or cleared) is not closed until it is no longer held.
+    """
+    def __init__(self, maxSize, closeFunc=None):
+        self.maxSize = int(maxSize)
+        self.closeFunc = closeFunc
+        self._dict = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._holdDict = {} # id(val): [val, number of holds]
+        self._evictedIDs = set() # id(val) of held values that have been evicted
+        self.nHits = 0
+        self.nMisses = 0
+
+    def get(self, key, makeFunc):
+        """Return the value for key, calling makeFunc() to create it if not cached"""
+        return self._get(key, makeFunc, doHold=False)
+
+    def acquire(self, key, makeFunc):
+        """Return the value for key, as for get, and hold it until it is passed to release"""
+        return self._get(key, makeFunc, doHold=True)
+
+    def release(self, val):
+        """Release a value returned by acquire; close it if it has been evicted and is no longer held"""
+        with self._lock:
+            holdItem = self._holdDict[id(val)]
+            holdItem[1] -= 1
+            if holdItem[1] > 0:
+                return
+            del self._holdDict[id(val)]
+            if id(val) not in self._evictedIDs:
+                return
+            self._evictedIDs.remove(id(val))
+        if self.closeFunc:
+            self.closeFunc(val)
+
+    def clear(self):
+        with self._lock:
+            valList = list(self._dict.values())
+            self._dict.clear()
+            closeList = self._evict(valList)
+        self._close(closeList)
+
+    def _get(self, key, makeFunc, doHold):
+        with self._lock:
+            if key in self._dict:
+                self.nHits += 1
+                val = self._dict.pop(key)
+                self._dict[key] = val
+                if doHold:
+                    self._hold(val)
+                return val
+            self.nMisses += 1
+        newVal = makeFunc()
+        closeList = []
+        with self._lock:
+            if key in self._dict:
+                # another thread made the value first; use that one
+                closeList.append(newVal)
+                val = self._dict[key]
+            else:
+                val = newVal
+                self._dict[key] = val
+            if doHold:
+                self._hold(val)
+            oldValList = []
+            while len(self._dict) > self.maxSize:
+                oldValList.append(self._dict.popitem(last=False)[1])
+            closeList += self._evict(oldValList)
+        self._close(closeList)
+        return val
+
+    def _hold(self, val):
+        """Hold a value; call with the lock held"""
+        self._holdDict.setdefault(id(val), [val, 0])[1] += 1
+
+    def _evict(self, valList):
+        """Note that values have been evicted; return those that are not held (so may be closed).
+
+        Call with the lock held.
+        """
+        closeList = []
+        for val in valList:
+            if id(val) in self._holdDict:
+                self._evictedIDs.add(id(val))
+            else:
+                closeList.append(val)
+        return closeList
+
+    def _close(self, valList):
+        if self.closeFunc:
+            for val in valList:
+                self.closeFunc(val)
+
+
+class GuideServer(object):
+    """A guide measurement server; see the module doc string for the protocol.
+
+    Inputs:
+    - socketPath    path of the Unix domain socket on which to listen;
+                    an existing socket file at this path is replaced
+    - nWorkers      number of worker threads (number of requests processed at the same time)
+    - cacheSize     number of frames, masks and shared memory blocks to keep in each cache
+    - nLatency      number of recent requests used to compute latency statistics
+    """
+    def __init__(self,
+        socketPath,
+        nWorkers = 1,
+        cacheSize = 4,
+        nLatency = 1000,
+    ):
+        self.socketPath = socketPath
+        self.nWorkers = int(nWorkers)
+        self._executor = None
+        self._server = None
+        self._frameCache = _LRUCache(cacheSize)
+        self._maskCache = _LRUCache(cacheSize)
+        self._shmCache = _LRUCache(cacheSize, closeFunc=_closeSharedMemory)
+        self._threadLocal = threading.local() # heldShmList: shared memory blocks held by the current request
+        self._latencyDict = collections.defaultdict(lambda: collections.deque(maxlen=nLatency))
+        self._opDict = dict(
+            findStars = self._doFindStars,
+            centroid = self._doCentroid,
+            stats = self._doStats,
+            ping = self._doPing,
+        )
+
+    async def start(self):
+        """Start listening for connections"""
+        if os.path.exists(self.socketPath):
+            os.remove(self.socketPath)
+        self._executor = ThreadPoolExecutor(self.nWorkers)
+        self._server = await asyncio.start_unix_server(self._handleConnection, path=self.socketPath)
+
+    async def close(self):
+        """Stop listening, wait for requests being processed to finish and release resources"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._frameCache.clear()
+        self._maskCache.clear()
+        self._shmCache.clear()
+        if os.path.exists(self.socketPath):
+            os.remove(self.socketPath)
+
+    async def serveForever(self):
+        """Start (if not already started) and serve until cancelled"""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    def run(self):
+        """Run the server until interrupted (e.g. by ctrl-C)"""
+        try:
+            asyncio.run(self.serveForever())
+        except KeyboardInterrupt:
+            pass
+
+    def getLatencyStats(self):
+        """Return latency statistics for recent requests, as a dict of op: dict with keys:
+        - n         number of requests (up to nLatency)
+        - p50, p90, p99, max: latency percentiles and maximum (sec)
+
+        Latency is measured from receipt of the request to sending the reply.
+        """
+        statsDict = {}
+        for op, latencyDeque in list(self._latencyDict.items()):
+            latencyArr = numpy.array(latencyDeque, dtype=float)
+            if len(latencyArr) == 0:
+                continue
+            p50, p90, p99 = numpy.percentile(latencyArr, [50, 90, 99])
+            statsDict[op] = dict(n=len(latencyArr), p50=p50, p90=p90, p99=p99, max=latencyArr.max())
+        return statsDict
+
+    async def _handleConnection(self, reader, writer):
+        """Handle requests from one connection, replying to each in turn"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                begTime = time.time()
+                header, payload = await loop.run_in_executor(self._executor, self._handleRequest, line)
+                writer.write(json.dumps(header).encode("utf-8") + b"\n")
+                if payload:
+                    writer.write(payload)
+                await writer.drain()
+                self._latencyDict[header.get("op") or "?"].append(time.time() - begTime)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _handleRequest(self, line):
+        """Process one request; return (header dict, payload bytes).
+
+        Runs in a worker thread.
+        """
+        begTime = time.time()
+        header = dict(id=None, op=None, isOK=True, error="", nBytes=0)
+        payload = b""
+        self._threadLocal.heldShmList = []
+        try:
+            request = json.loads(line.decode("utf-8"))
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            header["id"] = request.get("id")
+            op = request.get("op")
+            opFunc = self._opDict.get(op)
+            if opFunc is None:
+                raise ValueError("Unknown op %r" % (op,))
+            header["op"] = op
+            payload = opFunc(request, header) or b""
+        except Exception as e:
+            header["isOK"] = False
+            header["error"] = "%s: %s" % (type(e).__name__, e)
+            payload = b""
+        # the request no longer uses its shared memory (the payload is a copy of the results)
+        for shm in self._threadLocal.heldShmList:
+            self._shmCache.release(shm)
+        self._threadLocal.heldShmList = []
+        header["nBytes"] = len(payload)
+        header["procTime"] = time.time() - begTime
+        return header, payload
+
+    def _getFrame(self, request):
+        """Return (data, mask, satMask) for a request"""
+        frameDict = request.get("frame")
+        if not frameDict:
+            raise ValueError("frame is required")
+        if "path" in frameDict:
+            path = frameDict["path"]
+            fileStat = os.stat(path)
+            frame = self._frameCache.get(
+                (path, fileStat.st_mtime, fileStat.st_size),
+                lambda: FrameIO.loadFrame(path),
+            )
+            data = frame.data
+            dataSec = frame.dataSec
+        else:
+            data = self._getSharedArray(frameDict, defDType="float32")
+            dataSec = None
+        masks = []
+        for maskName in ("mask", "satMask"):
+            maskDict = request.get(maskName)
+            if not maskDict:
+                masks.append(None)
+            elif "path" in maskDict:
+                path = maskDict["path"]
+                fileStat = os.stat(path)
+                masks.append(self._maskCache.get(
+                    (path, fileStat.st_mtime, fileStat.st_size, tuple(dataSec or ())),
+                    lambda: FrameIO.loadMask(path, dataSec),
+                ))
+            else:
+                masks.append(self._getSharedArray(maskDict, defDType="bool"))
+        return data, masks[0], masks[1]
+
+    def _getSharedArray(self, shmDict, defDType):
+        """Return a numpy array that is a view of shared memory
+
+        The shared memory block is held (not closed) until the current request finishes.
+        """
+        name = shmDict["shm"]
+        shm = self._shmCache.acquire(name, lambda: _attachSharedMemory(name))
+        self._threadLocal.heldShmList.append(shm)
+        return numpy.ndarray(
+            shape = tuple(shmDict["shape"]),
+            dtype = numpy.dtype(shmDict.get("dtype", defDType)),
+            buffer = shm.buf,
+            offset = int(shmDict.get("offset", 0)),
+        )
+
+    def _getCCDInfo(self, request):
+        ccdDict = request.get("ccdInfo")
+        if not ccdDict:
+            raise ValueError("ccdInfo is required")
+        return CCDInfo(**ccdDict)
+
+    def _doFindStars(self, request, header):
+        data, mask, satMask = self._getFrame(request)
+        ccdInfo = self._getCCDInfo(request)
+        kargs = dict((key, request[key]) for key in ("thresh", "radMult", "rad") if request.get(key) is not None)
+        ctrDataList, imStats = FindStars.findStars(
+            data = data,
+            mask = mask,
+            satMask = satMask,
+            ccdInfo = ccdInfo,
+        **kargs)
+        if request.get("doShape"):
+            shapeData = StarShape.starShapeMany(
+                data = data,
+                mask = mask,
+                xyCtrs = [ctrData.xyCtr for ctrData in ctrDataList],
+                rads = [ctrData.rad for ctrData in ctrDataList],
+            )
+        else:
+            shapeData = None
+        header["nStars"] = len(ctrDataList)
+        header["imStats"] = dict((name, _jsonScalar(getattr(imStats, name))) for name in _ImStatsFields)
+        return StarCatalog.fromCentroidList(ctrDataList, shapeData).toBytes()
+
+    def _doCentroid(self, request, header):
+        data, mask, satMask = self._getFrame(request)
+        ccdInfo = self._getCCDInfo(request)
+        for key in ("xyGuess", "rad"):
+            if request.get(key) is None:
+                raise ValueError("%s is required" % (key,))
+        kargs = dict(
+            data = data,
+            mask = mask,
+            satMask = satMask,
+            xyGuess = request["xyGuess"],
+            rad = request["rad"],
+            ccdInfo = ccdInfo,
+        )
+        if request.get("thresh") is not None:
+            kargs["thresh"] = request["thresh"]
+        if request.get("doShape"):
+            ctrData, shapeData = Centroid.centroidAndShape(**kargs)
+            shapeDataList = [shapeData]
+        else:
+            ctrData = Centroid.centroid(**kargs)
+            shapeDataList = None
+        header["msgStr"] = ctrData.msgStr
+        return StarCatalog.fromCentroidList([ctrData], shapeDataList).toBytes()
+
+    def _doStats(self, request, header):
+        header["latency"] = self.getLatencyStats()
+        header["cache"] = dict(
+            (name, dict(nHits=cache.nHits, nMisses=cache.nMisses))
+            for name, cache in (("frame", self._frameCache), ("mask", self._maskCache), ("shm", self._shmCache))
+        )
+
+    def _doPing(self, request, header):
+        pass
+
+
+def _jsonScalar(val):
+    """Convert a numpy scalar to a python scalar (leaving None and python scalars alone)"""
+    if hasattr(val, "item"):
+        return val.item()
+    return val
+
+
+class GuideClient(object):
+    """A simple blocking client for GuideServer
+
+    Inputs:
+    - socketPath    path of the server's Unix domain socket
+    - timeout       timeout for socket operations (sec); None for no timeout
+
+    May be used as a context manager (which closes the connection on exit).
+    """
+    def __init__(self, socketPath, timeout=None):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(socketPath)
+        self._file = self._sock.makefile("rb")
+
+    def request(self, op, **kargs):
+        """Send a request and return (header, payload), where header is a dict and payload is bytes
+
+        Inputs:
+        - op        the operation, e.g. "findStars"
+        - kargs     other request items; see the module doc string
+        """
+        kargs["op"] = op
+        self._sock.sendall(json.dumps(kargs).encode("utf-8") + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise RuntimeError("Server closed the connection")
+        header = json.loads(line.decode("utf-8"))
+        nBytes = header.get("nBytes", 0)
+        payload = self._file.read(nBytes) if nBytes else b""
+        if len(payload) != nBytes:
+            raise RuntimeError("Server closed the connection")
+        return header, payload
+
+    def findStars(self, frame, ccdInfo, mask=None, satMask=None, **kargs):
+        """Find stars; return (catalog, header), where catalog is a StarCatalog (None on error)
+
+        Inputs:
+        - frame     the image: a FITS file path or a dict returned by frameRef
+        - ccdInfo   a PyGuide.CCDInfo
+        - mask      a mask of invalid data, specified as for frame, or None
+        - satMask   a mask of saturated pixels, specified as for frame, or None
+        - kargs     other request items, e.g. thresh, rad or doShape
+        """
+        return self._measure("findStars", frame, ccdInfo, mask, satMask, kargs)
+
+    def centroid(self, frame, ccdInfo, xyGuess, rad, mask=None, satMask=None, **kargs):
+        """Centroid a star; return (catalog, header), where catalog is a StarCatalog
+        containing one star (None on error)
+
+        Inputs: as for findStars, plus:
+        - xyGuess   initial x,y guess for centroid
+        - rad       radius of search (pixels)
+        """
+        kargs.update(xyGuess=[float(val) for val in xyGuess], rad=rad)
+        return self._measure("centroid", frame, ccdInfo, mask, satMask, kargs)
+
+    def getStats(self):
+        """Return the server's latency and cache statistics (as a dict)"""
+        return self.request("stats")[0]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _measure(self, op, frame, ccdInfo, mask, satMask, kargs):
+        for name, ref in (("frame", frame), ("mask", mask), ("satMask", satMask)):
+            if isinstance(ref, str):
+                ref = frameRef(path=ref)
+            kargs[name] = ref
+        kargs["ccdInfo"] = dict(
+            bias = ccdInfo.bias,
+            readNoise = ccdInfo.readNoise,
+            ccdGain = ccdInfo.ccdGain,
+            satLevel = ccdInfo.satLevel,
+        )
+        header, payload = self.request(op, **kargs)
+        if not header["isOK"]:
+            return None, header
+        return StarCatalog.fromBytes(payload), header
+
+
+def main(argv=None):
+    """Run a GuideServer from the command line"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Run a PyGuide guide measurement server.")
+    parser.add_argument("socketPath", help="path of Unix domain socket on which to listen")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="number of worker threads; default: %(default)s")
+    parser.add_argument("--cachesize", type=int, default=4, help="size of each cache; default: %(default)s")
+    args = parser.parse_args(argv)
+    GuideServer(args.socketPath, nWorkers=args.workers, cacheSize=args.cachesize).run()
+
+if __name__ == "__main__":
+    main()
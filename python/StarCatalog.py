@@ -0,0 +1,215 @@
+from __future__ import division, absolute_import, print_function
+"""A columnar catalog of centroid and star shape data.
+
+A StarCatalog holds data for many stars in one numpy structured array
+(one record per star), so it is compact, offers vectorized access
+to each field (e.g. xyCtr as an N x 2 array) and can be serialized
+to and from .npy bytes quickly, e.g. to send results to another process.
+
+The fields are listed in StarCatalogDType. Values that are None
+in CentroidData are stored as -1 (integer fields) or NaN (float fields).
+msgStr is not stored.
+
+History:
+2026-10-18          First version.
+                    Import Centroid and StarShape when first needed, so "import PyGuide" does not import them.
+"""
+__all__ = ["StarCatalog", "StarCatalogDType"]
+
+import io
+
+import numpy
+
+from .Constants import NaN
+from . import ImUtil
+
+StarCatalogDType = numpy.dtype([
+    # from CentroidData
+    ("isOK", numpy.bool_),
+    ("nSat", numpy.int32),      # -1 if unknown
+    ("rad", numpy.int32),       # -1 if unknown
+    ("xyCtr", numpy.float64, (2,)),
+    ("xyErr", numpy.float64, (2,)),
+    ("asymm", numpy.float64),
+    ("pix", numpy.int32),       # -1 if unknown
+    ("counts", numpy.float64),
+    # from CentroidData.imStats
+    ("med", numpy.float64),
+    ("stdDev", numpy.float64),
+    ("nPts", numpy.int32),      # -1 if unknown
+    ("thresh", numpy.float64),
+    ("dataCut", numpy.float64),
+    # from StarShapeData
+    ("shapeOK", numpy.bool_),
+    ("ampl", numpy.float64),
+    ("fwhm", numpy.float64),
+    ("bkgnd", numpy.float64),
+    ("chiSq", numpy.float64),
+])
+
+_IntFields = ("nSat", "rad", "pix", "nPts")
+_ImStatsFields = ("med", "stdDev", "nPts", "thresh", "dataCut")
+_ShapeFields = ("ampl", "fwhm", "bkgnd", "chiSq")
+
+def _fromNone(val, fieldName):
+    """Convert None to the null value for the specified field"""
+    if val is None:
+        if fieldName in _IntFields:
+            return -1
+        return NaN
+    return val
+
+def _toNone(val, fieldName):
+    """Convert the null value for the specified field to None; else return val as a python scalar"""
+    if fieldName in _IntFields:
+        return None if val < 0 else int(val)
+    return None if numpy.isnan(val) else float(val)
+
+def _fieldProperty(fieldName):
+    def getField(self):
+        return self.arr[fieldName]
+    return property(getField, doc="%s for all stars (a view, not a copy)" % (fieldName,))
+
+
+class StarCatalog(object):
+    """A columnar catalog of centroid and star shape data
+
+    Inputs:
+    - arr       a numpy structured array with dtype StarCatalogDType;
+                if None then a catalog of nStars null entries is created
+    - nStars    number of stars (ignored if arr is not None)
+
+    Attributes:
+    - arr       the structured array; one record per star
+
+    Field accessors return views of arr, e.g. catalog.xyCtr is an N x 2 array.
+    len() returns the number of stars and [ind] returns a CentroidData for one star
+    (use getShapeData to retrieve the associated StarShapeData).
+    """
+    __slots__ = ("arr",)
+
+    def __init__(self, arr=None, nStars=0):
+        if arr is None:
+            arr = numpy.zeros([nStars], dtype=StarCatalogDType)
+            for fieldName in StarCatalogDType.names:
+                if fieldName in ("isOK", "shapeOK"):
+                    continue
+                arr[fieldName] = _fromNone(None, fieldName)
+        else:
+            arr = numpy.asarray(arr)
+            if arr.dtype != StarCatalogDType:
+                raise ValueError("arr has dtype %s; must be StarCatalogDType" % (arr.dtype,))
+            if arr.ndim != 1:
+                raise ValueError("arr must be 1-dimensional")
+        self.arr = arr
+
+    @classmethod
+    def fromCentroidList(cls, ctrDataList, shapeDataList=None):
+        """Create a StarCatalog from a list of CentroidData (e.g. as returned by findStars)
+
+        Inputs:
+        - ctrDataList   a list of CentroidData objects
+        - shapeDataList a list of StarShapeData objects or a StarShapeArrays object,
+                        with one entry per star in ctrDataList; None if no shape data
+        """
+        from .StarShape import StarShapeArrays
+        catalog = cls(nStars=len(ctrDataList))
+        arr = catalog.arr
+        for ind, ctrData in enumerate(ctrDataList):
+            rec = arr[ind]
+            rec["isOK"] = ctrData.isOK
+            for fieldName in ("nSat", "rad", "xyCtr", "xyErr", "asymm", "pix", "counts"):
+                rec[fieldName] = _fromNone(getattr(ctrData, fieldName), fieldName)
+            for fieldName in _ImStatsFields:
+                rec[fieldName] = _fromNone(getattr(ctrData.imStats, fieldName), fieldName)
+
+        if shapeDataList is not None:
+            if len(shapeDataList) != len(ctrDataList):
+                raise ValueError("shapeDataList has %s entries; must have %s" % (len(shapeDataList), len(ctrDataList)))
+            if isinstance(shapeDataList, StarShapeArrays):
+                arr["shapeOK"] = shapeDataList.isOK
+                for fieldName in _ShapeFields:
+                    arr[fieldName] = getattr(shapeDataList, fieldName)
+            else:
+                for ind, shapeData in enumerate(shapeDataList):
+                    arr["shapeOK"][ind] = shapeData.isOK
+                    for fieldName in _ShapeFields:
+                        arr[fieldName][ind] = getattr(shapeData, fieldName)
+        return catalog
+
+    @classmethod
+    def fromBytes(cls, buf):
+        """Create a StarCatalog from bytes returned by toBytes"""
+        return cls(numpy.load(io.BytesIO(buf), allow_pickle=False))
+
+    def toBytes(self):
+        """Return the catalog as the contents of a .npy file (bytes)"""
+        outFile = io.BytesIO()
+        numpy.save(outFile, self.arr, allow_pickle=False)
+        return outFile.getvalue()
+
+    def toCentroidList(self):
+        """Return the data as a list of CentroidData objects"""
+        return [self[ind] for ind in range(len(self))]
+
+    def getShapeData(self, ind):
+        """Return a StarShapeData for the star at index ind"""
+        from .StarShape import StarShapeData
+        rec = self.arr[ind]
+        return StarShapeData(
+            isOK = rec["shapeOK"],
+            ampl = rec["ampl"],
+            fwhm = rec["fwhm"],
+            bkgnd = rec["bkgnd"],
+            chiSq = rec["chiSq"],
+        )
+
+    def sortByCounts(self):
+        """Return a new StarCatalog sorted in order of decreasing counts
+        (the same order as findStars)
+        """
+        sortInd = numpy.argsort(-self.arr["counts"], kind="mergesort")
+        return StarCatalog(self.arr[sortInd])
+
+    def __len__(self):
+        return len(self.arr)
+
+    def __getitem__(self, ind):
+        """Return a CentroidData for the star at index ind"""
+        from .Centroid import CentroidData
+        rec = self.arr[ind]
+        imStats = ImUtil.ImStats(**dict((fieldName, _toNone(rec[fieldName], fieldName)) for fieldName in _ImStatsFields))
+        xyCtr = rec["xyCtr"]
+        return CentroidData(
+            isOK = bool(rec["isOK"]),
+            nSat = _toNone(rec["nSat"], "nSat"),
+            rad = _toNone(rec["rad"], "rad"),
+            imStats = imStats,
+            xyCtr = None if numpy.all(numpy.isnan(xyCtr)) else [float(val) for val in xyCtr],
+            xyErr = tuple(float(val) for val in rec["xyErr"]),
+            asymm = _toNone(rec["asymm"], "asymm"),
+            pix = _toNone(rec["pix"], "pix"),
+            counts = _toNone(rec["counts"], "counts"),
+        )
+
+    def __repr__(self):
+        return "%s(nStars=%s)" % (self.__class__.__name__, len(self))
+
+    isOK = _fieldProperty("isOK")
+    nSat = _fieldProperty("nSat")
+    rad = _fieldProperty("rad")
+    xyCtr = _fieldProperty("xyCtr")
+    xyErr = _fieldProperty("xyErr")
+    asymm = _fieldProperty("asymm")
+    pix = _fieldProperty("pix")
+    counts = _fieldProperty("counts")
+    med = _fieldProperty("med")
+    stdDev = _fieldProperty("stdDev")
+    nPts = _fieldProperty("nPts")
+    thresh = _fieldProperty("thresh")
+    dataCut = _fieldProperty("dataCut")
+    shapeOK = _fieldProperty("shapeOK")
+    ampl = _fieldProperty("ampl")
+    fwhm = _fieldProperty("fwhm")
+    bkgnd = _fieldProperty("bkgnd")
+    chiSq = _fieldProperty("chiSq")
@@ -83,8 +83,17 @@ History:
                     Removed unused constants _FWHMMin/Max/Delta (thanks to pychecker).
 2008-01-12 ROwen    Fixed bug in StarShapeData.__repr__ (thanks to Adam Ginsburg).
 2009-11-20 ROwen    Modified to use numpy.
+2026-10-18          Added starShapeMany and StarShapeArrays to fit many stars at once.
+                    Added starShapeFromRadProf (split out of starShape).
+                    StarShapeData uses __slots__.
+                    Added Timing stages.
+                    Added the timeBudget and deadline arguments to starShape and starShapeFromRadProf,
+                    and the isPartial field to StarShapeData.
+                    starShapeMany accepts a PackedMask or RunMask.
+                    Import scipy.optimize only when _fitRadProfile is first called (it is slow to import);
+                    removed unused import of numpy.ma.
 """
-__all__ = ["StarShapeData", "starShape"]
+__all__ = ["StarShapeData", "StarShapeArrays", "starShape", "starShapeMany"]
 
 import math
 import sys
@@ -92,17 +101,23 @@ import traceback
 import warnings
 
 import numpy
-import numpy.ma
-import scipy.optimize
 
+from .CompactMask import isCompactMask
 from .Constants import FWHMPerSigma, NaN
 from . import ImUtil
 from . import radProf as radProfModule
+from . import Timing
 
 # minimum radius
 _MinRad = 3.0
+# relative tolerance for fwhm in starShapeMany
+_FWHMTol = 1.0e-8
 
-class StarShapeData:
+class _OutOfTime(Exception):
+    """Raised internally to stop a fit when the deadline is reached"""
+    pass
+
+class StarShapeData(object):
     """Guide star fit data
 
     Attributes:
@@ -112,7 +127,11 @@ class StarShapeData:
     - bkgnd     background level (ADUs)
     - fwhm      FWHM (pixels)
     - chiSq     chi squared of fit
+    - isPartial if True then the time budget ran out, so the fit was not refined;
+                the values are from the best of a coarse grid of trial FWHMs
     """
+    __slots__ = ("isOK", "msgStr", "ampl", "bkgnd", "fwhm", "chiSq", "isPartial")
+
     def __init__(self,
         isOK = True,
         msgStr = "",
@@ -120,6 +139,7 @@ class StarShapeData:
         fwhm = NaN,
         bkgnd = NaN,
         chiSq = NaN,
+        isPartial = False,
     ):
         self.isOK = bool(isOK)
         self.msgStr = msgStr
@@ -127,6 +147,7 @@ class StarShapeData:
         self.bkgnd = float(bkgnd)
         self.fwhm = float(fwhm)
         self.chiSq = float(chiSq)
+        self.isPartial = bool(isPartial)
 
     def __repr__(self):
         dataList = []
@@ -134,9 +155,61 @@ class StarShapeData:
             val = getattr(self, arg)
             if val not in (None, ""):
                 dataList.append("%s=%s" % (arg, val))
+        if self.isPartial:
+            dataList.append("isPartial=True")
         return "%s(%s)" % (self.__class__.__name__, ", ".join(dataList))
 
 
+class StarShapeArrays(object):
+    """Guide star fit data for many stars, stored as columns
+
+    Attributes (each has one element per star):
+    - isOK      array of bool; if False the fit failed; see msgStr for more info
+    - msgStr    list of warning or error messages ("" if none)
+    - ampl      array of profile amplitude (ADUs)
+    - bkgnd     array of background level (ADUs)
+    - fwhm      array of FWHM (pixels)
+    - chiSq     array of chi squared of fit
+
+    Values for stars whose fit failed are NaN.
+    Use len() to get the number of stars and [ind] to get a StarShapeData for one star.
+    """
+    __slots__ = ("isOK", "msgStr", "ampl", "fwhm", "bkgnd", "chiSq")
+
+    def __init__(self,
+        isOK,
+        msgStr,
+        ampl,
+        fwhm,
+        bkgnd,
+        chiSq,
+    ):
+        self.isOK = numpy.array(isOK, dtype=bool)
+        self.msgStr = list(msgStr)
+        self.ampl = numpy.array(ampl, dtype=float)
+        self.fwhm = numpy.array(fwhm, dtype=float)
+        self.bkgnd = numpy.array(bkgnd, dtype=float)
+        self.chiSq = numpy.array(chiSq, dtype=float)
+
+    def __len__(self):
+        return len(self.isOK)
+
+    def __getitem__(self, ind):
+        """Return a StarShapeData for the star at index ind"""
+        return StarShapeData(
+            isOK = self.isOK[ind],
+            msgStr = self.msgStr[ind],
+            ampl = self.ampl[ind],
+            fwhm = self.fwhm[ind],
+            bkgnd = self.bkgnd[ind],
+            chiSq = self.chiSq[ind],
+        )
+
+    def __repr__(self):
+        return "%s(nStars=%s, nOK=%s)" % (self.__class__.__name__, len(self), numpy.sum(self.isOK))
+
+
+@Timing.timed("starShape")
 def starShape(
     data,
     mask,
@@ -145,12 +218,14 @@ def starShape(
     predFWHM = None,
     verbosity = 0,
     doPlot = False,
+    timeBudget = None,
+    deadline = None,
 ):
     """Fit a double gaussian profile to a star
 
     Inputs:
     - data      a numpy array of float32 data
-    - mask      a numpy array of bool, or None if no mask (all data valid).
+    - mask      a numpy array of bool, a PackedMask or RunMask, or None if no mask (all data valid).
                 If supplied, mask must be the same shape as data
                 and elements are True for masked (invalid data).
     - xyCtr     x,y center of star; use the convention specified by
@@ -161,7 +236,12 @@ def starShape(
     - verbosity 0: no output, 1: print warnings, 2: print information, 3: print iteration info.
                 Note: there are no warnings at this time
     - doPlot    if True, output diagnostics using matplotlib
+    - timeBudget    maximum time (sec); None if no limit. If the time runs out before the fit
+                is refined, return the best fit found so far, marked isPartial (see StarShapeData).
+    - deadline  time by which to finish (a value of PyGuide.Timing.now()); None if no limit.
+                If timeBudget and deadline are both specified, the earlier applies.
     """
+    deadline = Timing.getDeadline(timeBudget, deadline)
     if verbosity >= 2:
         print("starShape(data[%s,%s]; xyCtr=%.2f, %.2f; rad=%.1f)" % \
             (data.shape[0], data.shape[1], xyCtr[0], xyCtr[1], rad))
@@ -169,11 +249,6 @@ def starShape(
     # compute index of nearest pixel center (pixel whose center is nearest xyCtr)
     ijCtrInd = ImUtil.ijIndFromXYPos(xyCtr)
 
-    # compute offset of position from nearest pixel center
-    ijCtrFloat = ImUtil.ijPosFromXYPos(xyCtr)
-    ijOff = [abs(round(pos) - pos) for pos in ijCtrFloat]
-    offSq = ijOff[0]**2 + ijOff[1]**2
-
     # adjust radius as required
     rad = int(round(max(rad, _MinRad)))
 
@@ -182,11 +257,52 @@ def starShape(
     radProf = numpy.zeros([radIndArrLen], numpy.float64)
     var = numpy.zeros([radIndArrLen], numpy.float64)
     nPts = numpy.zeros([radIndArrLen], numpy.int32)
-    radProfModule.radProf(data, mask, ijCtrInd, rad, radProf, var, nPts)
+    with Timing.stage("starShape.radProf"):
+        radProfModule.radProf(data, mask, ijCtrInd, rad, radProf, var, nPts)
+
+    return starShapeFromRadProf(radProf, var, nPts, xyCtr, rad, verbosity=verbosity, doPlot=doPlot,
+        deadline=deadline)
+
+
+def starShapeFromRadProf(
+    radProf,
+    var,
+    nPts,
+    xyCtr,
+    rad,
+    verbosity = 0,
+    doPlot = False,
+    timeBudget = None,
+    deadline = None,
+):
+    """Fit a double gaussian profile to a star, given its radial profile
+
+    Inputs:
+    - radProf   radial profile (mean) by radial index, as returned by radProf.radProf;
+                it must be centered on the pixel whose center is nearest xyCtr
+    - var       variance by radial index
+    - nPts      number of points by radial index
+    - xyCtr     x,y center of star; use the convention specified by
+                PyGuide.Constants.PosMinusIndex
+    - rad       radius of data used to compute the profile (pixels); an integer >= _MinRad
+    - verbosity 0: no output, 1: print warnings, 2: print information, 3: print iteration info.
+                Note: there are no warnings at this time
+    - doPlot    if True, output diagnostics using matplotlib
+    - timeBudget, deadline: time limit; see starShape
+
+    This is the part of starShape that follows extraction of the radial profile;
+    it allows reusing a profile computed elsewhere (e.g. by the centroider).
+    """
+    deadline = Timing.getDeadline(timeBudget, deadline)
+
+    # compute offset of position from nearest pixel center
+    ijCtrFloat = ImUtil.ijPosFromXYPos(xyCtr)
+    ijOff = [abs(round(pos) - pos) for pos in ijCtrFloat]
+    offSq = ijOff[0]**2 + ijOff[1]**2
 
     # fit data
     try:
-        gsData = _fitRadProfile(radProf, var, nPts, rad, verbosity=verbosity, doPlot=doPlot)
+        gsData = _fitRadProfile(radProf, var, nPts, rad, verbosity=verbosity, doPlot=doPlot, deadline=deadline)
         if verbosity >= 2:
             print("starShape: ampl=%.1f; fwhm=%.1f; bkgnd=%.1f; chiSq=%.2f" % \
                 (gsData.ampl, gsData.fwhm, gsData.bkgnd, gsData.chiSq))
@@ -214,7 +330,79 @@ def starShape(
     return gsData
 
 
-def _fitRadProfile(radProf, var, nPts, rad, verbosity=0, doPlot=False):
+@Timing.timed("starShapeMany")
+def starShapeMany(
+    data,
+    mask,
+    xyCtrs,
+    rads,
+    verbosity = 0,
+):
+    """Fit a double gaussian profile to many stars at once
+
+    Inputs:
+    - data      a numpy array of float32 data
+    - mask      a numpy array of bool, a PackedMask or RunMask, or None if no mask (all data valid).
+                If supplied, mask must be the same shape as data
+                and elements are True for masked (invalid data).
+    - xyCtrs    x,y center of each star: a sequence of N x,y pairs;
+                use the convention specified by PyGuide.Constants.PosMinusIndex
+    - rads      radius of data to fit (pixels): a scalar or a sequence of N values;
+                values less than _MinRad are treated as _MinRad
+    - verbosity 0: no output, 1: print warnings, 2: print information.
+
+    Returns a StarShapeArrays object.
+
+    The results match those of calling starShape for each star (to within the
+    tolerance of the final minimization), but all radial profiles are extracted
+    into one padded 2-d array and all stars are fit simultaneously.
+    """
+    xyCtrArr = numpy.array(xyCtrs, dtype=float).reshape([-1, 2])
+    nStars = len(xyCtrArr)
+    radList = [int(round(max(rad, _MinRad))) for rad in numpy.broadcast_to(rads, [nStars])]
+    if verbosity >= 2:
+        print("starShapeMany(data[%s,%s]; nStars=%s)" % (data.shape[0], data.shape[1], nStars))
+    if nStars == 0:
+        return StarShapeArrays(*[[]]*6)
+
+    # condition the arrays once rather than once per star
+    data = numpy.asarray(data, dtype=numpy.float32, order="C")
+    if mask is not None and not isCompactMask(mask):
+        mask = numpy.asarray(mask, dtype=numpy.bool, order="C")
+
+    # compute radial profiles and associated data;
+    # each row is long enough for the largest radius (and padded with zeros)
+    radArr = numpy.array(radList)
+    radIndArrLen = radArr.max() + 2 # radial index arrays need two extra points
+    radProfArr = numpy.zeros([nStars, radIndArrLen], numpy.float64)
+    varArr = numpy.zeros([nStars, radIndArrLen], numpy.float64)
+    nPtsArr = numpy.zeros([nStars, radIndArrLen], numpy.int32)
+    offSqArr = numpy.zeros([nStars], float)
+    with Timing.stage("starShapeMany.radProf"):
+        for ind in range(nStars):
+            xyCtr = xyCtrArr[ind]
+            ijCtrInd = ImUtil.ijIndFromXYPos(xyCtr)
+            ijCtrFloat = ImUtil.ijPosFromXYPos(xyCtr)
+            offSqArr[ind] = sum([(round(pos) - pos)**2 for pos in ijCtrFloat])
+            radProfModule.radProf(data, mask, ijCtrInd, radList[ind], radProfArr[ind], varArr[ind], nPtsArr[ind])
+
+    # fit data
+    shapeArrs = _fitRadProfileMany(radProfArr, varArr, nPtsArr, radArr, verbosity=verbosity)
+
+    # adjust the width for the fact that the centroid
+    # is not exactly on the center of a pixel; see starShape for details
+    with numpy.errstate(invalid="ignore"):
+        rawSigSq = (FWHMPerSigma * shapeArrs.fwhm)**2
+        corrSigSq = rawSigSq - (0.5 * offSqArr)
+        shapeArrs.fwhm = numpy.sqrt(corrSigSq) / FWHMPerSigma
+
+    if verbosity >= 2:
+        print("starShapeMany: %s of %s fits succeeded" % (numpy.sum(shapeArrs.isOK), nStars))
+    return shapeArrs
+
+
+@Timing.timed("starShape.fit")
+def _fitRadProfile(radProf, var, nPts, rad, verbosity=0, doPlot=False, deadline=None):
     """Fit in profile space to determine the width, amplitude, and background.
 
     Inputs:
@@ -225,9 +413,14 @@ def _fitRadProfile(radProf, var, nPts, rad, verbosity=0, doPlot=False):
     - verbosity 0: no output, 1: print warnings, 2: print information, 3: print iteration info.
                 Note: there are no warnings at this time because warnings are returned in the msgStr field.
     - doPlot    if True, output diagnostics using matplotlib
+    - deadline  time by which to finish (a value of Timing.now()), or None if no limit;
+                if the time runs out then the fit is not refined (or the refinement is stopped early)
+                and the best fit so far is returned, marked isPartial
 
     Returns a StarShapeData object
     """
+    import scipy.optimize # slow to import, so only import it when needed
+
     if verbosity >= 2:
         print("_fitRadProfile(radProf[%s]=%s\n, var[%s]=%s\n, nPts[%s]=%s, rad=%s)" %
             (len(radProf), radProf, len(var), var, len(nPts), nPts, rad))
@@ -262,8 +455,14 @@ def _fitRadProfile(radProf, var, nPts, rad, verbosity=0, doPlot=False):
         pylab.subplot(4,1,3)
         pylab.plot(radWeight)
 
+    # best (chiSq, fwhm) so far of the refinement, for returning a partial result
+    bestFit = [None]
     def myfunc(fwhm):
+        if deadline is not None and Timing.now() >= deadline:
+            raise _OutOfTime()
         ampl, bkgnd, chiSq, seeProf = _fitIter(radProf, nPts, radWeight, radSq, totPnts, totCounts, fwhm, verbosity=verbosity)
+        if ampl > 0 and (bestFit[0] is None or chiSq < bestFit[0][0]):
+            bestFit[0] = (chiSq, fwhm)
         return chiSq
 
     # brute-force check a lot of values to find a good starting place
@@ -316,7 +515,16 @@ def _fitRadProfile(radProf, var, nPts, rad, verbosity=0, doPlot=False):
     if verbosity > 2:
         print("fwhmFirst=%0.1f; guess fwhmMin=%0.1f; fwhmLast=%0.1f" % (fwhmFirst, fwhmMin, fwhmLast))
 
-    fwhmMin = scipy.optimize.brent(myfunc, brack=fwhmBracket)
+    isPartial = False
+    try:
+        fwhmMin = scipy.optimize.brent(myfunc, brack=fwhmBracket)
+    except _OutOfTime:
+        # use the best fit so far
+        isPartial = True
+        if bestFit[0] is not None and bestFit[0][0] < chiSqArr[minInd]:
+            fwhmMin = bestFit[0][1]
+        if verbosity > 1:
+            print("starShape: out of time; using fwhm=%0.1f" % (fwhmMin,))
     if verbosity > 2:
         print("optimized fwhmMin=%0.1f" % (fwhmMin,))
 
@@ -331,10 +539,113 @@ def _fitRadProfile(radProf, var, nPts, rad, verbosity=0, doPlot=False):
     # return StarShapeData containing fit data
     return StarShapeData(
         isOK = True,
+        msgStr = "Out of time; fit is incomplete" if isPartial else "",
         ampl  = ampl,
         fwhm = fwhmMin,
         bkgnd = bkgnd,
         chiSq = chiSq,
+        isPartial = isPartial,
+    )
+
+@Timing.timed("starShapeMany.fit")
+def _fitRadProfileMany(radProf, var, nPts, rad, verbosity=0):
+    """Fit many radial profiles at once; a vectorized version of _fitRadProfile.
+
+    Inputs:
+    - radProf   radial profile around center pixel by radial index [nStars, nRadInd]
+    - var       variance as a function of radius [nStars, nRadInd]
+    - nPts      number of points contributing to profile by radial index [nStars, nRadInd];
+                rows for stars with radius < nRadInd - 2 must be padded with 0
+    - rad       radius of data to fit (pixels) [nStars]
+    - verbosity 0: no output, 1: print warnings, 2: print information
+
+    Returns a StarShapeArrays object (fwhm is not corrected for centroid offset).
+
+    Unlike _fitRadProfile this does not use Brent's method to refine fwhm;
+    instead it performs a golden section search on all stars in parallel,
+    using the same brackets as _fitRadProfile.
+    """
+    nStars, nRadInd = radProf.shape
+    radSq = radProfModule.radSqByRadInd(nRadInd)
+    totPnts = numpy.sum(nPts, axis=1)
+    totCounts = numpy.sum(nPts*radProf, axis=1)
+
+    # the same simple normalization as _fitRadProfile
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        meanVar = numpy.sum(var, axis=1) / numpy.sum(nPts > 1, axis=1).astype(float)
+        radWeight = nPts / meanVar[:, numpy.newaxis]
+
+    # brute-force check a lot of values to find a good starting place;
+    # use the trial values of _fitRadProfile for the largest radius
+    # and ignore values too large for a given star's radius
+    fwhmList = []
+    fwhm = 1.0
+    while fwhm < rad.max()*1.5:
+        fwhmList.append(fwhm)
+        fwhm += fwhm * 0.1
+    fwhmArr = numpy.array(fwhmList)
+    nTrials = numpy.searchsorted(fwhmArr, rad*1.5)
+
+    if verbosity > 2:
+        print("find bracketing values")
+    ampl, bkgnd, chiSq = _fitIterMany(radProf, nPts, radWeight, radSq, totPnts, totCounts, fwhmArr[numpy.newaxis, :])
+
+    BadChiSq = 9.9e99
+    with numpy.errstate(invalid="ignore"):
+        isTrialOK = (numpy.arange(len(fwhmArr)) < nTrials[:, numpy.newaxis]) & (ampl > 0) & (chiSq < BadChiSq)
+    minInd = numpy.argmin(numpy.where(isTrialOK, chiSq, numpy.inf), axis=1)
+    isOK = (minInd != 0) & (minInd != nTrials - 1)
+    msgStr = ["" if ok else "Could not find bracketing values for fwhm" for ok in isOK]
+
+    starInd = numpy.arange(nStars)
+    firstInd = numpy.maximum(0, minInd - 2)
+    lastInd = numpy.minimum(nTrials - 1, minInd + 2)
+    minChiSq = chiSq[starInd, minInd]
+    isBracketed = (chiSq[starInd, firstInd] > minChiSq) & (chiSq[starInd, lastInd] > minChiSq)
+    for ind in numpy.flatnonzero(isOK & ~isBracketed):
+        msgStr[ind] = "Bracketing values do not satisfy f(fwhmMin) < f(fwhmFirst) and f(fwhmMin) < f(fwhmLast)"
+    isOK &= isBracketed
+
+    # golden section search for the minimum chiSq between the bracketing values
+    fwhmLow = fwhmArr[firstInd]
+    fwhmHigh = fwhmArr[lastInd]
+    invPhi = (math.sqrt(5.0) - 1.0) / 2.0
+    def chiSqFunc(fwhm):
+        return _fitIterMany(radProf, nPts, radWeight, radSq, totPnts, totCounts, fwhm[:, numpy.newaxis])[2][:, 0]
+    fwhm1 = fwhmHigh - invPhi * (fwhmHigh - fwhmLow)
+    fwhm2 = fwhmLow + invPhi * (fwhmHigh - fwhmLow)
+    chiSq1 = chiSqFunc(fwhm1)
+    chiSq2 = chiSqFunc(fwhm2)
+    while numpy.any(fwhmHigh - fwhmLow > _FWHMTol * fwhmHigh):
+        useLow = chiSq1 < chiSq2
+        fwhmHigh = numpy.where(useLow, fwhm2, fwhmHigh)
+        fwhmLow = numpy.where(useLow, fwhmLow, fwhm1)
+        fwhm1, fwhm2 = (
+            numpy.where(useLow, fwhmHigh - invPhi * (fwhmHigh - fwhmLow), fwhm2),
+            numpy.where(useLow, fwhm1, fwhmLow + invPhi * (fwhmHigh - fwhmLow)),
+        )
+        newChiSq = chiSqFunc(numpy.where(useLow, fwhm1, fwhm2))
+        chiSq1, chiSq2 = (
+            numpy.where(useLow, newChiSq, chiSq2),
+            numpy.where(useLow, chiSq1, newChiSq),
+        )
+    fwhmMin = (fwhmLow + fwhmHigh) / 2.0
+
+    # compute final answers at fwhmMin
+    ampl, bkgnd, chiSq = [arr[:, 0] for arr in
+        _fitIterMany(radProf, nPts, radWeight, radSq, totPnts, totCounts, fwhmMin[:, numpy.newaxis])]
+    if verbosity > 2:
+        print("optimized fwhmMin=%s" % (fwhmMin,))
+
+    def nanIfBad(arr):
+        return numpy.where(isOK, arr, NaN)
+    return StarShapeArrays(
+        isOK = isOK,
+        msgStr = msgStr,
+        ampl = nanIfBad(ampl),
+        fwhm = nanIfBad(fwhmMin),
+        bkgnd = nanIfBad(bkgnd),
+        chiSq = nanIfBad(chiSq),
     )
 
 def _fitIter(radProf, nPts, radWeight, radSq, totPnts, totCounts, fwhm, verbosity=0):
@@ -378,6 +689,41 @@ def _fitIter(radProf, nPts, radWeight, radSq, totPnts, totCounts, fwhm, verbosit
 
     return ampl, bkgnd, chiSq, seeProf
 
+def _fitIterMany(radProf, nPts, radWeight, radSq, totPnts, totCounts, fwhm):
+    """Vectorized version of _fitIter: fit amplitude and background for many stars and widths.
+
+    Inputs:
+    - radProf, nPts, radWeight  [nStars, nRadInd]
+    - radSq                     [nRadInd]
+    - totPnts, totCounts        [nStars]
+    - fwhm                      trial widths: [nStars, nTrials] or [1, nTrials]
+
+    Returns ampl, bkgnd, chiSq; each [nStars, nTrials]
+    """
+    # compute the seeing profile for each trial width: [nStars or 1, nTrials, nRadInd]
+    seeProf = _seeProf(radSq, fwhm[:, :, numpy.newaxis])
+    radProf = radProf[:, numpy.newaxis, :]
+    totPnts = totPnts[:, numpy.newaxis]
+    totCounts = totCounts[:, numpy.newaxis]
+
+    # compute sums
+    nPtsSeeProf = nPts[:, numpy.newaxis, :] * seeProf # temporary array
+    sumSeeProf = numpy.sum(nPtsSeeProf, axis=2)
+    sumSeeProfSq = numpy.sum(nPtsSeeProf*seeProf, axis=2)
+    sumSeeProfRadProf = numpy.sum(nPtsSeeProf*radProf, axis=2)
+
+    # compute amplitude and background
+    # using standard linear least squares fit equations
+    # (predicted value = bkgnd + ampl * seeProf)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        disc = (totPnts * sumSeeProfSq) - sumSeeProf**2
+        ampl  = ((totPnts * sumSeeProfRadProf) - (totCounts * sumSeeProf)) / disc
+        bkgnd = ((sumSeeProfSq * totCounts) - (sumSeeProf * sumSeeProfRadProf)) / disc
+        # diff is the weighted difference between the data and the model
+        diff = radProf - (ampl[:, :, numpy.newaxis] * seeProf) - bkgnd[:, :, numpy.newaxis]
+        chiSq = numpy.sum(radWeight[:, numpy.newaxis, :] * diff**2, axis=2) / totPnts
+    return ampl, bkgnd, chiSq
+
 def _seeProf(radSq, fwhm):
     """Computes the predicted star profile for the given width parameter.
 
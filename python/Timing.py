@@ -0,0 +1,303 @@
+from __future__ import division, absolute_import, print_function
+"""Per-stage timing instrumentation.
+
+PyGuide routines are instrumented with named stages (e.g. "findStars.medianFilter",
+"checkSignal", "starShape.fit"). Normally this costs almost nothing: each stage
+just checks whether a recorder is active. To measure, activate a recorder:
+
+    with PyGuide.Timing.recording() as recorder:
+        PyGuide.findStars(data, mask, satMask, ccdInfo)
+    print(recorder.formatStats())
+
+For each stage the recorder accumulates the number of calls, wall time, CPU time
+(of the calling thread) and maximum wall time per call. It can also record every call
+as an event (doTrace=True) for viewing as a Chrome trace (chrome://tracing or Perfetto).
+
+The active recorder is context-local (a contextvars.ContextVar where available,
+else thread-local). Thus it applies to the current thread (or asyncio task);
+code run in a thread pool is not recorded unless the pool's tasks run in a copy
+of the context (contextvars.copy_context().run) or activate a recorder themselves.
+A recorder may be shared by several threads.
+
+Stage names are "routine" or "routine.step". Stages may nest, so the wall time of an outer
+stage includes that of its inner stages.
+
+Also provided are helpers for time budgets: getDeadline and now.
+
+History:
+2026-10-18          First version.
+                    Added getDeadline and now.
+"""
+__all__ = ["TimingRecorder", "StageStats", "recording", "getRecorder", "stage", "timed", "addCount",
+    "getDeadline", "now"]
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+try:
+    from contextvars import ContextVar
+except ImportError:
+    ContextVar = None
+
+_perfCounter = getattr(time, "perf_counter", time.time)
+_cpuTime = getattr(time, "thread_time", None) or getattr(time, "process_time", None) or time.clock
+
+if ContextVar is not None:
+    _RecorderVar = ContextVar("PyGuideTimingRecorder", default=None)
+    _getCurrent = _RecorderVar.get
+
+    def _setCurrent(recorder):
+        token = _RecorderVar.set(recorder)
+        return lambda: _RecorderVar.reset(token)
+else:
+    _ThreadLocal = threading.local()
+
+    def _getCurrent():
+        return getattr(_ThreadLocal, "recorder", None)
+
+    def _setCurrent(recorder):
+        oldRecorder = _getCurrent()
+        _ThreadLocal.recorder = recorder
+        def reset():
+            _ThreadLocal.recorder = oldRecorder
+        return reset
+
+
+class StageStats(object):
+    """Accumulated timing for one stage
+
+    Attributes:
+    - count     number of calls
+    - wallTime  total wall time (sec)
+    - cpuTime   total CPU time of the calling thread(s) (sec)
+    - maxWallTime   maximum wall time for one call (sec)
+    """
+    __slots__ = ("count", "wallTime", "cpuTime", "maxWallTime")
+
+    def __init__(self):
+        self.count = 0
+        self.wallTime = 0.0
+        self.cpuTime = 0.0
+        self.maxWallTime = 0.0
+
+    def asDict(self):
+        return dict(count=self.count, wallTime=self.wallTime, cpuTime=self.cpuTime, maxWallTime=self.maxWallTime)
+
+    def __repr__(self):
+        return "StageStats(count=%s, wallTime=%s, cpuTime=%s, maxWallTime=%s)" % \
+            (self.count, self.wallTime, self.cpuTime, self.maxWallTime)
+
+
+class _Stage(object):
+    """Context manager that times one call of a stage"""
+    __slots__ = ("recorder", "name", "begWall", "begCPU")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.begWall = _perfCounter()
+        self.begCPU = _cpuTime()
+        return self
+
+    def __exit__(self, *args):
+        endWall = _perfCounter()
+        self.recorder._record(self.name, self.begWall, endWall - self.begWall, _cpuTime() - self.begCPU)
+        return False
+
+
+class _NullStage(object):
+    """Context manager that does nothing (used when no recorder is active)"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+_NullStageInstance = _NullStage()
+
+
+class TimingRecorder(object):
+    """Accumulate timing information for named stages
+
+    Inputs:
+    - doTrace   if True, record each call as an event, for asChromeTrace
+    - maxEvents maximum number of events to record; later events are counted in nLostEvents
+                (stage statistics are always accumulated)
+    """
+    def __init__(self, doTrace=False, maxEvents=1000000):
+        self.doTrace = bool(doTrace)
+        self.maxEvents = int(maxEvents)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Discard all accumulated data"""
+        with self._lock:
+            self.stats = {}
+            self.events = []
+            self.nLostEvents = 0
+            self.begTime = _perfCounter()
+
+    def stage(self, name):
+        """Return a context manager that times one call of the named stage"""
+        return _Stage(self, name)
+
+    def addCount(self, name, n=1):
+        """Increment the count of the named stage without recording any time"""
+        with self._lock:
+            stageStats = self.stats.get(name)
+            if stageStats is None:
+                stageStats = self.stats[name] = StageStats()
+            stageStats.count += n
+
+    def asDict(self):
+        """Return the stage statistics as a dict of stage name: dict of count, wallTime, cpuTime, maxWallTime"""
+        with self._lock:
+            return dict((name, stageStats.asDict()) for name, stageStats in self.stats.items())
+
+    def asChromeTrace(self):
+        """Return recorded events as a dict in Chrome trace event format (use json.dump to save it).
+
+        Requires doTrace=True, else there are no events.
+        """
+        pid = os.getpid()
+        with self._lock:
+            eventList = [
+                dict(
+                    name = name,
+                    cat = name.split(".")[0],
+                    ph = "X",
+                    ts = (begWall - self.begTime) * 1.0e6,
+                    dur = wallTime * 1.0e6,
+                    pid = pid,
+                    tid = threadId,
+                    args = dict(cpuTime=cpuTime),
+                ) for name, begWall, wallTime, cpuTime, threadId in self.events
+            ]
+        return dict(traceEvents=eventList, displayTimeUnit="ms")
+
+    def writeChromeTrace(self, filePath):
+        """Write recorded events to a file in Chrome trace event (JSON) format"""
+        with open(filePath, "w") as outFile:
+            json.dump(self.asChromeTrace(), outFile)
+
+    def overBudget(self, budgetDict):
+        """Return the stages that exceeded their time budget, as a dict of stage name: StageStats
+
+        Inputs:
+        - budgetDict    dict of stage name: maximum wall time per call (sec)
+        """
+        with self._lock:
+            return dict((name, self.stats[name]) for name, budget in budgetDict.items()
+                if name in self.stats and self.stats[name].maxWallTime > budget)
+
+    def formatStats(self):
+        """Return the stage statistics as a table (a string), in order of decreasing wall time"""
+        lineList = ["%-28s %8s %11s %11s %11s" % ("stage", "count", "wall (ms)", "cpu (ms)", "max (ms)")]
+        with self._lock:
+            statsList = sorted(self.stats.items(), key=lambda item: item[1].wallTime, reverse=True)
+            for name, stageStats in statsList:
+                lineList.append("%-28s %8d %11.3f %11.3f %11.3f" % (name, stageStats.count,
+                    stageStats.wallTime * 1000.0, stageStats.cpuTime * 1000.0, stageStats.maxWallTime * 1000.0))
+        return "\n".join(lineList)
+
+    def _record(self, name, begWall, wallTime, cpuTime):
+        with self._lock:
+            stageStats = self.stats.get(name)
+            if stageStats is None:
+                stageStats = self.stats[name] = StageStats()
+            stageStats.count += 1
+            stageStats.wallTime += wallTime
+            stageStats.cpuTime += cpuTime
+            if wallTime > stageStats.maxWallTime:
+                stageStats.maxWallTime = wallTime
+            if self.doTrace:
+                if len(self.events) < self.maxEvents:
+                    self.events.append((name, begWall, wallTime, cpuTime, threading.current_thread().ident))
+                else:
+                    self.nLostEvents += 1
+
+    def __repr__(self):
+        return "%s(nStages=%s, nEvents=%s)" % (self.__class__.__name__, len(self.stats), len(self.events))
+
+
+@contextlib.contextmanager
+def recording(recorder=None, doTrace=False):
+    """Context manager that activates a TimingRecorder for the current context and returns it
+
+    Inputs:
+    - recorder  the recorder to activate; if None then a new TimingRecorder is created
+    - doTrace   if creating a recorder: record each call as an event (see TimingRecorder)
+
+    The previously active recorder (if any) is restored on exit.
+    """
+    if recorder is None:
+        recorder = TimingRecorder(doTrace=doTrace)
+    resetFunc = _setCurrent(recorder)
+    try:
+        yield recorder
+    finally:
+        resetFunc()
+
+def getRecorder():
+    """Return the active TimingRecorder, or None if none"""
+    return _getCurrent()
+
+def stage(name):
+    """Return a context manager that times one call of the named stage
+    (it does nothing if no recorder is active)
+    """
+    recorder = _getCurrent()
+    if recorder is None:
+        return _NullStageInstance
+    return _Stage(recorder, name)
+
+def addCount(name, n=1):
+    """Increment the count of the named stage, if a recorder is active"""
+    recorder = _getCurrent()
+    if recorder is not None:
+        recorder.addCount(name, n)
+
+def timed(name):
+    """Decorator that times each call of a function as the named stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kargs):
+            recorder = _getCurrent()
+            if recorder is None:
+                return func(*args, **kargs)
+            with _Stage(recorder, name):
+                return func(*args, **kargs)
+        return wrapper
+    return decorator
+
+def now():
+    """Return the current time (sec) of the clock used for deadlines
+
+    This is time.perf_counter (or time.time if perf_counter is not available);
+    it is only useful for measuring intervals.
+    """
+    return _perfCounter()
+
+def getDeadline(timeBudget=None, deadline=None):
+    """Return the time by which a task must finish, or None if there is no limit
+
+    Inputs:
+    - timeBudget    time allowed for the task, starting now (sec); None if no limit
+    - deadline      time by which the task must finish (a value returned by now); None if no limit
+
+    If both are specified, the earlier deadline is returned.
+    """
+    if timeBudget is not None:
+        budgetDeadline = _perfCounter() + timeBudget
+        if deadline is None or budgetDeadline < deadline:
+            deadline = budgetDeadline
+    return deadline
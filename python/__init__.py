@@ -24,11 +24,64 @@ Acknowledgements:
   Jim Gunn and Robert Lupton.
 - Jim Gunn supplied the centroiding algorithm. Connie Rockosi explained
   some of the subtleties.
+
+Most modules are imported when first used (e.g. PyGuide.findStars imports FindStars),
+to keep "import PyGuide" fast; "import PyGuide" imports only Constants, CompactMask,
+MaskIndex, StarCatalog and Calibration, and the modules they need (ImUtil, Timing and
+the radProf extension). PyGuide does not need scipy, except to fit star shapes
+(starShape imports scipy.optimize the first time it is called).
 """
 from __future__ import absolute_import
+import sys
+
 from .Version import __version__
 from .Constants import *
-from .Centroid import *
-from .FindStars import *
-from .StarShape import *
-from . import FakeData
+# these modules export a name that is the same as the module name, so they must be imported now:
+# if another module imported them first, the package attribute would be the module, not the exported item
+from .CompactMask import *
+from .MaskIndex import *
+from .StarCatalog import *
+from .Calibration import *
+
+if sys.version_info >= (3, 7):
+    # import the remaining modules when first used (PEP 562), to speed up "import PyGuide"
+    import importlib
+
+    # names exported by each lazily imported module (its __all__; see tests/testLazyImport.py)
+    _LazyExports = {
+        "Centroid": ("CentroidData", "CentroidStats", "centroid", "centroidAndShape"),
+        "FindStars": ("findStars", "findStarsMosaic"),
+        "StarShape": ("StarShapeData", "StarShapeArrays", "starShape", "starShapeMany"),
+        "FrameIO": ("Frame", "loadFrame", "loadMask", "parseDataSec"),
+        "Pipeline": ("FramePipeline", "FrameResult", "loadSource"),
+    }
+    # submodules that are available as attributes (e.g. PyGuide.FakeData)
+    _LazySubmodules = ("Centroid", "FindStars", "StarShape", "FrameIO", "Pipeline",
+        "FakeData", "ImUtil", "Timing", "radProf")
+    _LazyModuleNameDict = dict((name, modName) for modName, names in _LazyExports.items() for name in names)
+
+    def __getattr__(name):
+        modName = _LazyModuleNameDict.get(name)
+        if modName is not None:
+            value = getattr(importlib.import_module("." + modName, __name__), name)
+        elif name in _LazySubmodules:
+            value = importlib.import_module("." + name, __name__)
+        else:
+            raise AttributeError("module %r has no attribute %r" % (__name__, name))
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LazyModuleNameDict) | set(_LazySubmodules))
+
+    # names for "from PyGuide import *" (which imports the lazily imported modules)
+    __all__ = sorted(name for name in set(globals()) | set(_LazyModuleNameDict) | set(("FakeData", "Timing"))
+        if not name.startswith("_") and name not in ("sys", "importlib"))
+else:
+    from .Centroid import *
+    from .FindStars import *
+    from .StarShape import *
+    from .FrameIO import *
+    from .Pipeline import *
+    from . import FakeData
+    from . import Timing
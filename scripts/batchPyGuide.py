@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Find stars in many image files and write the results in machine-readable form.
+
+A non-interactive (and ds9-free) counterpart to doPyGuide.py, for reprocessing
+large numbers of frames. Frames are processed in parallel on a pool of worker processes;
+for each frame PyGuide.findStars finds and centroids stars and (unless --noshape)
+PyGuide.starShapeMany fits their shapes.
+
+Output formats (one record per star):
+- jsonl     JSON lines
+- csv       comma-separated values with a header line
+- npy       a numpy structured array of dtype PyGuide.StarCatalogDType; requires --outdir
+
+If --outdir is specified then one output file is written per frame,
+named after the image file (e.g. gimg0001.fits -> gimg0001.jsonl).
+Output files mirror the subdirectories of the image files, relative to the deepest
+directory that contains all of them (e.g. night1/a.fits and night2/a.fits
+-> <outdir>/night1/a.jsonl and <outdir>/night2/a.jsonl; images in a single directory
+-> <outdir>/a.jsonl). If two image files would still have the same output file
+(e.g. a.fits and a.fit) then no frames are processed and an error is reported.
+Otherwise the results for all frames are written to stdout.
+JSON and CSV records include the path of the frame. Unknown values are null (JSON) or empty (CSV).
+
+Run with --help for the full list of arguments.
+
+History:
+2026-10-18          First version.
+                    Bug fix: frames with the same name in different directories wrote the same output file;
+                    output files now mirror the subdirectories of the image files (see getOutputPaths).
+"""
+import argparse
+import csv
+import glob
+import json
+import math
+import multiprocessing
+import os
+import sys
+
+import PyGuide
+
+# file name extensions of image files when searching directories
+FITSExtensions = (".fits", ".fit", ".fts")
+
+# fields whose values are x,y pairs, and the names to use for the x and y values
+_XYFieldNames = {
+    "xyCtr": ("xCtr", "yCtr"),
+    "xyErr": ("xErr", "yErr"),
+}
+
+def parseArgs(argv=None):
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(
+        description = "Find, centroid and shape-fit stars in FITS images.",
+    )
+    parser.add_argument("paths", nargs="+",
+        help="image files, glob patterns (e.g. 'night1/*.fits') or directories (all FITS files in them)")
+    parser.add_argument("--mask", help="bad pixel mask FITS file, applied to all images")
+    parser.add_argument("--satmask", help="saturated pixel mask FITS file, applied to all images")
+    parser.add_argument("--bias", type=float, default=0.0, help="bias remaining in the data (ADU); default: %(default)s")
+    parser.add_argument("--readnoise", type=float, required=True, help="ccd read noise (e-)")
+    parser.add_argument("--ccdgain", type=float, required=True, help="ccd inverse gain (e-/ADU)")
+    parser.add_argument("--satlevel", type=int, default=2**16 - 1, help="saturation level (ADU); default: %(default)s")
+    parser.add_argument("--thresh", type=float, default=PyGuide.Constants.DefThresh,
+        help="star-finding threshold (in units of sky standard deviation); default: %(default)s")
+    parser.add_argument("--radmult", type=float, default=1.0,
+        help="centroid radius = radmult * size of star-finding blob (ignored if --rad); default: %(default)s")
+    parser.add_argument("--rad", type=float, help="centroid radius (pixels); overrides --radmult")
+    parser.add_argument("--nodatasec", action="store_true", help="ignore DATASEC (process the full image)")
+    parser.add_argument("--noshape", action="store_true", help="do not fit star shapes")
+    parser.add_argument("--format", choices=("jsonl", "csv", "npy"), default="jsonl",
+        help="output format; default: %(default)s")
+    parser.add_argument("--outdir", help="directory for output files (one per frame); if omitted, write to stdout")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+        help="number of worker processes; 0 for one per CPU; default: %(default)s")
+    args = parser.parse_args(argv)
+    if args.format == "npy" and not args.outdir:
+        parser.error("--format npy requires --outdir")
+    return args
+
+def findImagePaths(pathList):
+    """Return a sorted list of image file paths, given a list of files, glob patterns and directories.
+
+    Duplicates are removed. Raise RuntimeError if a path matches nothing.
+    """
+    imPathSet = set()
+    for path in pathList:
+        if os.path.isdir(path):
+            matchList = [os.path.join(path, fileName) for fileName in os.listdir(path)
+                if os.path.splitext(fileName)[1].lower() in FITSExtensions]
+        elif os.path.isfile(path):
+            matchList = [path]
+        else:
+            matchList = [matchPath for matchPath in glob.glob(path) if os.path.isfile(matchPath)]
+        if not matchList:
+            raise RuntimeError("No image files found for %r" % (path,))
+        imPathSet.update(matchList)
+    return sorted(imPathSet)
+
+def getOutputPaths(imPathList, outDir, fmt):
+    """Return a dict of image path: output file path, for writing one output file per frame.
+
+    Output paths mirror the subdirectories of the image files, relative to the deepest
+    directory that contains all of them, and end in "." + fmt instead of the image file extension.
+
+    Raise RuntimeError if two image files have the same output path (e.g. a.fits and a.fit).
+    """
+    absDirList = [os.path.dirname(os.path.abspath(imPath)) for imPath in imPathList]
+    rootDirParts = os.path.commonprefix([absDir.split(os.sep) for absDir in absDirList])
+    rootDir = os.sep.join(rootDirParts) or os.sep
+
+    outPathDict = {}
+    imPathByOutPath = {}
+    for imPath, absDir in zip(imPathList, absDirList):
+        relDir = os.path.relpath(absDir, rootDir)
+        baseName = os.path.splitext(os.path.basename(imPath))[0]
+        outPath = os.path.normpath(os.path.join(outDir, relDir, "%s.%s" % (baseName, fmt)))
+        if outPath in imPathByOutPath:
+            raise RuntimeError("Image files %r and %r would both write output file %r" % \
+                (imPathByOutPath[outPath], imPath, outPath))
+        imPathByOutPath[outPath] = imPath
+        outPathDict[imPath] = outPath
+    return outPathDict
+
+def processFrame(imPath, args):
+    """Find, centroid and (unless args.noshape) shape-fit the stars in one image.
+
+    Returns (imPath, catalog, errStr), where:
+    - catalog is a PyGuide.StarCatalog, or None if processing failed
+    - errStr is an error message, or "" if processing succeeded
+    """
+    try:
+        frame = PyGuide.loadFrame(imPath, maskPath=args.mask, satMaskPath=args.satmask,
+            useDataSec=not args.nodatasec)
+        ccdInfo = PyGuide.CCDInfo(
+            bias = args.bias,
+            readNoise = args.readnoise,
+            ccdGain = args.ccdgain,
+            satLevel = args.satlevel,
+        )
+        ctrDataList, imStats = PyGuide.findStars(
+            data = frame.data,
+            mask = frame.mask,
+            satMask = frame.satMask,
+            ccdInfo = ccdInfo,
+            thresh = args.thresh,
+            radMult = args.radmult,
+            rad = args.rad,
+            verbosity = 0,
+        )
+        if args.noshape:
+            shapeArrays = None
+        else:
+            shapeArrays = PyGuide.starShapeMany(
+                data = frame.data,
+                mask = frame.mask,
+                xyCtrs = [ctrData.xyCtr for ctrData in ctrDataList],
+                rads = [ctrData.rad for ctrData in ctrDataList],
+            )
+        catalog = PyGuide.StarCatalog.fromCentroidList(ctrDataList, shapeArrays)
+        return imPath, catalog, ""
+    except Exception as e:
+        return imPath, None, "%s: %s" % (type(e).__name__, e)
+
+def _processFrameStar(argTuple):
+    """processFrame(*argTuple), for use with Pool.imap"""
+    return processFrame(*argTuple)
+
+def getColumnNames(noShape):
+    """Return the names of the output columns (excluding "frame")"""
+    colNames = []
+    for fieldName in PyGuide.StarCatalogDType.names:
+        if noShape and fieldName in ("shapeOK", "ampl", "fwhm", "bkgnd", "chiSq"):
+            continue
+        colNames += _XYFieldNames.get(fieldName, (fieldName,))
+    return colNames
+
+def iterRecords(imPath, catalog, colNames):
+    """Return an iterator over the stars in catalog; each item is a list of python scalars,
+    starting with imPath and followed by the values for colNames; null values are None.
+    """
+    arr = catalog.arr
+    colArrList = []
+    for colName in colNames:
+        for fieldName, xyNames in _XYFieldNames.items():
+            if colName in xyNames:
+                colArrList.append(arr[fieldName][:, xyNames.index(colName)])
+                break
+        else:
+            colArrList.append(arr[colName])
+    for ind in range(len(arr)):
+        recList = [imPath]
+        for colArr in colArrList:
+            val = colArr[ind].item()
+            if isinstance(val, float) and math.isnan(val):
+                val = None
+            elif val == -1 and colArr.dtype.kind == "i":
+                val = None
+            recList.append(val)
+        yield recList
+
+class OutputWriter(object):
+    """Write results for each frame in the desired format
+
+    Inputs:
+    - fmt           output format: one of "jsonl", "csv" or "npy"
+    - outPathDict   dict of image path: output file path (see getOutputPaths);
+                    if None then results are written to stdout
+    - noShape       if True, omit the star shape columns
+    """
+    def __init__(self, fmt, outPathDict, noShape):
+        self.fmt = fmt
+        self.outPathDict = outPathDict
+        self.colNames = getColumnNames(noShape)
+        if outPathDict is None:
+            self._writeHeader(sys.stdout)
+
+    def write(self, imPath, catalog):
+        """Write the results for one frame"""
+        if self.outPathDict is None:
+            self._writeRecords(sys.stdout, imPath, catalog)
+            sys.stdout.flush()
+            return
+
+        outPath = self.outPathDict[imPath]
+        outDir = os.path.dirname(outPath)
+        if outDir and not os.path.isdir(outDir):
+            os.makedirs(outDir)
+        if self.fmt == "npy":
+            with open(outPath, "wb") as outFile:
+                outFile.write(catalog.toBytes())
+        else:
+            with open(outPath, "w") as outFile:
+                self._writeHeader(outFile)
+                self._writeRecords(outFile, imPath, catalog)
+
+    def _writeHeader(self, outFile):
+        if self.fmt == "csv":
+            csv.writer(outFile).writerow(["frame"] + self.colNames)
+
+    def _writeRecords(self, outFile, imPath, catalog):
+        if self.fmt == "csv":
+            writer = csv.writer(outFile)
+            for recList in iterRecords(imPath, catalog, self.colNames):
+                writer.writerow(["" if val is None else val for val in recList])
+        else:
+            keyList = ["frame"] + self.colNames
+            for recList in iterRecords(imPath, catalog, self.colNames):
+                outFile.write(json.dumps(dict(zip(keyList, recList))) + "\n")
+
+def main(argv=None):
+    args = parseArgs(argv)
+    try:
+        imPathList = findImagePaths(args.paths)
+        outPathDict = getOutputPaths(imPathList, args.outdir, args.format) if args.outdir else None
+    except RuntimeError as e:
+        sys.stderr.write("%s\n" % (e,))
+        return 1
+
+    nJobs = args.jobs or multiprocessing.cpu_count()
+    nJobs = max(1, min(nJobs, len(imPathList)))
+    writer = OutputWriter(fmt=args.format, outPathDict=outPathDict, noShape=args.noshape)
+
+    argTupleList = [(imPath, args) for imPath in imPathList]
+    pool = None
+    if nJobs > 1:
+        pool = multiprocessing.Pool(nJobs)
+        resultIter = pool.imap(_processFrameStar, argTupleList)
+    else:
+        resultIter = (processFrame(*argTuple) for argTuple in argTupleList)
+
+    nFailed = 0
+    nStars = 0
+    try:
+        for imPath, catalog, errStr in resultIter:
+            if errStr:
+                nFailed += 1
+                sys.stderr.write("%s failed: %s\n" % (imPath, errStr))
+                continue
+            nStars += len(catalog)
+            writer.write(imPath, catalog)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    sys.stderr.write("Processed %s frames (%s failed) with %s workers; found %s stars\n" % \
+        (len(imPathList), nFailed, nJobs, nStars))
+    return 1 if nFailed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
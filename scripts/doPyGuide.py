@@ -39,18 +39,17 @@ History:
                     Set NUMERIX to make PyFits use numarray
 2009-11-20 ROwen    Modified to use numpy.
                     Stop setting NUMERIX.
+2026-10-18          Modified loadFiles to use PyGuide.loadFrame, which memory-maps the image.
+                    Replaced global imFits with imFrame and removed maskFits and satMaskFits.
+                    Moved parseDataSec to PyGuide.FrameIO.
 """
-import sys
-import pyfits
 import PyGuide
 import RO.DS9
 
 im = None
-imFits = None
+imFrame = None
 mask = None
-maskFits = None
 satMask = None
-satMaskFits = None
 
 # Default Parameters
 # these settings are for the new NA2 guider
@@ -147,7 +146,7 @@ def doCentroid(
     Inputs:
     - all the arguments for loadFiles plus most values shown by showDef
     """
-    global im, imFits, mask, maskFits, satMask, satMaskFits, isSat, sd
+    global im, imFrame, mask, satMask, isSat, sd
     im, mask, satMask = loadFiles(imName, maskName, satMaskName, invertMask)
     if xyGuess is None:
         print("xyGuess is required")
@@ -216,7 +215,7 @@ def doStarShape(
     Inputs:
     - Most of the arguments for loadFiles plus rad, xyCtr and verbosity.
     """
-    global im, imFits, mask, maskFits
+    global im, imFrame, mask
     im, mask, satMask = loadFiles(imName, maskName, None, invertMask)
     if xyCtr is None:
         print("xyCtr is required")
@@ -261,57 +260,20 @@ def loadFiles(
     - satMaskName: path to saturated pixel mask; 0=good regardless of invertMask;
             None to use current mask, if any
     """
-    global im, imFits, mask, maskFits, satMask, satMaskFits, isSat, sd
+    global im, imFrame, mask, satMask, isSat, sd
     if imName:
-        imFits = pyfits.open(imName)
-        print("Loading image %s into imFits and im" % (imName,))
-        dataSec = parseDataSec(imFits[0].header.get("DATASEC"))
-        dataShape = imFits[0].data.shape
-        if dataSec is None:
-            dataSec = [0, dataShape[0], 0, dataShape[1]]
-        im = imFits[0].data[dataSec[0]:dataSec[1], dataSec[2]:dataSec[3]]
+        print("Loading image %s into imFrame and im" % (imName,))
+        imFrame = PyGuide.loadFrame(imName)
+        im = imFrame.data
+    dataSec = imFrame.dataSec if imFrame is not None else None
     if maskName:
-        print("Loading bad pixel mask %s into maskFits and mask" % (maskName,))
-        maskFits = pyfits.open(maskName)
-        mask = maskFits[0].data[dataSec[0]:dataSec[1], dataSec[2]:dataSec[3]] > 0.1
+        print("Loading bad pixel mask %s into mask" % (maskName,))
+        mask = PyGuide.loadMask(maskName, dataSec)
     if satMaskName:
-        print("Loading saturated pixel mask %s into satMaskFits and satMask" % (satMaskName,))
-        satMaskFits = pyfits.open(satMaskName)
-        satMask = satMaskFits[0].data[dataSec[0]:dataSec[1], dataSec[2]:dataSec[3]] > 0.1
+        print("Loading saturated pixel mask %s into satMask" % (satMaskName,))
+        satMask = PyGuide.loadMask(satMaskName, dataSec)
     return im, mask, satMask
 
-def parseDataSec(dataSecStr):
-    """Parse DATASEC and return (beg x, end+1 x, beg y, end+1 y)
-    
-    DATASEC has an origin of 1 and the end is inclusive (FITS standard) and has x and y swapped
-    The return value has an origin of 0 and the end is exclusive (numpy/C++ standard)
-    
-    Return None if DATASEC is None or cannot be parsed.
-    
-    Input:
-    - dataSecStr: a DATASEC in the form [begx:endx,begy:endy]; if None then None is returned
-    
-    On error prints a message to stderr and returns None
-    """
-    if dataSecStr is None:
-        return None
-    try:
-        trimStr = dataSecStr[1:-1]
-        xyStrList = trimStr.split(",")
-        if len(xyStrList) != 2:
-            raise RuntimeError("Could not split %s" % (trimStr,))
-        xyStrList.reverse()
-        retValList = []
-        for strList in xyStrList:
-            begEndStrList = strList.split(":")
-            if len(begEndStrList) != 2:
-                raise RuntimeError("Could not split %s" % (begEndStrList))
-            retValList += [int(begEndStrList[0]) - 1, int(begEndStrList[1])]
-        return retValList
-    except Exception as e:
-        sys.stderr.write("Could not parse %r; error=%s" % (dataSecStr, e))
-        return None
-
 def printStarHeader():
     """Print star position data header"""
     print("   xctr    yctr    xerr    yerr          ampl     bkgnd    fwhm     rad     pix    nSat   chiSq")
@@ -365,7 +327,7 @@ doDS9       if True, shows current image and other info in ds9 in current frame.
 
 Computed data:
 im          image data array (set by loadFiles)
-imFits      pyfits version of im (set by loadFiles)
+imFrame     PyGuide.Frame containing im and its FITS header (set by loadFiles)
 mask        mask data array, or None if no mask (set by loadFiles)
 satMask     saturated mask data array, or None of no saturated mask (set by loadFiles)
 sd          star data returned by PyGuide.findStars
@@ -31,5 +31,5 @@ setup(
     packages = [PkgName],
     ext_modules = [radProfExt],
     data_files = dataFiles,
-    scripts = ["scripts/doPyGuide.py"],
+    scripts = ["scripts/doPyGuide.py", "scripts/batchPyGuide.py"],
 )
@@ -4,6 +4,7 @@
 
 #include <stdio.h>
 #include <math.h>
+#include <string.h>
 #include <signal.h>
 #include <ctype.h>
 
@@ -32,25 +33,48 @@ History:
                     instead of void (apparently recc. for python 2.3 and later).
 2008-10-01 ROwen    Changed bias from int to double.
 2009-11-19 ROwen    Modified to use numpy instead of numarray.
+2026-10-18          radAsymmWeighted: added optional mean, var and nPts outputs
+                    (the radial profile used to compute the asymmetry).
+                    Added calibrate (bias, flat field and bad pixel mask in one pass).
+                    radAsymmWeighted and radProf: added optional satLevel and satMask inputs
+                    and nSat output (the number of saturated pixels, counted in the same pass).
+                    radProf accepts named arguments.
+                    The mask argument of radAsymm, radAsymmWeighted, radProf and radSqProf
+                    may also be bit-packed (a PackedMask) or a table of runs of valid pixels
+                    (a RunMask); the profile is accumulated one run of valid pixels at a time,
+                    so masked pixels are skipped without being examined individually
+                    and (for a RunMask) without reading any mask data at all.
+                    radProf and radSqProf only visit pixels within rad of the center.
+                    Added medianFilter3 and labelBlobs, so PyGuide can find stars
+                    and centroid without scipy.
+                    radAsymm, radAsymmWeighted, radProf and radSqProf release the GIL while computing,
+                    so threads can centroid at the same time: radAsymm and radAsymmWeighted use
+                    working arrays allocated for each call (instead of global working arrays)
+                    and the radial index table is only grown, never freed (see g_radProf_setup).
 */
 
-// global working arrays for radProf
+// global radial index table for radProf (radial index by radius squared); see g_radProf_setup.
+// Only modify or read these with the GIL held; a table may be used without the GIL
+// because it is never freed.
 static npy_int32 *g_radProf_radIndByRadSq;
 static int g_radProf_nElt = 0;
 
-// global working arrays for radAsymm
-static npy_float64 *g_radAsymm_mean;
-static npy_float64 *g_radAsymm_var;
-static npy_int32 *g_radAsymm_nPts;
-static int g_radAsymm_nElt = 0;
-
 #define MAX(A,B) ((A) > (B) ? (A) : (B))
 #define MIN(A,B) ((A) < (B) ? (A) : (B))
 
+static int checkMaskShape(PyObject *maskObj, int lenI, int lenJ, char *modName);
+
+// value of bit jj of a row of a bit-packed mask (bits packed most significant bit first)
+#define PACKED_BIT(ROW, JJ) (((ROW)[(JJ) >> 3] >> (7 - ((JJ) & 7))) & 1)
+
+// number of pixels calibrate processes at a time (small enough to stay in cache)
+#define CALIB_BLOCK_SIZE 4096
+
 char radProfModule_doc [] =
 "Code to obtain radial profiles of 2-d arrays\n"
 "\n"
-"Warning: these routines only take positional arguments, not named arguments.\n"
+"Warning: these routines only take positional arguments, not named arguments,\n"
+"except where noted.\n"
 ;
 
 // note: MAX and MIN are defined in nummacro.h, imported by libnumarray.h
@@ -64,7 +88,8 @@ char Py_radAsymm_doc [] =
 "Input (by position only):\n"
 "- data         a 2-d array [i,j] (numpy.float32)\n"
 "- mask         mask array [i,j] (bool); True for values to mask out (ignore).\n"
-"               None if no mask array.\n"
+"               None if no mask array. May also be a PackedMask or RunMask\n"
+"               (see PyGuide.CompactMask), which are faster for large masked areas.\n"
 "- ijCtr        i,j center of scan ((int, int))\n"
 "- rad          radius of scan (int)\n"
 "Returns:\n"
@@ -83,7 +108,9 @@ char Py_radAsymm_doc [] =
 ;
 static PyObject *Py_radAsymm(PyObject *dumObj, PyObject *args) {
     PyObject *dataObj  = NULL, *maskObj  = NULL;
-    PyArrayObject *dataArry = NULL, *maskArry = NULL;
+    PyArrayObject *dataArry = NULL;
+    MaskInfo maskInfo = {MASK_NONE};
+    RadProfWork work = {NULL};
     int iCtr, jCtr, rad, totPts;
     double asymm, totCounts;
     char ModName[] = "radAsymm";
@@ -95,31 +122,33 @@ static PyObject *Py_radAsymm(PyObject *dumObj, PyObject *args) {
     // These arrays MUST be decrefed before return.
     dataArry = (PyArrayObject *)PyArray_FROM_OTF(dataObj, NPY_FLOAT32, NPY_ARRAY_IN_ARRAY);
     if (dataArry == NULL) goto errorExit;
-    if (maskObj != Py_None) {
-        maskArry = (PyArrayObject *)PyArray_FROM_OTF(maskObj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
-        if (maskArry == NULL) goto errorExit;
-    }
 
     // Check the input arrays
     if (PyArray_NDIM(dataArry) != 2) {
         PyErr_Format(PyExc_ValueError, "%s: data must be 2-dimensional", ModName);
         goto errorExit;
     }
-    if (maskArry && !PyArray_SAMESHAPE(dataArry, maskArry)) {
-        PyErr_Format(PyExc_ValueError, "%s: mask must be the same shape as data", ModName);
+    if (!getMaskInfo(maskObj, PyArray_DIM(dataArry, 0), PyArray_DIM(dataArry, 1), &maskInfo, ModName)) {
         goto errorExit;
     }
+    if (!allocRadProfWork(&work, rad, ModName)) goto errorExit;
     
     // Call the C code
+    Py_BEGIN_ALLOW_THREADS
     totPts = radAsymm(
         PyArray_DIM(dataArry, 0), PyArray_DIM(dataArry, 1),
         PyArray_DATA(dataArry),
-        maskArry? PyArray_DATA(maskArry): NULL,
+        &maskInfo,
         iCtr, jCtr,
         rad,
+        work.radIndByRadSq,
+        work.mean,
+        work.var,
+        work.nPts,
         &asymm,
         &totCounts
     );
+    Py_END_ALLOW_THREADS
     if (totPts < 0) {
         PyErr_Format(PyExc_ValueError, "radAsymm failed");
         goto errorExit;
@@ -127,13 +156,15 @@ static PyObject *Py_radAsymm(PyObject *dumObj, PyObject *args) {
 
     // Done with all arrays, decref them
     Py_XDECREF(dataArry);
-    Py_XDECREF(maskArry);
+    freeMaskInfo(&maskInfo);
+    freeRadProfWork(&work);
 
     return Py_BuildValue("ddl", asymm, totCounts, totPts);
 
 errorExit:
     Py_XDECREF(dataArry);
-    Py_XDECREF(maskArry);
+    freeMaskInfo(&maskInfo);
+    freeRadProfWork(&work);
     return NULL;
 }
 
@@ -149,7 +180,8 @@ char Py_radAsymmWeighted_doc [] =
 "Inputs (by position only):\n"
 "- data         a 2-d array [i,j] (numpy.float32)\n"
 "- mask         mask array [i,j] (bool); True for values to mask out (ignore).\n"
-"               None if no mask array.\n"
+"               None if no mask array. May also be a PackedMask or RunMask\n"
+"               (see PyGuide.CompactMask), which are faster for large masked areas.\n"
 "- ijCtr        i,j center of scan ((int, int))\n"
 "- rad          radius of scan (int)\n"
 "- readNoise    read noise in e- (float)\n"
@@ -161,6 +193,22 @@ char Py_radAsymmWeighted_doc [] =
 "- totCounts    the total # of counts (float)\n"
 "- totPts       the total # of points (int)\n"
 "\n"
+"Optional outputs (by position or name):\n"
+"- mean         the mean at each radial index (numpy.float64)\n"
+"- var          the variance (stdDev^2) at each radial index (numpy.float64)\n"
+"- nPts         the # of points at each radial index (numpy.int32)\n"
+"These are the radial profile used to compute asymm (see radProf for details);\n"
+"specify all three or none. Each must have the same length,\n"
+"and that length must be at least rad + 2, else raises ValueError.\n"
+"\n"
+"Optional inputs (by name):\n"
+"- satLevel     saturation level (ADU) (float); None (the default) if unknown.\n"
+"- satMask      saturated pixel mask [i,j] (bool); True for saturated pixels;\n"
+"               None (the default) if no mask. Must be the same shape as data.\n"
+"If satLevel or satMask is specified then an additional value is returned:\n"
+"- nSat         the # of points within rad that are saturated (int):\n"
+"               whose value >= satLevel or for which satMask is True\n"
+"\n"
 "Points off the data array are ignored.\n"
 "Thus the center need not be on the array.\n"
 "\n"
@@ -174,24 +222,49 @@ char Py_radAsymmWeighted_doc [] =
 "The code is more efficient if the arrays have the suggested type\n"
 "and are contiguous and in C order.\n"
 ;
-static PyObject *Py_radAsymmWeighted(PyObject *dumObj, PyObject *args) {
-    PyObject *dataObj, *maskObj;
-    PyArrayObject *dataArry = NULL, *maskArry = NULL;
-    int iCtr, jCtr, rad, totPts;
-    double bias, readNoise, ccdGain, asymm, totCounts;
+static PyObject *Py_radAsymmWeighted(PyObject *dumObj, PyObject *args, PyObject *kwds) {
+    PyObject *dataObj, *maskObj, *meanObj = Py_None, *varObj = Py_None, *nPtsObj = Py_None;
+    PyObject *satLevelObj = Py_None, *satMaskObj = Py_None;
+    PyArrayObject *dataArry = NULL, *meanArry = NULL, *varArry = NULL, *nPtsArry = NULL;
+    PyArrayObject *satMaskArry = NULL;
+    MaskInfo maskInfo = {MASK_NONE};
+    RadProfWork work = {NULL};
+    int iCtr, jCtr, rad, totPts, outLen = 0, outInd, nSat = 0;
+    int doSat;
+    double bias, readNoise, ccdGain, asymm, totCounts, satLevel = NAN;
     char ModName[] = "radAsymm";
+    static char *kwList[] = {"data", "mask", "ijCtr", "rad", "bias", "readNoise", "ccdGain",
+        "mean", "var", "nPts", "satLevel", "satMask", NULL};
 
-    if (!PyArg_ParseTuple(args, "OO(ii)iddd",
-            &dataObj, &maskObj, &iCtr, &jCtr, &rad, &bias, &readNoise, &ccdGain))
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO(ii)iddd|OOOOO", kwList,
+            &dataObj, &maskObj, &iCtr, &jCtr, &rad, &bias, &readNoise, &ccdGain,
+            &meanObj, &varObj, &nPtsObj, &satLevelObj, &satMaskObj))
         return NULL;
+    doSat = (satLevelObj != Py_None) || (satMaskObj != Py_None);
+    if (satLevelObj != Py_None) {
+        satLevel = PyFloat_AsDouble(satLevelObj);
+        if (satLevel == -1.0 && PyErr_Occurred()) return NULL;
+    }
     
     // Convert arrays to well-behaved arrays of correct type and verify
     // These arrays MUST be decrefed before return.
     dataArry = (PyArrayObject *)PyArray_FROM_OTF(dataObj, NPY_FLOAT32, NPY_ARRAY_IN_ARRAY);
     if (dataArry == NULL) goto errorExit;
-    if (maskObj != Py_None) {
-        maskArry = (PyArrayObject *)PyArray_FROM_OTF(maskObj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
-        if (maskArry == NULL) goto errorExit;
+    if (satMaskObj != Py_None) {
+        satMaskArry = (PyArrayObject *)PyArray_FROM_OTF(satMaskObj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
+        if (satMaskArry == NULL) goto errorExit;
+    }
+    if ((meanObj == Py_None) != (varObj == Py_None) || (meanObj == Py_None) != (nPtsObj == Py_None)) {
+        PyErr_Format(PyExc_ValueError, "%s: specify all or none of mean, var and nPts", ModName);
+        goto errorExit;
+    }
+    if (meanObj != Py_None) {
+        meanArry = (PyArrayObject *)PyArray_FROM_OTF(meanObj, NPY_FLOAT64, NPY_ARRAY_OUT_ARRAY);
+        if (meanArry == NULL) goto errorExit;
+        varArry =  (PyArrayObject *)PyArray_FROM_OTF(varObj,  NPY_FLOAT64, NPY_ARRAY_OUT_ARRAY);
+        if (varArry == NULL) goto errorExit;
+        nPtsArry = (PyArrayObject *)PyArray_FROM_OTF(nPtsObj, NPY_INT32,   NPY_ARRAY_OUT_ARRAY);
+        if (nPtsArry == NULL) goto errorExit;
     }
 
     // Check the input arrays
@@ -199,38 +272,99 @@ static PyObject *Py_radAsymmWeighted(PyObject *dumObj, PyObject *args) {
         PyErr_Format(PyExc_ValueError, "%s: data must be 2-dimensional", ModName);
         goto errorExit;
     }
-    if (maskArry && !PyArray_SAMESHAPE(dataArry, maskArry)) {
-        PyErr_Format(PyExc_ValueError, "%s: mask must be the same shape as data", ModName);
+    if (!getMaskInfo(maskObj, PyArray_DIM(dataArry, 0), PyArray_DIM(dataArry, 1), &maskInfo, ModName)) {
+        goto errorExit;
+    }
+    if (satMaskArry && !PyArray_SAMESHAPE(dataArry, satMaskArry)) {
+        PyErr_Format(PyExc_ValueError, "%s: satMask must be the same shape as data", ModName);
         goto errorExit;
     }
+
+    // Check the optional output arrays
+    if (meanArry) {
+        if (PyArray_NDIM(meanArry) != 1 || PyArray_NDIM(varArry) != 1 || PyArray_NDIM(nPtsArry) != 1) {
+            PyErr_Format(PyExc_ValueError, "%s: mean, var and nPts must be 1-dimensional", ModName);
+            goto errorExit;
+        }
+        outLen = PyArray_DIM(meanArry, 0);
+        if (outLen != PyArray_DIM(varArry, 0) || outLen != PyArray_DIM(nPtsArry, 0)) {
+            PyErr_Format(PyExc_ValueError, "%s: mean, var and nPts must have the same length", ModName);
+            goto errorExit;
+        }
+        if (outLen < rad + 2) {
+            PyErr_Format(PyExc_ValueError, "%s: output arrays are too short", ModName);
+            goto errorExit;
+        }
+    }
+    if (!allocRadProfWork(&work, rad, ModName)) goto errorExit;
     
     // Call the C code
+    Py_BEGIN_ALLOW_THREADS
     totPts = radAsymmWeighted(
         PyArray_DIM(dataArry, 0), PyArray_DIM(dataArry, 1),
         PyArray_DATA(dataArry),
-        maskArry? PyArray_DATA(maskArry): NULL,
+        &maskInfo,
         iCtr, jCtr,
         rad,
+        work.radIndByRadSq,
         bias,
         readNoise,
         ccdGain,
+        satLevel,
+        satMaskArry? PyArray_DATA(satMaskArry): NULL,
+        work.mean,
+        work.var,
+        work.nPts,
+        doSat ? &nSat : NULL,
         &asymm,
         &totCounts
     );
+    Py_END_ALLOW_THREADS
     if (totPts < 0) {
         PyErr_Format(PyExc_ValueError, "radAsymm failed");
         goto errorExit;
     }
 
+    // Copy the radial profile (left in the working arrays) to the optional outputs
+    if (meanArry) {
+        npy_float64 *meanData = (npy_float64 *)PyArray_DATA(meanArry);
+        npy_float64 *varData = (npy_float64 *)PyArray_DATA(varArry);
+        npy_int32 *nPtsData = (npy_int32 *)PyArray_DATA(nPtsArry);
+        for (outInd = 0; outInd < outLen; ++outInd) {
+            if (outInd < rad + 2) {
+                meanData[outInd] = work.mean[outInd];
+                varData[outInd] = work.var[outInd];
+                nPtsData[outInd] = work.nPts[outInd];
+            } else {
+                meanData[outInd] = 0.0;
+                varData[outInd] = 0.0;
+                nPtsData[outInd] = 0;
+            }
+        }
+    }
+
     // Done with all arrays, decref them
     Py_XDECREF(dataArry);
-    Py_XDECREF(maskArry);
+    freeMaskInfo(&maskInfo);
+    Py_XDECREF(meanArry);
+    Py_XDECREF(varArry);
+    Py_XDECREF(nPtsArry);
+    Py_XDECREF(satMaskArry);
+    freeRadProfWork(&work);
 
+    if (doSat) {
+        return Py_BuildValue("ddll", asymm, totCounts, totPts, nSat);
+    }
     return Py_BuildValue("ddl", asymm, totCounts, totPts);
 
 errorExit:
     Py_XDECREF(dataArry);
-    Py_XDECREF(maskArry);
+    freeMaskInfo(&maskInfo);
+    Py_XDECREF(meanArry);
+    Py_XDECREF(varArry);
+    Py_XDECREF(nPtsArry);
+    Py_XDECREF(satMaskArry);
+    freeRadProfWork(&work);
     return NULL;
 }
 
@@ -241,21 +375,29 @@ char Py_radProf_doc [] =
 "Generate a radial profile as a function of radial index\n"
 "(an approximation of radius; see below for details)\n"
 "\n"
-"Inputs (by position only):\n"
+"Inputs (by position or name):\n"
 "- data         a 2-d array [i,j] (numpy.float32)\n"
 "- mask         mask array [i,j] (bool); True for values to mask out (ignore).\n"
-"               None if no mask array.\n"
+"               None if no mask array. May also be a PackedMask or RunMask\n"
+"               (see PyGuide.CompactMask), which are faster for large masked areas.\n"
 "- ijCtr        i,j center of profile (int)\n"
 "- rad          desired radius of profile (int)\n"
 "\n"
-"Outputs (by position only):\n"
+"Outputs (by position or name):\n"
 "- mean         the mean at each radius squared; 0 if nPts=0 (numpy.float64)\n"
 "- var          the variance (stdDev^2) at each radius squared; 0 if npts=0 (numpy.float64)\n"
 "- nPts         the # of points at each radius squared (numpy.int32)\n"
 "\n"
+"Optional inputs (by name):\n"
+"- satLevel     saturation level (ADU) (float); None (the default) if unknown.\n"
+"- satMask      saturated pixel mask [i,j] (bool); True for saturated pixels;\n"
+"               None (the default) if no mask. Must be the same shape as data.\n"
+"\n"
 "Returns:\n"
 "- totCounts    the total # of counts (sum of mean*nPts); float\n"
 "- totPts       the total # of points (sum of nPts)\n"
+"- nSat         the # of points that are saturated (int): whose value >= satLevel\n"
+"               or for which satMask is True; only returned if satLevel or satMask is specified\n"
 "\n"
 "Radial Index:\n"
 "radProf uses the Mirage convention for radial profiles;\n"
@@ -282,24 +424,34 @@ char Py_radProf_doc [] =
 "All arguments are coerced to the correct data type,\n"
 "but the code is more efficient if the arrays have the suggested type.\n"
 ;
-static PyObject *Py_radProf(PyObject *dumObj, PyObject *args) {
-    PyObject *dataObj, *maskObj, *meanObj, *varObj, *nPtsObj;
-    PyArrayObject *dataArry=NULL, *maskArry=NULL, *meanArry=NULL, *varArry=NULL, *nPtsArry=NULL;
-    int iCtr, jCtr, rad, outLen, totPts;
-    double totCounts;
+static PyObject *Py_radProf(PyObject *dumObj, PyObject *args, PyObject *kwds) {
+    PyObject *dataObj, *maskObj, *meanObj, *varObj, *nPtsObj, *satLevelObj = Py_None, *satMaskObj = Py_None;
+    PyArrayObject *dataArry=NULL, *meanArry=NULL, *varArry=NULL, *nPtsArry=NULL;
+    PyArrayObject *satMaskArry=NULL;
+    MaskInfo maskInfo = {MASK_NONE};
+    int iCtr, jCtr, rad, outLen, totPts, nSat = 0;
+    int doSat;
+    double totCounts, satLevel = NAN;
+    const npy_int32 *radIndByRadSq;
     char ModName[] = "radProf";
+    static char *kwList[] = {"data", "mask", "ijCtr", "rad", "mean", "var", "nPts", "satLevel", "satMask", NULL};
     
-    if (!PyArg_ParseTuple(args, "OO(ii)iOOO",
-            &dataObj, &maskObj, &iCtr, &jCtr, &rad, &meanObj, &varObj, &nPtsObj))
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO(ii)iOOO|OO", kwList,
+            &dataObj, &maskObj, &iCtr, &jCtr, &rad, &meanObj, &varObj, &nPtsObj, &satLevelObj, &satMaskObj))
         return NULL;
+    doSat = (satLevelObj != Py_None) || (satMaskObj != Py_None);
+    if (satLevelObj != Py_None) {
+        satLevel = PyFloat_AsDouble(satLevelObj);
+        if (satLevel == -1.0 && PyErr_Occurred()) return NULL;
+    }
     
     // Convert arrays to well-behaved arrays of correct type and verify
     // These arrays MUST be decrefed before return.
     dataArry = (PyArrayObject *)PyArray_FROM_OTF(dataObj, NPY_FLOAT32, NPY_ARRAY_IN_ARRAY);
     if (dataArry == NULL) goto errorExit;
-    if (maskObj != Py_None) {
-        maskArry = (PyArrayObject *)PyArray_FROM_OTF(maskObj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
-        if (maskArry == NULL) goto errorExit;
+    if (satMaskObj != Py_None) {
+        satMaskArry = (PyArrayObject *)PyArray_FROM_OTF(satMaskObj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
+        if (satMaskArry == NULL) goto errorExit;
     }
     meanArry = (PyArrayObject *)PyArray_FROM_OTF(meanObj, NPY_FLOAT64, NPY_ARRAY_OUT_ARRAY);
     if (meanArry == NULL) goto errorExit;
@@ -313,8 +465,11 @@ static PyObject *Py_radProf(PyObject *dumObj, PyObject *args) {
         PyErr_Format(PyExc_ValueError, "%s: data must be 2-dimensional", ModName);
         goto errorExit;
     }
-    if (maskArry && !PyArray_SAMESHAPE(dataArry, maskArry)) {
-        PyErr_Format(PyExc_ValueError, "%s: mask must be the same shape as data", ModName);
+    if (!getMaskInfo(maskObj, PyArray_DIM(dataArry, 0), PyArray_DIM(dataArry, 1), &maskInfo, ModName)) {
+        goto errorExit;
+    }
+    if (satMaskArry && !PyArray_SAMESHAPE(dataArry, satMaskArry)) {
+        PyErr_Format(PyExc_ValueError, "%s: satMask must be the same shape as data", ModName);
         goto errorExit;
     }
     
@@ -344,21 +499,28 @@ static PyObject *Py_radProf(PyObject *dumObj, PyObject *args) {
         PyErr_Format(PyExc_ValueError, "%s: output arrays are too short", ModName);
         goto errorExit;
     }
-    
+    radIndByRadSq = getRadIndByRadSq(rad, ModName);
+    if (radIndByRadSq == NULL) goto errorExit;
     
     // Call the C code
+    Py_BEGIN_ALLOW_THREADS
     totPts = radProf(
         PyArray_DIM(dataArry, 0), PyArray_DIM(dataArry, 1),
         PyArray_DATA(dataArry),
-        maskArry? PyArray_DATA(maskArry): NULL,
+        &maskInfo,
         iCtr, jCtr,
         rad,
+        radIndByRadSq,
         outLen,
         PyArray_DATA(meanArry),
         PyArray_DATA(varArry),
         PyArray_DATA(nPtsArry),
+        satLevel,
+        satMaskArry? PyArray_DATA(satMaskArry): NULL,
+        doSat ? &nSat : NULL,
         &totCounts
     );
+    Py_END_ALLOW_THREADS
     if (totPts < 0) {
         PyErr_Format(PyExc_ValueError, "radProf failed");
         goto errorExit;
@@ -366,19 +528,24 @@ static PyObject *Py_radProf(PyObject *dumObj, PyObject *args) {
 
     // Done with all arrays, decref them
     Py_XDECREF(dataArry);
-    Py_XDECREF(maskArry);
+    freeMaskInfo(&maskInfo);
     Py_XDECREF(meanArry);
     Py_XDECREF(varArry);
     Py_XDECREF(nPtsArry);
+    Py_XDECREF(satMaskArry);
 
+    if (doSat) {
+        return Py_BuildValue("dll", totCounts, totPts, nSat);
+    }
     return Py_BuildValue("dl", totCounts, totPts);
 
 errorExit:
     Py_XDECREF(dataArry);
-    Py_XDECREF(maskArry);
+    freeMaskInfo(&maskInfo);
     Py_XDECREF(meanArry);
     Py_XDECREF(varArry);
     Py_XDECREF(nPtsArry);
+    Py_XDECREF(satMaskArry);
     return NULL;
 }
 
@@ -478,7 +645,8 @@ char Py_radSqProf_doc [] =
 "Input (by position only):\n"
 "- data         a 2-d array [i,j] (numpy.float32)\n"
 "- mask         mask array [i,j] (bool); True for values to mask out (ignore).\n"
-"               None if no mask array.\n"
+"               None if no mask array. May also be a PackedMask or RunMask\n"
+"               (see PyGuide.CompactMask), which are faster for large masked areas.\n"
 "- ijCtr        i,j center of profile (int)\n"
 "- rad          radius of profile (int)\n"
 "Outputs (by position only):\n"
@@ -504,7 +672,8 @@ char Py_radSqProf_doc [] =
 ;
 static PyObject *Py_radSqProf(PyObject *dumObj, PyObject *args) {
     PyObject *dataObj, *maskObj, *meanObj, *varObj, *nPtsObj;
-    PyArrayObject *dataArry=NULL, *maskArry=NULL, *meanArry=NULL, *varArry=NULL, *nPtsArry=NULL;
+    PyArrayObject *dataArry=NULL, *meanArry=NULL, *varArry=NULL, *nPtsArry=NULL;
+    MaskInfo maskInfo = {MASK_NONE};
     int iCtr, jCtr, rad, radSq, outLen, totPts;
     double totCounts;
     char ModName[] = "radSqProf";
@@ -518,10 +687,6 @@ static PyObject *Py_radSqProf(PyObject *dumObj, PyObject *args) {
     // These arrays MUST be decrefed before return.
     dataArry = (PyArrayObject *)PyArray_FROM_OTF(dataObj, NPY_FLOAT32, NPY_ARRAY_IN_ARRAY);
     if (dataArry == NULL) goto errorExit;
-    if (maskObj != Py_None) {
-        maskArry = (PyArrayObject *)PyArray_FROM_OTF(maskObj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
-        if (maskArry == NULL) goto errorExit;
-    }
     meanArry = (PyArrayObject *)PyArray_FROM_OTF(meanObj, NPY_FLOAT64, NPY_ARRAY_OUT_ARRAY);
     if (meanArry == NULL) goto errorExit;
     varArry =  (PyArrayObject *)PyArray_FROM_OTF(varObj,  NPY_FLOAT64, NPY_ARRAY_OUT_ARRAY);
@@ -536,8 +701,7 @@ static PyObject *Py_radSqProf(PyObject *dumObj, PyObject *args) {
         PyErr_Format(PyExc_ValueError, "%s: data must be 2-dimensional", ModName);
         goto errorExit;
     }
-    if (maskArry && !PyArray_SAMESHAPE(dataArry, maskArry)) {
-        PyErr_Format(PyExc_ValueError, "%s: mask must be the same shape as data", ModName);
+    if (!getMaskInfo(maskObj, PyArray_DIM(dataArry, 0), PyArray_DIM(dataArry, 1), &maskInfo, ModName)) {
         goto errorExit;
     }
 
@@ -569,10 +733,11 @@ static PyObject *Py_radSqProf(PyObject *dumObj, PyObject *args) {
     }
     
     // Call the C code
+    Py_BEGIN_ALLOW_THREADS
     totPts = radSqProf(
         PyArray_DIM(dataArry, 0), PyArray_DIM(dataArry, 1),
         PyArray_DATA(dataArry),
-        maskArry? PyArray_DATA(maskArry): NULL,
+        &maskInfo,
         iCtr, jCtr,
         rad,
         outLen,
@@ -581,6 +746,7 @@ static PyObject *Py_radSqProf(PyObject *dumObj, PyObject *args) {
         PyArray_DATA(nPtsArry),
         &totCounts
     );
+    Py_END_ALLOW_THREADS
     if (totPts < 0) {
         PyErr_Format(PyExc_ValueError, "radSqProf failed");
         goto errorExit;
@@ -588,7 +754,7 @@ static PyObject *Py_radSqProf(PyObject *dumObj, PyObject *args) {
 
     // Done with all arrays, decref them
     Py_XDECREF(dataArry);
-    Py_XDECREF(maskArry);
+    freeMaskInfo(&maskInfo);
     Py_XDECREF(meanArry);
     Py_XDECREF(varArry);
     Py_XDECREF(nPtsArry);
@@ -597,7 +763,7 @@ static PyObject *Py_radSqProf(PyObject *dumObj, PyObject *args) {
 
 errorExit:
     Py_XDECREF(dataArry);
-    Py_XDECREF(maskArry);
+    freeMaskInfo(&maskInfo);
     Py_XDECREF(meanArry);
     Py_XDECREF(varArry);
     Py_XDECREF(nPtsArry);
@@ -605,23 +771,646 @@ errorExit:
 }
 
 
+/* Py_calibrate ============================================================
+*/
+char Py_calibrate_doc [] =
+"Calibrate raw image data in one pass: subtract bias, apply the flat field\n"
+"and combine the masks:\n"
+"  outData = (data - biasVal - bias) * scale\n"
+"  outMask = mask | badMask\n"
+"  outSatMask = data >= satLevel\n"
+"\n"
+"Inputs (by position or name):\n"
+"- data         a 2-d array [i,j] of raw data (numpy.uint16 or numpy.float32;\n"
+"               other types are first converted to numpy.float32)\n"
+"- mask         mask array [i,j] (bool); True for values to mask out (ignore).\n"
+"               None if no mask array.\n"
+"- biasVal      scalar bias to subtract (ADU) (float)\n"
+"- bias         bias (or bias + dark) frame [i,j] to subtract (numpy.float32);\n"
+"               None if no bias frame\n"
+"- scale        scale factor [i,j] = 1/flat (numpy.float32); None if no flat\n"
+"- badMask      bad pixel mask [i,j] (bool); True for bad pixels; None if none\n"
+"- satLevel     saturation level of the raw data (ADU) (float)\n"
+"\n"
+"Outputs (by position or name):\n"
+"- outData      calibrated data [i,j] (numpy.float32)\n"
+"- outMask      combined mask [i,j] (bool); may be None (in which case\n"
+"               mask and badMask are ignored)\n"
+"- outSatMask   saturated pixel mask [i,j] (bool); may be None\n"
+"\n"
+"Returns:\n"
+"- nMasked      the number of pixels set in outMask (int)\n"
+"- nSat         the number of pixels set in outSatMask (int)\n"
+"\n"
+"All arrays must have the same shape, else raises ValueError.\n"
+"The output arrays must have the specified type and be contiguous and in C order,\n"
+"else raises ValueError. outData may be data, if data is numpy.float32,\n"
+"which calibrates the data in place.\n"
+;
+static PyObject *Py_calibrate(PyObject *dumObj, PyObject *args, PyObject *kwds) {
+    PyObject *dataObj, *maskObj, *biasObj, *scaleObj, *badMaskObj, *outDataObj, *outMaskObj;
+    PyObject *outSatMaskObj;
+    PyArrayObject *dataArry = NULL, *maskArry = NULL, *biasArry = NULL, *scaleArry = NULL;
+    PyArrayObject *badMaskArry = NULL, *outDataArry = NULL, *outMaskArry = NULL, *outSatMaskArry = NULL;
+    PyArrayObject *checkList[7];
+    int dataType, ind, nCheck = 0;
+    npy_intp nPix, nMasked, nSat;
+    double biasVal, satLevel;
+    char ModName[] = "calibrate";
+    static char *kwList[] = {"data", "mask", "biasVal", "bias", "scale", "badMask", "satLevel",
+        "outData", "outMask", "outSatMask", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OOdOOOdOOO", kwList,
+            &dataObj, &maskObj, &biasVal, &biasObj, &scaleObj, &badMaskObj, &satLevel,
+            &outDataObj, &outMaskObj, &outSatMaskObj))
+        return NULL;
+
+    // Convert arrays to well-behaved arrays of correct type and verify
+    // These arrays MUST be decrefed before return.
+    dataType = PyArray_Check(dataObj) && PyArray_TYPE((PyArrayObject *)dataObj) == NPY_UINT16 ?
+        NPY_UINT16 : NPY_FLOAT32;
+    dataArry = (PyArrayObject *)PyArray_FROM_OTF(dataObj, dataType, NPY_ARRAY_IN_ARRAY | NPY_ARRAY_FORCECAST);
+    if (dataArry == NULL) goto errorExit;
+    if (maskObj != Py_None) {
+        maskArry = (PyArrayObject *)PyArray_FROM_OTF(maskObj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
+        if (maskArry == NULL) goto errorExit;
+        checkList[nCheck++] = maskArry;
+    }
+    if (biasObj != Py_None) {
+        biasArry = (PyArrayObject *)PyArray_FROM_OTF(biasObj, NPY_FLOAT32, NPY_ARRAY_IN_ARRAY | NPY_ARRAY_FORCECAST);
+        if (biasArry == NULL) goto errorExit;
+        checkList[nCheck++] = biasArry;
+    }
+    if (scaleObj != Py_None) {
+        scaleArry = (PyArrayObject *)PyArray_FROM_OTF(scaleObj, NPY_FLOAT32, NPY_ARRAY_IN_ARRAY | NPY_ARRAY_FORCECAST);
+        if (scaleArry == NULL) goto errorExit;
+        checkList[nCheck++] = scaleArry;
+    }
+    if (badMaskObj != Py_None) {
+        badMaskArry = (PyArrayObject *)PyArray_FROM_OTF(badMaskObj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
+        if (badMaskArry == NULL) goto errorExit;
+        checkList[nCheck++] = badMaskArry;
+    }
+
+    // The outputs must already be the right type, since they are written in place
+    if (!PyArray_Check(outDataObj) || PyArray_TYPE((PyArrayObject *)outDataObj) != NPY_FLOAT32
+        || !PyArray_ISCARRAY((PyArrayObject *)outDataObj)) {
+        PyErr_Format(PyExc_ValueError, "%s: outData must be a writable contiguous numpy.float32 array", ModName);
+        goto errorExit;
+    }
+    outDataArry = (PyArrayObject *)outDataObj;
+    Py_INCREF(outDataArry);
+    checkList[nCheck++] = outDataArry;
+    if (outMaskObj != Py_None) {
+        if (!PyArray_Check(outMaskObj) || PyArray_TYPE((PyArrayObject *)outMaskObj) != NPY_BOOL
+            || !PyArray_ISCARRAY((PyArrayObject *)outMaskObj)) {
+            PyErr_Format(PyExc_ValueError, "%s: outMask must be a writable contiguous bool array", ModName);
+            goto errorExit;
+        }
+        outMaskArry = (PyArrayObject *)outMaskObj;
+        Py_INCREF(outMaskArry);
+        checkList[nCheck++] = outMaskArry;
+    }
+    if (outSatMaskObj != Py_None) {
+        if (!PyArray_Check(outSatMaskObj) || PyArray_TYPE((PyArrayObject *)outSatMaskObj) != NPY_BOOL
+            || !PyArray_ISCARRAY((PyArrayObject *)outSatMaskObj)) {
+            PyErr_Format(PyExc_ValueError, "%s: outSatMask must be a writable contiguous bool array", ModName);
+            goto errorExit;
+        }
+        outSatMaskArry = (PyArrayObject *)outSatMaskObj;
+        Py_INCREF(outSatMaskArry);
+        checkList[nCheck++] = outSatMaskArry;
+    }
+
+    // Check the arrays
+    if (PyArray_NDIM(dataArry) != 2) {
+        PyErr_Format(PyExc_ValueError, "%s: data must be 2-dimensional", ModName);
+        goto errorExit;
+    }
+    for (ind = 0; ind < nCheck; ++ind) {
+        if (!PyArray_SAMESHAPE(dataArry, checkList[ind])) {
+            PyErr_Format(PyExc_ValueError, "%s: all arrays must be the same shape as data", ModName);
+            goto errorExit;
+        }
+    }
+
+    // Call the C code
+    nPix = PyArray_SIZE(dataArry);
+    Py_BEGIN_ALLOW_THREADS
+    nMasked = calibrate(
+        nPix,
+        dataType,
+        PyArray_DATA(dataArry),
+        maskArry? PyArray_DATA(maskArry): NULL,
+        biasVal,
+        biasArry? PyArray_DATA(biasArry): NULL,
+        scaleArry? PyArray_DATA(scaleArry): NULL,
+        badMaskArry? PyArray_DATA(badMaskArry): NULL,
+        satLevel,
+        PyArray_DATA(outDataArry),
+        outMaskArry? PyArray_DATA(outMaskArry): NULL,
+        outSatMaskArry? PyArray_DATA(outSatMaskArry): NULL,
+        &nSat
+    );
+    Py_END_ALLOW_THREADS
+
+    // Done with all arrays, decref them
+    Py_XDECREF(dataArry);
+    Py_XDECREF(maskArry);
+    Py_XDECREF(biasArry);
+    Py_XDECREF(scaleArry);
+    Py_XDECREF(badMaskArry);
+    Py_XDECREF(outDataArry);
+    Py_XDECREF(outMaskArry);
+    Py_XDECREF(outSatMaskArry);
+
+    return Py_BuildValue("nn", (Py_ssize_t) nMasked, (Py_ssize_t) nSat);
+
+errorExit:
+    Py_XDECREF(dataArry);
+    Py_XDECREF(maskArry);
+    Py_XDECREF(biasArry);
+    Py_XDECREF(scaleArry);
+    Py_XDECREF(badMaskArry);
+    Py_XDECREF(outDataArry);
+    Py_XDECREF(outMaskArry);
+    Py_XDECREF(outSatMaskArry);
+    return NULL;
+}
+
+
+/* Py_medianFilter3 ============================================================
+*/
+char Py_medianFilter3_doc [] =
+"Apply a 3x3 median filter to a 2-d array.\n"
+"\n"
+"The result is the same as scipy.ndimage.median_filter(data, 3)\n"
+"(values beyond the edges are the nearest edge values).\n"
+"\n"
+"Inputs:\n"
+"- data         a 2-d array [i,j] (converted to numpy.float32 if necessary)\n"
+"- out          output array [i,j]: a writable contiguous numpy.float32 array\n"
+"               the same shape as data; may be data, to filter in place\n"
+"\n"
+"Raises ValueError if out is not suitable.\n"
+;
+static PyObject *Py_medianFilter3(PyObject *dumObj, PyObject *args) {
+    PyObject *dataObj, *outObj;
+    PyArrayObject *dataArry = NULL, *outArry = NULL;
+    npy_float32 *work = NULL;
+    int lenI, lenJ;
+    char ModName[] = "medianFilter3";
+
+    if (!PyArg_ParseTuple(args, "OO", &dataObj, &outObj))
+        return NULL;
+
+    dataArry = (PyArrayObject *)PyArray_FROM_OTF(dataObj, NPY_FLOAT32, NPY_ARRAY_IN_ARRAY | NPY_ARRAY_FORCECAST);
+    if (dataArry == NULL) goto errorExit;
+    if (PyArray_NDIM(dataArry) != 2) {
+        PyErr_Format(PyExc_ValueError, "%s: data must be 2-dimensional", ModName);
+        goto errorExit;
+    }
+    if (!PyArray_Check(outObj) || PyArray_TYPE((PyArrayObject *)outObj) != NPY_FLOAT32
+        || !PyArray_ISCARRAY((PyArrayObject *)outObj)) {
+        PyErr_Format(PyExc_ValueError, "%s: out must be a writable contiguous numpy.float32 array", ModName);
+        goto errorExit;
+    }
+    outArry = (PyArrayObject *)outObj;
+    Py_INCREF(outArry);
+    if (!PyArray_SAMESHAPE(dataArry, outArry)) {
+        PyErr_Format(PyExc_ValueError, "%s: out must be the same shape as data", ModName);
+        goto errorExit;
+    }
+
+    lenI = PyArray_DIM(dataArry, 0);
+    lenJ = PyArray_DIM(dataArry, 1);
+    if (lenI > 0 && lenJ > 0) {
+        work = (npy_float32 *) malloc(4 * lenJ * sizeof(npy_float32));
+        if (work == NULL) {
+            PyErr_Format(PyExc_MemoryError, "%s: insufficient memory", ModName);
+            goto errorExit;
+        }
+        Py_BEGIN_ALLOW_THREADS
+        medianFilter3(lenI, lenJ, PyArray_DATA(dataArry), PyArray_DATA(outArry), work);
+        Py_END_ALLOW_THREADS
+    }
+
+    free(work);
+    Py_XDECREF(dataArry);
+    Py_XDECREF(outArry);
+    Py_RETURN_NONE;
+
+errorExit:
+    Py_XDECREF(dataArry);
+    Py_XDECREF(outArry);
+    return NULL;
+}
+
+/* Py_labelBlobs ============================================================
+*/
+char Py_labelBlobs_doc [] =
+"Label blobs (8-connected regions of True values) in a 2-d bool array.\n"
+"\n"
+"The labels are the same as those of\n"
+"scipy.ndimage.label(mask, numpy.ones((3,3))): blobs are numbered from 1\n"
+"in order of their first pixel (scanning rows in order).\n"
+"\n"
+"Inputs:\n"
+"- mask         a 2-d array [i,j] (bool)\n"
+"\n"
+"Returns:\n"
+"- labels       label of each pixel [i,j] (numpy.int32); 0 if not in a blob\n"
+"- bbox         bounding box of each blob: an array [nBlobs, 4] (numpy.int32)\n"
+"               of (beg i, end i, beg j, end j), where the end values are exclusive;\n"
+"               the bounding box of blob n is bbox[n-1]\n"
+;
+static PyObject *Py_labelBlobs(PyObject *dumObj, PyObject *args) {
+    PyObject *maskObj, *retObj;
+    PyArrayObject *maskArry = NULL, *labelsArry = NULL, *bboxArry = NULL;
+    npy_int32 *parent = NULL;
+    npy_intp bboxDims[2];
+    npy_intp nBlobs = 0, maxProv;
+    int lenI, lenJ;
+    char ModName[] = "labelBlobs";
+
+    if (!PyArg_ParseTuple(args, "O", &maskObj))
+        return NULL;
+
+    maskArry = (PyArrayObject *)PyArray_FROM_OTF(maskObj, NPY_BOOL, NPY_ARRAY_IN_ARRAY | NPY_ARRAY_FORCECAST);
+    if (maskArry == NULL) goto errorExit;
+    if (PyArray_NDIM(maskArry) != 2) {
+        PyErr_Format(PyExc_ValueError, "%s: mask must be 2-dimensional", ModName);
+        goto errorExit;
+    }
+    lenI = PyArray_DIM(maskArry, 0);
+    lenJ = PyArray_DIM(maskArry, 1);
+    labelsArry = (PyArrayObject *)PyArray_ZEROS(2, PyArray_DIMS(maskArry), NPY_INT32, 0);
+    if (labelsArry == NULL) goto errorExit;
+
+    // with 8-connectivity a new blob can start at most at every other pixel of every other row
+    maxProv = ((npy_intp) (lenI + 1) / 2) * ((lenJ + 1) / 2) + 1;
+    parent = (npy_int32 *) malloc(maxProv * sizeof(npy_int32));
+    if (parent == NULL) {
+        PyErr_Format(PyExc_MemoryError, "%s: insufficient memory", ModName);
+        goto errorExit;
+    }
+    Py_BEGIN_ALLOW_THREADS
+    nBlobs = labelBlobs(lenI, lenJ, PyArray_DATA(maskArry), PyArray_DATA(labelsArry), parent);
+    Py_END_ALLOW_THREADS
+    free(parent);
+    parent = NULL;
+
+    bboxDims[0] = nBlobs;
+    bboxDims[1] = 4;
+    bboxArry = (PyArrayObject *)PyArray_SimpleNew(2, bboxDims, NPY_INT32);
+    if (bboxArry == NULL) goto errorExit;
+    Py_BEGIN_ALLOW_THREADS
+    blobBBoxes(lenI, lenJ, PyArray_DATA(labelsArry), nBlobs, PyArray_DATA(bboxArry));
+    Py_END_ALLOW_THREADS
+
+    Py_XDECREF(maskArry);
+    retObj = Py_BuildValue("NN", PyArray_Return(labelsArry), PyArray_Return(bboxArry));
+    return retObj;
+
+errorExit:
+    free(parent);
+    Py_XDECREF(maskArry);
+    Py_XDECREF(labelsArry);
+    Py_XDECREF(bboxArry);
+    return NULL;
+}
+
+
+/* getMaskInfo ============================================================
+
+Describe a mask, given as a Python object, for the routines that compute radial profiles.
+
+Inputs:
+- maskObj       the mask: one of:
+                - None: no mask
+                - a bool array [i,j] (or anything convertible to one): True for values to ignore
+                - a PackedMask (or any object with attributes "packedMask" and "shape"):
+                  packedMask is a uint8 array [i, (lenJ + 7) / 8] of mask bits packed
+                  along j, most significant bit first (as numpy.packbits(mask, axis=1));
+                  a set bit means ignore the value
+                - a RunMask (or any object with attributes "rowStart", "runs" and "shape"):
+                  runs is an int32 array [nRuns, 2] of (beg j, end j + 1) of each run of valid values,
+                  sorted by i, then j; rowStart is an int32 array [lenI + 1] such that
+                  the runs for row i are runs[rowStart[i]:rowStart[i+1]]
+- lenI, lenJ    shape of the data array
+- modName       name of calling routine, for error messages
+
+Outputs:
+- maskInfo      information about the mask; call freeMaskInfo when done with it
+                (even if this routine fails)
+
+Returns 1 on success; on failure sets a Python exception and returns 0.
+*/
+int getMaskInfo(
+    PyObject *maskObj,
+    int lenI, int lenJ,
+    MaskInfo *maskInfo,
+    char *modName
+) {
+    PyObject *attrObj;
+    PyArrayObject *arry;
+    int isRunMask;
+
+    maskInfo->form = MASK_NONE;
+    maskInfo->lenI = lenI;
+    maskInfo->lenJ = lenJ;
+    maskInfo->arry1 = NULL;
+    maskInfo->arry2 = NULL;
+    if (maskObj == Py_None) {
+        return 1;
+    }
+
+    isRunMask = !PyArray_Check(maskObj) && PyObject_HasAttrString(maskObj, "runs");
+    if (!isRunMask && (PyArray_Check(maskObj) || !PyObject_HasAttrString(maskObj, "packedMask"))) {
+        // an ordinary mask
+        arry = (PyArrayObject *)PyArray_FROM_OTF(maskObj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
+        if (arry == NULL) return 0;
+        maskInfo->arry1 = arry;
+        if (PyArray_NDIM(arry) != 2 || PyArray_DIM(arry, 0) != lenI || PyArray_DIM(arry, 1) != lenJ) {
+            PyErr_Format(PyExc_ValueError, "%s: mask must be the same shape as data", modName);
+            return 0;
+        }
+        maskInfo->form = MASK_BOOL;
+        maskInfo->boolMask = PyArray_DATA(arry);
+        return 1;
+    }
+
+    // a compact mask; check its shape
+    if (!checkMaskShape(maskObj, lenI, lenJ, modName)) {
+        return 0;
+    }
+
+    if (isRunMask) {
+        attrObj = PyObject_GetAttrString(maskObj, "rowStart");
+        if (attrObj == NULL) return 0;
+        arry = (PyArrayObject *)PyArray_FROM_OTF(attrObj, NPY_INT32, NPY_ARRAY_IN_ARRAY);
+        Py_DECREF(attrObj);
+        if (arry == NULL) return 0;
+        maskInfo->arry1 = arry;
+        attrObj = PyObject_GetAttrString(maskObj, "runs");
+        if (attrObj == NULL) return 0;
+        arry = (PyArrayObject *)PyArray_FROM_OTF(attrObj, NPY_INT32, NPY_ARRAY_IN_ARRAY);
+        Py_DECREF(attrObj);
+        if (arry == NULL) return 0;
+        maskInfo->arry2 = arry;
+        if (PyArray_NDIM(maskInfo->arry1) != 1 || PyArray_DIM(maskInfo->arry1, 0) != lenI + 1) {
+            PyErr_Format(PyExc_ValueError, "%s: mask.rowStart must have length %d", modName, lenI + 1);
+            return 0;
+        }
+        if (PyArray_NDIM(arry) != 2 || PyArray_DIM(arry, 1) != 2) {
+            PyErr_Format(PyExc_ValueError, "%s: mask.runs must have shape (nRuns, 2)", modName);
+            return 0;
+        }
+        maskInfo->form = MASK_RUNS;
+        maskInfo->rowStart = PyArray_DATA(maskInfo->arry1);
+        maskInfo->runs = PyArray_DATA(arry);
+        maskInfo->nRuns = PyArray_DIM(arry, 0);
+        return 1;
+    }
+
+    attrObj = PyObject_GetAttrString(maskObj, "packedMask");
+    if (attrObj == NULL) return 0;
+    arry = (PyArrayObject *)PyArray_FROM_OTF(attrObj, NPY_UINT8, NPY_ARRAY_IN_ARRAY);
+    Py_DECREF(attrObj);
+    if (arry == NULL) return 0;
+    maskInfo->arry1 = arry;
+    if (PyArray_NDIM(arry) != 2 || PyArray_DIM(arry, 0) != lenI || PyArray_DIM(arry, 1) < (lenJ + 7) / 8) {
+        PyErr_Format(PyExc_ValueError, "%s: mask.packedMask must have shape (%d, %d)",
+            modName, lenI, (lenJ + 7) / 8);
+        return 0;
+    }
+    maskInfo->form = MASK_PACKED;
+    maskInfo->packedMask = PyArray_DATA(arry);
+    maskInfo->nBytesPerRow = PyArray_DIM(arry, 1);
+    return 1;
+}
+
+/* checkMaskShape ============================================================
+
+Check that the "shape" attribute of a compact mask is (lenI, lenJ).
+
+Returns 1 if so; otherwise sets a Python exception and returns 0.
+*/
+static int checkMaskShape(
+    PyObject *maskObj,
+    int lenI, int lenJ,
+    char *modName
+) {
+    PyObject *shapeObj, *item;
+    long shapeI = -1, shapeJ = -1;
+
+    shapeObj = PyObject_GetAttrString(maskObj, "shape");
+    if (shapeObj == NULL) return 0;
+    if (PySequence_Check(shapeObj) && PySequence_Size(shapeObj) == 2) {
+        item = PySequence_GetItem(shapeObj, 0);
+        if (item) { shapeI = PyLong_AsLong(item); Py_DECREF(item); }
+        item = PySequence_GetItem(shapeObj, 1);
+        if (item) { shapeJ = PyLong_AsLong(item); Py_DECREF(item); }
+    }
+    Py_DECREF(shapeObj);
+    if (PyErr_Occurred()) return 0;
+    if (shapeI != lenI || shapeJ != lenJ) {
+        PyErr_Format(PyExc_ValueError, "%s: mask must be the same shape as data", modName);
+        return 0;
+    }
+    return 1;
+}
+
+/* freeMaskInfo ============================================================
+
+Release the arrays referenced by a MaskInfo (as filled in by getMaskInfo).
+*/
+void freeMaskInfo(
+    MaskInfo *maskInfo
+) {
+    Py_XDECREF(maskInfo->arry1);
+    Py_XDECREF(maskInfo->arry2);
+    maskInfo->arry1 = NULL;
+    maskInfo->arry2 = NULL;
+    maskInfo->form = MASK_NONE;
+}
+
+/* maskRowBegin ============================================================
+
+Start iterating over the runs of valid pixels in one row of a mask.
+
+Inputs:
+- maskInfo          the mask
+- ii                the row (i index)
+- begJ, endJ        range of j to iterate over (endJ is exclusive)
+
+Outputs:
+- rowIter           iterator for maskRowNextRun
+
+A RunMask whose rowStart is out of range for this row is treated as masking the whole row.
+*/
+void maskRowBegin(
+    const MaskInfo *maskInfo,
+    MaskRowIter *rowIter,
+    int ii,
+    int begJ, int endJ
+) {
+    npy_intp lowInd, highInd, midInd;
+
+    rowIter->ii = ii;
+    rowIter->jj = begJ;
+    rowIter->endJ = endJ;
+    if (maskInfo->form == MASK_RUNS) {
+        lowInd = maskInfo->rowStart[ii];
+        highInd = maskInfo->rowStart[ii + 1];
+        if (lowInd < 0 || highInd > maskInfo->nRuns || lowInd > highInd) {
+            lowInd = highInd = 0;
+        }
+        rowIter->endRunInd = highInd;
+        // find the first run that ends after begJ
+        while (lowInd < highInd) {
+            midInd = (lowInd + highInd) / 2;
+            if (maskInfo->runs[2 * midInd + 1] <= begJ) {
+                lowInd = midInd + 1;
+            } else {
+                highInd = midInd;
+            }
+        }
+        rowIter->runInd = lowInd;
+    }
+}
+
+/* maskRowNextRun ============================================================
+
+Find the next run of valid pixels in a row of a mask.
+
+Inputs:
+- maskInfo          the mask
+- rowIter           the iterator, as set up by maskRowBegin
+
+Outputs:
+- runBegJ, runEndJ  range of j of the run of valid pixels (runEndJ is exclusive)
+
+Returns 1 if a run was found, 0 if there are no more runs.
+*/
+int maskRowNextRun(
+    const MaskInfo *maskInfo,
+    MaskRowIter *rowIter,
+    int *runBegJPtr,
+    int *runEndJPtr
+) {
+    int jj = rowIter->jj;
+    int endJ = rowIter->endJ;
+    npy_bool *boolRow;
+    npy_uint8 *packedRow;
+    npy_int32 *run;
+
+    if (jj >= endJ) {
+        return 0;
+    }
+    switch (maskInfo->form) {
+        case MASK_BOOL:
+            boolRow = maskInfo->boolMask + (npy_intp) rowIter->ii * maskInfo->lenJ;
+            while (jj < endJ && boolRow[jj]) ++jj;
+            if (jj >= endJ) break;
+            *runBegJPtr = jj;
+            while (jj < endJ && !boolRow[jj]) ++jj;
+            *runEndJPtr = rowIter->jj = jj;
+            return 1;
+
+        case MASK_PACKED:
+            // skip whole bytes at a time where possible
+            packedRow = maskInfo->packedMask + (npy_intp) rowIter->ii * maskInfo->nBytesPerRow;
+            while (jj < endJ) {
+                if ((jj & 7) == 0 && packedRow[jj >> 3] == 0xFF) {
+                    jj += 8;
+                } else if (PACKED_BIT(packedRow, jj)) {
+                    ++jj;
+                } else {
+                    break;
+                }
+            }
+            if (jj >= endJ) break;
+            *runBegJPtr = jj;
+            while (jj < endJ) {
+                if ((jj & 7) == 0 && packedRow[jj >> 3] == 0) {
+                    jj += 8;
+                } else if (!PACKED_BIT(packedRow, jj)) {
+                    ++jj;
+                } else {
+                    break;
+                }
+            }
+            *runEndJPtr = rowIter->jj = MIN(jj, endJ);
+            return 1;
+
+        case MASK_RUNS:
+            while (rowIter->runInd < rowIter->endRunInd) {
+                run = maskInfo->runs + 2 * rowIter->runInd;
+                if (run[0] >= endJ) break;
+                ++rowIter->runInd;
+                *runBegJPtr = MAX(run[0], jj);
+                *runEndJPtr = MIN(run[1], endJ);
+                if (*runBegJPtr < *runEndJPtr) {
+                    rowIter->jj = *runEndJPtr;
+                    return 1;
+                }
+            }
+            break;
+
+        default:
+            *runBegJPtr = jj;
+            *runEndJPtr = rowIter->jj = endJ;
+            return 1;
+    }
+    rowIter->jj = endJ;
+    return 0;
+}
+
+/* circleHalfWidth ============================================================
+
+Return the largest integer w such that di^2 + w^2 <= radSq, or -1 if di^2 > radSq.
+*/
+int circleHalfWidth(
+    int radSq,
+    int di
+) {
+    int remSq = radSq - di * di;
+    int halfWidth;
+
+    if (remSq < 0) {
+        return -1;
+    }
+    halfWidth = (int) sqrt((double) remSq);
+    // correct for roundoff error in sqrt
+    while (halfWidth * halfWidth > remSq) --halfWidth;
+    while ((halfWidth + 1) * (halfWidth + 1) <= remSq) ++halfWidth;
+    return halfWidth;
+}
+
+
 /* g_radProf_setup ============================================================
 
-Set up the global arrays used by radProf.
+Set up the global radial index table used by radProf (g_radProf_radIndByRadSq).
 
 Inputs:
-- nElt  the numer of points for the arrays = maxRad^2 + 1
+- rad   the maximum radius; the table must have rad^2 + 1 elements
+
+If the table already has enough elements, leaves it alone.
+Else allocates a new, larger table (at least twice the size of the old one)
+and fills it. The old table is not freed, because a thread that has released the GIL
+may still be using it; since each table is at least twice the size of the one before,
+the old tables use less memory than the current one.
 
-If the arrays already have enough elements, leaves them alone.
-Else deallocates them, allocates anew and fills with new values.
-If there is not sufficient memory, deallocates all of them.
+Call with the GIL held.
 
-Returns 1 on success, 0 on failure (insufficient memory).
+Returns 1 on success, 0 on failure (insufficient memory), in which case the old table is unchanged.
 */
 int g_radProf_setup(
     int rad
 ) {
     int nElt, radSq;
+    npy_int32 *radIndByRadSq;
     
     // compute nElt and make sure it is int enough for the initialization code
     nElt = MAX(rad*rad + 1, 3);
@@ -630,79 +1419,97 @@ int g_radProf_setup(
         // array is already int enough; bail out.
         return 1;
     }
+    nElt = MAX(nElt, 2 * g_radProf_nElt);
     
-    g_radProf_free();
-    
-    g_radProf_radIndByRadSq = calloc(nElt, sizeof *g_radProf_radIndByRadSq);
-    if (g_radProf_radIndByRadSq == NULL) {
-        g_radProf_free();
+    radIndByRadSq = calloc(nElt, sizeof *radIndByRadSq);
+    if (radIndByRadSq == NULL) {
         return 0;
     }
-    g_radProf_nElt = nElt;
     
     for (radSq = 0; radSq < 3; ++radSq) {
-        g_radProf_radIndByRadSq[radSq] = radSq;
+        radIndByRadSq[radSq] = radSq;
     }
     for (radSq = 3; radSq < nElt; ++radSq) {
-        g_radProf_radIndByRadSq[radSq] = (int)(sqrt((double)(radSq)) + 1.5);
+        radIndByRadSq[radSq] = (int)(sqrt((double)(radSq)) + 1.5);
     }
+    g_radProf_radIndByRadSq = radIndByRadSq;
+    g_radProf_nElt = nElt;
     
     return 1;
 }
 
-/* g_radProf_free ============================================================
+/* getRadIndByRadSq ============================================================
+
+Return the radial index table for use by radProf, radAsymm or radAsymmWeighted,
+which may use it after releasing the GIL.
 
-Free the global arrays for radProf
+Inputs:
+- rad       the maximum radius
+- modName   name of calling routine (for error messages)
+
+Call with the GIL held.
+
+Returns the table, or NULL (with a Python exception set) if insufficient memory.
 */
-void g_radProf_free() {
-    free(g_radProf_radIndByRadSq);
-    g_radProf_nElt = 0;
+const npy_int32 *getRadIndByRadSq(
+    int rad,
+    char *modName
+) {
+    if (!g_radProf_setup(rad)) {
+        PyErr_Format(PyExc_MemoryError, "%s: insufficient memory", modName);
+        return NULL;
+    }
+    return g_radProf_radIndByRadSq;
 }
 
-/* g_radAsymm_alloc ============================================================
+/* allocRadProfWork ============================================================
 
-Allocate or reallocate the global arrays for radAsymm
+Allocate the working arrays for one call to radAsymm or radAsymmWeighted
+and get the radial index table.
 
 Inputs:
-- rad   the desired radius (each array must have rad+2 elements)
+- work      working arrays; release with freeRadProfWork (even if this fails)
+- rad       the desired radius (each array must have rad+2 elements)
+- modName   name of calling routine (for error messages)
 
-If the arrays already have enough elements, leaves them alone.
-Else deallocates them and allocates anew.
-If there is not sufficient memory, deallocates all of them.
+Call with the GIL held.
 
-Returns 1 on success, 0 on failure.
+Returns 1 on success, 0 (with a Python exception set) on failure.
 */
-int g_radAsymm_alloc(
-    int rad
+int allocRadProfWork(
+    RadProfWork *work,
+    int rad,
+    char *modName
 ) {
-    int nElt = rad + 2;
+    int nElt = MAX(rad + 2, 1);
 
-    if (g_radAsymm_nElt >= nElt) {
-        return 1;
+    work->radIndByRadSq = getRadIndByRadSq(rad, modName);
+    if (work->radIndByRadSq == NULL) {
+        return 0;
     }
-    
-    g_radAsymm_free();
-    
-    g_radAsymm_mean = calloc(nElt, sizeof *g_radAsymm_mean);
-    g_radAsymm_var = calloc(nElt, sizeof *g_radAsymm_var);
-    g_radAsymm_nPts = calloc(nElt, sizeof *g_radAsymm_nPts);
-    if (g_radAsymm_mean == NULL || g_radAsymm_var == NULL || g_radAsymm_nPts == NULL) {
-        g_radAsymm_free();
+    work->mean = calloc(nElt, sizeof *work->mean);
+    work->var = calloc(nElt, sizeof *work->var);
+    work->nPts = calloc(nElt, sizeof *work->nPts);
+    if (work->mean == NULL || work->var == NULL || work->nPts == NULL) {
+        PyErr_Format(PyExc_MemoryError, "%s: insufficient memory", modName);
         return 0;
     }
-    g_radAsymm_nElt = nElt;
     return 1;
 }
 
-/* g_radAsymm_free ============================================================
+/* freeRadProfWork ============================================================
 
-Free the global arrays for radSqProf.
+Free the working arrays allocated by allocRadProfWork.
 */
-void g_radAsymm_free() {
-    free(g_radAsymm_mean);
-    free(g_radAsymm_var);
-    free(g_radAsymm_nPts);
-    g_radAsymm_nElt = 0;
+void freeRadProfWork(
+    RadProfWork *work
+) {
+    free(work->mean);
+    free(work->var);
+    free(work->nPts);
+    work->mean = NULL;
+    work->var = NULL;
+    work->nPts = NULL;
 }
 
 /* radAsymm ============================================================
@@ -712,12 +1519,14 @@ Compute a measure of radial asymmetry: sum over rad of var(rad)^2 * nPts(rad).
 Inputs:
 - inLenI, inLenJ    dimensions of data and mask
 - data              data array [i,j]
-- mask              mask array [i,j] (NULL if none);
-                    0 for valid values, 1 for values to ignore
+- maskInfo          mask (see getMaskInfo)
 - iCtr, jCtr        i,j center of profile
 - rad               radius of profile
+- radIndByRadSq     radial index table (see getRadIndByRadSq)
 
 Outputs:
+- mean, var, nPts   working arrays, each with at least rad+2 elements;
+                    on return they contain the radial profile (see radProf)
 - asymm             radial asymmetry (see above)
 - totCounts         the total # of counts (floating point to avoid overflow)
 
@@ -725,17 +1534,22 @@ Returns:
 - totPts            the total # of points (sum of nPts); <0 on error
 
 Error Conditions:
-- If insufficient memory to generate a working array, returns -2.
-- Any other negative return value indicates a bug.
+- Any negative return value indicates a bug.
 
 Points off the data array are ignored. Thus the center need not be on the array.
+
+Does not use the GIL.
 */
 int radAsymm(
     int inLenI, int inLenJ,
     npy_float data[inLenI][inLenJ],
-    npy_bool mask[inLenI][inLenJ],
+    const MaskInfo *maskInfo,
     int iCtr, int jCtr,
     int rad,
+    const npy_int32 *radIndByRadSq,
+    npy_float64 *mean,
+    npy_float64 *var,
+    npy_int32 *nPts,
     double *asymmPtr,
     double *totCountsPtr
 ) {
@@ -747,22 +1561,21 @@ int radAsymm(
     *asymmPtr = 0.0;
     *totCountsPtr = 0.0;
     
-    // reallocate working arrays if necessary
-    if (!g_radAsymm_alloc(nElt)) {
-        return -2;
-    }
-    
     // compute radial profile stats
     totPts = radProf (
         inLenI, inLenJ,
         data,
-        mask,
+        maskInfo,
         iCtr, jCtr,
         rad,
+        radIndByRadSq,
         nElt,
-        g_radAsymm_mean,
-        g_radAsymm_var,
-        g_radAsymm_nPts,
+        mean,
+        var,
+        nPts,
+        NAN,
+        NULL,
+        NULL,
         totCountsPtr
     );
     if (totPts <= 0) {
@@ -772,7 +1585,7 @@ int radAsymm(
     
     // asymm = sum(std dev^2)
     for (ind = 0; ind < nElt; ++ind){
-        *asymmPtr += g_radAsymm_var[ind] * (double) g_radAsymm_nPts[ind];
+        *asymmPtr += var[ind] * (double) nPts[ind];
     }
         
     return totPts;
@@ -790,15 +1603,22 @@ where weight is the expected sigma of var(rad) due to pixel noise:
 Inputs:
 - inLenI, inLenJ    dimensions of data and mask
 - data              data array [i,j]
-- mask              mask array [i,j] (NULL if none);
-                    0 for valid values, 1 for values to ignore
+- maskInfo          mask (see getMaskInfo)
 - iCtr, jCtr        i,j center of profile
 - rad               radius of profile
+- radIndByRadSq     radial index table (see getRadIndByRadSq)
 - readNoise         read noise in e-
 - ccdGain           ccd inverse gain in e-/ADU
 - bias              ccd bias in ADU
+- satLevel          saturation level in ADU (ignored if nSatPtr is NULL); NAN if none
+- satMask           saturated pixel mask [i,j] (NULL if none; ignored if nSatPtr is NULL);
+                    1 for saturated pixels
 
 Outputs:
+- mean, var, nPts   working arrays, each with at least rad+2 elements;
+                    on return they contain the radial profile (see radProf)
+- nSat              the # of saturated points: whose value >= satLevel or for which satMask is 1
+                    (NULL if not wanted)
 - asymm             radial asymmetry (see above)
 - totCounts         the total # of counts (floating point to avoid overflow)
 
@@ -811,28 +1631,36 @@ Notes:
   This greatly reduces the harm from too large a bias.
 
 Error Conditions:
-- If insufficient memory to generate a working array, returns -2.
-- Any other negative return value indicates a bug.
+- Any negative return value indicates a bug.
 
 Points off the data array are ignored.
 Thus the center need not be on the array.
+
+Does not use the GIL.
 */
 int radAsymmWeighted(
     int inLenI, int inLenJ,
     npy_float data[inLenI][inLenJ],
-    npy_bool mask[inLenI][inLenJ],
+    const MaskInfo *maskInfo,
     int iCtr, int jCtr,
     int rad,
+    const npy_int32 *radIndByRadSq,
     double bias,
     double readNoise,
     double ccdGain,
+    double satLevel,
+    npy_bool satMask[inLenI][inLenJ],
+    npy_float64 *mean,
+    npy_float64 *var,
+    npy_int32 *nPts,
+    int *nSatPtr,
     double *asymmPtr,
     double *totCountsPtr
 ) {
     int nElt = rad + 2;
     int ind;
     int totPts;
-    int nPts;
+    int radNPts;
     double readNoiseSqADU = (readNoise * readNoise) / (ccdGain * ccdGain);
     double pixNoiseSq;
     double weight;
@@ -841,22 +1669,21 @@ int radAsymmWeighted(
     *asymmPtr = 0.0;
     *totCountsPtr = 0.0;
     
-    // reallocate working arrays if necessary
-    if (!g_radAsymm_alloc(nElt)) {
-        return -2;
-    }
-    
     // compute radial profile stats
     totPts = radProf (
         inLenI, inLenJ,
         data,
-        mask,
+        maskInfo,
         iCtr, jCtr,
         rad,
+        radIndByRadSq,
         nElt,
-        g_radAsymm_mean,
-        g_radAsymm_var,
-        g_radAsymm_nPts,
+        mean,
+        var,
+        nPts,
+        satLevel,
+        satMask,
+        nSatPtr,
         totCountsPtr
     );
     if (totPts <= 0) {
@@ -867,16 +1694,16 @@ int radAsymmWeighted(
     // force bias < smallest mean value, if necessary,
     // to prevent bogus bias from really messing up the results
     for (ind = 0; ind < nElt; ++ind) {
-        if (g_radAsymm_mean[ind] < bias) bias = g_radAsymm_mean[ind];
+        if (mean[ind] < bias) bias = mean[ind];
     }
     
     // asymm = sum(std dev^2)
     for (ind = 0; ind < nElt; ++ind) {
-        nPts = g_radAsymm_nPts[ind];
-        if (nPts > 1) {
-            pixNoiseSq = readNoiseSqADU + ((g_radAsymm_mean[ind] - bias) / ccdGain);
-            weight = sqrt(2.0 * (double) (nPts - 1)) * pixNoiseSq / (double) nPts;
-            *asymmPtr += g_radAsymm_var[ind] / weight;
+        radNPts = nPts[ind];
+        if (radNPts > 1) {
+            pixNoiseSq = readNoiseSqADU + ((mean[ind] - bias) / ccdGain);
+            weight = sqrt(2.0 * (double) (radNPts - 1)) * pixNoiseSq / (double) radNPts;
+            *asymmPtr += var[ind] / weight;
         }
     }
         
@@ -892,16 +1719,21 @@ Generate a radial profile as a function of radial index
 Inputs:
 - inLenI, inLenJ    dimensions of data and mask
 - data              data array [i,j]
-- mask              mask array [i,j] (NULL if none);
-                    0 for valid values, 1 for values to ignore
+- maskInfo          mask (see getMaskInfo)
 - iCtr, jCtr        i,j center of profile
 - rad               radius of profile
+- radIndByRadSq     radial index table (see getRadIndByRadSq)
 - outLen            length of output arrays
+- satLevel          saturation level (ignored if nSatPtr is NULL); NAN if none
+- satMask           saturated pixel mask [i,j] (NULL if none; ignored if nSatPtr is NULL);
+                    1 for saturated pixels
 
 Outputs:
 - mean              the mean at each radius squared; 0 if npts=0
 - var               the variance (stdDev^2) at each radius squared; 0 if npts=0
 - nPts              the # of points at each radius squared
+- nSat              the # of saturated points: whose value >= satLevel or for which satMask is 1
+                    (NULL if not wanted)
 - totCounts         the total # of counts (floating point to avoid overflow)
 
 Returns:
@@ -912,30 +1744,36 @@ Error Conditions:
   writes off the end of an array.
 
 - If outLen < rad + 2, returns -1.
-- If insufficient memory to generate a working array, returns -2.
-- If any value in g_radProf_radIndByRadSq[0:rad^2] > rad, returns -3. 
+- If any value in radIndByRadSq[0:rad^2] > rad, returns -3. 
 
 Points off the data array are ignored.
 Thus the center need not be on the array.
+
+Does not use the GIL.
 */
 int radProf(
     int inLenI, int inLenJ,
     npy_float data[inLenI][inLenJ],
-    npy_bool mask[inLenI][inLenJ],
+    const MaskInfo *maskInfo,
     int iCtr, int jCtr,
     int rad,
+    const npy_int32 *radIndByRadSq,
     int outLen,
     npy_float64 *mean,
     npy_float64 *var,
     npy_int32 *nPts,
+    double satLevel,
+    npy_bool satMask[inLenI][inLenJ],
+    int *nSatPtr,
     double *totCountsPtr
 ) {
     int desOutLen = rad + 2;
     int maxRadSq = rad*rad;
     int jj, ii, currRadSq, outInd;
-    int minJJ, maxJJ, minII, maxII;
-    int totPts;
+    int begJJ, endJJ, minII, maxII, halfWidth, runBegJJ, runEndJJ;
+    int totPts, nSat;
     double d;
+    MaskRowIter rowIter;
     char ModName[]="radProf";
     
     // test inputs
@@ -943,15 +1781,10 @@ int radProf(
         printf("%s: outLen too small\n", ModName);
         return -1;
     }
-    
-    // set up index array
-    if (!g_radProf_setup(rad)) {
-        printf("%s: insufficient memory\n", ModName);
-        return -2;
-    }
 
     // initialize outputs to 0
     totPts = 0;
+    nSat = 0;
     for(outInd=0; outInd<outLen; outInd++){
         nPts[outInd] = 0;
         mean[outInd] = 0.0;
@@ -959,18 +1792,18 @@ int radProf(
     }
     *totCountsPtr = 0;
 
-    // compute sums
+    // compute sums over the valid pixels within rad of the center, one run of valid pixels at a time
     minII = MAX(iCtr - rad, 0);
-    minJJ = MAX(jCtr - rad, 0);
     maxII = MIN(iCtr + rad, inLenI - 1);
-    maxJJ = MIN(jCtr + rad, inLenJ - 1);
     for (ii = minII; ii <= maxII; ++ii) {
-        for (jj = minJJ; jj <= maxJJ; ++jj) {
-            if (mask==NULL || !mask[ii][jj]) {
+        halfWidth = circleHalfWidth(maxRadSq, ii - iCtr);
+        begJJ = MAX(jCtr - halfWidth, 0);
+        endJJ = MIN(jCtr + halfWidth + 1, inLenJ);
+        maskRowBegin(maskInfo, &rowIter, ii, begJJ, endJJ);
+        while (maskRowNextRun(maskInfo, &rowIter, &runBegJJ, &runEndJJ)) {
+            for (jj = runBegJJ; jj < runEndJJ; ++jj) {
                 currRadSq = (ii - iCtr)*(ii - iCtr) + (jj - jCtr)*(jj - jCtr);
-                if (currRadSq > maxRadSq)
-                    continue;
-                outInd = g_radProf_radIndByRadSq[currRadSq];
+                outInd = radIndByRadSq[currRadSq];
                 if (outInd >= desOutLen) {
                     printf("radProf failed: outInd=%d, rad=%d\n", outInd, rad);
                     return -3;
@@ -982,9 +1815,11 @@ int radProf(
                 nPts[outInd]++;
                 *totCountsPtr += d;
                 totPts++;
+                nSat += (d >= satLevel) || (satMask != NULL && satMask[ii][jj]);
             }
         }
     }
+    if (nSatPtr) *nSatPtr = nSat;
 
     /* normalize outputs */
     for(outInd=0; outInd<desOutLen; outInd++) {
@@ -1005,8 +1840,7 @@ Generate a radial profile as a function of radius squared.
 Inputs:
 - inLenI, inLenJ    dimensions of data and mask
 - data              data array [i,j]
-- mask              mask array [i,j] (NULL if none);
-                    0 for valid values, 1 for values to ignore
+- maskInfo          mask (see getMaskInfo)
 - iCtr, jCtr        i,j center of profile
 - rad               radius of profile
 - outLen            length of output arrays
@@ -1031,7 +1865,7 @@ Thus the center need not be on the array.
 int radSqProf(
     int inLenI, int inLenJ,
     npy_float data[inLenI][inLenJ],
-    npy_bool mask[inLenI][inLenJ],
+    const MaskInfo *maskInfo,
     int iCtr, int jCtr,
     int rad,
     int outLen,
@@ -1042,9 +1876,10 @@ int radSqProf(
 ) {
     int desOutLen = rad*rad + 1;
     int jj, ii, outInd;
-    int minJJ, maxJJ, minII, maxII;
+    int begJJ, endJJ, minII, maxII, halfWidth, runBegJJ, runEndJJ;
     double d;
     int totPts;
+    MaskRowIter rowIter;
     
     // test inputs
     if (outLen < desOutLen) {
@@ -1060,17 +1895,17 @@ int radSqProf(
     *totCountsPtr = 0.0;
     totPts = 0;
 
-    // compute sums
+    // compute sums over the valid pixels within rad of the center, one run of valid pixels at a time
     minII = MAX(iCtr - rad, 0);
-    minJJ = MAX(jCtr - rad, 0);
     maxII = MIN(iCtr + rad, inLenI - 1);
-    maxJJ = MIN(jCtr + rad, inLenJ - 1);
     for (ii = minII; ii <= maxII; ++ii) {
-        for (jj = minJJ; jj <= maxJJ; ++jj) {
-            if (mask==NULL || !mask[ii][jj]) {
+        halfWidth = circleHalfWidth(desOutLen - 1, ii - iCtr);
+        begJJ = MAX(jCtr - halfWidth, 0);
+        endJJ = MIN(jCtr + halfWidth + 1, inLenJ);
+        maskRowBegin(maskInfo, &rowIter, ii, begJJ, endJJ);
+        while (maskRowNextRun(maskInfo, &rowIter, &runBegJJ, &runEndJJ)) {
+            for (jj = runBegJJ; jj < runEndJJ; ++jj) {
                 outInd = (ii - iCtr)*(ii - iCtr) + (jj - jCtr)*(jj - jCtr);
-                if (outInd >= desOutLen)
-                    continue;
     
                 d = (double) data[ii][jj];
                 mean[outInd] += d;
@@ -1093,13 +1928,328 @@ int radSqProf(
 }
 
 
+/* calibrate ============================================================
+
+Calibrate raw image data: subtract bias, apply the flat field and combine the masks:
+  outData = (data - biasVal - bias) * scale
+  outMask = mask | badMask
+  outSatMask = data >= satLevel
+
+Inputs:
+- nPix              number of pixels in each array
+- dataType          type of data: NPY_UINT16 or NPY_FLOAT32
+- data              raw data array
+- mask              mask array (NULL if none); 0 for valid values, 1 for values to ignore
+- biasVal           scalar bias
+- bias              bias (or bias + dark) frame (NULL if none)
+- scale             scale factor = 1/flat (NULL if none)
+- badMask           bad pixel mask (NULL if none); 1 for bad pixels
+- satLevel          saturation level of the raw data
+
+Outputs:
+- outData           calibrated data; may be the same array as data if dataType is NPY_FLOAT32
+- outMask           combined mask (NULL if not wanted)
+- outSatMask        saturated pixel mask (NULL if not wanted)
+- nSat              the number of saturated pixels (0 if outSatMask is NULL)
+
+Returns:
+- nMasked           the number of masked pixels in outMask (0 if outMask is NULL)
+
+All arrays are read and written in a single pass, a block of pixels at a time.
+*/
+npy_intp calibrate(
+    npy_intp nPix,
+    int dataType,
+    void *data,
+    npy_bool *mask,
+    double biasVal,
+    npy_float32 *bias,
+    npy_float32 *scale,
+    npy_bool *badMask,
+    double satLevel,
+    npy_float32 *outData,
+    npy_bool *outMask,
+    npy_bool *outSatMask,
+    npy_intp *nSatPtr
+) {
+    npy_intp begInd, endInd, ind, nMasked = 0, nSat = 0;
+    npy_uint16 *uint16Data = (npy_uint16 *) data;
+    npy_float32 *float32Data = (npy_float32 *) data;
+    npy_float32 fBiasVal = (npy_float32) biasVal;
+    npy_float32 fSatLevel = (npy_float32) satLevel;
+    int intSatLevel = (int) ceil(MIN(MAX(satLevel, 0.0), 65536.0));
+    unsigned int blockCount;
+
+    // Work a block at a time, so each block of outData is still in cache for the later steps;
+    // each step is a simple loop the compiler can vectorize
+    for (begInd = 0; begInd < nPix; begInd += CALIB_BLOCK_SIZE) {
+        endInd = MIN(begInd + CALIB_BLOCK_SIZE, nPix);
+        if (dataType == NPY_UINT16) {
+            if (outSatMask) {
+                blockCount = 0;
+                for (ind = begInd; ind < endInd; ++ind) {
+                    outSatMask[ind] = ((int) uint16Data[ind] >= intSatLevel);
+                    blockCount += outSatMask[ind];
+                }
+                nSat += blockCount;
+            }
+            for (ind = begInd; ind < endInd; ++ind) {
+                outData[ind] = (npy_float32) uint16Data[ind] - fBiasVal;
+            }
+        } else {
+            if (outSatMask) {
+                blockCount = 0;
+                for (ind = begInd; ind < endInd; ++ind) {
+                    outSatMask[ind] = (float32Data[ind] >= fSatLevel);
+                    blockCount += outSatMask[ind];
+                }
+                nSat += blockCount;
+            }
+            for (ind = begInd; ind < endInd; ++ind) {
+                outData[ind] = float32Data[ind] - fBiasVal;
+            }
+        }
+        if (bias) {
+            for (ind = begInd; ind < endInd; ++ind) {
+                outData[ind] -= bias[ind];
+            }
+        }
+        if (scale) {
+            for (ind = begInd; ind < endInd; ++ind) {
+                outData[ind] *= scale[ind];
+            }
+        }
+        if (outMask) {
+            if (mask && badMask) {
+                for (ind = begInd; ind < endInd; ++ind) {
+                    outMask[ind] = mask[ind] | badMask[ind];
+                }
+            } else if (mask || badMask) {
+                memcpy(outMask + begInd, (mask ? mask : badMask) + begInd, (endInd - begInd) * sizeof *outMask);
+            } else {
+                memset(outMask + begInd, 0, (endInd - begInd) * sizeof *outMask);
+            }
+            blockCount = 0;
+            for (ind = begInd; ind < endInd; ++ind) {
+                blockCount += outMask[ind];
+            }
+            nMasked += blockCount;
+        }
+    }
+    *nSatPtr = nSat;
+    return nMasked;
+}
+
+
+/* medianFilter3 ============================================================
+
+Apply a 3x3 median filter to a 2-d array; values beyond the edges are the nearest edge values.
+
+Inputs:
+- lenI, lenJ    shape of the arrays
+- data          data [lenI][lenJ]
+
+Outputs:
+- out           filtered data [lenI][lenJ]; may be data (to filter in place)
+
+Work arrays:
+- work          [4 * lenJ]
+
+Each output value is the median of the sorted columns of its 3x3 neighborhood:
+med3(max of the column minima, median of the column medians, min of the column maxima).
+The columns of each row are sorted once, and the input row is saved before it is overwritten,
+so data and out may be the same array.
+*/
+void medianFilter3(
+    int lenI, int lenJ,
+    const npy_float32 *data,
+    npy_float32 *out,
+    npy_float32 *work
+) {
+    npy_float32 *colLow = work;
+    npy_float32 *colMid = work + lenJ;
+    npy_float32 *colHigh = work + 2 * lenJ;
+    npy_float32 *prevRow = work + 3 * lenJ;
+    const npy_float32 *rowAbove, *row, *rowBelow;
+    npy_float32 a, b, c, lowAB, highAB, low, mid, high;
+    int ii, jj, jjPrev, jjNext;
+
+    for (ii = 0; ii < lenI; ++ii) {
+        row = data + (npy_intp) ii * lenJ;
+        rowAbove = (ii == 0) ? row : prevRow;
+        rowBelow = (ii + 1 < lenI) ? row + lenJ : row;
+        // sort each column of 3 values
+        for (jj = 0; jj < lenJ; ++jj) {
+            a = rowAbove[jj];
+            b = row[jj];
+            c = rowBelow[jj];
+            lowAB = MIN(a, b);
+            highAB = MAX(a, b);
+            colLow[jj] = MIN(lowAB, c);
+            colHigh[jj] = MAX(highAB, c);
+            colMid[jj] = MAX(lowAB, MIN(highAB, c));
+        }
+        // save this row of input before (possibly) overwriting it
+        memcpy(prevRow, row, lenJ * sizeof(npy_float32));
+        for (jj = 0; jj < lenJ; ++jj) {
+            jjPrev = (jj > 0) ? jj - 1 : 0;
+            jjNext = (jj + 1 < lenJ) ? jj + 1 : jj;
+            low = MAX(MAX(colLow[jjPrev], colLow[jj]), colLow[jjNext]);
+            high = MIN(MIN(colHigh[jjPrev], colHigh[jj]), colHigh[jjNext]);
+            a = colMid[jjPrev];
+            b = colMid[jj];
+            c = colMid[jjNext];
+            mid = MAX(MIN(a, b), MIN(MAX(a, b), c));
+            out[(npy_intp) ii * lenJ + jj] = MAX(MIN(low, mid), MIN(MAX(low, mid), high));
+        }
+    }
+}
+
+/* labelBlobs ============================================================
+
+Label blobs (8-connected regions of True values) in a 2-d bool array.
+
+Inputs:
+- lenI, lenJ    shape of the arrays
+- mask          mask [lenI][lenJ]
+
+Outputs:
+- labels        label of each pixel [lenI][lenJ]; 0 if not in a blob;
+                blobs are numbered from 1 in order of their first pixel (scanning rows in order)
+
+Work arrays:
+- parent        [((lenI + 1) / 2) * ((lenJ + 1) / 2) + 1]
+
+Returns the number of blobs.
+
+Pixels are given provisional labels in one pass, merging provisional labels that touch
+(union-find, keeping the lowest label as the root), then relabelled in a second pass.
+*/
+npy_intp labelBlobs(
+    int lenI, int lenJ,
+    const npy_bool *mask,
+    npy_int32 *labels,
+    npy_int32 *parent
+) {
+    npy_int32 nProv = 0, nBlobs = 0, label, root, otherRoot, neighLabel;
+    npy_intp ind;
+    int ii, jj, neighInd;
+    npy_int32 neighLabels[4];
+
+    parent[0] = 0;
+    for (ii = 0; ii < lenI; ++ii) {
+        for (jj = 0; jj < lenJ; ++jj) {
+            ind = (npy_intp) ii * lenJ + jj;
+            if (!mask[ind]) {
+                continue;
+            }
+            // previously scanned neighbors: left, up-left, up and up-right
+            neighLabels[0] = (jj > 0) ? labels[ind - 1] : 0;
+            neighLabels[1] = (ii > 0 && jj > 0) ? labels[ind - lenJ - 1] : 0;
+            neighLabels[2] = (ii > 0) ? labels[ind - lenJ] : 0;
+            neighLabels[3] = (ii > 0 && jj + 1 < lenJ) ? labels[ind - lenJ + 1] : 0;
+            label = 0;
+            for (neighInd = 0; neighInd < 4; ++neighInd) {
+                neighLabel = neighLabels[neighInd];
+                if (neighLabel == 0) {
+                    continue;
+                }
+                if (label == 0) {
+                    label = neighLabel;
+                    continue;
+                }
+                // merge the two provisional labels
+                root = label;
+                while (parent[root] != root) root = parent[root];
+                otherRoot = neighLabel;
+                while (parent[otherRoot] != otherRoot) otherRoot = parent[otherRoot];
+                if (root != otherRoot) {
+                    parent[MAX(root, otherRoot)] = MIN(root, otherRoot);
+                }
+            }
+            if (label == 0) {
+                label = ++nProv;
+                parent[label] = label;
+            }
+            labels[ind] = label;
+        }
+    }
+
+    // flatten the trees: since parent[label] <= label, processing labels in increasing order
+    // makes each parent[label] the root; then number the roots in order (a root is the lowest label
+    // of its blob, so this numbers the blobs in order of their first pixel)
+    for (label = 1; label <= nProv; ++label) {
+        root = parent[label];
+        if (root == label) {
+            parent[label] = -(++nBlobs);
+        } else {
+            parent[label] = parent[root];
+        }
+    }
+    // parent[label] is now -(blob number)
+    for (ind = 0; ind < (npy_intp) lenI * lenJ; ++ind) {
+        if (labels[ind] != 0) {
+            labels[ind] = -parent[labels[ind]];
+        }
+    }
+    return nBlobs;
+}
+
+/* blobBBoxes ============================================================
+
+Compute the bounding box of each blob labelled by labelBlobs.
+
+Inputs:
+- lenI, lenJ    shape of labels
+- labels        blob labels [lenI][lenJ], as returned by labelBlobs
+- nBlobs        number of blobs
+
+Outputs:
+- bbox          [nBlobs][4]: (beg i, end i, beg j, end j) of each blob (end values are exclusive)
+*/
+void blobBBoxes(
+    int lenI, int lenJ,
+    const npy_int32 *labels,
+    npy_intp nBlobs,
+    npy_int32 *bbox
+) {
+    npy_intp blobInd;
+    npy_int32 *blobBBox;
+    int ii, jj;
+    npy_int32 label;
+
+    for (blobInd = 0; blobInd < nBlobs; ++blobInd) {
+        bbox[4 * blobInd + 0] = lenI;
+        bbox[4 * blobInd + 1] = 0;
+        bbox[4 * blobInd + 2] = lenJ;
+        bbox[4 * blobInd + 3] = 0;
+    }
+    for (ii = 0; ii < lenI; ++ii) {
+        for (jj = 0; jj < lenJ; ++jj) {
+            label = labels[(npy_intp) ii * lenJ + jj];
+            if (label == 0) {
+                continue;
+            }
+            blobBBox = bbox + 4 * (npy_intp) (label - 1);
+            blobBBox[0] = MIN(blobBBox[0], ii);
+            blobBBox[1] = MAX(blobBBox[1], ii + 1);
+            blobBBox[2] = MIN(blobBBox[2], jj);
+            blobBBox[3] = MAX(blobBBox[3], jj + 1);
+        }
+    }
+}
+
+
 static PyMethodDef radProfMethods[] = {
     {"radAsymm", Py_radAsymm, METH_VARARGS, Py_radAsymm_doc},
-    {"radAsymmWeighted", Py_radAsymmWeighted, METH_VARARGS, Py_radAsymmWeighted_doc},
-    {"radProf", Py_radProf, METH_VARARGS, Py_radProf_doc},
+    {"radAsymmWeighted", (PyCFunction)Py_radAsymmWeighted, METH_VARARGS | METH_KEYWORDS, Py_radAsymmWeighted_doc},
+    {"radProf", (PyCFunction)Py_radProf, METH_VARARGS | METH_KEYWORDS, Py_radProf_doc},
     {"radIndByRadSq", Py_radIndByRadSq, METH_VARARGS, Py_radIndByRadSq_doc},
     {"radSqByRadInd", Py_radSqByRadInd, METH_VARARGS, Py_radSqByRadInd_doc},
     {"radSqProf", Py_radSqProf, METH_VARARGS, Py_radSqProf_doc},
+    {"calibrate", (PyCFunction)Py_calibrate, METH_VARARGS | METH_KEYWORDS, Py_calibrate_doc},
+    {"medianFilter3", Py_medianFilter3, METH_VARARGS, Py_medianFilter3_doc},
+    {"labelBlobs", Py_labelBlobs, METH_VARARGS, Py_labelBlobs_doc},
     {NULL, NULL, 0, NULL} /* Sentinel */
 };
 
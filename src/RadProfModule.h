@@ -8,6 +8,15 @@ History:
 2004-10-13 ROwen    modified libnumarray.h include to match numarray 1.1 docs.
 2008-10-01 ROwen    radAsymmWeighted: changed bias from int to double.
 2009-11-19 ROwen    Modified to use numpy instead of numarray.
+2026-10-18          Added calibrate.
+                    radAsymmWeighted and radProf: added satLevel, satMask and nSatPtr.
+                    Added MaskInfo and MaskRowIter: the profile routines take a MaskInfo
+                    (which supports bool, bit-packed and run-length masks) instead of a bool array.
+                    Added medianFilter3, labelBlobs and blobBBoxes.
+                    Added RadProfWork, getRadIndByRadSq, allocRadProfWork and freeRadProfWork
+                    and removed g_radProf_free, g_radAsymm_alloc and g_radAsymm_free:
+                    radAsymm, radAsymmWeighted and radProf take their radial index table
+                    and working arrays as arguments, so they can run without the GIL.
 */
 
 #include "Python.h"
@@ -18,63 +27,139 @@ History:
 extern "C" {
 #endif
 
+// forms of mask supported by MaskInfo
+enum {MASK_NONE, MASK_BOOL, MASK_PACKED, MASK_RUNS};
+
+// a mask in any supported form; see getMaskInfo for details
+typedef struct {
+    int form;                   // one of MASK_NONE, MASK_BOOL, MASK_PACKED, MASK_RUNS
+    int lenI, lenJ;             // shape of the mask
+    npy_bool *boolMask;         // MASK_BOOL: mask [lenI][lenJ]
+    npy_uint8 *packedMask;      // MASK_PACKED: bit-packed mask [lenI][nBytesPerRow]
+    int nBytesPerRow;
+    npy_int32 *rowStart;        // MASK_RUNS: index of first run for each row [lenI + 1]
+    npy_int32 *runs;            // MASK_RUNS: beg j, end j (exclusive) of each run of valid pixels [nRuns][2]
+    npy_intp nRuns;
+    PyArrayObject *arry1, *arry2;   // references to release (see freeMaskInfo)
+} MaskInfo;
+
+// iterator over the runs of valid pixels in one row of a mask
+typedef struct {
+    int ii, jj, endJ;
+    npy_intp runInd, endRunInd;
+} MaskRowIter;
+
+// the radial index table and working arrays for one call to radAsymm or radAsymmWeighted
+typedef struct {
+    const npy_int32 *radIndByRadSq; // radial index table (see getRadIndByRadSq); not owned
+    npy_float64 *mean;              // working arrays [rad + 2]
+    npy_float64 *var;
+    npy_int32 *nPts;
+} RadProfWork;
+
 // routines visible to Python
 static PyObject *Py_radAsymm(PyObject *dumObj, PyObject *args);
-static PyObject *Py_radProf(PyObject *dumObj, PyObject *args);
+static PyObject *Py_radProf(PyObject *dumObj, PyObject *args, PyObject *kwds);
 static PyObject *Py_radIndByRadSq(PyObject *dumObj, PyObject *args);
 static PyObject *Py_radSqByRadInd(PyObject *dumObj, PyObject *args);
 static PyObject *Py_radSqProf(PyObject *dumObj, PyObject *args);
+static PyObject *Py_calibrate(PyObject *dumObj, PyObject *args, PyObject *kwds);
+static PyObject *Py_medianFilter3(PyObject *dumObj, PyObject *args);
+static PyObject *Py_labelBlobs(PyObject *dumObj, PyObject *args);
 
 // internal routines
+int getMaskInfo(
+    PyObject *maskObj,
+    int lenI, int lenJ,
+    MaskInfo *maskInfo,
+    char *modName
+);
+void freeMaskInfo(
+    MaskInfo *maskInfo
+);
+void maskRowBegin(
+    const MaskInfo *maskInfo,
+    MaskRowIter *rowIter,
+    int ii,
+    int begJ, int endJ
+);
+int maskRowNextRun(
+    const MaskInfo *maskInfo,
+    MaskRowIter *rowIter,
+    int *runBegJPtr,
+    int *runEndJPtr
+);
+int circleHalfWidth(
+    int radSq,
+    int di
+);
 int g_radProf_setup(
     int rad
 );
-void g_radProf_free(
-    void
+const npy_int32 *getRadIndByRadSq(
+    int rad,
+    char *modName
 );
-int g_radAsymm_alloc(
-    int nElt
+int allocRadProfWork(
+    RadProfWork *work,
+    int rad,
+    char *modName
 );
-void g_radAsymm_free(
-    void
+void freeRadProfWork(
+    RadProfWork *work
 );
 int radAsymm(
     int inLenI, int inLenJ,
     npy_float32 data[inLenI][inLenJ],
-    npy_bool mask[inLenI][inLenJ],
+    const MaskInfo *maskInfo,
     int iCtr, int jCtr,
     int rad,
+    const npy_int32 *radIndByRadSq,
+    npy_float64 *mean,
+    npy_float64 *var,
+    npy_int32 *nPts,
     double *asymmPtr,
     double *totCountsPtr
 );
 int radAsymmWeighted(
     int inLenI, int inLenJ,
     npy_float32 data[inLenI][inLenJ],
-    npy_bool mask[inLenI][inLenJ],
+    const MaskInfo *maskInfo,
     int iCtr, int jCtr,
     int rad,
+    const npy_int32 *radIndByRadSq,
     double bias,
     double readNoise,
     double ccdGain,
+    double satLevel,
+    npy_bool satMask[inLenI][inLenJ],
+    npy_float64 *mean,
+    npy_float64 *var,
+    npy_int32 *nPts,
+    int *nSatPtr,
     double *asymmPtr,
     double *totCountsPtr
 );
 int radProf(
     int inLenI, int inLenJ,
     npy_float32 data[inLenI][inLenJ],
-    npy_bool mask[inLenI][inLenJ],
+    const MaskInfo *maskInfo,
     int iCtr, int jCtr,
     int rad,
+    const npy_int32 *radIndByRadSq,
     int outLen,
     npy_float64 *mean,
     npy_float64 *var,
     npy_int32 *nPts,
+    double satLevel,
+    npy_bool satMask[inLenI][inLenJ],
+    int *nSatPtr,
     double *totCountsPtr
 );
 int radSqProf(
     int inLenI, int inLenJ,
     npy_float32 data[inLenI][inLenJ],
-    npy_bool mask[inLenI][inLenJ],
+    const MaskInfo *maskInfo,
     int iCtr, int jCtr,
     int rad,
     int outLen,
@@ -83,6 +168,39 @@ int radSqProf(
     npy_int32 *nPts,
     double *totCountsPtr
 );
+npy_intp calibrate(
+    npy_intp nPix,
+    int dataType,
+    void *data,
+    npy_bool *mask,
+    double biasVal,
+    npy_float32 *bias,
+    npy_float32 *scale,
+    npy_bool *badMask,
+    double satLevel,
+    npy_float32 *outData,
+    npy_bool *outMask,
+    npy_bool *outSatMask,
+    npy_intp *nSatPtr
+);
+void medianFilter3(
+    int lenI, int lenJ,
+    const npy_float32 *data,
+    npy_float32 *out,
+    npy_float32 *work
+);
+npy_intp labelBlobs(
+    int lenI, int lenJ,
+    const npy_bool *mask,
+    npy_int32 *labels,
+    npy_int32 *parent
+);
+void blobBBoxes(
+    int lenI, int lenJ,
+    const npy_int32 *labels,
+    npy_intp nBlobs,
+    npy_int32 *bbox
+);
 
 #ifdef __cplusplus
 }
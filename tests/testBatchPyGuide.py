@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test scripts/batchPyGuide.py: output files, including frames with the same name in different directories.
+
+History:
+2026-10-18          First version.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy
+import PyGuide
+from PyGuide import FakeData
+from PyGuide.FrameIO import _getFitsModule
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "scripts"))
+import batchPyGuide
+
+ImShape = (120, 140)
+fits = _getFitsModule()
+
+def writeFrame(path, xyCtrs, seed):
+    """Write a fake frame with stars at xyCtrs"""
+    randState = numpy.random.RandomState(seed)
+    data = FakeData.fakeField(ImShape, xyCtrs, 1.5, 8000) + 1000 + randState.normal(0, 10, ImShape)
+    dirPath = os.path.dirname(path)
+    if not os.path.isdir(dirPath):
+        os.makedirs(dirPath)
+    fits.PrimaryHDU(data.astype(numpy.float32)).writeto(path)
+
+def readJSONL(path):
+    with open(path) as inFile:
+        return [json.loads(line) for line in inFile]
+
+tempDir = tempfile.mkdtemp()
+try:
+    inDir = os.path.join(tempDir, "in")
+    outDir = os.path.join(tempDir, "out")
+    # two frames named x.fits in different directories, with different numbers of stars
+    pathA = os.path.join(inDir, "a", "x.fits")
+    pathB = os.path.join(inDir, "b", "x.fits")
+    writeFrame(pathA, [(40.3, 50.2)], seed=1)
+    writeFrame(pathB, [(40.3, 50.2), (100.6, 80.1)], seed=2)
+
+    baseArgs = ["--readnoise", "10", "--ccdgain", "2", "--bias", "1000", "-j", "1", "--noshape"]
+    assert batchPyGuide.main(baseArgs + ["--outdir", outDir, pathA, pathB]) == 0
+    outA = readJSONL(os.path.join(outDir, "a", "x.jsonl"))
+    outB = readJSONL(os.path.join(outDir, "b", "x.jsonl"))
+    assert [rec["frame"] for rec in outA] == [pathA], outA
+    assert [rec["frame"] for rec in outB] == [pathB] * 2, outB
+    assert abs(outA[0]["xCtr"] - 40.3) < 0.1 and abs(outA[0]["yCtr"] - 50.2) < 0.1, outA
+    print("frames with the same name in different directories: OK")
+
+    # frames in a single directory are written directly to the output directory
+    flatOutDir = os.path.join(tempDir, "flatout")
+    assert batchPyGuide.main(baseArgs + ["--outdir", flatOutDir, "--format", "npy", os.path.dirname(pathB)]) == 0
+    assert os.listdir(flatOutDir) == ["x.npy"], os.listdir(flatOutDir)
+    with open(os.path.join(flatOutDir, "x.npy"), "rb") as inFile:
+        assert len(PyGuide.StarCatalog.fromBytes(inFile.read())) == 2
+    print("frames in one directory: OK")
+
+    # frames whose output files would collide are rejected before any are processed
+    pathC = os.path.join(inDir, "a", "x.fit")
+    writeFrame(pathC, [(40.3, 50.2)], seed=3)
+    collideOutDir = os.path.join(tempDir, "collideout")
+    assert batchPyGuide.main(baseArgs + ["--outdir", collideOutDir, pathA, pathC]) == 1
+    assert not os.path.exists(collideOutDir)
+    print("colliding output files rejected: OK")
+finally:
+    shutil.rmtree(tempDir)
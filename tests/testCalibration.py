@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test Calibration and CalibrationCache against the equivalent numpy computation.
+
+History:
+2026-10-18          First version.
+"""
+import numpy
+import PyGuide
+
+ImShape = (300, 200)
+CCDInfo = PyGuide.CCDInfo(bias=50, readNoise=10, ccdGain=2, satLevel=60000)
+
+randState = numpy.random.RandomState(3)
+rawData = randState.uniform(900, 65535, ImShape).astype(numpy.uint16)
+biasFrame = randState.normal(1000, 5, ImShape)
+flat = randState.uniform(0.8, 1.2, ImShape)
+flat[10, 20] = 0
+flat[30, 40] = numpy.nan
+badPixMask = randState.uniform(size=ImShape) < 0.01
+mask = randState.uniform(size=ImShape) < 0.05
+
+def checkCalib(calib, data, mask, desData, desMask, descr):
+    desSatMask = numpy.asarray(data) >= CCDInfo.satLevel
+    calData, calMask, satMask = calib.apply(data, mask)
+    assert calData.dtype == numpy.float32 and calData.flags.c_contiguous, "%s: wrong type" % (descr,)
+    assert numpy.allclose(calData, desData, rtol=1e-6, atol=1e-2), "%s: data mismatch" % (descr,)
+    if desMask is None:
+        assert calMask is None, "%s: calMask=%s; should be None" % (descr, calMask)
+    else:
+        assert numpy.array_equal(calMask, desMask), "%s: mask mismatch" % (descr,)
+    assert numpy.array_equal(satMask, desSatMask), "%s: satMask mismatch" % (descr,)
+
+    # output arrays are reused
+    newData, newMask, newSatMask = calib.apply(data, mask, out=(calData, calMask, satMask))
+    assert newData is calData and newMask is calMask and newSatMask is satMask, "%s: did not reuse" % (descr,)
+    assert numpy.allclose(newData, desData, rtol=1e-6, atol=1e-2), "%s: reused data mismatch" % (descr,)
+    print("%s: OK" % (descr,))
+
+flatBad = ~numpy.isfinite(flat) | (flat <= 0)
+with numpy.errstate(invalid="ignore", divide="ignore"):
+    scale = numpy.where(flatBad, 0.0, 1.0 / flat).astype(numpy.float32)
+biasFrame32 = biasFrame.astype(numpy.float32)
+fullDesData = (rawData - numpy.float64(CCDInfo.bias) - biasFrame32) * scale
+
+calib = PyGuide.Calibration(CCDInfo, biasFrame=biasFrame, flat=flat, badPixMask=badPixMask)
+assert calib.ccdInfo.bias == 0 and calib.ccdInfo.readNoise == CCDInfo.readNoise
+checkCalib(calib, rawData, mask, fullDesData, mask | badPixMask | flatBad, "uint16 data")
+checkCalib(calib, rawData.astype(numpy.float32), mask, fullDesData, mask | badPixMask | flatBad,
+    "float32 data")
+checkCalib(calib, rawData.astype(numpy.int32), None, fullDesData, badPixMask | flatBad, "int32 data, no mask")
+
+checkCalib(PyGuide.Calibration(CCDInfo, biasFrame=biasFrame), rawData, None,
+    rawData - numpy.float64(CCDInfo.bias) - biasFrame32, None, "bias only")
+checkCalib(PyGuide.Calibration(CCDInfo, badPixMask=badPixMask), rawData, mask,
+    rawData - numpy.float64(CCDInfo.bias), mask | badPixMask, "bad pixel mask only")
+
+try:
+    calib.apply(rawData[1:], None)
+except ValueError:
+    pass
+else:
+    raise AssertionError("apply accepted data of the wrong shape")
+
+# calibrated data can be used directly by findStars
+calData, calMask, satMask = calib.apply(rawData, mask)
+PyGuide.findStars(calData, calMask, satMask, calib.ccdInfo)
+
+calibCache = PyGuide.CalibrationCache(maxEntries=2)
+nMade = []
+def makeCalib():
+    nMade.append(1)
+    return PyGuide.Calibration(CCDInfo, biasFrame=biasFrame)
+for key in ("a", "a", "b", "a", "c", "a", "b"):
+    calibCache.get(key, makeCalib)
+assert len(nMade) == 4, "made %s Calibrations; should be 4" % (len(nMade),)
+assert len(calibCache) == 2 and "a" in calibCache and "b" in calibCache and "c" not in calibCache
+print("CalibrationCache: OK")
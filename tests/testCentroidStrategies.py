@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test the centroid search strategies (the strategy argument of centroid).
+
+History:
+2026-10-18          First version.
+"""
+import numpy
+import PyGuide
+from PyGuide import Centroid
+from PyGuide import FakeData
+
+ImShape = (200, 200)
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2)
+NumTrials = 40
+
+randState = numpy.random.RandomState(5)
+nEvalDict = dict((strategy, 0) for strategy in Centroid.Strategies)
+nFoundDict = dict((strategy, 0) for strategy in Centroid.Strategies)
+for trial in range(NumTrials):
+    xyStar = randState.uniform(50, 150, 2)
+    cleanData = FakeData.fakeField(ImShape, [xyStar], [randState.uniform(1.5, 4)], [randState.uniform(2000, 30000)])
+    data = FakeData.noisyFrames(cleanData + 300, 1, 0, CCDInfo, seed=trial)[0]
+    mask = randState.uniform(size=ImShape) < 0.05
+    xyGuess = xyStar + randState.uniform(-8, 8, 2)
+    ctrDataDict = {}
+    for strategy in Centroid.Strategies:
+        ctrData = PyGuide.centroid(data, mask, None, xyGuess, 20, CCDInfo, doStats=True, strategy=strategy)
+        ctrDataDict[strategy] = ctrData
+        nEvalDict[strategy] += ctrData.stats.nEval
+        if ctrData.isOK and numpy.hypot(*(numpy.subtract(ctrData.xyCtr, xyStar))) < 0.5:
+            nFoundDict[strategy] += 1
+    # the strategies usually stop at the same pixel, and so give the same centroid
+    gridData = ctrDataDict["grid"]
+    for strategy in ("cross", "jump"):
+        ctrData = ctrDataDict[strategy]
+        if ctrData.isOK and gridData.isOK and numpy.allclose(ctrData.xyCtr, gridData.xyCtr):
+            assert ctrData.asymm == gridData.asymm
+            assert numpy.allclose(ctrData.xyErr, gridData.xyErr)
+
+print("evaluations: %s" % (nEvalDict,))
+print("stars found in %s trials: %s" % (NumTrials, nFoundDict))
+for strategy in ("cross", "jump"):
+    assert nEvalDict[strategy] < nEvalDict["grid"] * 0.8, "%s needed too many evaluations" % (strategy,)
+    assert nFoundDict[strategy] >= nFoundDict["grid"] - 2, "%s found too few stars" % (strategy,)
+
+try:
+    PyGuide.centroid(data, mask, None, xyGuess, 20, CCDInfo, strategy="bogus")
+except ValueError:
+    pass
+else:
+    raise AssertionError("an invalid strategy was accepted")
+print("centroid strategies OK")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test the background statistics of Centroid.checkSignal when there are too few
+background pixels outside the circle, so the statistics are computed from all unmasked
+pixels in the region (the usual case).
+
+History:
+2026-10-18          First version.
+"""
+import numpy
+import PyGuide
+from PyGuide import Centroid, FakeData
+from PyGuide.MaskIndex import SignalRegion
+
+ImShape = (100, 100)
+Sky = 1000
+Noise = 10
+XYStar = (30.3, 70.6)
+XYBlank = (70.2, 30.4)
+Rad = 10 # large enough that the region has too few pixels outside the circle
+
+randState = numpy.random.RandomState(9)
+data = Sky + FakeData.fakeField(ImShape, [XYStar], 1.5, 5000) + randState.normal(0, Noise, ImShape)
+data = data.astype(numpy.float32)
+mask = randState.uniform(size=ImShape) < 0.1
+
+for ctrMask in (None, mask, PyGuide.MaskIndex(mask)):
+    for xyCtr, desSignalOK in ((XYBlank, False), (XYStar, True)):
+        signalOK, imStats = Centroid.checkSignal(data, ctrMask, xyCtr, Rad)
+        descr = "xyCtr=%s, mask=%s" % (xyCtr, type(ctrMask).__name__)
+        assert signalOK == desSignalOK, "%s: signalOK=%s" % (descr, signalOK)
+        if xyCtr == XYBlank:
+            # the statistics are those of the data, not of the mask (0s and 1s)
+            assert abs(imStats.med - Sky) < 3, "%s: med=%s" % (descr, imStats.med)
+            assert abs(imStats.stdDev - Noise) < 3, "%s: stdDev=%s" % (descr, imStats.stdDev)
+            assert imStats.dataCut > Sky, "%s: dataCut=%s" % (descr, imStats.dataCut)
+
+        # the statistics use the unmasked pixels of the whole region (less any rejected by skyStats)
+        sigRegion = SignalRegion(data, None if ctrMask is None else mask, xyCtr, Rad, Rad + 10)
+        assert len(sigRegion.bkgndInd) < 100, "%s: region has enough background pixels; test is not useful" % (descr,)
+        assert len(sigRegion.bkgndInd) < imStats.nPts <= len(sigRegion.validInd), "%s: nPts=%s; expected %s-%s" % \
+            (descr, imStats.nPts, len(sigRegion.bkgndInd), len(sigRegion.validInd))
+    print("checkSignal mask=%s: OK" % (type(ctrMask).__name__,))
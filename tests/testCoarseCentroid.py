@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test the coarse-to-fine centroid search (the coarseBin argument of centroid)
+when the initial guess is far from the star.
+
+History:
+2026-10-18          First version.
+"""
+import numpy
+import PyGuide
+from PyGuide import FakeData
+from PyGuide import ImUtil
+
+ImShape = (400, 400)
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2)
+Sky = 500
+Rad = 30
+
+# binImage averages the valid pixels of each block
+arr = numpy.arange(20, dtype=float).reshape(4, 5)
+binMask = numpy.zeros(arr.shape, bool)
+binMask[0, 0] = True
+binMask[2:4, 2:4] = True
+binData, binMaskOut = ImUtil.binImage(arr, binMask, 2)
+assert binData.shape == (2, 2)
+assert numpy.allclose(binData, [[(1 + 5 + 6) / 3.0, 5], [13, 0]]), binData
+assert binMaskOut.tolist() == [[False, False], [False, True]], binMaskOut
+
+NumTrials = 20
+randState = numpy.random.RandomState(1)
+nFound = dict((coarseBin, 0) for coarseBin in (1, 2, 4))
+nPixRead = dict((coarseBin, 0) for coarseBin in (1, 2, 4))
+for trial in range(NumTrials):
+    xyStar = randState.uniform(150, 250, 2)
+    cleanData = FakeData.fakeField(ImShape, [xyStar], [randState.uniform(2.5, 4)], [randState.uniform(5000, 30000)])
+    data = FakeData.noisyFrames(cleanData + Sky, 1, 0, CCDInfo, seed=trial)[0]
+    mask = randState.uniform(size=ImShape) < 0.02
+    # an initial guess 8-20 pixels from the star
+    offAngle = randState.uniform(0, 2 * numpy.pi)
+    offRad = randState.uniform(8, 20)
+    xyGuess = xyStar + offRad * numpy.array((numpy.cos(offAngle), numpy.sin(offAngle)))
+
+    binCache = {}
+    ctrDataDict = {}
+    for coarseBin in (1, 2, 4):
+        ctrData = PyGuide.centroid(data, mask, None, xyGuess, Rad, CCDInfo, doStats=True, coarseBin=coarseBin)
+        ctrDataDict[coarseBin] = ctrData
+        if coarseBin > 1:
+            # the result is the same whether the whole image is binned (and cached) or just the region needed
+            cachedCtrData = PyGuide.centroid(data, mask, None, xyGuess, Rad, CCDInfo,
+                coarseBin=coarseBin, binCache=binCache)
+            assert repr(cachedCtrData.xyCtr) == repr(ctrData.xyCtr), \
+                "coarseBin=%s: xyCtr=%s with binCache; %s without" % (coarseBin, cachedCtrData.xyCtr, ctrData.xyCtr)
+        nPixRead[coarseBin] += int(ctrData.stats.nPixRead)
+    foundList = [coarseBin for coarseBin, ctrData in ctrDataDict.items()
+        if ctrData.isOK and numpy.hypot(*(numpy.array(ctrData.xyCtr) - xyStar)) < 0.5]
+    for coarseBin in foundList:
+        nFound[coarseBin] += 1
+        # searches that find the star end on the same pixel, so they give the same centroid
+        assert repr(ctrDataDict[coarseBin].xyCtr) == repr(ctrDataDict[foundList[0]].xyCtr)
+    assert sorted(binCache.keys()) == [2, 4]
+    print("offset %4.1f: " % (offRad,) + "; ".join("coarseBin=%s: nEval=%3d nCoarseEval=%3d ok=%s" % \
+        (coarseBin, ctrData.stats.nEval, ctrData.stats.nCoarseEval, ctrData.isOK)
+        for coarseBin, ctrData in sorted(ctrDataDict.items())))
+
+print("stars found in %s trials: %s" % (NumTrials, nFound))
+print("pixels read: %s" % (nPixRead,))
+# binning averages away noise, so the coarse search finds the star more often
+assert nFound[4] >= max(nFound[1], NumTrials * 3 // 4), "coarseBin=4 found too few stars"
+assert nPixRead[4] < nPixRead[1] / 2, "coarseBin=4 read too many pixels"
+print("coarse-to-fine search OK")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test that PackedMask and RunMask give the same results as the equivalent bool mask.
+
+History:
+2026-10-18          First version.
+                    Test that CentroidStats.nPixRead counts the pixels read by the asymmetry evaluations.
+"""
+import numpy
+import PyGuide
+from PyGuide import FakeData
+
+ImShape = (200, 211)    # odd number of columns tests the padding of packed rows
+NumStars = 12
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2, satLevel=30000)
+
+randState = numpy.random.RandomState(11)
+xyCtrs = numpy.column_stack((randState.uniform(10, 200, NumStars), randState.uniform(10, 190, NumStars)))
+cleanData = FakeData.fakeField(ImShape, xyCtrs, randState.uniform(1, 3, NumStars),
+    randState.uniform(2000, 40000, NumStars))
+data = FakeData.noisyFrames(cleanData, 1, 500, CCDInfo, seed=5)[0]
+
+# a mask like a fiber bundle: valid data inside a few large disks, plus scattered bad pixels
+iInd, jInd = numpy.indices(ImShape)
+mask = numpy.ones(ImShape, dtype=bool)
+for ijCtr, rad in (((60, 60), 55), ((140, 150), 50), ((150, 40), 30)):
+    mask &= (iInd - ijCtr[0])**2 + (jInd - ijCtr[1])**2 > rad**2
+mask |= randState.uniform(size=ImShape) < 0.02
+
+compactMasks = (PyGuide.PackedMask(mask), PyGuide.RunMask(mask), PyGuide.RunMask(PyGuide.PackedMask(mask)))
+for compactMask in compactMasks:
+    assert compactMask.shape == ImShape
+    assert numpy.array_equal(compactMask.toMask(), mask), "%s.toMask() mismatch" % (compactMask,)
+    assert numpy.array_equal(compactMask[20:90, 33:150], mask[20:90, 33:150]), "%s slice mismatch" % (compactMask,)
+    assert numpy.array_equal(compactMask[190:], mask[190:]), "%s row slice mismatch" % (compactMask,)
+assert compactMasks[1].nValid == numpy.sum(~mask)
+print("toMask and slicing: OK")
+
+# radial profile routines, including centers near and beyond the edges
+for ijCtr, rad in (((60, 60), 20), ((3, 205), 9), ((140, 150), 30), ((-2, 100), 5), ((199, 0), 12)):
+    desAsymm = PyGuide.radProf.radAsymmWeighted(data, mask, ijCtr, rad,
+        CCDInfo.bias, CCDInfo.readNoise, CCDInfo.ccdGain, satLevel=CCDInfo.satLevel)
+    desProf = [numpy.zeros(rad + 2), numpy.zeros(rad + 2), numpy.zeros(rad + 2, numpy.int32)]
+    desProfRet = PyGuide.radProf.radProf(data, mask, ijCtr, rad, *desProf)
+    desSqProf = [numpy.zeros(rad**2 + 1), numpy.zeros(rad**2 + 1), numpy.zeros(rad**2 + 1, numpy.int32)]
+    desSqProfRet = PyGuide.radProf.radSqProf(data, mask, ijCtr, rad, *desSqProf)
+    for compactMask in compactMasks:
+        asymm = PyGuide.radProf.radAsymmWeighted(data, compactMask, ijCtr, rad,
+            CCDInfo.bias, CCDInfo.readNoise, CCDInfo.ccdGain, satLevel=CCDInfo.satLevel)
+        assert asymm == desAsymm, "radAsymmWeighted %s != %s for %s" % (asymm, desAsymm, compactMask)
+        prof = [numpy.zeros(rad + 2), numpy.zeros(rad + 2), numpy.zeros(rad + 2, numpy.int32)]
+        profRet = PyGuide.radProf.radProf(data, compactMask, ijCtr, rad, *prof)
+        assert profRet == desProfRet and all(numpy.array_equal(a, b) for a, b in zip(prof, desProf)), \
+            "radProf mismatch for %s" % (compactMask,)
+        sqProf = [numpy.zeros(rad**2 + 1), numpy.zeros(rad**2 + 1), numpy.zeros(rad**2 + 1, numpy.int32)]
+        sqProfRet = PyGuide.radProf.radSqProf(data, compactMask, ijCtr, rad, *sqProf)
+        assert sqProfRet == desSqProfRet and all(numpy.array_equal(a, b) for a, b in zip(sqProf, desSqProf)), \
+            "radSqProf mismatch for %s" % (compactMask,)
+print("radAsymmWeighted, radProf and radSqProf: OK")
+
+try:
+    PyGuide.radProf.radProf(data, PyGuide.RunMask(mask[1:]), (50, 50), 5, *desProf)
+except ValueError:
+    pass
+else:
+    raise AssertionError("radProf accepted a mask of the wrong shape")
+
+def checkCtrData(ctrData, desCtrData, descr):
+    assert repr(ctrData) == repr(desCtrData), "%s: %s != %s" % (descr, ctrData, desCtrData)
+
+for xyCtr in xyCtrs:
+    desCtrData = PyGuide.centroid(data, mask, None, xyCtr, 8, CCDInfo)
+    for compactMask in compactMasks:
+        checkCtrData(PyGuide.centroid(data, compactMask, None, xyCtr, 8, CCDInfo), desCtrData,
+            "centroid at %s with %s" % (xyCtr, compactMask))
+print("centroid: OK")
+
+# nPixRead is the number of unmasked pixels the asymmetry evaluations read,
+# which is the total number of points in the radial profiles of the evaluated centers
+for ctrMask in [mask] + list(compactMasks):
+    profDict = {}
+    ctrData = PyGuide.centroid(data, ctrMask, None, xyCtrs[0], 8, CCDInfo, doStats=True, profDict=profDict)
+    desNPixRead = sum(int(nPts.sum()) for mean, var, nPts in profDict.values())
+    assert ctrData.stats.nEval == len(profDict)
+    assert ctrData.stats.nPixRead == desNPixRead, "nPixRead=%s != %s for %s" % \
+        (ctrData.stats.nPixRead, desNPixRead, type(ctrMask).__name__)
+    assert ctrData.stats.nPixRead < ctrData.stats.nEval * numpy.pi * 9**2
+print("nPixRead: OK")
+
+desCtrDataList = PyGuide.findStars(data, mask, None, CCDInfo)[0]
+for compactMask in compactMasks:
+    for tileMem in (None, 50000):
+        ctrDataList = PyGuide.findStars(data, compactMask, None, CCDInfo, tileMem=tileMem)[0]
+        assert len(ctrDataList) == len(desCtrDataList), "findStars found %s stars instead of %s" % \
+            (len(ctrDataList), len(desCtrDataList))
+        for ctrData, desCtrData in zip(ctrDataList, desCtrDataList):
+            checkCtrData(ctrData, desCtrData, "findStars with %s, tileMem=%s" % (compactMask, tileMem))
+print("findStars: OK (%s stars)" % (len(desCtrDataList),))
+
+desShapes = PyGuide.starShapeMany(data, mask, xyCtrs, 10)
+for compactMask in compactMasks:
+    shapes = PyGuide.starShapeMany(data, compactMask, xyCtrs, 10)
+    assert repr(shapes) == repr(desShapes), "starShapeMany mismatch for %s" % (compactMask,)
+print("starShapeMany: OK")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test PyGuide.FakeData.fakeField against fakeStar, and noisyFrames and iterNoisyFrames.
+
+History:
+2026-10-18          First version.
+"""
+import numpy
+import PyGuide
+from PyGuide import FakeData
+
+ImShape = (120, 150)
+XYCtrList = [(30.2, 40.7), (100.5, 60.1), (148.0, 2.0), (-3.0, 60.0)]
+SigmaList = [1.0, 2.5, 1.5, 2.0]
+AmplList = [2000, 40000, 10000, 5000]
+
+# a single star matches fakeStar
+for xyCtr, sigma, ampl in zip(XYCtrList, SigmaList, AmplList):
+    fieldData = FakeData.fakeField(ImShape, [xyCtr], sigma, ampl)
+    starData = FakeData.fakeStar(ImShape, xyCtr, sigma, ampl)
+    assert fieldData.dtype == numpy.uint16
+    assert numpy.array_equal(fieldData, starData), "fakeField != fakeStar for xyCtr=%s" % (xyCtr,)
+
+# many stars: fakeField truncates once, so it is within 1 ADU per star of the sum of fakeStar
+sumData = numpy.zeros(ImShape, dtype=float)
+for xyCtr, sigma, ampl in zip(XYCtrList, SigmaList, AmplList):
+    sumData += FakeData.fakeStar(ImShape, xyCtr, sigma, ampl)
+fieldData = FakeData.fakeField(ImShape, XYCtrList, SigmaList, AmplList)
+maxDiff = numpy.abs(fieldData - sumData).max()
+assert maxDiff <= len(XYCtrList), "fakeField differs from sum of fakeStar by %s" % (maxDiff,)
+
+# saturation and mask
+satLevel = 20000
+mask = numpy.zeros(ImShape, dtype=bool)
+mask[:, 70:80] = True
+fieldData, satMask = FakeData.fakeField(ImShape, XYCtrList, SigmaList, AmplList,
+    satLevel=satLevel, mask=mask, doSatMask=True)
+assert fieldData.max() == satLevel
+assert satMask.any() and numpy.all(fieldData[satMask] == satLevel)
+assert not numpy.any(fieldData[mask])
+
+print("PyGuide.FakeData.fakeField OK")
+
+# noisy frames are reproducible, independent of the number of processes, and match iterNoisyFrames
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2)
+Sky = 500
+cleanData = FakeData.fakeField(ImShape, XYCtrList, SigmaList, AmplList)
+cube = FakeData.noisyFrames(cleanData, 5, Sky, CCDInfo, seed=3)
+assert cube.shape == (5,) + ImShape and cube.dtype == numpy.float32
+assert numpy.array_equal(cube, FakeData.noisyFrames(cleanData, 5, Sky, CCDInfo, seed=3, nProc=2))
+frameList = [frame.copy() for frame in FakeData.iterNoisyFrames(cleanData, 5, Sky, CCDInfo, seed=3, nBuffers=2)]
+assert numpy.array_equal(cube, frameList)
+assert not numpy.array_equal(cube[0], cube[1])
+
+# the noise has the expected mean and standard deviation (on sky, well away from the stars)
+skyCube = cube[:, 90:, :20]
+predStdDev = numpy.sqrt(Sky / CCDInfo.ccdGain + (CCDInfo.readNoise / CCDInfo.ccdGain)**2)
+assert abs(skyCube.mean() - (Sky + CCDInfo.bias - 0.5)) < 1.0, "mean=%s" % (skyCube.mean(),)
+assert abs(skyCube.std() / predStdDev - 1) < 0.05, "std dev=%s; expected %s" % (skyCube.std(), predStdDev)
+
+print("PyGuide.FakeData.noisyFrames OK")
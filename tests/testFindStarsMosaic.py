@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test findStarsMosaic: it should find the same stars as findStars, including stars
+on the boundaries between tiles, with no duplicates.
+
+History:
+2026-10-18          First version.
+"""
+import numpy
+import PyGuide
+from PyGuide import FakeData
+
+ImShape = (1100, 900)
+NumStars = 120
+TileSize = 400
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2)
+
+randState = numpy.random.RandomState(7)
+xyCtrs = numpy.column_stack((randState.uniform(3, ImShape[1] - 3, NumStars), randState.uniform(3, ImShape[0] - 3, NumStars)))
+# put some stars on the boundaries between tiles
+xyCtrs[0:10, 0] = TileSize + randState.uniform(-1, 1, 10)
+xyCtrs[10:20, 1] = TileSize + randState.uniform(-1, 1, 10)
+cleanData = FakeData.fakeField(ImShape, xyCtrs, 1.2, randState.uniform(500, 30000, NumStars))
+data = FakeData.noisyFrames(cleanData, 1, 500, CCDInfo, seed=1)[0]
+
+ctrDataList, imStats = PyGuide.findStars(data, None, None, CCDInfo)
+refXYArr = numpy.array([ctrData.xyCtr for ctrData in ctrDataList])
+for nWorkers in (1, 2):
+    mosCtrDataList, imStatsList = PyGuide.findStarsMosaic(data, None, None, CCDInfo, tileSize=TileSize, nWorkers=nWorkers)
+    assert len(imStatsList) == 9
+    assert len(mosCtrDataList) == len(ctrDataList), "found %s stars; findStars found %s" % \
+        (len(mosCtrDataList), len(ctrDataList))
+    countsList = [ctrData.counts for ctrData in mosCtrDataList]
+    assert countsList == sorted(countsList, reverse=True), "stars not sorted by counts"
+    for ctrData in mosCtrDataList:
+        minDist = numpy.hypot(*(refXYArr - ctrData.xyCtr).transpose()).min()
+        assert minDist < 0.01, "star at %s is %s from the nearest star found by findStars" % (ctrData.xyCtr, minDist)
+    print("findStarsMosaic nWorkers=%s found %s stars OK" % (nWorkers, len(mosCtrDataList)))
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test that findStars with tileMem (finding candidates in bands of rows)
+gives the same results as without.
+
+History:
+2026-10-18          First version.
+"""
+import numpy
+import PyGuide
+from PyGuide import FakeData
+
+ImShape = (600, 500)
+NumStars = 60
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2)
+
+randState = numpy.random.RandomState(4)
+xyCtrs = numpy.column_stack((randState.uniform(5, 495, NumStars), randState.uniform(5, 595, NumStars)))
+cleanData = FakeData.fakeField(ImShape, xyCtrs, randState.uniform(0.8, 3, NumStars),
+    randState.uniform(200, 60000, NumStars)).astype(float)
+# add a U-shaped object that spans many bands and whose arms only join at the bottom
+cleanData[100:300, 200:204] += 3000
+cleanData[100:300, 260:264] += 3000
+cleanData[296:300, 200:264] += 3000
+data = FakeData.noisyFrames(cleanData, 1, 500, CCDInfo, seed=2)[0]
+mask = randState.uniform(size=ImShape) < 0.05
+mask[:, 400:420] = True
+
+def checkTiled(data, mask, tileMem, descr):
+    ctrDataList, imStats = PyGuide.findStars(data, mask, None, CCDInfo)
+    tiledCtrDataList, tiledImStats = PyGuide.findStars(data, mask, None, CCDInfo, tileMem=tileMem)
+    assert repr(tiledImStats) == repr(imStats), "%s: imStats %s != %s" % (descr, tiledImStats, imStats)
+    assert len(tiledCtrDataList) == len(ctrDataList), \
+        "%s: found %s stars instead of %s" % (descr, len(tiledCtrDataList), len(ctrDataList))
+    for tiledCtrData, ctrData in zip(tiledCtrDataList, ctrDataList):
+        assert repr(tiledCtrData) == repr(ctrData), "%s: %s != %s" % (descr, tiledCtrData, ctrData)
+    print("%s: %s stars OK" % (descr, len(ctrDataList)))
+
+for tileMem in (1, 10**5, 10**9):
+    checkTiled(data, None, tileMem, "no mask, tileMem=%s" % (tileMem,))
+    checkTiled(data, mask, tileMem, "mask, tileMem=%s" % (tileMem,))
+# integer-valued data has many repeated values
+checkTiled(numpy.floor(data), mask, 1, "integer data")
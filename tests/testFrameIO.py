@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test PyGuide.loadFrame: BZERO/BSCALE scaling, DATASEC trimming and masks.
+
+Requires pyfits or astropy (whichever PyGuide.FrameIO uses).
+
+History:
+2026-10-18          First version.
+                    Get the FITS module from PyGuide.FrameIO, so the test runs with astropy.
+"""
+import os
+import tempfile
+import numpy
+import PyGuide
+from PyGuide import Centroid
+from PyGuide.FrameIO import _getFitsModule
+
+pyfits = _getFitsModule()
+
+tempDir = tempfile.mkdtemp()
+imPath = os.path.join(tempDir, "im.fits")
+maskPath = os.path.join(tempDir, "mask.fits")
+
+# unsigned 16-bit data is stored as signed data with BZERO = 32768
+imArr = numpy.arange(20 * 30, dtype=numpy.uint16).reshape(20, 30) * 100
+hdu = pyfits.PrimaryHDU(imArr)
+hdu.header["DATASEC"] = "[3:27,2:19]"
+hdu.writeto(imPath)
+maskArr = numpy.zeros(imArr.shape, dtype=numpy.uint8)
+maskArr[5:7, :] = 1
+pyfits.PrimaryHDU(maskArr).writeto(maskPath)
+
+frame = PyGuide.loadFrame(imPath, maskPath=maskPath)
+print(frame)
+trimmedArr = imArr[1:19, 2:27]
+assert frame.dataSec == [1, 19, 2, 27], "dataSec=%s" % (frame.dataSec,)
+assert frame.shape == trimmedArr.shape
+assert frame.data.dtype == numpy.float32 and frame.data.flags.c_contiguous
+assert numpy.array_equal(frame.data, trimmedArr), "scaled data does not match"
+assert numpy.array_equal(frame.mask, maskArr[1:19, 2:27] > 0.1), "mask does not match"
+
+# conditioning the scaled data (or the frame itself) does not copy it
+assert Centroid.conditionData(frame.data) is frame.data
+assert Centroid.conditionData(frame) is frame.data
+
+fullFrame = PyGuide.loadFrame(imPath, useDataSec=False)
+assert fullFrame.dataSec is None
+assert numpy.array_equal(fullFrame.data, imArr)
+
+print("PyGuide.loadFrame OK")
+
+del frame, fullFrame
+for path in (imPath, maskPath):
+    os.remove(path)
+os.rmdir(tempDir)
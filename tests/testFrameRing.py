@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test FrameRing: latest-frame-wins reading, overwrite detection, zero-copy use by findStars,
+and reading from another process.
+
+Requires Python 3.8 or later.
+
+History:
+2026-10-18          First version.
+                    Read in a separate Python process (not a multiprocessing child), as a guide process would,
+                    so it has its own resource tracker.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy
+import PyGuide
+from PyGuide import FakeData
+from PyGuide import FrameRing
+
+ImShape = (200, 220)
+NSlots = 3
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2)
+
+# code to read the next frame in another process; arguments are ring name and afterSeq
+ReadCode = """
+import json, sys
+import numpy
+from PyGuide import FrameRing
+ring = FrameRing.FrameRing.attach(sys.argv[1])
+frame = ring.getLatest(afterSeq=int(sys.argv[2]), timeout=10)
+print(json.dumps((frame.seq, frame.meta, float(frame.data.sum(dtype=numpy.float64)), frame.isValid())))
+del frame
+ring.close()
+"""
+
+if __name__ == "__main__":
+    randState = numpy.random.RandomState(2)
+    xyCtrs = numpy.column_stack((randState.uniform(20, 200, 5), randState.uniform(20, 180, 5)))
+    cleanData = FakeData.fakeField(ImShape, xyCtrs, [2.0] * 5, randState.uniform(5000, 20000, 5))
+    frameList = FakeData.noisyFrames(cleanData, 6, 500, CCDInfo, seed=7).astype(numpy.float32)
+
+    ring = FrameRing.FrameRing.create(ImShape, dtype=numpy.float32, nSlots=NSlots)
+    try:
+        assert ring.lastSeq == 0
+        assert ring.getLatest(timeout=0) is None, "got a frame from an empty ring"
+
+        # latest frame wins
+        for frameInd in range(2):
+            ring.write(frameList[frameInd], meta=dict(frameNum=frameInd))
+        frame = ring.getLatest()
+        assert frame.seq == 2 and frame.meta == dict(frameNum=1), "wrong frame: %s" % (frame,)
+        assert numpy.array_equal(frame.data, frameList[1])
+        assert not frame.data.flags.writeable and frame.data.dtype == numpy.float32
+        assert ring.getLatest(afterSeq=frame.seq, timeout=0.01) is None, "got a frame that is not new"
+
+        # the frame is a view of shared memory that findStars uses without copying
+        assert PyGuide.Centroid.conditionData(frame.data) is frame.data, "conditionData copied the frame"
+        ctrDataList = PyGuide.findStars(frame.data, None, None, CCDInfo)[0]
+        desCtrDataList = PyGuide.findStars(frameList[1], None, None, CCDInfo)[0]
+        assert repr(ctrDataList) == repr(desCtrDataList), "findStars mismatch"
+        assert frame.isValid()
+
+        # overwriting the slot invalidates the frame
+        for frameInd in range(2, 2 + NSlots):
+            ring.write(frameList[frameInd], meta=dict(frameNum=frameInd))
+            assert frame.isValid() == (frameInd < 1 + NSlots), "isValid wrong after writing frame %s" % (frameInd,)
+        print("write, getLatest and isValid: OK")
+
+        # a failed write does not publish a frame
+        lastSeq = ring.lastSeq
+        try:
+            with ring.writeSlot() as slotData:
+                raise RuntimeError("camera failed")
+        except RuntimeError:
+            pass
+        assert ring.lastSeq == lastSeq and ring.getLatest().seq == lastSeq
+        print("failed write: OK")
+
+        # another process reads the next frame; it is a separate Python process (as a guide process would be),
+        # rather than a multiprocessing child, which would share this process's resource tracker
+        env = dict(os.environ)
+        pkgDir = os.path.dirname(os.path.dirname(os.path.abspath(PyGuide.__file__)))
+        env["PYTHONPATH"] = os.pathsep.join([pkgDir] + [path for path in (env.get("PYTHONPATH"),) if path])
+        proc = subprocess.Popen([sys.executable, "-c", ReadCode, ring.name, str(ring.lastSeq)],
+            stdout=subprocess.PIPE, env=env)
+        time.sleep(0.5)
+        seq = ring.write(frameList[5], meta=dict(frameNum=5))
+        output = proc.communicate(timeout=20)[0]
+        assert proc.returncode == 0, "other process failed"
+        result = tuple(json.loads(output.decode("ascii").strip().splitlines()[-1]))
+        assert result == (seq, dict(frameNum=5), float(frameList[5].sum(dtype=numpy.float64)), True), \
+            "other process read %s" % (result,)
+        print("reading from another process: OK")
+
+        # a local producer writes frames while a consumer keeps up with the latest
+        with FrameRing.LocalProducer(ring, list(frameList), interval=0.005) as producer:
+            seq = ring.lastSeq
+            nRead = 0
+            while producer.isAlive() or ring.lastSeq > seq:
+                frame = ring.getLatest(afterSeq=seq, timeout=0.1)
+                if frame is None:
+                    continue
+                assert frame.seq > seq
+                assert numpy.array_equal(frame.data, frameList[frame.meta["frameNum"]]) or not frame.isValid()
+                seq = frame.seq
+                nRead += 1
+        assert producer.nWritten == len(frameList) and nRead > 0
+        print("LocalProducer: OK (read %s of %s frames)" % (nRead, producer.nWritten))
+        del frame
+    finally:
+        ring.close()
+        ring.unlink()
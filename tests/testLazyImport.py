@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test that importing PyGuide and finding and centroiding stars does not import scipy or numpy.ma,
+that importing PyGuide does not import the lazily imported modules,
+that the lazily imported names match each module's __all__,
+and that ImUtil.medianFilter3, labelBlobs and minimumPosition match the scipy.ndimage functions they replace.
+
+History:
+2026-10-18          First version.
+                    Check that import PyGuide does not import the lazily imported modules.
+"""
+import os
+import subprocess
+import sys
+
+import numpy
+import PyGuide
+from PyGuide import ImUtil
+
+# run in a new process, so modules imported by this test do not count
+SubprocessCode = """
+import sys
+import numpy
+import PyGuide
+ccdInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2, satLevel=60000)
+iInd, jInd = numpy.indices((200, 180))
+data = 1200 + 5000 * numpy.exp(-((iInd - 91.3)**2 + (jInd - 60.8)**2) / 8.0)
+data += numpy.random.RandomState(1).normal(0, 10, data.shape)
+mask = numpy.random.RandomState(2).uniform(size=data.shape) < 0.05
+importedAfterImport = sorted(name for name in ("scipy", "numpy.ma") if name in sys.modules)
+lazyImported = sorted(name for name in PyGuide._LazyExports if "PyGuide." + name in sys.modules)
+ctrData = PyGuide.centroid(data, mask, None, (63, 89), 8, ccdInfo)
+assert ctrData.isOK, ctrData.msgStr
+ctrDataList = PyGuide.findStars(data, mask, None, ccdInfo)[0]
+assert len(ctrDataList) == 1, "found %s stars" % (len(ctrDataList),)
+imported = sorted(name for name in ("scipy", "numpy.ma") if name in sys.modules)
+print(repr((importedAfterImport, lazyImported, imported)))
+"""
+
+if sys.version_info >= (3, 7):
+    env = dict(os.environ)
+    pkgDir = os.path.dirname(os.path.dirname(os.path.abspath(PyGuide.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join([pkgDir] + [path for path in (env.get("PYTHONPATH"),) if path])
+    output = subprocess.check_output([sys.executable, "-c", SubprocessCode], env=env)
+    importedAfterImport, lazyImported, imported = eval(output.decode("ascii").strip().splitlines()[-1])
+    assert not importedAfterImport, "import PyGuide imported %s" % (importedAfterImport,)
+    assert not lazyImported, "import PyGuide imported lazily imported modules %s" % (lazyImported,)
+    assert not imported, "centroid and findStars imported %s" % (imported,)
+    print("import without lazily imported modules; import, centroid and findStars without scipy or numpy.ma: OK")
+
+    for modName, names in PyGuide._LazyExports.items():
+        module = getattr(PyGuide, modName)
+        assert tuple(module.__all__) == names, "PyGuide._LazyExports[%r] != %s.__all__" % (modName, modName)
+        for name in names:
+            assert getattr(PyGuide, name) is getattr(module, name), "PyGuide.%s is not %s.%s" % (name, modName, name)
+            assert name in dir(PyGuide), "%s missing from dir(PyGuide)" % (name,)
+    for name in ("MaskIndex", "StarCatalog", "Calibration"):
+        assert isinstance(getattr(PyGuide, name), type), "PyGuide.%s is not a class" % (name,)
+    print("lazy names: OK")
+
+randState = numpy.random.RandomState(4)
+try:
+    import scipy.ndimage
+except ImportError:
+    scipy = None
+    print("scipy not available; not comparing to scipy.ndimage")
+for shape in ((1, 1), (1, 7), (6, 1), (2, 2), (37, 53), (300, 211)):
+    data = randState.normal(size=shape).astype(numpy.float32)
+    data[randState.uniform(size=shape) < 0.2] = 0 # test equal values
+    filtData = ImUtil.medianFilter3(data)
+    inPlaceData = data.copy()
+    ImUtil.medianFilter3(inPlaceData, out=inPlaceData)
+    assert numpy.array_equal(filtData, inPlaceData), "medianFilter3 in place mismatch for shape %s" % (shape,)
+    if scipy is None:
+        continue
+
+    assert numpy.array_equal(filtData, scipy.ndimage.median_filter(data, 3)), \
+        "medianFilter3 mismatch for shape %s" % (shape,)
+    for blobMask in [randState.uniform(size=shape) < frac for frac in (0.3, 0.5, 0.7)]:
+        labels, slices = ImUtil.labelBlobs(blobMask)
+        desLabels = scipy.ndimage.label(blobMask, numpy.ones((3, 3)))[0]
+        assert numpy.array_equal(labels, desLabels), "labelBlobs labels mismatch for shape %s" % (shape,)
+        assert slices == scipy.ndimage.find_objects(desLabels), "labelBlobs slices mismatch for shape %s" % (shape,)
+    assert ImUtil.minimumPosition(data) == tuple(scipy.ndimage.minimum_position(data)), \
+        "minimumPosition mismatch for shape %s" % (shape,)
+print("medianFilter3, labelBlobs and minimumPosition: OK")
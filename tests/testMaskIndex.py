@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test that MaskIndex gives the same results as the equivalent bool mask,
+and that getMaskIndex caches by mask contents.
+
+History:
+2026-10-18          First version.
+"""
+import numpy
+import PyGuide
+from PyGuide import FakeData
+
+ImShape = (300, 320)
+NumFrames = 3
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2, satLevel=30000)
+
+# a mask like a set of guide probes: valid data inside a few disks (one touching the edge),
+# plus scattered bad pixels
+iInd, jInd = numpy.indices(ImShape)
+mask = numpy.ones(ImShape, dtype=bool)
+probeList = (((60, 70), 45), ((200, 230), 55), ((280, 40), 30), ((150, 160), 20))
+for ijCtr, rad in probeList:
+    mask &= (iInd - ijCtr[0])**2 + (jInd - ijCtr[1])**2 > rad**2
+randState = numpy.random.RandomState(4)
+mask |= randState.uniform(size=ImShape) < 0.02
+
+maskIndex = PyGuide.MaskIndex(mask)
+assert len(maskIndex.probeSlices) >= len(probeList), "found %s probes" % (len(maskIndex.probeSlices),)
+assert numpy.array_equal(maskIndex.toMask(), mask)
+assert PyGuide.getMaskIndex(mask.copy()) is PyGuide.getMaskIndex(mask), "getMaskIndex did not cache"
+assert PyGuide.getMaskIndex(maskIndex) is maskIndex
+otherMask = mask.copy()
+otherMask[0, 0] = not otherMask[0, 0]
+assert PyGuide.maskKey(otherMask) != maskIndex.key
+print("MaskIndex: OK (%s probes)" % (len(maskIndex.probeSlices),))
+
+def checkCtrData(ctrData, desCtrData, descr):
+    assert repr(ctrData) == repr(desCtrData), "%s: %s != %s" % (descr, ctrData, desCtrData)
+
+# stars at fixed positions in each probe, as in a guide loop
+xyCtrs = numpy.array([(ijCtr[1] + 3.3, ijCtr[0] - 2.6) for ijCtr, rad in probeList])
+nStars = 0
+for frameInd, cleanData in enumerate(FakeData.iterNoisyFrames(
+    FakeData.fakeField(ImShape, xyCtrs, [1.5, 2, 2.5, 1.2], [5000, 20000, 40000, 3000]),
+    NumFrames, 500, CCDInfo, seed=8,
+)):
+    data = cleanData
+    for xyCtr in xyCtrs:
+        for rad in (5, 12):
+            desCtrData = PyGuide.centroid(data, mask, None, xyCtr, rad, CCDInfo)
+            ctrData = PyGuide.centroid(data, maskIndex, None, xyCtr, rad, CCDInfo)
+            checkCtrData(ctrData, desCtrData, "centroid at %s, rad=%s, frame %s" % (xyCtr, rad, frameInd))
+
+    desCtrDataList = PyGuide.findStars(data, mask, None, CCDInfo)[0]
+    ctrDataList = PyGuide.findStars(data, maskIndex, None, CCDInfo)[0]
+    assert len(ctrDataList) == len(desCtrDataList), "findStars found %s stars instead of %s" % \
+        (len(ctrDataList), len(desCtrDataList))
+    for ctrData, desCtrData in zip(ctrDataList, desCtrDataList):
+        checkCtrData(ctrData, desCtrData, "findStars, frame %s" % (frameInd,))
+    nStars += len(ctrDataList)
+assert nStars > 0, "no stars found; test is not useful"
+print("centroid and findStars: OK (%s stars found in %s frames)" % (nStars, NumFrames))
+
+# the filtered probes match the filtered full image, even with many probes
+manyMask = randState.uniform(size=ImShape) < 0.7
+data = FakeData.noisyFrames(numpy.zeros(ImShape), 1, 500, CCDInfo, seed=2)[0]
+desCtrDataList = PyGuide.findStars(data, manyMask, None, CCDInfo)[0]
+ctrDataList = PyGuide.findStars(data, PyGuide.MaskIndex(manyMask), None, CCDInfo)[0]
+assert repr(ctrDataList) == repr(desCtrDataList), "findStars mismatch with many probes"
+print("findStars with many probes: OK")
@@ -0,0 +1,392 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Monte Carlo test of the accuracy of PyGuide.centroid and PyGuide.starShape using lots of fake data.
+
+Replaces testCentroidLong.py and testStarShapeLong.py (and their helper Stats.py).
+
+For each configuration (star amplitude, FWHM and mask width) numTries fake images are made,
+each containing one star centered at random within +/- FWHM/2 of the center of the image.
+A slit mask along y (of the specified width) covers the center of the image,
+so errors along y should be smaller than along x.
+Each star is centroided and then its shape is fit at the measured centroid.
+
+Configurations are distributed over a pool of worker processes. Each configuration
+has its own random number stream, derived from the seed and the configuration's index,
+so the results do not depend on the number of processes or the order in which they run.
+Thus a change that should not affect accuracy (e.g. a speed optimization)
+should give identical results for the same settings and seed; use --reference
+to compare a report to one made earlier (e.g. before the change).
+
+Statistics reported for each configuration and for all configurations together:
+- number of tries and of centroid and star shape failures
+- centroid error (measured - actual, pixels) in x and y: bias (mean), standard deviation, rms and max abs
+- centroid error / estimated error (xyErr) in x and y: rms (ideally 1)
+- star shape error (100 * (measured - actual) / actual) for fwhm, amplitude and background:
+  bias, standard deviation, rms and max abs
+- time per centroid and per star shape fit (sec)
+
+The fake images are made by this test (fakeStar and addNoise, below), using only numpy,
+rather than by PyGuide.FakeData, so that the images are the same for every version of PyGuide;
+thus a report made with the code before a change is a valid reference for the code after it.
+
+Limitations:
+- Only one star per image
+- No cosmic rays
+
+Run with --help for the arguments. Examples:
+    ./testMonteCarlo.py -o report.json
+    ./testMonteCarlo.py --reference report.json
+
+History:
+2026-10-18          First version, based on testCentroidLong.py and testStarShapeLong.py.
+                    Make the fake images with fakeStar and addNoise, instead of PyGuide.FakeData.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+import numpy
+import PyGuide
+
+_timer = getattr(time, "perf_counter", time.time)
+
+# image data info
+ImWidth = 64
+Sky = 1000      # sky level, in ADU
+CCDInfo = PyGuide.CCDInfo(
+    bias = 2176,    # image bias, in ADU
+    readNoise = 19, # read noise, in e-
+    ccdGain = 2.1,  # inverse ccd gain, in e-/ADU
+)
+
+# default settings
+Thresh = 2.5
+AmplValues = (100, 1000, 10000)
+FWHMValues = (2.0, 3.0, 4.0)
+MaskWidthsPerFWHM = (0.0, 0.5, 1.0, 1.5, 2.0) # fractions of a FWHM
+NumTries = 20
+Seed = 1
+
+# x,y position of the center of pixel i,j is (j + PosMinusIndex, i + PosMinusIndex); see PyGuide.Constants
+_PosMinusIndex = 0.5
+_MaxValUInt16 = 2**16 - 1
+
+def fakeStar(imShape, xyCtr, sigma, ampl):
+    """Return a noise-free double gaussian star (the star of PyGuide.FakeData.fakeStar) as a float64 array
+
+    Inputs:
+    - imShape   image shape (i,j)
+    - xyCtr     x,y center of star
+    - sigma     sigma of star (float)
+    - ampl      amplitude of star (float)
+    """
+    iInd, jInd = numpy.indices(imShape, dtype=numpy.float64)
+    radSq = (iInd - (xyCtr[1] - _PosMinusIndex))**2 + (jInd - (xyCtr[0] - _PosMinusIndex))**2
+    expArg = - radSq / (2.0 * sigma**2)
+    return numpy.minimum(ampl * (numpy.exp(expArg) + 0.1 * numpy.exp(0.25 * expArg)), _MaxValUInt16)
+
+def addNoise(data, rng):
+    """Return data with sky, poisson noise, bias and gaussian read noise added, as a float32 array
+
+    Inputs:
+    - data      noiseless image, in ADU
+    - rng       a numpy.random.Generator
+
+    Values are truncated to the range of uint16 and rounded down to integers (as by a real camera).
+    """
+    outData = rng.poisson(lam = (data + Sky) * CCDInfo.ccdGain) / CCDInfo.ccdGain
+    outData += rng.normal(loc = CCDInfo.bias, scale = CCDInfo.readNoise / CCDInfo.ccdGain, size = data.shape)
+    return numpy.floor(numpy.clip(outData, 0, _MaxValUInt16)).astype(numpy.float32)
+
+def makeConfigList(amplValues=AmplValues, fwhmValues=FWHMValues, maskWidthsPerFWHM=MaskWidthsPerFWHM):
+    """Return a list of configurations: dicts of ampl, fwhm and maskWidth (pixels)"""
+    return [dict(ampl=ampl, fwhm=fwhm, maskWidth=maskMult * fwhm)
+        for ampl in amplValues for fwhm in fwhmValues for maskMult in maskWidthsPerFWHM]
+
+def runConfig(argTuple):
+    """Centroid and fit the shape of numTries fake stars for one configuration
+
+    Inputs (as one tuple, for use with Pool.imap_unordered):
+    - configInd index of configuration
+    - config    configuration dict (see makeConfigList)
+    - numTries  number of fake stars
+    - thresh    centroid threshold
+    - seed      random number seed
+
+    Returns (configInd, resultDict), where resultDict contains arrays of length numTries:
+    - actXYCtr      actual x,y center (shape (numTries, 2))
+    - xyCtr, xyErr  measured center and estimated error; NaN if centroid failed
+    - ctrOK         centroid OK?
+    - fwhm, ampl, bkgnd fitted star shape; NaN if centroid or star shape failed
+    - shapeOK       star shape OK? (False if centroid failed)
+    - ctrTime, shapeTime    time for each centroid and star shape fit (sec)
+    """
+    configInd, config, numTries, thresh, seed = argTuple
+    ampl = config["ampl"]
+    fwhm = config["fwhm"]
+    sigma = fwhm / PyGuide.FWHMPerSigma
+    rad = fwhm * 3.0
+
+    imShape = (ImWidth, ImWidth)
+    nomCtr = (ImWidth // 2, ImWidth // 2)
+    mask = numpy.zeros(imShape, dtype=bool)
+    maskRad = int(config["maskWidth"] / 2.0)
+    if maskRad > 0:
+        mask[nomCtr[0] - maskRad: nomCtr[0] + maskRad + 1, :] = True
+
+    seedSeq = numpy.random.SeedSequence(seed, spawn_key=(configInd,))
+    rng = numpy.random.default_rng(seedSeq.spawn(1)[0])
+    actXYCtr = rng.uniform(-fwhm / 2.0, fwhm / 2.0, size=(numTries, 2)) + nomCtr
+
+    nanArr = numpy.full((numTries,), numpy.nan)
+    resultDict = dict(
+        actXYCtr = actXYCtr,
+        xyCtr = numpy.full((numTries, 2), numpy.nan),
+        xyErr = numpy.full((numTries, 2), numpy.nan),
+        ctrOK = numpy.zeros((numTries,), dtype=bool),
+        fwhm = nanArr.copy(),
+        ampl = nanArr.copy(),
+        bkgnd = nanArr.copy(),
+        shapeOK = numpy.zeros((numTries,), dtype=bool),
+        ctrTime = nanArr.copy(),
+        shapeTime = nanArr.copy(),
+    )
+    noiseSeedSeq = seedSeq.spawn(1)[0]
+    for ind in range(numTries):
+        cleanData = fakeStar(imShape, actXYCtr[ind], sigma, ampl)
+        data = addNoise(cleanData, numpy.random.default_rng(noiseSeedSeq.spawn(1)[0]))
+
+        begTime = _timer()
+        ctrData = PyGuide.centroid(
+            data = data,
+            mask = mask,
+            satMask = None,
+            xyGuess = nomCtr,
+            rad = rad,
+            ccdInfo = CCDInfo,
+            thresh = thresh,
+        )
+        resultDict["ctrTime"][ind] = _timer() - begTime
+        if not ctrData.isOK:
+            continue
+        resultDict["ctrOK"][ind] = True
+        resultDict["xyCtr"][ind] = ctrData.xyCtr
+        resultDict["xyErr"][ind] = ctrData.xyErr
+
+        begTime = _timer()
+        shapeData = PyGuide.starShape(
+            data = data,
+            mask = mask,
+            xyCtr = ctrData.xyCtr,
+            rad = rad,
+        )
+        resultDict["shapeTime"][ind] = _timer() - begTime
+        if not shapeData.isOK:
+            continue
+        resultDict["shapeOK"][ind] = True
+        resultDict["fwhm"][ind] = shapeData.fwhm
+        resultDict["ampl"][ind] = shapeData.ampl
+        resultDict["bkgnd"][ind] = shapeData.bkgnd
+    return configInd, resultDict
+
+def errStats(errArr):
+    """Return statistics of errors (ignoring NaN) along the first axis: dict of bias, stdDev, rms and maxAbs
+
+    Values are floats if errArr is 1-d, else lists; all are None if there are no finite errors.
+    """
+    goodArr = numpy.isfinite(errArr)
+    nGood = goodArr.sum(axis=0)
+    if not numpy.any(nGood):
+        return dict(bias=None, stdDev=None, rms=None, maxAbs=None)
+    zeroedArr = numpy.where(goodArr, errArr, 0.0)
+    bias = zeroedArr.sum(axis=0) / nGood
+    meanSq = (zeroedArr**2).sum(axis=0) / nGood
+    statDict = dict(
+        bias = bias,
+        stdDev = numpy.sqrt(numpy.maximum(meanSq - bias**2, 0) * nGood / numpy.maximum(nGood - 1, 1)),
+        rms = numpy.sqrt(meanSq),
+        maxAbs = numpy.abs(zeroedArr).max(axis=0),
+    )
+    return dict((key, val.tolist()) for key, val in statDict.items())
+
+def summarize(resultDict, fwhm, ampl):
+    """Compute statistics for the results of runConfig (or the concatenation of several)
+
+    Inputs:
+    - resultDict    results from runConfig
+    - fwhm, ampl    actual fwhm and amplitude of each star (arrays the same length as the results)
+    """
+    ctrErr = resultDict["xyCtr"] - resultDict["actXYCtr"]
+    bkgnd = Sky + CCDInfo.bias
+    pull = ctrErr / resultDict["xyErr"]
+    goodPull = numpy.isfinite(pull)
+    nGoodPull = numpy.maximum(goodPull.sum(axis=0), 1)
+    pullRMS = numpy.sqrt((numpy.where(goodPull, pull, 0.0)**2).sum(axis=0) / nGoodPull)
+    return dict(
+        nTries = len(ctrErr),
+        nCtrFail = int((~resultDict["ctrOK"]).sum()),
+        nShapeFail = int((resultDict["ctrOK"] & ~resultDict["shapeOK"]).sum()),
+        ctrErr = errStats(ctrErr),
+        ctrPullRMS = pullRMS.tolist(),
+        fwhmPctErr = errStats((resultDict["fwhm"] - fwhm) * 100.0 / fwhm),
+        amplPctErr = errStats((resultDict["ampl"] - ampl) * 100.0 / ampl),
+        bkgndPctErr = errStats((resultDict["bkgnd"] - bkgnd) * 100.0 / bkgnd),
+        ctrTime = float(numpy.nanmean(resultDict["ctrTime"])),
+        shapeTime = float(numpy.nanmean(resultDict["shapeTime"])) if resultDict["ctrOK"].any() else None,
+    )
+
+def runMonteCarlo(configList, numTries=NumTries, thresh=Thresh, seed=Seed, nProc=0, log=None):
+    """Run the Monte Carlo test; return a report (a dict suitable for saving as JSON)
+
+    Inputs:
+    - configList    list of configurations (see makeConfigList)
+    - numTries      number of stars per configuration
+    - thresh        centroid threshold
+    - seed          random number seed
+    - nProc         number of processes; 0 for one per CPU
+    - log           a file to which to write progress (e.g. sys.stdout); None for silence
+    """
+    begTime = _timer()
+    nProc = nProc or multiprocessing.cpu_count()
+    argList = [(ind, config, numTries, thresh, seed) for ind, config in enumerate(configList)]
+    resultList = [None] * len(configList)
+    if nProc > 1:
+        pool = multiprocessing.Pool(min(nProc, len(argList)))
+        try:
+            for configInd, resultDict in pool.imap_unordered(runConfig, argList):
+                resultList[configInd] = resultDict
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for argTuple in argList:
+            configInd, resultDict = runConfig(argTuple)
+            resultList[configInd] = resultDict
+
+    configReportList = []
+    for config, resultDict in zip(configList, resultList):
+        configReport = dict(config=config, stats=summarize(resultDict, config["fwhm"], config["ampl"]))
+        configReportList.append(configReport)
+        if log is not None:
+            log.write("%s\n" % (formatConfigReport(configReport),))
+
+    allResults = dict((key, numpy.concatenate([resultDict[key] for resultDict in resultList]))
+        for key in resultList[0])
+    allFWHM = numpy.repeat([config["fwhm"] for config in configList], numTries)
+    allAmpl = numpy.repeat([config["ampl"] for config in configList], numTries)
+    return dict(
+        settings = dict(imWidth=ImWidth, sky=Sky, bias=CCDInfo.bias, readNoise=CCDInfo.readNoise,
+            ccdGain=CCDInfo.ccdGain, thresh=thresh, numTries=numTries, seed=seed),
+        pyGuideVersion = PyGuide.__version__,
+        nProc = nProc,
+        elapsedTime = _timer() - begTime,
+        configs = configReportList,
+        summary = summarize(allResults, allFWHM, allAmpl),
+    )
+
+def _fmt(val, fmtStr="%7.3f"):
+    """Format a value, or return "NaN" (right-justified to the width of fmtStr) if it is None"""
+    if val is None:
+        return ("%" + fmtStr[1:].split(".")[0] + "s") % ("NaN",)
+    return fmtStr % (val,)
+
+def formatConfigReport(configReport):
+    """Format the report for one configuration as a line of text"""
+    config = configReport["config"]
+    stats = configReport["stats"]
+    ctrErr = stats["ctrErr"]
+    xyBias = ctrErr["bias"] or (None, None)
+    xyRMS = ctrErr["rms"] or (None, None)
+    return "%4.1f %6d %5.2f %3d %3d %s %s %s %s %s %s %s %s %s %9.6f %s" % (
+        config["fwhm"], config["ampl"], config["maskWidth"], stats["nCtrFail"], stats["nShapeFail"],
+        _fmt(xyBias[0]), _fmt(xyBias[1]), _fmt(xyRMS[0]), _fmt(xyRMS[1]),
+        _fmt(stats["ctrPullRMS"][0], "%6.2f"), _fmt(stats["ctrPullRMS"][1], "%6.2f"),
+        _fmt(stats["fwhmPctErr"]["bias"], "%7.1f"), _fmt(stats["fwhmPctErr"]["rms"], "%7.1f"),
+        _fmt(stats["amplPctErr"]["rms"], "%7.1f"),
+        stats["ctrTime"], _fmt(stats["shapeTime"], "%9.6f"),
+    )
+
+ConfigReportHeader = "fwhm   ampl mskWd nCF nSF   xBias   yBias    xRMS    yRMS xPullR yPullR fwhmBias fwhmRMS amplRMS ctrTime shapeTime"
+
+def compareReports(report, refReport, tolerance):
+    """Compare a report to a reference report; return a list of problems (strings)
+
+    A configuration has a problem if it has more failures than the reference
+    or if its rms centroid error or rms fwhm error exceeds the reference value by more than tolerance
+    (a fraction of the reference value).
+    """
+    problemList = []
+    refDict = dict((tuple(sorted(configReport["config"].items())), configReport["stats"])
+        for configReport in refReport["configs"])
+    for configReport in report["configs"]:
+        configKey = tuple(sorted(configReport["config"].items()))
+        configStr = " ".join("%s=%s" % item for item in configKey)
+        refStats = refDict.get(configKey)
+        if refStats is None:
+            problemList.append("%s: not in reference" % (configStr,))
+            continue
+        stats = configReport["stats"]
+        for failName in ("nCtrFail", "nShapeFail"):
+            if stats[failName] > refStats[failName]:
+                problemList.append("%s: %s=%s > %s" % (configStr, failName, stats[failName], refStats[failName]))
+        for statName, rmsList, refRMSList in (
+            ("ctrErr.rms", stats["ctrErr"]["rms"], refStats["ctrErr"]["rms"]),
+            ("fwhmPctErr.rms", stats["fwhmPctErr"]["rms"], refStats["fwhmPctErr"]["rms"]),
+        ):
+            if rmsList is None or refRMSList is None:
+                continue
+            for rms, refRMS in zip(numpy.atleast_1d(rmsList), numpy.atleast_1d(refRMSList)):
+                if rms > refRMS * (1.0 + tolerance) + 1.0e-9:
+                    problemList.append("%s: %s=%.4f > reference %.4f" % (configStr, statName, rms, refRMS))
+    return problemList
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo test of centroid and star shape accuracy.")
+    parser.add_argument("-n", "--ntries", type=int, default=NumTries,
+        help="number of stars per configuration; default: %(default)s")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+        help="number of worker processes; 0 for one per CPU; default: %(default)s")
+    parser.add_argument("--thresh", type=float, default=Thresh, help="centroid threshold; default: %(default)s")
+    parser.add_argument("--seed", type=int, default=Seed, help="random number seed; default: %(default)s")
+    parser.add_argument("-o", "--output", help="file to which to write the report as JSON")
+    parser.add_argument("--reference", help="report (JSON) to compare to; exit status is 1 if accuracy is worse")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+        help="allowed fractional increase in rms error vs. the reference; default: %(default)s")
+    args = parser.parse_args(argv)
+
+    print("Compare centroid and star shape measurements to actual values over a range of fake data")
+    print("Sky=%s ADU; bias=%s ADU; read noise=%s e-; ccd gain=%s e-/ADU; thresh=%s; %s tries per configuration" % \
+        (Sky, CCDInfo.bias, CCDInfo.readNoise, CCDInfo.ccdGain, args.thresh, args.ntries))
+    print("Centroid errors are in pixels, star shape errors in percent, times in seconds;")
+    print("nCF and nSF are the number of centroid and star shape failures;")
+    print("xPullR and yPullR are the rms of centroid error / estimated error")
+    print()
+    print(ConfigReportHeader)
+    report = runMonteCarlo(makeConfigList(), numTries=args.ntries, thresh=args.thresh, seed=args.seed,
+        nProc=args.jobs, log=sys.stdout)
+    print()
+    print("All configurations:")
+    print(formatConfigReport(dict(config=dict(fwhm=0, ampl=0, maskWidth=0), stats=report["summary"])))
+    print("Elapsed time: %.1f sec using %s processes" % (report["elapsedTime"], report["nProc"]))
+
+    if args.output:
+        with open(args.output, "w") as outFile:
+            json.dump(report, outFile, indent=1, sort_keys=True)
+
+    if args.reference:
+        with open(args.reference, "r") as refFile:
+            refReport = json.load(refFile)
+        problemList = compareReports(report, refReport, tolerance=args.tolerance)
+        print()
+        if problemList:
+            print("Accuracy is worse than reference %s:" % (args.reference,))
+            for problem in problemList:
+                print("  %s" % (problem,))
+            return 1
+        print("Accuracy is no worse than reference %s" % (args.reference,))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test PyGuide.FramePipeline: ordering, error reporting, backpressure and dropOldest.
+
+History:
+2026-10-18          First version.
+"""
+import time
+import numpy
+import PyGuide
+
+def slowSum(data):
+    time.sleep(0.02)
+    return data.sum()
+
+def failingLoad():
+    raise RuntimeError("cannot load")
+
+def checkOrder(nWorkers):
+    # arrays and callables, with one source that fails to load and one that fails to process
+    sources = [numpy.ones([4, 4]) * ind for ind in range(10)]
+    sources[3] = failingLoad
+    sources[5] = "not an array"
+    pipeline = PyGuide.FramePipeline(slowSum, nWorkers=nWorkers, maxQueue=2)
+    resultList = list(pipeline.run(sources))
+    assert [res.index for res in resultList] == list(range(10)), "results out of order"
+    for res in resultList:
+        if res.index in (3, 5):
+            assert not res.isOK, "frame %s should have failed" % (res.index,)
+        else:
+            assert res.isOK, "frame %s failed: %s" % (res.index, res.error)
+            assert res.result == 16 * res.index, "frame %s result wrong" % (res.index,)
+    assert pipeline.nDropped == 0
+    print("nWorkers=%s: %s frames processed in order; failures reported" % (nWorkers, len(resultList)))
+
+def checkOverlap():
+    # loading and processing each take 0.02 sec; overlapped they should take ~0.02 sec/frame
+    def slowLoad(source):
+        time.sleep(0.02)
+        return source
+    nFrames = 20
+    sources = [numpy.zeros([4, 4]) for ind in range(nFrames)]
+    pipeline = PyGuide.FramePipeline(slowSum, loadFunc=slowLoad, nWorkers=1)
+    begTime = time.time()
+    nResults = len(list(pipeline.run(sources)))
+    duration = time.time() - begTime
+    print("%s frames loaded and processed in %0.2f sec (%0.2f sec if not overlapped)" % (nResults, duration, nFrames * 0.04))
+    assert duration < nFrames * 0.035, "I/O and processing were not overlapped"
+
+def checkDropOldest():
+    # a fast source and slow processing: with dropOldest, frames are discarded
+    # and the final frame is always processed
+    nFrames = 50
+    sources = [numpy.ones([4, 4]) * ind for ind in range(nFrames)]
+    pipeline = PyGuide.FramePipeline(slowSum, nWorkers=1, maxQueue=1, dropOldest=True)
+    resultList = list(pipeline.run(sources))
+    indList = [res.index for res in resultList]
+    assert indList == sorted(indList), "results out of order"
+    assert indList[-1] == nFrames - 1, "last frame not processed"
+    assert len(resultList) + pipeline.nDropped == nFrames, "frames lost"
+    print("dropOldest: %s frames processed, %s dropped" % (len(resultList), pipeline.nDropped))
+
+def checkEarlyStop():
+    def sourceGen():
+        ind = 0
+        while True:
+            yield numpy.ones([4, 4]) * ind
+            ind += 1
+    pipeline = PyGuide.FramePipeline(slowSum, nWorkers=2)
+    for res in pipeline.run(sourceGen()):
+        if res.index >= 5:
+            break
+    print("stopped an endless source after %s frames" % (res.index + 1,))
+
+checkOrder(nWorkers=1)
+checkOrder(nWorkers=3)
+checkOverlap()
+checkDropOldest()
+checkEarlyStop()
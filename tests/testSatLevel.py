@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test that centroid and findStars give the same results using ccdInfo.satLevel
+(satMask=None) as using a saturated pixel mask made from it,
+and test the saturated pixel count of radAsymmWeighted and radProf.
+
+History:
+2026-10-18          First version.
+                    Added a test of the nSat output of radAsymmWeighted and radProf.
+"""
+import numpy
+import PyGuide
+from PyGuide import FakeData
+
+ImShape = (300, 250)
+NumStars = 25
+SatLevel = 20000
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2, satLevel=SatLevel)
+
+randState = numpy.random.RandomState(6)
+xyCtrs = numpy.column_stack((randState.uniform(10, 240, NumStars), randState.uniform(10, 290, NumStars)))
+cleanData = FakeData.fakeField(ImShape, xyCtrs, randState.uniform(1, 3, NumStars),
+    randState.uniform(2000, 60000, NumStars))
+data = FakeData.noisyFrames(cleanData, 1, 500, CCDInfo, seed=3)[0]
+data = numpy.minimum(data, SatLevel + 500)
+mask = randState.uniform(size=ImShape) < 0.05
+satMask = data >= SatLevel
+
+def checkCtrData(ctrData, satCtrData, descr):
+    assert repr(ctrData) == repr(satCtrData), "%s: %s != %s" % (descr, ctrData, satCtrData)
+
+nSatStars = 0
+for xyCtr in xyCtrs:
+    for useMask in (False, True):
+        ctrMask = mask if useMask else None
+        satCtrData = PyGuide.centroid(data, ctrMask, satMask, xyCtr, 10, CCDInfo)
+        ctrData = PyGuide.centroid(data, ctrMask, None, xyCtr, 10, CCDInfo)
+        checkCtrData(ctrData, satCtrData, "centroid at %s, useMask=%s" % (xyCtr, useMask))
+        if ctrData.isOK and ctrData.nSat:
+            nSatStars += 1
+assert nSatStars > 0, "no saturated stars; test is not useful"
+print("centroid: OK (%s of %s centroids had saturated pixels)" % (nSatStars, 2 * NumStars))
+
+satCtrDataList = PyGuide.findStars(data, mask, satMask, CCDInfo)[0]
+ctrDataList = PyGuide.findStars(data, mask, None, CCDInfo)[0]
+assert len(ctrDataList) == len(satCtrDataList), "findStars found %s stars instead of %s" % \
+    (len(ctrDataList), len(satCtrDataList))
+for ctrData, satCtrData in zip(ctrDataList, satCtrDataList):
+    checkCtrData(ctrData, satCtrData, "findStars")
+print("findStars: OK (%s stars)" % (len(ctrDataList),))
+
+# satLevel=None means saturation is unknown
+noSatCCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2, satLevel=None)
+ctrData = PyGuide.centroid(data, None, None, xyCtrs[0], 10, noSatCCDInfo)
+assert ctrData.nSat is None, "nSat=%s; should be None" % (ctrData.nSat,)
+print("satLevel=None: OK")
+
+# radAsymmWeighted and radProf count saturated pixels (unmasked, within rad) from satLevel and/or satMask
+iInd, jInd = numpy.indices(ImShape)
+for ijCtr, rad in (((150, 120), 10), ((2, 3), 8)):
+    inDisk = ((iInd - ijCtr[0])**2 + (jInd - ijCtr[1])**2 <= rad**2) & ~mask
+    extraSatMask = randState.uniform(size=ImShape) < 0.1
+    for satArgs, isSat in (
+        (dict(satLevel=SatLevel), data >= SatLevel),
+        (dict(satMask=extraSatMask), extraSatMask),
+        (dict(satLevel=SatLevel, satMask=extraSatMask), (data >= SatLevel) | extraSatMask),
+    ):
+        desNSat = numpy.sum(inDisk & isSat)
+        nSat = PyGuide.radProf.radAsymmWeighted(data, mask, ijCtr, rad,
+            CCDInfo.bias, CCDInfo.readNoise, CCDInfo.ccdGain, **satArgs)[3]
+        assert nSat == desNSat, "radAsymmWeighted nSat=%s != %s for %s" % (nSat, desNSat, sorted(satArgs))
+        profArrs = (numpy.zeros(rad + 2), numpy.zeros(rad + 2), numpy.zeros(rad + 2, numpy.int32))
+        nSat = PyGuide.radProf.radProf(data, mask, ijCtr, rad, *profArrs, **satArgs)[2]
+        assert nSat == desNSat, "radProf nSat=%s != %s for %s" % (nSat, desNSat, sorted(satArgs))
+print("radAsymmWeighted and radProf nSat: OK")
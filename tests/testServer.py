@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test PyGuide.Server: run a GuideServer in a separate process and send it requests
+using GuideClient, with the image in shared memory.
+
+Requires Python 3.8 or later.
+
+History:
+2026-10-18          First version.
+                    Test that the cache does not close a value (e.g. shared memory) that is still in use.
+                    Start the server before creating shared memory, so it has its own resource tracker.
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+from multiprocessing import shared_memory
+import numpy
+import PyGuide
+from PyGuide import Server
+
+ImShape = (256, 256)
+XYCtrList = [(60.3, 70.8), (180.6, 150.2)]
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2)
+NumRequests = 20
+
+# a cached value that is evicted while in use is closed only when released
+closedList = []
+cache = Server._LRUCache(1, closeFunc=closedList.append)
+valA = cache.acquire("a", lambda: ["a"])
+assert cache.acquire("a", lambda: ["new a"]) is valA
+valB = cache.get("b", lambda: ["b"]) # evicts valA, which is held twice
+assert closedList == []
+cache.release(valA)
+assert closedList == []
+cache.release(valA)
+assert closedList == [valA], closedList
+cache.get("c", lambda: ["c"]) # evicts valB, which is not held
+assert closedList == [valA, valB], closedList
+valC = cache.acquire("c", lambda: ["new c"])
+cache.clear()
+assert closedList == [valA, valB], closedList
+cache.release(valC)
+assert closedList == [valA, valB, valC], closedList
+print("cache closes evicted values when no longer held: OK")
+
+# start the server in a separate process and wait for it to listen;
+# start it before creating shared memory, so it does not share this process's resource tracker
+# (like a server started independently of the camera process)
+socketPath = os.path.join(tempfile.mkdtemp(), "pyguide.sock")
+serverProc = multiprocessing.Process(target=Server.main, args=([socketPath, "--workers", "2"],))
+serverProc.start()
+for i in range(100):
+    if os.path.exists(socketPath):
+        break
+    time.sleep(0.1)
+
+# make an image in shared memory
+numpy.random.seed(1)
+cleanData = numpy.zeros(ImShape, float)
+for xyCtr in XYCtrList:
+    cleanData += PyGuide.FakeData.fakeStar(ImShape, xyCtr, 2.0, 3000)
+data = PyGuide.FakeData.addNoise(cleanData, sky=500, ccdInfo=CCDInfo).astype(numpy.float32)
+shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+shmData = numpy.ndarray(ImShape, dtype=numpy.float32, buffer=shm.buf)
+shmData[...] = data
+frame = Server.frameRef(shmName=shm.name, shape=ImShape)
+
+try:
+    refCtrDataList, refImStats = PyGuide.findStars(data, None, None, CCDInfo)
+    with Server.GuideClient(socketPath, timeout=30) as client:
+        for ind in range(NumRequests):
+            catalog, header = client.findStars(frame, CCDInfo, doShape=True, id=ind)
+            assert header["isOK"], "findStars failed: %s" % (header["error"],)
+            assert header["id"] == ind
+            assert numpy.allclose(catalog.xyCtr, [ctrData.xyCtr for ctrData in refCtrDataList])
+        print("findStars: %s stars; fwhm=%s" % (len(catalog), catalog.fwhm))
+
+        refCtrData = PyGuide.centroid(data, None, None, XYCtrList[0], 10, CCDInfo)
+        catalog, header = client.centroid(frame, CCDInfo, xyGuess=XYCtrList[0], rad=10)
+        assert header["isOK"], "centroid failed: %s" % (header["error"],)
+        assert numpy.allclose(catalog.xyCtr[0], refCtrData.xyCtr)
+        print("centroid: xyCtr=%s" % (catalog[0].xyCtr,))
+
+        # errors are reported in the reply and do not break the connection
+        catalog, header = client.centroid(frame, CCDInfo, xyGuess=XYCtrList[0], rad=None)
+        assert not header["isOK"] and catalog is None
+        print("bad request reported: %s" % (header["error"],))
+
+        stats = client.getStats()
+        print("latency stats:", stats["latency"])
+        assert stats["latency"]["findStars"]["n"] == NumRequests
+        assert stats["cache"]["shm"]["nMisses"] == 1
+finally:
+    serverProc.terminate()
+    serverProc.join()
+    if os.path.exists(socketPath):
+        os.remove(socketPath)
+    os.rmdir(os.path.dirname(socketPath))
+    del shmData
+    shm.close()
+    shm.unlink()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test StarCatalog: the fromCentroidList -> toBytes -> fromBytes -> toCentroidList/getShapeData
+round trip, and the documented lossy conversions (None values and msgStr).
+
+History:
+2026-10-18          First version.
+"""
+import math
+
+import numpy
+import PyGuide
+from PyGuide import FakeData, ImUtil
+
+ImShape = (200, 220)
+NumStars = 8
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2, satLevel=30000)
+
+randState = numpy.random.RandomState(12)
+xyCtrs = numpy.column_stack((randState.uniform(20, 200, NumStars), randState.uniform(20, 180, NumStars)))
+data = FakeData.fakeField(ImShape, xyCtrs, 1.5, randState.uniform(2000, 20000, NumStars))
+data = (data + 1000 + randState.normal(0, 10, ImShape)).astype(numpy.float32)
+mask = randState.uniform(size=ImShape) < 0.05
+
+def isSame(val, desVal):
+    """Return True if val == desVal, treating nan as equal to nan"""
+    if isinstance(desVal, float) and math.isnan(desVal):
+        return isinstance(val, float) and math.isnan(val)
+    return val == desVal
+
+def checkCtrData(ctrData, desCtrData, descr):
+    """Check that a CentroidData from a catalog matches the original (other than msgStr)"""
+    for fieldName in ("isOK", "nSat", "rad", "asymm", "pix", "counts"):
+        val, desVal = getattr(ctrData, fieldName), getattr(desCtrData, fieldName)
+        assert isSame(val, desVal), "%s: %s=%r != %r" % (descr, fieldName, val, desVal)
+    for fieldName in ("xyCtr", "xyErr"):
+        val, desVal = getattr(ctrData, fieldName), getattr(desCtrData, fieldName)
+        if desVal is None:
+            assert val is None, "%s: %s=%r != None" % (descr, fieldName, val)
+        else:
+            assert numpy.array_equal(val, desVal, equal_nan=True), "%s: %s=%r != %r" % (descr, fieldName, val, desVal)
+    for fieldName in ("med", "stdDev", "nPts", "thresh", "dataCut"):
+        val, desVal = getattr(ctrData.imStats, fieldName), getattr(desCtrData.imStats, fieldName)
+        if desVal is not None:
+            desVal = type(val)(desVal) # the catalog stores float32 statistics as float64
+        assert isSame(val, desVal), "%s: imStats.%s=%r != %r" % (descr, fieldName, val, desVal)
+
+# round trip of findStars and starShapeMany results
+ctrDataList = PyGuide.findStars(data, mask, None, CCDInfo)[0]
+assert len(ctrDataList) >= NumStars // 2, "found only %s stars" % (len(ctrDataList),)
+shapeArrays = PyGuide.starShapeMany(data, mask, [ctrData.xyCtr for ctrData in ctrDataList],
+    [ctrData.rad for ctrData in ctrDataList])
+shapeDataList = [shapeArrays[ind] for ind in range(len(shapeArrays))]
+for shapeArg in (shapeArrays, shapeDataList):
+    catalog = PyGuide.StarCatalog.fromCentroidList(ctrDataList, shapeArg)
+    assert catalog.arr.dtype == PyGuide.StarCatalogDType
+    newCatalog = PyGuide.StarCatalog.fromBytes(catalog.toBytes())
+    assert newCatalog.toBytes() == catalog.toBytes()
+    assert len(newCatalog) == len(ctrDataList)
+    assert numpy.array_equal(newCatalog.xyCtr, [ctrData.xyCtr for ctrData in ctrDataList])
+    for ind, ctrData in enumerate(newCatalog.toCentroidList()):
+        checkCtrData(ctrData, ctrDataList[ind], "star %s" % (ind,))
+        shapeData = newCatalog.getShapeData(ind)
+        desShapeData = shapeDataList[ind]
+        assert bool(shapeData.isOK) == bool(desShapeData.isOK)
+        for fieldName in ("ampl", "fwhm", "bkgnd", "chiSq"):
+            val, desVal = float(getattr(shapeData, fieldName)), float(getattr(desShapeData, fieldName))
+            assert isSame(val, desVal), "star %s: shape %s=%r != %r" % (ind, fieldName, val, desVal)
+    countsList = list(newCatalog.sortByCounts().counts)
+    assert countsList == sorted(countsList, reverse=True)
+print("round trip of %s stars: OK" % (len(ctrDataList),))
+
+# lossy conversions: None <-> sentinel values, xyErr None -> nan, msgStr is not stored
+nullCtrData = PyGuide.CentroidData(isOK=False, msgStr="No star found")
+partCtrData = PyGuide.CentroidData(isOK=True, msgStr="some message", nSat=None, rad=5, xyCtr=(10.5, 20.25),
+    xyErr=None, asymm=3.5, pix=None, counts=1234.0, imStats=ImUtil.ImStats(med=1000.0, nPts=None))
+catalog = PyGuide.StarCatalog.fromBytes(PyGuide.StarCatalog.fromCentroidList([nullCtrData, partCtrData]).toBytes())
+assert list(catalog.nSat) == [-1, -1] and list(catalog.pix) == [-1, -1] and list(catalog.rad) == [-1, 5]
+assert numpy.all(numpy.isnan(catalog.xyErr)), catalog.xyErr
+assert not numpy.any(catalog.shapeOK) and numpy.all(numpy.isnan(catalog.fwhm))
+for ind, desCtrData in enumerate((nullCtrData, partCtrData)):
+    ctrData = catalog[ind]
+    checkCtrData(ctrData, desCtrData, "null star %s" % (ind,))
+    assert ctrData.nSat is None and ctrData.pix is None and ctrData.imStats.nPts is None
+    assert all(math.isnan(val) for val in ctrData.xyErr), ctrData.xyErr
+    assert ctrData.msgStr == "", "msgStr=%r; should not be stored" % (ctrData.msgStr,)
+assert catalog[0].xyCtr is None and catalog[1].xyCtr == [10.5, 20.25]
+print("None values and msgStr: OK")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Compare PyGuide.starShapeMany to PyGuide.starShape on a field of fake stars.
+
+History:
+2026-10-18          First version.
+                    Exit with status 1 if there are any mismatches.
+"""
+import sys
+import time
+import numpy
+import PyGuide
+
+# settings
+ImWidth = 256
+NumStars = 40
+Sky = 1000      # sky level, in ADU
+CCDInfo = PyGuide.CCDInfo(
+    bias = 2176,    # image bias, in ADU
+    readNoise = 19, # read noise, in e-
+    ccdGain = 2.1,  # inverse ccd gain, in e-/ADU
+)
+
+imShape = (ImWidth, ImWidth)
+numpy.random.seed(1)
+xyCtrs = numpy.random.uniform(20, ImWidth - 20, size=(NumStars, 2))
+sigmas = numpy.random.uniform(1.0, 2.5, size=(NumStars,))
+ampls = numpy.random.uniform(200, 5000, size=(NumStars,))
+rads = sigmas * 4.0
+
+cleanData = numpy.zeros(imShape, float)
+for xyCtr, sigma, ampl in zip(xyCtrs, sigmas, ampls):
+    cleanData += PyGuide.FakeData.fakeStar(imShape, xyCtr, sigma, ampl)
+data = PyGuide.FakeData.addNoise(cleanData, sky = Sky, ccdInfo = CCDInfo)
+mask = numpy.zeros(imShape, numpy.bool)
+mask[ImWidth // 2 - 2: ImWidth // 2 + 2, :] = 1
+
+begTime = time.time()
+shapeList = [PyGuide.starShape(data, mask, xyCtr, rad) for xyCtr, rad in zip(xyCtrs, rads)]
+oneTime = time.time() - begTime
+
+begTime = time.time()
+shapeArrs = PyGuide.starShapeMany(data, mask, xyCtrs, rads)
+manyTime = time.time() - begTime
+
+print("starShape time=%.3f; starShapeMany time=%.3f" % (oneTime, manyTime))
+print("   xctr    yctr   ok   fwhm    fwhm diff     ampl diff    bkgnd diff")
+nBad = 0
+for ind, shapeData in enumerate(shapeList):
+    print("%7.2f %7.2f %4s %6.2f %12.3g %13.3g %13.3g" % (
+        xyCtrs[ind][0], xyCtrs[ind][1], shapeData.isOK, shapeData.fwhm,
+        shapeArrs.fwhm[ind] - shapeData.fwhm,
+        shapeArrs.ampl[ind] - shapeData.ampl,
+        shapeArrs.bkgnd[ind] - shapeData.bkgnd,
+    ))
+    if shapeData.isOK != shapeArrs.isOK[ind]:
+        nBad += 1
+    elif shapeData.isOK and abs(shapeArrs.fwhm[ind] - shapeData.fwhm) > 1.0e-4 * shapeData.fwhm:
+        nBad += 1
+
+print()
+print("number of mismatches =", nBad)
+if nBad > 0:
+    sys.exit(1)
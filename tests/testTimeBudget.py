@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test the timeBudget argument of centroid, findStars and starShape.
+
+History:
+2026-10-18          First version.
+                    Test that CentroidData still accepts its original arguments positionally.
+                    findStars returns imStats.ctrStats instead of an extra return value.
+                    findStars returns imStats.isPartial instead of an extra return value.
+"""
+import numpy
+import PyGuide
+from PyGuide import FakeData
+
+ImShape = (300, 300)
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2)
+NumStars = 20
+Sigma = 2.0
+
+randState = numpy.random.RandomState(2)
+xyCtrs = randState.uniform(20, 280, size=(NumStars, 2))
+ampls = randState.uniform(1000, 30000, NumStars)
+cleanData = FakeData.fakeField(ImShape, xyCtrs, Sigma, ampls)
+data = FakeData.noisyFrames(cleanData + 500, 1, 0, CCDInfo, seed=1)[0]
+xyBright = xyCtrs[numpy.argmax(ampls)]
+
+# centroid: a generous budget gives the usual result
+xyGuess = xyBright + (3, -4)
+ctrData = PyGuide.centroid(data, None, None, xyGuess, 15, CCDInfo)
+budgetCtrData = PyGuide.centroid(data, None, None, xyGuess, 15, CCDInfo, timeBudget=100)
+assert repr(budgetCtrData) == repr(ctrData), "%s != %s" % (budgetCtrData, ctrData)
+assert ctrData.isOK and not ctrData.isPartial
+# no time: the search stops after one iteration; the result is partial but usable
+partCtrData = PyGuide.centroid(data, None, None, xyGuess, 15, CCDInfo, timeBudget=0)
+assert partCtrData.isOK and partCtrData.isPartial, partCtrData
+assert partCtrData.msgStr
+ijGuess = PyGuide.ImUtil.ijIndFromXYPos(xyGuess)
+assert numpy.all(numpy.abs(numpy.subtract(PyGuide.ImUtil.ijPosFromXYPos(partCtrData.xyCtr), ijGuess)) <= 1), partCtrData
+assert numpy.hypot(*(numpy.subtract(partCtrData.xyCtr, xyBright))) < numpy.hypot(*(xyGuess - xyBright))
+# a deadline in the past acts like no time
+pastCtrData = PyGuide.centroid(data, None, None, xyGuess, 15, CCDInfo, deadline=PyGuide.Timing.now() - 1)
+assert repr(pastCtrData) == repr(partCtrData)
+print("centroid: full %s; partial %s" % (ctrData.xyCtr, partCtrData.xyCtr))
+
+# findStars
+ctrDataList, imStats = PyGuide.findStars(data, None, None, CCDInfo)
+assert not imStats.isPartial and imStats.ctrStats is None
+budgetCtrDataList, budgetImStats = PyGuide.findStars(data, None, None, CCDInfo, timeBudget=100)
+assert not budgetImStats.isPartial
+assert [repr(cd) for cd in budgetCtrDataList] == [repr(cd) for cd in ctrDataList]
+partCtrDataList, partImStats = PyGuide.findStars(data, None, None, CCDInfo, timeBudget=0)
+assert partImStats.isPartial
+assert repr(partImStats) == repr(imStats).replace(")", ", isPartial=True)"), "%s vs %s" % (partImStats, imStats)
+# with no time, only the brightest candidate is centroided
+assert len(partCtrDataList) == 1, "found %s stars with no time" % (len(partCtrDataList),)
+assert numpy.hypot(*(numpy.subtract(partCtrDataList[0].xyCtr, ctrDataList[0].xyCtr))) < 3.0, partCtrDataList[0]
+# findStars returns two items, regardless of doStats and the time limit
+retVal = PyGuide.findStars(data, None, None, CCDInfo, doStats=True, timeBudget=0)
+assert len(retVal) == 2, "findStars returned %s items" % (len(retVal),)
+statsImStats = retVal[1]
+assert statsImStats.isPartial and statsImStats.ctrStats.nCentroids == 1, statsImStats
+print("findStars: %s stars with no time limit; %s with no time" % (len(budgetCtrDataList), len(partCtrDataList)))
+
+# starShape
+shapeData = PyGuide.starShape(data, None, ctrData.xyCtr, 15)
+budgetShapeData = PyGuide.starShape(data, None, ctrData.xyCtr, 15, timeBudget=100)
+assert repr(budgetShapeData) == repr(shapeData)
+partShapeData = PyGuide.starShape(data, None, ctrData.xyCtr, 15, timeBudget=0)
+assert partShapeData.isOK and partShapeData.isPartial, partShapeData
+assert abs(partShapeData.fwhm - shapeData.fwhm) < 0.1 * shapeData.fwhm, "%s vs %s" % (partShapeData, shapeData)
+print("starShape: fwhm=%.3f; partial fwhm=%.3f" % (shapeData.fwhm, partShapeData.fwhm))
+
+print("time budget OK")
+
+# isPartial is the last argument of CentroidData, so positional arguments keep their old meaning
+ctrData = PyGuide.CentroidData(True, "", 3, 10)
+assert (ctrData.nSat, ctrData.rad, ctrData.isPartial) == (3, 10, False), "CentroidData positional args: %s" % (ctrData,)
+print("CentroidData positional arguments: OK")
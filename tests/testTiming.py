@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
+"""Test PyGuide.Timing: record the stages of findStars and starShapeMany.
+
+History:
+2026-10-18          First version.
+"""
+import json
+import numpy
+import PyGuide
+from PyGuide import Timing
+
+ImShape = (256, 256)
+CCDInfo = PyGuide.CCDInfo(bias=1000, readNoise=10, ccdGain=2)
+
+numpy.random.seed(1)
+cleanData = numpy.zeros(ImShape, float)
+for xyCtr in [(60.3, 70.8), (180.6, 150.2), (100.1, 200.4)]:
+    cleanData += PyGuide.FakeData.fakeStar(ImShape, xyCtr, 2.0, 3000)
+data = PyGuide.FakeData.addNoise(cleanData, sky=500, ccdInfo=CCDInfo)
+
+# nothing is recorded unless a recorder is active
+assert Timing.getRecorder() is None
+
+with Timing.recording(doTrace=True) as recorder:
+    ctrDataList, imStats = PyGuide.findStars(data, None, None, CCDInfo)
+    PyGuide.starShapeMany(data, None, [ctrData.xyCtr for ctrData in ctrDataList], [ctrData.rad for ctrData in ctrDataList])
+assert Timing.getRecorder() is None
+print(recorder.formatStats())
+
+statsDict = recorder.asDict()
+for name in ("findStars", "findStars.medianFilter", "findStars.label", "centroid", "checkSignal",
+    "basicCentroid.radAsymm", "starShapeMany.fit"):
+    assert name in statsDict, "stage %s not recorded" % (name,)
+assert statsDict["findStars"]["count"] == 1
+assert statsDict["centroid"]["count"] >= len(ctrDataList)
+assert statsDict["findStars"]["wallTime"] >= statsDict["findStars.medianFilter"]["wallTime"]
+
+trace = json.loads(json.dumps(recorder.asChromeTrace()))
+assert len(trace["traceEvents"]) == sum(stageDict["count"] for name, stageDict in statsDict.items()
+    if name != "basicCentroid.walkIter")
+assert set(recorder.overBudget({"findStars": 1.0e-9}).keys()) == set(["findStars"])
+print("Timing OK")
@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+from __future__ import division, absolute_import, print_function
 """Time PyGuide.centroid and related routines.
 
 History:
@@ -10,6 +11,8 @@ History:
 2005-05-19 ROwen    Modified for PyGuide 2.0.
 2005-10-14 ROwen    Supply null satMask for PyGuide 2.1.
 2009-11-20 ROwen    Modified to use numpy.
+2026-10-18          Bug fix: used nonexistent data.getshape(). Modernized for Python 3.
+                    See benchmarks/runBenchmarks.py for a more complete benchmark suite.
 """
 import time
 import numpy
@@ -28,8 +31,8 @@ FWHM = 2.5
 Ampl = 5000
 
 def timeCentroid(data, mask, xyGuess, niter, rad=20):
-    print "timeCentroid: xyGuess=%3.0f, %3.0f; niter=%2d; rad=%3d;" % \
-        (xyGuess[0], xyGuess[1], niter, rad),
+    print("timeCentroid: xyGuess=%3.0f, %3.0f; niter=%2d; rad=%3d;" % \
+        (xyGuess[0], xyGuess[1], niter, rad), end=" ")
     begTime = time.time()
     for ii in range(niter):
         PyGuide.centroid(
@@ -42,14 +45,14 @@ def timeCentroid(data, mask, xyGuess, niter, rad=20):
             ccdInfo = CCDInfo,
         )
     dTime = time.time() - begTime
-    print "time/iter=%.3f" % (dTime/niter,)
+    print("time/iter=%.3f" % (dTime/niter,))
 
 
 def timeRadAsymmWeighted(data, mask, niter, rad=20):
-    shape = data.getshape()
-    xc = shape[0]/2
-    yc = shape[1]/2
-    print "timeRadAsymmWeighted: niter=%2d; rad=%3d;" % (niter, rad),
+    shape = data.shape
+    xc = shape[0]//2
+    yc = shape[1]//2
+    print("timeRadAsymmWeighted: niter=%2d; rad=%3d;" % (niter, rad), end=" ")
     
     begTime = time.time()
     for ii in range(niter):
@@ -58,15 +61,15 @@ def timeRadAsymmWeighted(data, mask, niter, rad=20):
             CCDInfo.bias, CCDInfo.readNoise, CCDInfo.ccdGain,
         )
     dTime = time.time() - begTime
-    print "time/iter=%.3f" % (dTime/niter,)
+    print("time/iter=%.3f" % (dTime/niter,))
 
 
 def timeRadProf(data, mask, niter, rad):
     """Time radProf and radSqProf"""
-    shape = data.getshape()
-    xc = shape[0]/2
-    yc = shape[1]/2
-    print "timeRadProf: niter=%2d; rad=%3d;" % (niter, rad,),
+    shape = data.shape
+    xc = shape[0]//2
+    yc = shape[1]//2
+    print("timeRadProf: niter=%2d; rad=%3d;" % (niter, rad,), end=" ")
     
     radSqLen = rad**2 + 1
     radSqMean = numpy.zeros([radSqLen], numpy.float64)
@@ -82,15 +85,15 @@ def timeRadProf(data, mask, niter, rad):
     for ii in range(niter):
         PyGuide.radProf.radSqProf(data, mask, (xc, yc), rad, radSqMean, radSqVar, radSqNPts)
     dTime = time.time() - begTime
-    print "radSqProf time/iter=%.4f;" % (dTime/niter,),
+    print("radSqProf time/iter=%.4f;" % (dTime/niter,), end=" ")
     
     begTime = time.time()
     for ii in range(niter):
         PyGuide.radProf.radProf(data, mask, (xc, yc), rad, radMean, radVar, radNPts)
     dTime = time.time() - begTime
-    print "radProf time/iter=%.4f" % (dTime/niter,),
+    print("radProf time/iter=%.4f" % (dTime/niter,), end=" ")
     
-    print
+    print()
 
 
 def runTests():
@@ -109,19 +112,19 @@ def runTests():
     # let centroiding walk a bit to find the center
     xyGuess = numpy.add(xyCtr, (2, -2))
 
-    print "Time various parts of centroiding as a function of radius"
-    print
-    print "Settings:"
-    print "CCD Size      =", ImWidth, "x", ImWidth, "pix"
-    print "Star center   = %d, %d pix" % (xyCtr[0], xyCtr[1])
-    print "Initial guess = %d, %d pix" % (xyGuess[0], xyGuess[1])
-    print
-    print "Amplitude  =", Ampl, "ADU"
-    print "FWHM       =", FWHM, "pix"
-    print "Sky        =", Sky, "ADU"
-    print "Bias       =", CCDInfo.bias, "ADU"
-    print "Read Noise =", CCDInfo.readNoise, "e-"
-    print "CCD Gain   =", CCDInfo.ccdGain, "e-/ADU"
+    print("Time various parts of centroiding as a function of radius")
+    print()
+    print("Settings:")
+    print("CCD Size      =", ImWidth, "x", ImWidth, "pix")
+    print("Star center   = %d, %d pix" % (xyCtr[0], xyCtr[1]))
+    print("Initial guess = %d, %d pix" % (xyGuess[0], xyGuess[1]))
+    print()
+    print("Amplitude  =", Ampl, "ADU")
+    print("FWHM       =", FWHM, "pix")
+    print("Sky        =", Sky, "ADU")
+    print("Bias       =", CCDInfo.bias, "ADU")
+    print("Read Noise =", CCDInfo.readNoise, "e-")
+    print("CCD Gain   =", CCDInfo.ccdGain, "e-/ADU")
 
     allZerosMask = data.astype(numpy.bool)
     allZerosMask[:] = 0
@@ -132,8 +135,8 @@ def runTests():
     )
     
     for mask, expl in maskData:
-        print
-        print expl
+        print()
+        print(expl)
         
         radNiterList = (
             ( 10, 20),
@@ -145,19 +148,19 @@ def runTests():
             (640, 10),
         )
     
-        print
+        print()
         for rad, niter in radNiterList:
             try:
                 timeRadProf(data, mask, niter, rad)
             except Exception as e:
-                print "timeRadProf(niter=%s, rad=%s) failed: %s" % (niter, rad, e)
+                print("timeRadProf(niter=%s, rad=%s) failed: %s" % (niter, rad, e))
         
-        print
+        print()
         for rad, niter in radNiterList:
             try:
                 timeRadAsymmWeighted(data, mask, niter, rad)
             except Exception as e:
-                print "timeRadAsymmWeighted(niter=%s, rad=%s) failed: %s" % (niter, rad, e)
+                print("timeRadAsymmWeighted(niter=%s, rad=%s) failed: %s" % (niter, rad, e))
 
         radNiterList = (
             ( 10, 10),
@@ -169,13 +172,13 @@ def runTests():
             (640, 1),
         )
         
-        print
+        print()
         for rad, niter in radNiterList:
             try:
                 timeCentroid(data, mask, xyGuess, niter, rad)
             except Exception as e:
                 raise
-#               print "timeCentroid(niter=%s, rad=%s) failed: %s" % (niter, rad, e)
+#               print("timeCentroid(niter=%s, rad=%s) failed: %s" % (niter, rad, e))
 
 
 if __name__ == "__main__":